@@ -0,0 +1,366 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Optional, Any, AsyncIterator, BinaryIO, Union, Final
+from collections import deque
+from asyncio import Event, Task, create_task, CancelledError
+from tempfile import TemporaryFile
+from pickle import dump as pickle_dump, load as pickle_load, HIGHEST_PROTOCOL
+from pathlib import Path
+from sys import platform
+
+from rpc.connection import Connection as RPCConnection
+
+from ms_rrp.operations.base_reg_open_key import base_reg_open_key, BaseRegOpenKeyRequest
+from ms_rrp.operations.base_reg_query_info_key import base_reg_query_info_key, BaseRegQueryInfoKeyRequest
+from ms_rrp.structures.regsam import Regsam
+from ms_rrp.utils import WalkedKey, enumerate_sub_keys, enumerate_values, is_operation_error
+
+DEFAULT_MEMORY_LIMIT: Final[int] = 256 * 1024 * 1024
+
+# Rough per-object overheads, in bytes, used to estimate the memory use of buffered keys.
+_FRONTIER_ENTRY_OVERHEAD: Final[int] = 120
+_WALKED_KEY_OVERHEAD: Final[int] = 400
+_VALUE_OVERHEAD: Final[int] = 200
+
+
+def _peak_rss() -> Optional[int]:
+    try:
+        from resource import getrusage, RUSAGE_SELF
+    except ImportError:
+        return None
+
+    # `ru_maxrss` is in kibibytes on Linux and in bytes on macOS.
+    max_rss: int = getrusage(RUSAGE_SELF).ru_maxrss
+    return max_rss if platform == 'darwin' else max_rss * 1024
+
+
+def _frontier_entry_size(sub_key_path: str) -> int:
+    return 2 * len(sub_key_path) + _FRONTIER_ENTRY_OVERHEAD
+
+
+def _walked_key_size(walked_key: WalkedKey) -> int:
+    return 2 * len(walked_key.key_path) + _WALKED_KEY_OVERHEAD + sum(
+        2 * len(value_name) + len(value) + _VALUE_OVERHEAD
+        for value_name, (_, value) in walked_key.values.items()
+    )
+
+
+@dataclass
+class CrawlStatistics:
+    num_keys: int = 0
+    peak_buffered_bytes: int = 0
+    spilled_bytes: int = 0
+    num_spills: int = 0
+    peak_rss: Optional[int] = None
+
+
+class _SpillFile:
+    def __init__(self, spill_directory: Optional[Union[str, Path]], statistics: CrawlStatistics):
+        self._spill_directory = spill_directory
+        self._statistics = statistics
+        self._file: Optional[BinaryIO] = None
+
+    @property
+    def file(self) -> BinaryIO:
+        if self._file is None:
+            self._file = TemporaryFile(dir=self._spill_directory)
+        return self._file
+
+    def write(self, obj: Any) -> None:
+        self.file.seek(0, 2)
+        start_offset = self.file.tell()
+        pickle_dump(obj, self.file, protocol=HIGHEST_PROTOCOL)
+        self._statistics.spilled_bytes += self.file.tell() - start_offset
+        self._statistics.num_spills += 1
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+
+class _SpillingStack:
+    """
+    A stack of the sub key paths of the frontier whose bottom part is spilled to disk when it grows too large.
+    """
+
+    def __init__(self, memory_limit: int, spill_file: _SpillFile):
+        self._memory_limit = memory_limit
+        self._spill_file = spill_file
+        self._items: list[tuple[str, int]] = []
+        self._size = 0
+        self._chunk_offsets: list[int] = []
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return bool(self._items or self._chunk_offsets)
+
+    def push(self, sub_key_path: str, depth: int) -> None:
+        self._items.append((sub_key_path, depth))
+        self._size += _frontier_entry_size(sub_key_path=sub_key_path)
+
+        if self._size > self._memory_limit and len(self._items) > 1:
+            num_spilled_items = len(self._items) // 2
+            self._spill_file.file.seek(0, 2)
+            self._chunk_offsets.append(self._spill_file.file.tell())
+            self._spill_file.write(self._items[:num_spilled_items])
+            del self._items[:num_spilled_items]
+            self._size = sum(_frontier_entry_size(sub_key_path=sub_key_path) for sub_key_path, _ in self._items)
+
+    def pop(self) -> tuple[str, int]:
+        if not self._items:
+            # The spilled chunks are read back in reverse order, after which they are no longer needed.
+            chunk_offset = self._chunk_offsets.pop()
+            self._spill_file.file.seek(chunk_offset)
+            self._items = pickle_load(self._spill_file.file)
+            self._spill_file.file.truncate(chunk_offset)
+            self._size = sum(_frontier_entry_size(sub_key_path=sub_key_path) for sub_key_path, _ in self._items)
+
+        sub_key_path, depth = self._items.pop()
+        self._size -= _frontier_entry_size(sub_key_path=sub_key_path)
+        return sub_key_path, depth
+
+
+class _SpillingQueue:
+    """
+    A queue of walked keys that are spilled to disk once the keys held in memory exceed the memory limit.
+
+    Once the queue has started spilling, new keys are spilled until all spilled keys have been read back, so that the
+    keys are dequeued in the order in which they were enqueued.
+    """
+
+    def __init__(self, memory_limit: int, spill_file: _SpillFile):
+        self._memory_limit = memory_limit
+        self._spill_file = spill_file
+        self._items: deque[WalkedKey] = deque()
+        self._size = 0
+        self._num_spilled_items = 0
+        self._read_offset = 0
+        self._finished = False
+        self._exception: Optional[Exception] = None
+        self._event = Event()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def put(self, walked_key: WalkedKey) -> None:
+        if self._num_spilled_items or self._size > self._memory_limit:
+            self._spill_file.write(walked_key)
+            self._num_spilled_items += 1
+        else:
+            self._items.append(walked_key)
+            self._size += _walked_key_size(walked_key=walked_key)
+
+        self._event.set()
+
+    def finish(self, exception: Optional[Exception] = None) -> None:
+        self._finished = True
+        self._exception = exception
+        self._event.set()
+
+    async def get(self) -> Optional[WalkedKey]:
+        """
+        Dequeue the next walked key.
+
+        :return: The next walked key, or `None` if the queue is finished and empty.
+        """
+
+        while not self._items and not self._num_spilled_items and not self._finished:
+            self._event.clear()
+            await self._event.wait()
+
+        if self._items:
+            walked_key = self._items.popleft()
+            self._size -= _walked_key_size(walked_key=walked_key)
+            return walked_key
+
+        if self._num_spilled_items:
+            self._spill_file.file.seek(self._read_offset)
+            walked_key = pickle_load(self._spill_file.file)
+            self._num_spilled_items -= 1
+            if self._num_spilled_items:
+                self._read_offset = self._spill_file.file.tell()
+            else:
+                self._spill_file.file.truncate(0)
+                self._read_offset = 0
+            return walked_key
+
+        if self._exception is not None:
+            raise self._exception
+
+        return None
+
+
+class BoundedCrawl:
+    """
+    Walk a registry key and its subkeys with a bounded amount of memory.
+
+    The keys are walked in the same order as with `walk_key`, but rather than holding one handle and one list of
+    subkey names per level of depth, the pending subkeys are kept in an explicit frontier and opened by their paths
+    relative to the start key. The walk runs ahead of the consumer, buffering the walked keys. When the estimated size
+    of the frontier or of the buffered keys exceeds its half of the memory limit, the excess is spilled to temporary
+    files and read back when needed, so that neither a wide tree nor a slow consumer causes unbounded memory use.
+
+    As with `walk_key`, subkeys that cannot be opened or read are skipped and recorded in `errors`, and the walk
+    continues; only a failure to walk the start key fails the walk.
+    """
+
+    def __init__(
+        self,
+        rpc_connection: RPCConnection,
+        key_handle: bytes,
+        key_path: str = '',
+        maximum_depth: Optional[int] = None,
+        memory_limit: int = DEFAULT_MEMORY_LIMIT,
+        spill_directory: Optional[Union[str, Path]] = None,
+        sam_desired: Regsam = Regsam(maximum_allowed=True)
+    ):
+        """
+        :param rpc_connection: An RPC connection with which to perform the operations.
+        :param key_handle: A handle to the registry key at which to start the walk.
+        :param key_path: The path of the registry key, used as a prefix of the paths of the walked keys.
+        :param maximum_depth: The maximum depth, relative to the start key, of keys to walk.
+        :param memory_limit: The number of bytes of frontier and buffered keys to hold in memory before spilling.
+        :param spill_directory: The directory in which to create the temporary files. Defaults to the system's
+            temporary directory.
+        :param sam_desired: The desired access when opening the subkeys.
+        """
+
+        self.rpc_connection = rpc_connection
+        self.key_handle = key_handle
+        self.key_path = key_path
+        self.maximum_depth = maximum_depth
+        self.memory_limit = memory_limit
+        self.spill_directory = spill_directory
+        self.sam_desired = sam_desired
+
+        self.statistics = CrawlStatistics()
+        # The paths of the subkeys that could not be walked, e.g. because access is denied, mapped to their errors.
+        self.errors: dict[str, Exception] = {}
+
+    def _full_key_path(self, sub_key_path: str) -> str:
+        return f'{self.key_path}\\{sub_key_path}' if self.key_path and sub_key_path else self.key_path or sub_key_path
+
+    async def _walk_key(
+        self,
+        key_handle: bytes,
+        sub_key_path: str,
+        depth: int,
+        frontier: _SpillingStack,
+        queue: _SpillingQueue
+    ) -> None:
+        query_info_key_response = await base_reg_query_info_key(
+            rpc_connection=self.rpc_connection,
+            request=BaseRegQueryInfoKeyRequest(key_handle=key_handle)
+        )
+
+        # As with `walk_key`, the key is produced before its subkeys are enumerated.
+        queue.put(
+            WalkedKey(
+                key_path=self._full_key_path(sub_key_path=sub_key_path),
+                last_write_time=query_info_key_response.last_write_time,
+                values={
+                    enum_value_response.value_name: (enum_value_response.value_type, enum_value_response.value)
+                    async for enum_value_response in enumerate_values(
+                        rpc_connection=self.rpc_connection,
+                        key_handle=key_handle,
+                        query_info_key_response=query_info_key_response
+                    )
+                }
+            )
+        )
+
+        if self.maximum_depth is None or depth < self.maximum_depth:
+            sub_key_names = [
+                enum_key_response.sub_key_name
+                async for enum_key_response in enumerate_sub_keys(
+                    rpc_connection=self.rpc_connection,
+                    key_handle=key_handle,
+                    query_info_key_response=query_info_key_response
+                )
+            ]
+            # The subkeys are pushed in reverse so that they are popped, and walked, in enumeration order.
+            for sub_key_name in reversed(sub_key_names):
+                frontier.push(
+                    sub_key_path=f'{sub_key_path}\\{sub_key_name}' if sub_key_path else sub_key_name,
+                    depth=depth + 1
+                )
+
+    async def _produce(self, frontier: _SpillingStack, queue: _SpillingQueue) -> None:
+        try:
+            frontier.push(sub_key_path='', depth=0)
+            while frontier:
+                sub_key_path, depth = frontier.pop()
+
+                if not sub_key_path:
+                    # A failure to walk the start key fails the walk.
+                    await self._walk_key(
+                        key_handle=self.key_handle,
+                        sub_key_path=sub_key_path,
+                        depth=depth,
+                        frontier=frontier,
+                        queue=queue
+                    )
+                else:
+                    base_reg_open_key_options = dict(
+                        rpc_connection=self.rpc_connection,
+                        request=BaseRegOpenKeyRequest(
+                            key_handle=self.key_handle,
+                            sub_key_name=sub_key_path,
+                            sam_desired=self.sam_desired
+                        )
+                    )
+                    try:
+                        async with base_reg_open_key(**base_reg_open_key_options) as base_reg_open_key_response:
+                            await self._walk_key(
+                                key_handle=base_reg_open_key_response.key_handle,
+                                sub_key_path=sub_key_path,
+                                depth=depth,
+                                frontier=frontier,
+                                queue=queue
+                            )
+                    except Exception as exception:
+                        if not is_operation_error(exception=exception):
+                            raise
+                        self.errors[self._full_key_path(sub_key_path=sub_key_path)] = exception
+
+                self.statistics.peak_buffered_bytes = max(
+                    self.statistics.peak_buffered_bytes,
+                    frontier.size + queue.size
+                )
+        except Exception as exception:
+            queue.finish(exception=exception)
+        else:
+            queue.finish()
+
+    async def walk(self) -> AsyncIterator[WalkedKey]:
+        """
+        Walk the registry key and its subkeys.
+
+        :return: An asynchronous iterator of the walked keys.
+        """
+
+        frontier_spill_file = _SpillFile(spill_directory=self.spill_directory, statistics=self.statistics)
+        queue_spill_file = _SpillFile(spill_directory=self.spill_directory, statistics=self.statistics)
+        frontier = _SpillingStack(memory_limit=self.memory_limit // 2, spill_file=frontier_spill_file)
+        queue = _SpillingQueue(memory_limit=self.memory_limit // 2, spill_file=queue_spill_file)
+
+        producer_task: Task = create_task(self._produce(frontier=frontier, queue=queue))
+
+        try:
+            while (walked_key := await queue.get()) is not None:
+                self.statistics.num_keys += 1
+                yield walked_key
+        finally:
+            producer_task.cancel()
+            try:
+                await producer_task
+            except CancelledError:
+                pass
+
+            frontier_spill_file.close()
+            queue_spill_file.close()
+            self.statistics.peak_rss = _peak_rss()
@@ -0,0 +1,191 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Optional, Mapping
+from asyncio import Semaphore, Task, create_task, gather
+from contextlib import AsyncExitStack
+
+from msdsalgs.win32_error import Win32ErrorCode
+from rpc.connection import Connection as RPCConnection
+
+from ms_rrp.operations.base_reg_create_key import base_reg_create_key, BaseRegCreateKeyRequest
+from ms_rrp.operations.base_reg_set_value import base_reg_set_value, BaseRegSetValueRequest
+from ms_rrp.operations.base_reg_query_value import base_reg_query_value, BaseRegQueryValueRequest
+from ms_rrp.operations.base_reg_flush_key import base_reg_flush_key, BaseRegFlushKeyRequest
+from ms_rrp.structures.reg_value_type import RegValueType
+from ms_rrp.structures.regsam import Regsam
+
+
+@dataclass
+class ValueWriteResult:
+    key_path: str
+    value_name: str
+    return_code: Optional[Win32ErrorCode] = None
+    exception: Optional[Exception] = None
+    verified: Optional[bool] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return (
+            self.exception is None
+            and self.return_code is Win32ErrorCode.ERROR_SUCCESS
+            and self.verified is not False
+        )
+
+
+@dataclass
+class _CreatedKey:
+    key_path: str
+    key_handle: bytes
+    exit_stack: AsyncExitStack = field(default_factory=AsyncExitStack)
+    write_tasks: list[Task] = field(default_factory=list)
+
+
+def _normalize_key_path(key_path: str) -> str:
+    return '\\'.join(part for part in key_path.split('\\') if part)
+
+
+def _is_same_or_sub_key_path(key_path: str, ancestor_key_path: str) -> bool:
+    key_path, ancestor_key_path = key_path.lower(), ancestor_key_path.lower()
+    return not ancestor_key_path or key_path == ancestor_key_path or key_path.startswith(f'{ancestor_key_path}\\')
+
+
+async def bulk_write(
+    rpc_connection: RPCConnection,
+    root_key_handle: bytes,
+    key_path_to_values: Mapping[str, Mapping[str, tuple[RegValueType, bytes]]],
+    verify: bool = False,
+    flush: bool = True,
+    max_concurrency: int = 16,
+    sam_desired: Regsam = Regsam(maximum_allowed=True)
+) -> list[ValueWriteResult]:
+    """
+    Write many registry values under many keys, creating the keys as needed.
+
+    Each key is created with one `BaseRegCreateKey` operation, relative to the closest key that has already been
+    created or opened. The keys are created in path order, so that a key's handle is closed as soon as its subkeys
+    have been created and its own writes have completed, and at most one handle per level of depth is kept open for
+    creating further keys. The `BaseRegSetValue` operations of
+    a key are issued concurrently as soon as the key has been created, with at most `max_concurrency` operations in
+    flight. Optionally, each written value is read back with `BaseRegQueryValue` and compared with what was written,
+    and the root key is flushed with one `BaseRegFlushKey` operation at the end.
+
+    A failure to create a key or write a value does not abort the other writes; it is reported in the results.
+
+    :param rpc_connection: An RPC connection with which to perform the operations.
+    :param root_key_handle: A handle to the registry key relative to which the key paths are specified.
+    :param key_path_to_values: A mapping of key paths to mappings of value names to value types and data.
+    :param verify: Whether to read back each written value and compare it with what was written.
+    :param flush: Whether to flush the root key when all values have been written.
+    :param max_concurrency: The maximum number of operations in flight at once.
+    :param sam_desired: The desired access when creating the keys.
+    :return: One result per value, in the order of `key_path_to_values`.
+    """
+
+    semaphore = Semaphore(max_concurrency)
+
+    async def write_value(key_handle: bytes, result: ValueWriteResult, value_type: RegValueType, value: bytes):
+        async with semaphore:
+            try:
+                result.return_code = (
+                    await base_reg_set_value(
+                        rpc_connection=rpc_connection,
+                        request=BaseRegSetValueRequest(
+                            key_handle=key_handle,
+                            sub_key_name=result.value_name,
+                            value_type=value_type,
+                            value=value
+                        ),
+                        raise_exception=False
+                    )
+                ).return_code
+
+                if verify and result.return_code is Win32ErrorCode.ERROR_SUCCESS:
+                    base_reg_query_value_response = await base_reg_query_value(
+                        rpc_connection=rpc_connection,
+                        request=BaseRegQueryValueRequest(
+                            key_handle=key_handle,
+                            value_name=result.value_name,
+                            value_buffer_size=len(value)
+                        ),
+                        raise_exception=False
+                    )
+                    result.verified = (
+                        base_reg_query_value_response.return_code is Win32ErrorCode.ERROR_SUCCESS
+                        and base_reg_query_value_response.value_type is value_type
+                        and base_reg_query_value_response.value == value
+                    )
+            except Exception as exception:
+                result.exception = exception
+
+    results: list[ValueWriteResult] = []
+    key_path_to_results: dict[str, list[ValueWriteResult]] = {}
+    for key_path, value_name_to_value in key_path_to_values.items():
+        key_results = [ValueWriteResult(key_path=key_path, value_name=value_name) for value_name in value_name_to_value]
+        results.extend(key_results)
+        key_path_to_results.setdefault(_normalize_key_path(key_path), []).extend(key_results)
+
+    async def close_when_written(created_key: _CreatedKey) -> None:
+        await gather(*created_key.write_tasks)
+        await created_key.exit_stack.aclose()
+
+    # The created keys that are ancestors of, or the same as, the key being created, starting with the root key.
+    created_keys: list[_CreatedKey] = [_CreatedKey(key_path='', key_handle=root_key_handle)]
+    close_tasks: list[Task] = []
+
+    try:
+        # Creating the keys in the order of their path components ensures that a key's subkeys are created directly
+        # after it, so that its handle can be reused for them and then closed.
+        for key_path in sorted(key_path_to_results, key=lambda path: path.lower().split('\\')):
+            while len(created_keys) > 1 and not _is_same_or_sub_key_path(
+                key_path=key_path,
+                ancestor_key_path=created_keys[-1].key_path
+            ):
+                close_tasks.append(create_task(close_when_written(created_key=created_keys.pop())))
+
+            parent_key = created_keys[-1]
+            try:
+                if key_path.lower() == parent_key.key_path.lower():
+                    created_key = parent_key
+                else:
+                    created_key = _CreatedKey(key_path=key_path, key_handle=b'')
+                    base_reg_create_key_response = await created_key.exit_stack.enter_async_context(
+                        base_reg_create_key(
+                            rpc_connection=rpc_connection,
+                            request=BaseRegCreateKeyRequest(
+                                key_handle=parent_key.key_handle,
+                                sub_key_name=key_path[len(parent_key.key_path):].lstrip('\\'),
+                                sam_desired=sam_desired
+                            )
+                        )
+                    )
+                    created_key.key_handle = base_reg_create_key_response.key_handle
+                    created_keys.append(created_key)
+            except Exception as exception:
+                for result in key_path_to_results[key_path]:
+                    result.exception = exception
+                continue
+
+            for result in key_path_to_results[key_path]:
+                value_type, value = key_path_to_values[result.key_path][result.value_name]
+                created_key.write_tasks.append(
+                    create_task(
+                        write_value(
+                            key_handle=created_key.key_handle,
+                            result=result,
+                            value_type=value_type,
+                            value=value
+                        )
+                    )
+                )
+    finally:
+        while created_keys:
+            close_tasks.append(create_task(close_when_written(created_key=created_keys.pop())))
+        await gather(*close_tasks)
+
+    if flush:
+        await base_reg_flush_key(
+            rpc_connection=rpc_connection,
+            request=BaseRegFlushKeyRequest(key_handle=root_key_handle)
+        )
+
+    return results
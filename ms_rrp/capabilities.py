@@ -0,0 +1,248 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Callable, Awaitable, Optional, Union, Final
+from asyncio import Task, create_task, shield
+from pathlib import Path
+from uuid import uuid4
+
+from rpc.connection import Connection as RPCConnection
+
+from ms_rrp.operations import Operation
+from ms_rrp.operations.base_reg_get_version import base_reg_get_version, BaseRegGetVersionRequest
+from ms_rrp.operations.base_reg_delete_key_ex import base_reg_delete_key_ex, BaseRegDeleteKeyExRequest
+from ms_rrp.operations.base_reg_query_multiple_values2 import base_reg_query_multiple_values2, \
+    BaseRegQueryMultipleValues2Request
+from ms_rrp.host_cache import host_cache_path, read_host_cache, write_host_cache
+from ms_rrp.structures.regsam import Regsam, RegsamFlag
+from ms_rrp.utils import open_key_path, query_value, rpc_fault_status
+
+_CURRENT_VERSION_KEY_PATH: Final[str] = 'HKLM\\SOFTWARE\\Microsoft\\Windows NT\\CurrentVersion'
+
+# The status of the RPC fault with which a server rejects a request of an operation number that it does not implement.
+NCA_S_OP_RNG_ERROR: Final[int] = 0x1C010002
+
+
+async def _probe_delete_key_ex(rpc_connection: RPCConnection, key_handle: bytes) -> None:
+    # `BaseRegDeleteKeyEx` is a write operation, so the request is made invalid: with both the 64-bit and the 32-bit
+    # registry view requested, a supporting server rejects it with `ERROR_INVALID_PARAMETER` before looking up the
+    # subkey. Should a server not validate the views, the subkey does not exist, and the server responds with
+    # `ERROR_FILE_NOT_FOUND`. Either way, nothing is deleted.
+    await base_reg_delete_key_ex(
+        rpc_connection=rpc_connection,
+        request=BaseRegDeleteKeyExRequest(
+            key_handle=key_handle,
+            sub_key_name=str(uuid4()),
+            sam_desired=Regsam.from_int(RegsamFlag.KEY_WOW64_64KEY | RegsamFlag.KEY_WOW64_32KEY)
+        ),
+        raise_exception=False
+    )
+
+
+async def _probe_query_multiple_values2(rpc_connection: RPCConnection, key_handle: bytes) -> None:
+    await base_reg_query_multiple_values2(
+        rpc_connection=rpc_connection,
+        request=BaseRegQueryMultipleValues2Request(key_handle=key_handle, value_names=[], value_buffer_size=0),
+        raise_exception=False
+    )
+
+
+# Requests of the optional operations that do not change the registry, each performed with a handle to the
+# `CurrentVersion` key. A server that does not implement an operation rejects the request with an
+# `nca_s_op_rng_error` RPC fault rather than responding.
+OPERATION_PROBES: Final[dict[Operation, Callable[[RPCConnection, bytes], Awaitable[None]]]] = {
+    Operation.BASE_REG_DELETE_KEY_EX: _probe_delete_key_ex,
+    Operation.BASE_REG_QUERY_MULTIPLE_VALUES2: _probe_query_multiple_values2
+}
+
+
+@dataclass
+class HostCapabilities:
+    version: int
+    build_number: str
+    supported_operations: set[Operation] = field(default_factory=set)
+
+    @property
+    def build_key(self) -> str:
+        return f'{self.version}-{self.build_number}'
+
+    def supports(self, operation: Operation) -> bool:
+        """
+        Tell whether the host supports an operation.
+
+        :param operation: The operation.
+        :return: Whether the operation was found to be supported, or is not an optional operation.
+        """
+
+        return operation not in OPERATION_PROBES or operation in self.supported_operations
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'version': self.version,
+            'build_number': self.build_number,
+            'supported_operations': sorted(operation.name for operation in self.supported_operations)
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> HostCapabilities:
+        return cls(
+            version=data['version'],
+            build_number=data['build_number'],
+            supported_operations={Operation[name] for name in data['supported_operations']}
+        )
+
+
+async def _get_version_and_build_number(rpc_connection: RPCConnection, key_handle: bytes) -> tuple[int, str]:
+    version: int = (
+        await base_reg_get_version(
+            rpc_connection=rpc_connection,
+            request=BaseRegGetVersionRequest(key_handle=key_handle)
+        )
+    ).version
+
+    current_build_number: bytes = (
+        await query_value(
+            rpc_connection=rpc_connection,
+            key_handle=key_handle,
+            value_name='CurrentBuildNumber',
+            value_buffer_size=64
+        )
+    ).value
+
+    return version, current_build_number.decode(encoding='utf-16-le', errors='replace').split('\x00')[0]
+
+
+async def get_build_key(rpc_connection: RPCConnection) -> str:
+    """
+    Obtain a key identifying the registry version and the build of a host.
+
+    The key consists of the registry version, from `BaseRegGetVersion`, and the build number of the host, which the
+    version alone does not tell apart.
+
+    :param rpc_connection: An RPC connection to the host.
+    :return: The build key.
+    """
+
+    async with open_key_path(rpc_connection=rpc_connection, key_path=_CURRENT_VERSION_KEY_PATH) as key_handle:
+        version, build_number = await _get_version_and_build_number(
+            rpc_connection=rpc_connection,
+            key_handle=key_handle
+        )
+
+    return f'{version}-{build_number}'
+
+
+async def _probe_operations(
+    rpc_connection: RPCConnection,
+    key_handle: bytes,
+    host_capabilities: HostCapabilities
+) -> None:
+    for operation, probe in OPERATION_PROBES.items():
+        try:
+            await probe(rpc_connection, key_handle)
+        except Exception as exception:
+            if rpc_fault_status(exception=exception) != NCA_S_OP_RNG_ERROR:
+                raise
+            continue
+        host_capabilities.supported_operations.add(operation)
+
+
+async def probe_capabilities(rpc_connection: RPCConnection) -> HostCapabilities:
+    """
+    Determine the registry version and build of a host and which of the optional operations it supports.
+
+    Each optional operation is probed with one request that does not change the registry, even for write operations
+    such as `BaseRegDeleteKeyEx`. An operation is deemed unsupported if the server rejects the request with an
+    `nca_s_op_rng_error` RPC fault, and supported if it answers it, with whatever return code; any other error is
+    raised.
+
+    :param rpc_connection: An RPC connection to the host.
+    :return: The capabilities of the host.
+    """
+
+    async with open_key_path(rpc_connection=rpc_connection, key_path=_CURRENT_VERSION_KEY_PATH) as key_handle:
+        version, build_number = await _get_version_and_build_number(
+            rpc_connection=rpc_connection,
+            key_handle=key_handle
+        )
+        host_capabilities = HostCapabilities(version=version, build_number=build_number)
+        await _probe_operations(
+            rpc_connection=rpc_connection,
+            key_handle=key_handle,
+            host_capabilities=host_capabilities
+        )
+
+    return host_capabilities
+
+
+class CapabilityCache:
+    """
+    Cache the capabilities of hosts, in memory and optionally as files in a directory.
+
+    A host is probed at most once per cache in memory; concurrent requests for the capabilities of the same host share
+    one probe. Files are keyed by host and by build key, so that a host is probed again only when it is upgraded.
+    """
+
+    def __init__(self, cache_directory: Optional[Union[str, Path]] = None):
+        """
+        :param cache_directory: The directory in which to persist the capabilities. If not specified, the
+            capabilities are only cached in memory.
+        """
+
+        self.cache_directory = Path(cache_directory) if cache_directory is not None else None
+
+        self._cache: dict[str, HostCapabilities] = {}
+        self._in_flight: dict[str, Task] = {}
+
+    async def _load(self, rpc_connection: RPCConnection, host: str) -> HostCapabilities:
+        async with open_key_path(rpc_connection=rpc_connection, key_path=_CURRENT_VERSION_KEY_PATH) as key_handle:
+            # The version and build are looked up once, both to key the persisted capabilities and to be part of them.
+            version, build_number = await _get_version_and_build_number(
+                rpc_connection=rpc_connection,
+                key_handle=key_handle
+            )
+            host_capabilities = HostCapabilities(version=version, build_number=build_number)
+
+            if self.cache_directory is None:
+                await _probe_operations(
+                    rpc_connection=rpc_connection,
+                    key_handle=key_handle,
+                    host_capabilities=host_capabilities
+                )
+            else:
+                cache_path = host_cache_path(
+                    cache_directory=self.cache_directory,
+                    host=host,
+                    build_key=host_capabilities.build_key
+                )
+                try:
+                    host_capabilities = HostCapabilities.from_dict(data=read_host_cache(cache_path=cache_path))
+                except (OSError, ValueError, KeyError):
+                    await _probe_operations(
+                        rpc_connection=rpc_connection,
+                        key_handle=key_handle,
+                        host_capabilities=host_capabilities
+                    )
+                    write_host_cache(cache_path=cache_path, data=host_capabilities.to_dict())
+
+        self._cache[host.lower()] = host_capabilities
+        return host_capabilities
+
+    async def get(self, rpc_connection: RPCConnection, host: str) -> HostCapabilities:
+        """
+        Obtain the capabilities of a host.
+
+        :param rpc_connection: An RPC connection to the host.
+        :param host: The name of the host, used as the cache key.
+        :return: The capabilities of the host.
+        """
+
+        if (host_capabilities := self._cache.get(host.lower())) is not None:
+            return host_capabilities
+
+        # The probe is shielded, so that a cancelled request does not cancel it for the others waiting on it.
+        if (in_flight_task := self._in_flight.get(host.lower())) is None:
+            in_flight_task = create_task(self._load(rpc_connection=rpc_connection, host=host))
+            self._in_flight[host.lower()] = in_flight_task
+            in_flight_task.add_done_callback(lambda _: self._in_flight.pop(host.lower(), None))
+
+        return await shield(in_flight_task)
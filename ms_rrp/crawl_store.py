@@ -0,0 +1,257 @@
+from __future__ import annotations
+from typing import Optional, Iterator, AsyncIterable, Mapping, Final
+from array import array
+
+from ms_rrp.structures.reg_value_type import RegValueType
+from ms_rrp.utils import WalkedKey
+
+NO_PARENT: Final[int] = -1
+
+_EMPTY_SLOT: Final[int] = -1
+_INITIAL_NUM_SLOTS: Final[int] = 64
+
+
+class CrawlStore:
+    """
+    Store the keys and values of a registry crawl in columns.
+
+    Key names and value names are interned in a string table, the key and value attributes are stored in `array`
+    columns, and the value data is stored in one contiguous `bytearray`. A key refers to its parent by index, so that
+    a path is stored as one string table index per key rather than as a string.
+
+    Keys are expected to be added in depth-first pre-order, as produced by `walk_key`, so that each subtree occupies a
+    contiguous range of key indices. A key whose parent has not been added becomes a root key, whose name is its whole
+    path; a key with an empty path, as walked by `walk_key` without a `key_path`, is the parent of the keys whose
+    paths consist of one name.
+
+    The keys are looked up case-insensitively, as in the registry, through an open-addressing table of (parent index,
+    case-folded name) pairs stored in two arrays. The case-folded names are interned in the same string table as the
+    names, so that no other mapping of names is kept.
+    """
+
+    def __init__(self):
+        self.strings: list[str] = []
+        self._string_to_index: dict[str, int] = {}
+
+        self.key_parents = array('i')
+        self.key_names = array('I')
+        self.key_depths = array('H')
+        self.key_last_write_times = array('Q')
+        self.key_value_starts = array('I')
+
+        # An open-addressing table mapping the child keys of `_child_key` to key indices, with linear probing.
+        self._child_table_keys = array('q', [_EMPTY_SLOT]) * _INITIAL_NUM_SLOTS
+        self._child_table_key_indices = array('i', bytes(4 * _INITIAL_NUM_SLOTS))
+
+        self.value_names = array('I')
+        self.value_types = array('I')
+        self.value_data_offsets = array('Q', [0])
+        self.data = bytearray()
+
+    def _intern(self, string: str) -> int:
+        if (index := self._string_to_index.get(string)) is None:
+            index = len(self.strings)
+            self.strings.append(string)
+            self._string_to_index[string] = index
+        return index
+
+    @staticmethod
+    def _child_key(parent_index: int, folded_name_index: int) -> int:
+        return ((parent_index + 1) << 32) | folded_name_index
+
+    def _child_slot(self, child_key: int) -> int:
+        mask = len(self._child_table_keys) - 1
+        slot = ((child_key * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> 32 & mask
+        while (slot_key := self._child_table_keys[slot]) != _EMPTY_SLOT and slot_key != child_key:
+            slot = (slot + 1) & mask
+        return slot
+
+    def _set_child(self, child_key: int, key_index: int) -> None:
+        # The table is kept at most half full, so that probe sequences stay short.
+        if 2 * (len(self.key_names) + 1) > len(self._child_table_keys):
+            child_table_keys = self._child_table_keys
+            child_table_key_indices = self._child_table_key_indices
+            self._child_table_keys = array('q', [_EMPTY_SLOT]) * (2 * len(child_table_keys))
+            self._child_table_key_indices = array('i', bytes(4 * len(self._child_table_keys)))
+            for slot_key, slot_key_index in zip(child_table_keys, child_table_key_indices):
+                if slot_key != _EMPTY_SLOT:
+                    slot = self._child_slot(child_key=slot_key)
+                    self._child_table_keys[slot] = slot_key
+                    self._child_table_key_indices[slot] = slot_key_index
+
+        slot = self._child_slot(child_key=child_key)
+        self._child_table_keys[slot] = child_key
+        self._child_table_key_indices[slot] = key_index
+
+    def _find_child(self, parent_index: int, name: str) -> Optional[int]:
+        if (folded_name_index := self._string_to_index.get(name.casefold())) is None:
+            return None
+        slot = self._child_slot(
+            child_key=self._child_key(parent_index=parent_index, folded_name_index=folded_name_index)
+        )
+        return self._child_table_key_indices[slot] if self._child_table_keys[slot] != _EMPTY_SLOT else None
+
+    def __len__(self) -> int:
+        return len(self.key_names)
+
+    @property
+    def num_values(self) -> int:
+        return len(self.value_names)
+
+    def add_key(
+        self,
+        key_path: str,
+        last_write_time: int = 0,
+        values: Optional[Mapping[str, tuple[RegValueType, bytes]]] = None
+    ) -> int:
+        """
+        Add a key and its values.
+
+        :param key_path: The path of the key.
+        :param last_write_time: The last-write time of the key.
+        :param values: A mapping of the value names of the key to value types and data.
+        :return: The index of the added key.
+        """
+
+        parent_key_path, separator, name = key_path.rpartition('\\')
+        parent_index = self.find_key(key_path=parent_key_path) if separator or key_path else None
+        if parent_index is None:
+            parent_index = NO_PARENT
+            name = key_path
+
+        name_index = self._intern(name)
+        key_index = len(self.key_names)
+
+        self.key_parents.append(parent_index)
+        self.key_names.append(name_index)
+        self.key_depths.append(self.key_depths[parent_index] + 1 if parent_index != NO_PARENT else 0)
+        self.key_last_write_times.append(last_write_time)
+        self.key_value_starts.append(len(self.value_names))
+        self._set_child(
+            child_key=self._child_key(parent_index=parent_index, folded_name_index=self._intern(name.casefold())),
+            key_index=key_index
+        )
+
+        for value_name, (value_type, value) in (values or {}).items():
+            self.value_names.append(self._intern(value_name))
+            self.value_types.append(value_type)
+            self.data += value
+            self.value_data_offsets.append(len(self.data))
+
+        return key_index
+
+    def add_walked_key(self, walked_key: WalkedKey) -> int:
+        return self.add_key(
+            key_path=walked_key.key_path,
+            last_write_time=walked_key.last_write_time,
+            values=walked_key.values
+        )
+
+    async def extend(self, walked_keys: AsyncIterable[WalkedKey]) -> None:
+        """
+        Add walked keys, as obtained from e.g. `walk_key`, as they are produced.
+
+        :param walked_keys: An asynchronous iterable of walked keys.
+        :return: None
+        """
+
+        async for walked_key in walked_keys:
+            self.add_walked_key(walked_key=walked_key)
+
+    def key_path(self, key_index: int) -> str:
+        names: list[str] = []
+        while key_index != NO_PARENT:
+            names.append(self.strings[self.key_names[key_index]])
+            key_index = self.key_parents[key_index]
+        # The name of a key with an empty path is not part of the paths of its descendants.
+        return '\\'.join(name for name in reversed(names) if name)
+
+    def find_key(self, key_path: str) -> Optional[int]:
+        """
+        Find a key by its path, case-insensitively.
+
+        :param key_path: The path of the key.
+        :return: The index of the key, or `None` if the store has no such key.
+        """
+
+        empty_path_key_index = self._find_child(parent_index=NO_PARENT, name='')
+        if not key_path:
+            return empty_path_key_index
+
+        parent_index = empty_path_key_index if empty_path_key_index is not None else NO_PARENT
+        name_parts: list[str] = key_path.split('\\')
+        while name_parts:
+            # A root key's name may consist of several path components.
+            for num_parts in range(1 if parent_index != NO_PARENT else len(name_parts), 0, -1):
+                child_index = self._find_child(parent_index=parent_index, name='\\'.join(name_parts[:num_parts]))
+                if child_index is not None:
+                    parent_index = child_index
+                    del name_parts[:num_parts]
+                    break
+            else:
+                return None
+
+        return parent_index if parent_index != NO_PARENT else None
+
+    def value_range(self, key_index: int) -> range:
+        if key_index + 1 < len(self.key_value_starts):
+            return range(self.key_value_starts[key_index], self.key_value_starts[key_index + 1])
+        return range(self.key_value_starts[key_index], len(self.value_names))
+
+    def value_data(self, value_index: int) -> memoryview:
+        """
+        Obtain the data of a value without copying it.
+
+        The returned view must be released before more keys are added, as a `bytearray` cannot be resized while it is
+        being viewed.
+
+        :param value_index: The index of the value.
+        :return: A view of the data of the value.
+        """
+
+        return memoryview(self.data)[self.value_data_offsets[value_index]:self.value_data_offsets[value_index + 1]]
+
+    def sub_tree_range(self, key_index: int) -> range:
+        """
+        Obtain the range of the indices of a key and all of its descendants.
+
+        :param key_index: The index of the key.
+        :return: The range of key indices of the subtree.
+        """
+
+        depth = self.key_depths[key_index]
+        end_index = key_index + 1
+        while end_index < len(self.key_depths) and self.key_depths[end_index] > depth:
+            end_index += 1
+        return range(key_index, end_index)
+
+    def iter_prefix(self, key_path_prefix: str) -> Iterator[WalkedKey]:
+        """
+        Iterate over a key and all of its descendants.
+
+        :param key_path_prefix: The path of the key at which the subtree starts.
+        :return: An iterator of the keys of the subtree, in the order in which they were added.
+        """
+
+        if (key_index := self.find_key(key_path=key_path_prefix)) is None:
+            return
+
+        for sub_key_index in self.sub_tree_range(key_index=key_index):
+            yield self.walked_key(key_index=sub_key_index)
+
+    def walked_key(self, key_index: int) -> WalkedKey:
+        return WalkedKey(
+            key_path=self.key_path(key_index=key_index),
+            last_write_time=self.key_last_write_times[key_index],
+            values={
+                self.strings[self.value_names[value_index]]: (
+                    RegValueType(self.value_types[value_index]),
+                    bytes(self.value_data(value_index=value_index))
+                )
+                for value_index in self.value_range(key_index=key_index)
+            }
+        )
+
+    def __iter__(self) -> Iterator[WalkedKey]:
+        for key_index in range(len(self)):
+            yield self.walked_key(key_index=key_index)
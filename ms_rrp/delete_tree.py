@@ -0,0 +1,136 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Optional
+from asyncio import Semaphore, gather
+
+from msdsalgs.win32_error import Win32ErrorCode
+from rpc.connection import Connection as RPCConnection
+
+from ms_rrp.capabilities import HostCapabilities
+from ms_rrp.operations import Operation
+from ms_rrp.operations.base_reg_open_key import base_reg_open_key, BaseRegOpenKeyRequest
+from ms_rrp.operations.base_reg_delete_key import base_reg_delete_key, BaseRegDeleteKeyRequest
+from ms_rrp.operations.base_reg_delete_key_ex import base_reg_delete_key_ex, BaseRegDeleteKeyExRequest
+from ms_rrp.structures.regsam import Regsam, RegsamFlag
+from ms_rrp.utils import enumerate_sub_keys
+
+
+@dataclass
+class KeyDeleteResult:
+    key_path: str
+    return_code: Optional[Win32ErrorCode] = None
+    exception: Optional[Exception] = None
+    skipped: bool = False
+
+    @property
+    def succeeded(self) -> bool:
+        return not self.skipped and self.exception is None and self.return_code is Win32ErrorCode.ERROR_SUCCESS
+
+
+async def delete_tree(
+    rpc_connection: RPCConnection,
+    key_handle: bytes,
+    sub_key_name: str,
+    wow64_view: Optional[RegsamFlag] = None,
+    max_concurrency: int = 16,
+    host_capabilities: Optional[HostCapabilities] = None
+) -> list[KeyDeleteResult]:
+    """
+    Delete a registry key and all of its subkeys.
+
+    The `BaseRegDeleteKey` operation only deletes keys without subkeys, so the tree is deleted in post-order: a key
+    is deleted once all of its subkeys have been deleted. Sibling subtrees are processed concurrently, with at most
+    `max_concurrency` keys being listed or deleted at once.
+
+    A failure to list or delete a key does not abort the deletion of the rest of the tree. Keys whose subkeys could not
+    all be deleted are not attempted and are reported as skipped.
+
+    :param rpc_connection: An RPC connection with which to perform the operations.
+    :param key_handle: A handle to the registry key relative to which `sub_key_name` is specified.
+    :param sub_key_name: The path of the registry key to delete.
+    :param wow64_view: The registry view in which to delete the keys, either `RegsamFlag.KEY_WOW64_32KEY` or
+        `RegsamFlag.KEY_WOW64_64KEY`. If specified, the keys are deleted with `BaseRegDeleteKeyEx`, unless the host
+        does not support it according to `host_capabilities`, in which case the host predates registry views and the
+        keys are deleted with `BaseRegDeleteKey`.
+    :param max_concurrency: The maximum number of keys being listed or deleted at once.
+    :param host_capabilities: The capabilities of the host, with which to choose the delete operation.
+    :return: One result per key, in the order the keys were processed.
+    """
+
+    if wow64_view not in {None, RegsamFlag.KEY_WOW64_32KEY, RegsamFlag.KEY_WOW64_64KEY}:
+        raise ValueError(f'Not a registry view flag: {wow64_view!r}')
+
+    use_delete_key_ex = wow64_view is not None and (
+        host_capabilities is None or host_capabilities.supports(Operation.BASE_REG_DELETE_KEY_EX)
+    )
+    semaphore = Semaphore(max_concurrency)
+    open_sam_desired = Regsam.from_int(
+        RegsamFlag.KEY_QUERY_VALUE | RegsamFlag.KEY_ENUMERATE_SUB_KEYS | (wow64_view or 0)
+    )
+    results: list[KeyDeleteResult] = []
+
+    async def delete_key(key_path: str) -> bool:
+        result = KeyDeleteResult(key_path=key_path)
+
+        try:
+            async with semaphore:
+                base_reg_open_key_options = dict(
+                    rpc_connection=rpc_connection,
+                    request=BaseRegOpenKeyRequest(
+                        key_handle=key_handle,
+                        sub_key_name=key_path,
+                        sam_desired=open_sam_desired
+                    )
+                )
+                async with base_reg_open_key(**base_reg_open_key_options) as base_reg_open_key_response:
+                    sub_key_names = [
+                        enum_key_response.sub_key_name
+                        async for enum_key_response in enumerate_sub_keys(
+                            rpc_connection=rpc_connection,
+                            key_handle=base_reg_open_key_response.key_handle
+                        )
+                    ]
+        except Exception as exception:
+            result.exception = exception
+            results.append(result)
+            return False
+
+        sub_keys_deleted: list[bool] = await gather(
+            *(delete_key(key_path=f'{key_path}\\{sub_key_name}') for sub_key_name in sub_key_names)
+        )
+        if not all(sub_keys_deleted):
+            result.skipped = True
+            results.append(result)
+            return False
+
+        try:
+            async with semaphore:
+                if use_delete_key_ex:
+                    result.return_code = (
+                        await base_reg_delete_key_ex(
+                            rpc_connection=rpc_connection,
+                            request=BaseRegDeleteKeyExRequest(
+                                key_handle=key_handle,
+                                sub_key_name=key_path,
+                                sam_desired=Regsam.from_int(wow64_view)
+                            ),
+                            raise_exception=False
+                        )
+                    ).return_code
+                else:
+                    result.return_code = (
+                        await base_reg_delete_key(
+                            rpc_connection=rpc_connection,
+                            request=BaseRegDeleteKeyRequest(key_handle=key_handle, sub_key_name=key_path),
+                            raise_exception=False
+                        )
+                    ).return_code
+        except Exception as exception:
+            result.exception = exception
+
+        results.append(result)
+        return result.succeeded
+
+    await delete_key(key_path=sub_key_name.strip('\\'))
+
+    return results
@@ -0,0 +1,346 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, Union, Final
+from bisect import bisect_right
+from hashlib import sha256
+from io import BytesIO, RawIOBase, SEEK_SET, SEEK_CUR, SEEK_END
+from pathlib import Path
+from struct import Struct
+from urllib.parse import quote, unquote
+
+# An archive is a directory containing:
+#
+#   blocks.pack     the distinct blocks, appended one after another
+#   blocks.idx      index records (SHA-256 digest, pack offset u64, length u32) of the blocks in the pack
+#   manifests/      one manifest per dump: a header (magic, dump size u64, number of blocks u32) followed by the
+#                   (pack offset u64, length u32) records of the blocks of the dump, in order
+#
+# All integers are little-endian. The archive supports one writer at a time.
+
+HIVE_BASE_BLOCK_SIZE: Final[int] = 4096
+HBIN_ALIGNMENT: Final[int] = 4096
+HBIN_SIGNATURE: Final[bytes] = b'hbin'
+
+MANIFEST_MAGIC: Final[bytes] = b'RRPDUMP\x01'
+
+_HBIN_SIZE_STRUCT: Final[Struct] = Struct('<I')
+_HBIN_SIZE_OFFSET: Final[int] = 8
+_INDEX_RECORD_STRUCT: Final[Struct] = Struct('<32sQI')
+_MANIFEST_HEADER_STRUCT: Final[Struct] = Struct('<8sQI')
+_BLOCK_RECORD_STRUCT: Final[Struct] = Struct('<QI')
+
+
+def iter_hive_blocks(stream: BinaryIO) -> Iterator[bytes]:
+    """
+    Split a registry hive file into its base block and its hive bins.
+
+    Data that does not start with a valid hive bin header, e.g. at the end of a truncated file, is split into blocks
+    of the hive bin alignment.
+
+    :param stream: A readable binary stream of the hive file.
+    :return: An iterator of the blocks, which concatenated form the hive file.
+    """
+
+    if not (base_block := stream.read(HIVE_BASE_BLOCK_SIZE)):
+        return
+    yield base_block
+
+    while block := stream.read(HBIN_ALIGNMENT):
+        if len(block) == HBIN_ALIGNMENT and block.startswith(HBIN_SIGNATURE):
+            hbin_size: int = _HBIN_SIZE_STRUCT.unpack_from(block, _HBIN_SIZE_OFFSET)[0]
+            if hbin_size > HBIN_ALIGNMENT and hbin_size % HBIN_ALIGNMENT == 0:
+                block += stream.read(hbin_size - HBIN_ALIGNMENT)
+        yield block
+
+
+@dataclass
+class DumpStatistics:
+    size: int = 0
+    num_blocks: int = 0
+    num_new_blocks: int = 0
+    num_new_bytes: int = 0
+
+
+class ArchivedDump(RawIOBase):
+    """
+    A read-only, seekable view of an archived dump, reading the blocks from the archive's pack as they are accessed.
+
+    The view can be passed to anything that reads a binary file, and can be sliced like a bytes object.
+    """
+
+    def __init__(self, pack_path: Path, block_records: list[tuple[int, int]]):
+        super().__init__()
+
+        self._pack_file: BinaryIO = pack_path.open(mode='rb')
+        self._block_pack_offsets: list[int] = []
+        self._block_lengths: list[int] = []
+        self._block_offsets: list[int] = []
+
+        offset = 0
+        for pack_offset, length in block_records:
+            self._block_pack_offsets.append(pack_offset)
+            self._block_lengths.append(length)
+            self._block_offsets.append(offset)
+            offset += length
+
+        self._size = offset
+        self._position = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def close(self) -> None:
+        if not self.closed:
+            self._pack_file.close()
+        super().close()
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = SEEK_SET) -> int:
+        if whence == SEEK_SET:
+            position = offset
+        elif whence == SEEK_CUR:
+            position = self._position + offset
+        elif whence == SEEK_END:
+            position = self._size + offset
+        else:
+            raise ValueError(f'Invalid whence: {whence}')
+
+        if position < 0:
+            raise ValueError(f'Negative seek position: {position}')
+
+        self._position = position
+        return self._position
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        """
+        Read data of the dump at an offset, without moving the position.
+
+        :param offset: The offset in the dump at which to read.
+        :param size: The number of bytes to read.
+        :return: The data, which is shorter than `size` if the end of the dump is reached.
+        """
+
+        end_offset = min(offset + size, self._size)
+        if offset >= end_offset:
+            return b''
+
+        chunks: list[bytes] = []
+        block_index = bisect_right(self._block_offsets, offset) - 1
+        while offset < end_offset:
+            offset_in_block = offset - self._block_offsets[block_index]
+            chunk_length = min(self._block_lengths[block_index] - offset_in_block, end_offset - offset)
+
+            self._pack_file.seek(self._block_pack_offsets[block_index] + offset_in_block)
+            chunks.append(self._pack_file.read(chunk_length))
+
+            offset += chunk_length
+            block_index += 1
+
+        return b''.join(chunks)
+
+    def readinto(self, buffer) -> int:
+        data = self.read_at(offset=self._position, size=len(buffer))
+        buffer[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[int, bytes]:
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._size)
+            data = self.read_at(offset=start, size=max(0, stop - start))
+            return data if step == 1 else data[::step]
+
+        if key < 0:
+            key += self._size
+        if not 0 <= key < self._size:
+            raise IndexError('Dump index out of range.')
+        return self.read_at(offset=key, size=1)[0]
+
+    def iter_blocks(self) -> Iterator[bytes]:
+        """
+        Reconstruct the dump block by block, so that it can be streamed without being held in memory.
+
+        :return: An iterator of the blocks of the dump, in order.
+        """
+
+        for pack_offset, length in zip(self._block_pack_offsets, self._block_lengths):
+            self._pack_file.seek(pack_offset)
+            yield self._pack_file.read(length)
+
+
+class DumpArchive:
+    """
+    Store registry hive dumps, e.g. retrieved with `dump_reg`, with identical blocks stored once.
+
+    Each dump is split into its base block and hive bins, which are stored in the archive's pack keyed by their
+    SHA-256 digests; a block already in the pack is not stored again. The dump itself is recorded as a manifest of its
+    blocks. Successive dumps of the same hive mostly consist of unchanged hive bins, so that each new dump takes up
+    little more than its changed bins.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        """
+        :param directory: The directory of the archive, which is created if it does not exist.
+        """
+
+        self.directory = Path(directory)
+        self.manifest_directory.mkdir(parents=True, exist_ok=True)
+
+        self._index: dict[bytes, tuple[int, int]] = {}
+
+        if self.pack_path.exists() and self.index_path.exists():
+            pack_size = self.pack_path.stat().st_size
+            with self.index_path.open(mode='rb') as index_file:
+                index_data = index_file.read()
+
+            num_index_records = len(index_data) // _INDEX_RECORD_STRUCT.size
+            for digest, pack_offset, length in _INDEX_RECORD_STRUCT.iter_unpack(
+                index_data[:num_index_records * _INDEX_RECORD_STRUCT.size]
+            ):
+                # Index records of blocks that were not completely written, e.g. because of a crash, are ignored.
+                if pack_offset + length <= pack_size:
+                    self._index[digest] = (pack_offset, length)
+
+        self._pack_file: BinaryIO = self.pack_path.open(mode='ab')
+        self._index_file: BinaryIO = self.index_path.open(mode='ab')
+
+    @property
+    def pack_path(self) -> Path:
+        return self.directory / 'blocks.pack'
+
+    @property
+    def index_path(self) -> Path:
+        return self.directory / 'blocks.idx'
+
+    @property
+    def manifest_directory(self) -> Path:
+        return self.directory / 'manifests'
+
+    def _manifest_path(self, name: str) -> Path:
+        return self.manifest_directory / f'{quote(name, safe="")}.manifest'
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def close(self) -> None:
+        self._pack_file.close()
+        self._index_file.close()
+
+    def __enter__(self) -> DumpArchive:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def add_dump(self, name: str, dump: Union[bytes, BinaryIO]) -> DumpStatistics:
+        """
+        Add a dump to the archive, replacing any dump with the same name.
+
+        :param name: The name of the dump, e.g. `<host>/<hive>/<date>`.
+        :param dump: The data of the dump, or a readable binary stream of it.
+        :return: Statistics of the dump and of the data that was added to the archive.
+        """
+
+        stream = BytesIO(dump) if isinstance(dump, (bytes, bytearray, memoryview)) else dump
+        dump_statistics = DumpStatistics()
+        block_records = bytearray()
+        new_index_records = bytearray()
+
+        pack_offset = self._pack_file.seek(0, SEEK_END)
+        for block in iter_hive_blocks(stream=stream):
+            digest = sha256(block).digest()
+            if (index_entry := self._index.get(digest)) is None:
+                self._pack_file.write(block)
+                index_entry = (pack_offset, len(block))
+                self._index[digest] = index_entry
+                new_index_records += _INDEX_RECORD_STRUCT.pack(digest, *index_entry)
+                pack_offset += len(block)
+
+                dump_statistics.num_new_blocks += 1
+                dump_statistics.num_new_bytes += len(block)
+
+            block_records += _BLOCK_RECORD_STRUCT.pack(*index_entry)
+            dump_statistics.size += len(block)
+            dump_statistics.num_blocks += 1
+
+        # The blocks are written before the index records and the manifest that refer to them.
+        self._pack_file.flush()
+        self._index_file.write(new_index_records)
+        self._index_file.flush()
+
+        manifest_path = self._manifest_path(name=name)
+        temporary_manifest_path = manifest_path.with_suffix('.tmp')
+        with temporary_manifest_path.open(mode='wb') as manifest_file:
+            manifest_file.write(
+                _MANIFEST_HEADER_STRUCT.pack(MANIFEST_MAGIC, dump_statistics.size, dump_statistics.num_blocks)
+            )
+            manifest_file.write(block_records)
+        temporary_manifest_path.replace(manifest_path)
+
+        return dump_statistics
+
+    def dump_names(self) -> list[str]:
+        return sorted(unquote(manifest_path.stem) for manifest_path in self.manifest_directory.glob('*.manifest'))
+
+    def remove_dump(self, name: str) -> None:
+        """
+        Remove a dump from the archive. Its blocks are kept, as other dumps may refer to them.
+
+        :param name: The name of the dump.
+        :return: None
+        """
+
+        self._manifest_path(name=name).unlink()
+
+    def open_dump(self, name: str) -> ArchivedDump:
+        """
+        Open an archived dump for reading.
+
+        :param name: The name of the dump.
+        :return: A read-only, seekable view of the dump.
+        """
+
+        with self._manifest_path(name=name).open(mode='rb') as manifest_file:
+            manifest_data = manifest_file.read()
+
+        magic, size, num_blocks = _MANIFEST_HEADER_STRUCT.unpack_from(manifest_data, 0)
+        if magic != MANIFEST_MAGIC:
+            raise ValueError(f'Bad manifest magic: {magic!r}')
+
+        block_records: list[tuple[int, int]] = list(
+            _BLOCK_RECORD_STRUCT.iter_unpack(
+                manifest_data[
+                    _MANIFEST_HEADER_STRUCT.size:_MANIFEST_HEADER_STRUCT.size + num_blocks * _BLOCK_RECORD_STRUCT.size
+                ]
+            )
+        )
+        if len(block_records) != num_blocks or sum(length for _, length in block_records) != size:
+            raise ValueError(f'Truncated manifest of the dump {name!r}.')
+
+        self._pack_file.flush()
+        return ArchivedDump(pack_path=self.pack_path, block_records=block_records)
+
+    def write_dump(self, name: str, stream: BinaryIO) -> int:
+        """
+        Reconstruct an archived dump into a stream, block by block.
+
+        :param name: The name of the dump.
+        :param stream: A writable binary stream to which to write the dump.
+        :return: The number of bytes written.
+        """
+
+        num_bytes_written = 0
+        with self.open_dump(name=name) as archived_dump:
+            for block in archived_dump.iter_blocks():
+                stream.write(block)
+                num_bytes_written += len(block)
+
+        return num_bytes_written
@@ -0,0 +1,209 @@
+from __future__ import annotations
+from typing import Optional, BinaryIO, AsyncIterable, Iterable, Any, Final
+from abc import ABC, abstractmethod
+from gzip import GzipFile
+from json import dumps as json_dumps
+from struct import unpack_from
+
+from ms_rrp.hive import walk_hive
+from ms_rrp.structures.reg_value_type import RegValueType
+from ms_rrp.utils import WalkedKey, split_key_path
+
+DEFAULT_BUFFER_SIZE: Final[int] = 1024 * 1024
+
+_REG_FILE_HEADER: Final[str] = 'Windows Registry Editor Version 5.00\r\n\r\n'
+
+_STRING_VALUE_TYPES: Final[set[RegValueType]] = {
+    RegValueType.REG_SZ,
+    RegValueType.REG_EXPAND_SZ,
+    RegValueType.REG_LINK
+}
+
+
+class Exporter(ABC):
+    """
+    Write walked registry keys to a binary stream incrementally.
+
+    Output is accumulated in a buffer that is written to the stream, optionally through a compressor, whenever it
+    exceeds the buffer size, so that memory use is independent of the number of exported keys.
+    """
+
+    def __init__(self, stream: BinaryIO, compression: Optional[str] = None, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        """
+        :param stream: A writable binary stream to which to write the output.
+        :param compression: The compression with which to write the output: `gzip`, `zstd`, or `None`. `zstd`
+            requires the `zstandard` package, installed with the `zstd` extra of `ms_rrp`.
+        :param buffer_size: The number of bytes to accumulate before writing to the stream.
+        """
+
+        self._stream = stream
+        self._buffer_size = buffer_size
+        self._buffer = bytearray()
+
+        if compression is None:
+            self._writer: BinaryIO = stream
+        elif compression == 'gzip':
+            self._writer = GzipFile(fileobj=stream, mode='wb')
+        elif compression == 'zstd':
+            try:
+                from zstandard import ZstdCompressor
+            except ImportError as exception:
+                raise ImportError(
+                    'zstd compression requires the `zstandard` package; install `ms_rrp[zstd]`.'
+                ) from exception
+            self._writer = ZstdCompressor().stream_writer(stream, closefd=False)
+        else:
+            raise ValueError(f'Unsupported compression: {compression}')
+
+    def _write(self, data: bytes) -> None:
+        self._buffer += data
+        if len(self._buffer) >= self._buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buffer:
+            self._writer.write(self._buffer)
+            self._buffer.clear()
+
+    def close(self) -> None:
+        """
+        Write any buffered output and finalize the compression, if any. The underlying stream is not closed.
+
+        :return: None
+        """
+
+        self.flush()
+        if self._writer is not self._stream:
+            self._writer.close()
+        self._stream.flush()
+
+    def __enter__(self) -> Exporter:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    @abstractmethod
+    def write_key(self, walked_key: WalkedKey) -> None:
+        raise NotImplementedError
+
+    async def export(self, walked_keys: AsyncIterable[WalkedKey]) -> None:
+        """
+        Export walked keys, as obtained from e.g. `walk_key`, as they are produced.
+
+        :param walked_keys: An asynchronous iterable of walked keys.
+        :return: None
+        """
+
+        async for walked_key in walked_keys:
+            self.write_key(walked_key=walked_key)
+
+    def export_hive(self, hive_stream: BinaryIO, key_path: str) -> None:
+        """
+        Export the keys of a dumped registry hive file, as obtained from e.g. `dump_reg`, as they are read.
+
+        :param hive_stream: A readable and seekable binary stream of the hive file.
+        :param key_path: The path of the dumped key, e.g. `HKLM\\SOFTWARE`, under which to export the keys of the
+            hive.
+        :return: None
+        """
+
+        walked_keys: Iterable[WalkedKey] = walk_hive(stream=hive_stream, key_path=key_path)
+        for walked_key in walked_keys:
+            self.write_key(walked_key=walked_key)
+
+
+def _full_key_path(key_path: str) -> str:
+    try:
+        root_key, sub_key_name = split_key_path(key_path=key_path)
+    except ValueError:
+        raise ValueError(
+            f'The key path {key_path!r} does not start with a root key, e.g. because the key was walked without a '
+            f'`key_path`.'
+        )
+
+    return f'{root_key.name}\\{sub_key_name}' if sub_key_name else root_key.name
+
+
+def _escape_reg_string(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _reg_file_value_line(value_name: str, value_type: RegValueType, value: bytes) -> str:
+    name = f'"{_escape_reg_string(value_name)}"' if value_name else '@'
+
+    if value_type is RegValueType.REG_SZ and len(value) % 2 == 0:
+        data = f'"{_escape_reg_string(value.decode(encoding="utf-16-le", errors="replace").split(chr(0))[0])}"'
+    elif value_type is RegValueType.REG_DWORD and len(value) == 4:
+        data = f'dword:{unpack_from("<I", value)[0]:08x}'
+    elif value_type is RegValueType.REG_BINARY:
+        data = f'hex:{",".join(f"{byte:02x}" for byte in value)}'
+    else:
+        data = f'hex({int(value_type):x}):{",".join(f"{byte:02x}" for byte in value)}'
+
+    return f'{name}={data}\r\n'
+
+
+class RegFileExporter(Exporter):
+    """
+    Write walked registry keys in the Windows `.reg` format (version 5.00, UTF-16 little-endian).
+
+    The paths of the keys must start with their root key, e.g. `HKLM\\SOFTWARE`, as produced by `walk_key` when
+    given the path of the start key.
+    """
+
+    def __init__(self, stream: BinaryIO, compression: Optional[str] = None, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        super().__init__(stream=stream, compression=compression, buffer_size=buffer_size)
+        self._write(b'\xff\xfe' + _REG_FILE_HEADER.encode(encoding='utf-16-le'))
+
+    def write_key(self, walked_key: WalkedKey) -> None:
+        self._write(
+            ''.join([
+                f'[{_full_key_path(key_path=walked_key.key_path)}]\r\n',
+                *(
+                    _reg_file_value_line(value_name=value_name, value_type=value_type, value=value)
+                    for value_name, (value_type, value) in walked_key.values.items()
+                ),
+                '\r\n'
+            ]).encode(encoding='utf-16-le')
+        )
+
+
+def _json_value_data(value_type: RegValueType, value: bytes) -> Any:
+    if value_type in _STRING_VALUE_TYPES and len(value) % 2 == 0:
+        return value.decode(encoding='utf-16-le', errors='replace').split('\x00')[0]
+    elif value_type is RegValueType.REG_MULTI_SZ and len(value) % 2 == 0:
+        return [string for string in value.decode(encoding='utf-16-le', errors='replace').split('\x00') if string]
+    elif value_type is RegValueType.REG_DWORD and len(value) == 4:
+        return unpack_from('<I', value)[0]
+    elif value_type is RegValueType.REG_DWORD_BIG_ENDIAN and len(value) == 4:
+        return unpack_from('>I', value)[0]
+    elif value_type is RegValueType.REG_QWORD and len(value) == 8:
+        return unpack_from('<Q', value)[0]
+    else:
+        return value.hex()
+
+
+class JSONLinesExporter(Exporter):
+    """
+    Write walked registry keys as JSON Lines, one object per key.
+
+    String, integer, and multi-string values are written as JSON strings, numbers, and lists; other values are
+    written as hexadecimal strings.
+    """
+
+    def write_key(self, walked_key: WalkedKey) -> None:
+        self._write(
+            json_dumps({
+                'key_path': walked_key.key_path,
+                'last_write_time': walked_key.last_write_time,
+                'values': [
+                    {
+                        'name': value_name,
+                        'type': value_type.name,
+                        'data': _json_value_data(value_type=value_type, value=value)
+                    }
+                    for value_name, (value_type, value) in walked_key.values.items()
+                ]
+            }, ensure_ascii=False).encode() + b'\n'
+        )
@@ -0,0 +1,638 @@
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional, Sequence, Union, Final
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from heapq import merge as heapq_merge
+from json import dump as json_dump, load as json_load
+from mmap import mmap, ACCESS_READ
+from pathlib import Path
+from re import compile as re_compile, Pattern
+from struct import Struct
+from uuid import uuid4
+
+from ms_rrp.search import value_to_text
+from ms_rrp.utils import WalkedKey
+
+# The index consists of immutable segments, each holding the keys of the snapshots of one or more hosts, and of a
+# manifest listing the segments and, per host, the segment with its latest snapshot. The keys of a host in other
+# segments are superseded and not matched. The layout of a segment file, in which all integers are little-endian:
+#
+#   header
+#   term offsets        (num_terms + 1) * u64, offsets of the terms relative to the term data
+#   term data           UTF-8 encoded terms, sorted
+#   postings offsets    (num_terms + 1) * u64, offsets of the postings lists, in number of entries
+#   postings            sorted u32 key numbers per term
+#   string offsets      (num_strings + 1) * u64, offsets of the strings relative to the string data
+#   string data         UTF-8 encoded host names and key paths
+#   host records        num_hosts * (name string index u32, first key number u32, num keys u32)
+#   key records         num_keys * (path string index u32), grouped by host
+#
+# A term is a field letter, a null character, and the lowercase field text: a key path component, a value name, or a
+# token of the text representation of value data.
+
+SEGMENT_FILE_MAGIC: Final[bytes] = b'RRPFIDX\x00'
+SEGMENT_FILE_VERSION: Final[int] = 1
+
+PATH_FIELD: Final[str] = 'p'
+VALUE_NAME_FIELD: Final[str] = 'v'
+DATA_FIELD: Final[str] = 'd'
+
+MAX_TOKEN_LENGTH: Final[int] = 64
+
+_TOKEN_PATTERN: Final[Pattern] = re_compile(r'\w+')
+
+_HEADER_STRUCT: Final[Struct] = Struct('<8sIIII7Q')
+_OFFSET_STRUCT: Final[Struct] = Struct('<Q')
+_OFFSET_PAIR_STRUCT: Final[Struct] = Struct('<2Q')
+_POSTING_STRUCT: Final[Struct] = Struct('<I')
+_HOST_RECORD_STRUCT: Final[Struct] = Struct('<III')
+_KEY_RECORD_STRUCT: Final[Struct] = Struct('<I')
+
+
+def make_term(field: str, text: str) -> str:
+    return f'{field}\x00{text.lower()}'
+
+
+def walked_key_terms(walked_key: WalkedKey) -> set[str]:
+    """
+    Produce the terms under which a walked key is indexed.
+
+    :param walked_key: The walked key.
+    :return: The terms of the components of the key path, of the value names, and of the tokens of the value data.
+    """
+
+    terms: set[str] = {
+        make_term(field=PATH_FIELD, text=component) for component in walked_key.key_path.split('\\') if component
+    }
+
+    for value_name, (value_type, value) in walked_key.values.items():
+        if value_name:
+            terms.add(make_term(field=VALUE_NAME_FIELD, text=value_name))
+
+        if (value_text := value_to_text(value_type=value_type, value=value)) is not None:
+            terms.update(
+                make_term(field=DATA_FIELD, text=token)
+                for token in _TOKEN_PATTERN.findall(value_text)
+                if len(token) <= MAX_TOKEN_LENGTH
+            )
+
+    return terms
+
+
+def _intersect(key_numbers: Sequence[int], other_key_numbers: Sequence[int]) -> list[int]:
+    # The shorter list is iterated over, and the key numbers are searched for in the longer one, whose searched part
+    # shrinks as the lists are sorted.
+    if len(key_numbers) > len(other_key_numbers):
+        key_numbers, other_key_numbers = other_key_numbers, key_numbers
+
+    intersection: list[int] = []
+    low = 0
+    for key_number in key_numbers:
+        if (low := bisect_left(other_key_numbers, key_number, low)) == len(other_key_numbers):
+            break
+        if other_key_numbers[low] == key_number:
+            intersection.append(key_number)
+    return intersection
+
+
+def _difference(key_numbers: Sequence[int], other_key_numbers: Sequence[int]) -> list[int]:
+    difference: list[int] = []
+    low = 0
+    for key_number in key_numbers:
+        low = bisect_left(other_key_numbers, key_number, low)
+        if low == len(other_key_numbers) or other_key_numbers[low] != key_number:
+            difference.append(key_number)
+    return difference
+
+
+def _union(key_number_lists: Iterable[Sequence[int]]) -> list[int]:
+    union: list[int] = []
+    for key_number in heapq_merge(*key_number_lists):
+        if not union or union[-1] != key_number:
+            union.append(key_number)
+    return union
+
+
+def _pack_string_table(strings: list[str]) -> tuple[bytes, bytes]:
+    encoded_strings: list[bytes] = [string.encode(encoding='utf-8', errors='surrogatepass') for string in strings]
+    offsets = bytearray(_OFFSET_STRUCT.pack(0))
+    length = 0
+    for encoded_string in encoded_strings:
+        length += len(encoded_string)
+        offsets += _OFFSET_STRUCT.pack(length)
+    return bytes(offsets), b''.join(encoded_strings)
+
+
+class _SegmentBuilder:
+    def __init__(self):
+        self.strings: list[str] = []
+        self.host_records: list[tuple[int, int, int]] = []
+        self.key_path_string_indices: list[int] = []
+        self.postings: defaultdict[str, list[int]] = defaultdict(list)
+
+    def _intern(self, string: str) -> int:
+        self.strings.append(string)
+        return len(self.strings) - 1
+
+    def start_host(self, host: str) -> None:
+        self.host_records.append((self._intern(host), len(self.key_path_string_indices), 0))
+
+    def add_key(self, key_path: str, terms: Iterable[str]) -> int:
+        key_number = len(self.key_path_string_indices)
+        self.key_path_string_indices.append(self._intern(key_path))
+
+        host_string_index, first_key_number, num_keys = self.host_records[-1]
+        self.host_records[-1] = (host_string_index, first_key_number, num_keys + 1)
+
+        for term in terms:
+            self.postings[term].append(key_number)
+
+        return key_number
+
+    def write(self, file_path: Path) -> None:
+        terms: list[str] = sorted(self.postings, key=lambda term: term.encode(encoding='utf-8', errors='surrogatepass'))
+        term_offsets, term_data = _pack_string_table(strings=terms)
+
+        postings_offsets = bytearray(_OFFSET_STRUCT.pack(0))
+        postings_data = bytearray()
+        num_postings = 0
+        for term in terms:
+            term_postings = sorted(self.postings[term])
+            postings_data += Struct(f'<{len(term_postings)}I').pack(*term_postings)
+            num_postings += len(term_postings)
+            postings_offsets += _OFFSET_STRUCT.pack(num_postings)
+
+        string_offsets, string_data = _pack_string_table(strings=self.strings)
+        host_records = b''.join(_HOST_RECORD_STRUCT.pack(*host_record) for host_record in self.host_records)
+        key_records = b''.join(
+            _KEY_RECORD_STRUCT.pack(string_index) for string_index in self.key_path_string_indices
+        )
+
+        sections = [term_offsets, term_data, postings_offsets, postings_data, string_offsets, string_data, host_records]
+        section_offsets: list[int] = []
+        offset = _HEADER_STRUCT.size
+        for section in sections:
+            section_offsets.append(offset)
+            offset += len(section)
+
+        temporary_file_path = file_path.with_suffix('.tmp')
+        with temporary_file_path.open(mode='wb') as file:
+            file.write(
+                _HEADER_STRUCT.pack(
+                    SEGMENT_FILE_MAGIC,
+                    SEGMENT_FILE_VERSION,
+                    len(terms),
+                    len(self.strings),
+                    len(self.host_records),
+                    *section_offsets
+                )
+            )
+            file.writelines(sections)
+            file.write(key_records)
+        temporary_file_path.replace(file_path)
+
+
+class _Segment:
+    def __init__(self, file_path: Path):
+        self.name = file_path.stem
+
+        with file_path.open(mode='rb') as file:
+            self._mmap = mmap(file.fileno(), 0, access=ACCESS_READ)
+
+        (
+            magic,
+            version,
+            self.num_terms,
+            self.num_strings,
+            num_hosts,
+            self._term_offsets_offset,
+            self._term_data_offset,
+            self._postings_offsets_offset,
+            self._postings_offset,
+            self._string_offsets_offset,
+            self._string_data_offset,
+            self._host_records_offset
+        ) = _HEADER_STRUCT.unpack_from(self._mmap, 0)
+
+        if magic != SEGMENT_FILE_MAGIC or version != SEGMENT_FILE_VERSION:
+            self._mmap.close()
+            raise ValueError(f'Bad segment file: {file_path}')
+
+        self._key_records_offset = self._host_records_offset + num_hosts * _HOST_RECORD_STRUCT.size
+        self.num_keys = (len(self._mmap) - self._key_records_offset) // _KEY_RECORD_STRUCT.size
+
+        self.hosts: list[str] = []
+        self.host_key_ranges: list[range] = []
+        for host_index in range(num_hosts):
+            host_string_index, first_key_number, num_keys = _HOST_RECORD_STRUCT.unpack_from(
+                self._mmap,
+                self._host_records_offset + host_index * _HOST_RECORD_STRUCT.size
+            )
+            self.hosts.append(self._string(string_index=host_string_index))
+            self.host_key_ranges.append(range(first_key_number, first_key_number + num_keys))
+
+        self._host_key_starts: list[int] = [host_key_range.start for host_key_range in self.host_key_ranges]
+
+        # The key ranges of the hosts for which this segment holds the latest snapshot, sorted; set by the index.
+        self.live_key_ranges: list[range] = []
+        self._live_key_starts: list[int] = []
+
+    @property
+    def num_live_keys(self) -> int:
+        return sum(len(live_key_range) for live_key_range in self.live_key_ranges)
+
+    def set_live_hosts(self, hosts: Iterable[str]) -> None:
+        hosts = set(hosts)
+        self.live_key_ranges = [
+            host_key_range for host, host_key_range in zip(self.hosts, self.host_key_ranges) if host in hosts
+        ]
+        self._live_key_starts = [live_key_range.start for live_key_range in self.live_key_ranges]
+
+    def live_key_numbers(self, key_numbers: Sequence[int]) -> Sequence[int]:
+        """
+        Filter key numbers, keeping those of the hosts for which this segment holds the latest snapshot.
+
+        :param key_numbers: Sorted key numbers.
+        :return: The sorted live key numbers.
+        """
+
+        if len(self.live_key_ranges) == len(self.host_key_ranges):
+            return key_numbers
+
+        return [
+            key_number
+            for key_number in key_numbers
+            if (range_index := bisect_right(self._live_key_starts, key_number) - 1) >= 0
+            and key_number in self.live_key_ranges[range_index]
+        ]
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def _string(self, string_index: int) -> str:
+        start_offset, end_offset = _OFFSET_PAIR_STRUCT.unpack_from(
+            self._mmap,
+            self._string_offsets_offset + string_index * _OFFSET_STRUCT.size
+        )
+        return self._mmap[
+            self._string_data_offset + start_offset:self._string_data_offset + end_offset
+        ].decode(encoding='utf-8', errors='surrogatepass')
+
+    def _term(self, term_index: int) -> bytes:
+        start_offset, end_offset = _OFFSET_PAIR_STRUCT.unpack_from(
+            self._mmap,
+            self._term_offsets_offset + term_index * _OFFSET_STRUCT.size
+        )
+        return self._mmap[self._term_data_offset + start_offset:self._term_data_offset + end_offset]
+
+    def term(self, term_index: int) -> str:
+        return self._term(term_index=term_index).decode(encoding='utf-8', errors='surrogatepass')
+
+    def postings(self, term_index: int) -> tuple[int, ...]:
+        start, end = _OFFSET_PAIR_STRUCT.unpack_from(
+            self._mmap,
+            self._postings_offsets_offset + term_index * _OFFSET_STRUCT.size
+        )
+        return Struct(f'<{end - start}I').unpack_from(self._mmap, self._postings_offset + start * _POSTING_STRUCT.size)
+
+    def _lower_bound(self, encoded_term: bytes) -> int:
+        low, high = 0, self.num_terms
+        while low < high:
+            middle = (low + high) // 2
+            if self._term(term_index=middle) < encoded_term:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def term_key_numbers(self, term: str) -> Sequence[int]:
+        encoded_term = term.encode(encoding='utf-8', errors='surrogatepass')
+        term_index = self._lower_bound(encoded_term=encoded_term)
+        if term_index < self.num_terms and self._term(term_index=term_index) == encoded_term:
+            return self.postings(term_index=term_index)
+        return ()
+
+    def prefix_key_numbers(self, term_prefix: str) -> Sequence[int]:
+        encoded_term_prefix = term_prefix.encode(encoding='utf-8', errors='surrogatepass')
+        term_postings: list[Sequence[int]] = []
+        for term_index in range(self._lower_bound(encoded_term=encoded_term_prefix), self.num_terms):
+            if not self._term(term_index=term_index).startswith(encoded_term_prefix):
+                break
+            term_postings.append(self.postings(term_index=term_index))
+        return term_postings[0] if len(term_postings) == 1 else _union(key_number_lists=term_postings)
+
+    def host(self, key_number: int) -> str:
+        return self.hosts[bisect_right(self._host_key_starts, key_number) - 1]
+
+    def key_path(self, key_number: int) -> str:
+        return self._string(
+            string_index=_KEY_RECORD_STRUCT.unpack_from(
+                self._mmap,
+                self._key_records_offset + key_number * _KEY_RECORD_STRUCT.size
+            )[0]
+        )
+
+
+class Query(ABC):
+    """
+    A query matching registry keys. Queries are combined with `&`, `|`, and `~`.
+
+    A query produces the sorted numbers of the matching keys of a segment, which are combined by merging them. They may
+    include keys of superseded snapshots, which are filtered out only once the query has been evaluated.
+    """
+
+    @abstractmethod
+    def _key_numbers(self, segment: _Segment) -> Sequence[int]:
+        raise NotImplementedError
+
+    def __and__(self, other: Query) -> Query:
+        return And(self, other)
+
+    def __or__(self, other: Query) -> Query:
+        return Or(self, other)
+
+    def __invert__(self) -> Query:
+        return Not(self)
+
+
+class Term(Query):
+    def __init__(self, field: str, text: str):
+        """
+        :param field: The field of the term: `PATH_FIELD`, `VALUE_NAME_FIELD`, or `DATA_FIELD`.
+        :param text: The text of the term, matched case-insensitively.
+        """
+
+        self.term = make_term(field=field, text=text)
+
+    def _key_numbers(self, segment: _Segment) -> Sequence[int]:
+        return segment.term_key_numbers(term=self.term)
+
+
+class Prefix(Query):
+    def __init__(self, field: str, text_prefix: str):
+        """
+        :param field: The field of the terms: `PATH_FIELD`, `VALUE_NAME_FIELD`, or `DATA_FIELD`.
+        :param text_prefix: The prefix of the text of the terms, matched case-insensitively.
+        """
+
+        self.term_prefix = make_term(field=field, text=text_prefix)
+
+    def _key_numbers(self, segment: _Segment) -> Sequence[int]:
+        return segment.prefix_key_numbers(term_prefix=self.term_prefix)
+
+
+class And(Query):
+    def __init__(self, *queries: Query):
+        self.queries = queries
+
+    def _key_numbers(self, segment: _Segment) -> Sequence[int]:
+        # Negated queries are subtracted from the intersection of the others rather than complemented.
+        negated_queries = [query.query for query in self.queries if isinstance(query, Not)]
+        key_numbers: Optional[Sequence[int]] = None
+        for query in self.queries:
+            if isinstance(query, Not):
+                continue
+            key_numbers = query._key_numbers(segment=segment) if key_numbers is None else _intersect(
+                key_numbers=key_numbers,
+                other_key_numbers=query._key_numbers(segment=segment)
+            )
+            if not key_numbers:
+                return ()
+
+        if key_numbers is None:
+            if not negated_queries:
+                return ()
+            key_numbers = Not(negated_queries.pop())._key_numbers(segment=segment)
+
+        for query in negated_queries:
+            if not key_numbers:
+                break
+            key_numbers = _difference(key_numbers=key_numbers, other_key_numbers=query._key_numbers(segment=segment))
+
+        return key_numbers
+
+
+class Or(Query):
+    def __init__(self, *queries: Query):
+        self.queries = queries
+
+    def _key_numbers(self, segment: _Segment) -> Sequence[int]:
+        return _union(key_number_lists=[query._key_numbers(segment=segment) for query in self.queries])
+
+
+class Not(Query):
+    def __init__(self, query: Query):
+        self.query = query
+
+    def _key_numbers(self, segment: _Segment) -> Sequence[int]:
+        # The complement is taken within the live key ranges, so that the keys of superseded snapshots are not listed.
+        excluded_key_numbers = self.query._key_numbers(segment=segment)
+        key_numbers: list[int] = []
+        for live_key_range in segment.live_key_ranges:
+            low = bisect_left(excluded_key_numbers, live_key_range.start)
+            for key_number in live_key_range:
+                if low < len(excluded_key_numbers) and excluded_key_numbers[low] == key_number:
+                    low += 1
+                else:
+                    key_numbers.append(key_number)
+        return key_numbers
+
+
+def path_component(text: str) -> Term:
+    return Term(field=PATH_FIELD, text=text)
+
+
+def value_name(text: str) -> Term:
+    return Term(field=VALUE_NAME_FIELD, text=text)
+
+
+def data_token(text: str) -> Term:
+    return Term(field=DATA_FIELD, text=text)
+
+
+@dataclass(frozen=True)
+class IndexHit:
+    host: str
+    key_path: str
+
+
+class FleetIndex:
+    """
+    An on-disk inverted index of the registry keys of many hosts.
+
+    Keys are indexed by the components of their paths, the names of their values, and the tokens of the text
+    representations of their value data, and are matched by combinations of term and prefix queries, e.g.
+    `path_component('Run') & value_name('OneDrive')`. Each batch of snapshots added is written as a new segment; a
+    host's newer snapshot supersedes its older ones, which are no longer matched and are dropped by `merge`.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        """
+        :param directory: The directory of the index, which is created if it does not exist.
+        """
+
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._host_to_segment_name: dict[str, str] = {}
+        self._segments: dict[str, _Segment] = {}
+
+        try:
+            with self.manifest_path.open() as file:
+                manifest = json_load(fp=file)
+        except FileNotFoundError:
+            pass
+        else:
+            self._host_to_segment_name = manifest['hosts']
+            for segment_name in manifest['segments']:
+                self._segments[segment_name] = _Segment(file_path=self._segment_path(segment_name=segment_name))
+            self._update_live_key_ranges()
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.directory / 'manifest.json'
+
+    def _segment_path(self, segment_name: str) -> Path:
+        return self.directory / f'{segment_name}.segment'
+
+    @property
+    def hosts(self) -> list[str]:
+        return sorted(self._host_to_segment_name)
+
+    def close(self) -> None:
+        for segment in self._segments.values():
+            segment.close()
+
+    def __enter__(self) -> FleetIndex:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def _update_live_key_ranges(self) -> None:
+        for segment in self._segments.values():
+            segment.set_live_hosts(
+                hosts=(host for host in segment.hosts if self._host_to_segment_name.get(host) == segment.name)
+            )
+
+    def _commit(self, segment_names: list[str], host_to_segment_name: dict[str, str]) -> None:
+        temporary_manifest_path = self.manifest_path.with_suffix('.tmp')
+        with temporary_manifest_path.open(mode='w') as file:
+            json_dump(obj={'segments': segment_names, 'hosts': host_to_segment_name}, fp=file)
+        temporary_manifest_path.replace(self.manifest_path)
+
+    def add_snapshots(self, snapshots: Iterable[tuple[str, Iterable[WalkedKey]]]) -> None:
+        """
+        Index the snapshots of hosts as a new segment.
+
+        :param snapshots: Pairs of a host and its walked keys, e.g. from `walk_key`, a `CrawlStore`, or a
+            `SnapshotFile`. Each host may appear once.
+        :return: None
+        """
+
+        segment_builder = _SegmentBuilder()
+        hosts: set[str] = set()
+        for host, walked_keys in snapshots:
+            if host in hosts:
+                raise ValueError(f'The host {host!r} appears more than once.')
+            hosts.add(host)
+
+            segment_builder.start_host(host=host)
+            for walked_key in walked_keys:
+                segment_builder.add_key(key_path=walked_key.key_path, terms=walked_key_terms(walked_key=walked_key))
+
+        if not hosts:
+            return
+
+        segment_name = uuid4().hex
+        segment_builder.write(file_path=self._segment_path(segment_name=segment_name))
+
+        host_to_segment_name = {**self._host_to_segment_name, **{host: segment_name for host in hosts}}
+        self._commit(segment_names=[*self._segments, segment_name], host_to_segment_name=host_to_segment_name)
+
+        self._segments[segment_name] = _Segment(file_path=self._segment_path(segment_name=segment_name))
+        self._host_to_segment_name = host_to_segment_name
+        self._update_live_key_ranges()
+
+    def add_snapshot(self, host: str, walked_keys: Iterable[WalkedKey]) -> None:
+        self.add_snapshots(snapshots=[(host, walked_keys)])
+
+    def search(self, query: Query) -> Iterator[IndexHit]:
+        """
+        Find the keys matching a query, in the latest snapshots of the hosts.
+
+        :param query: The query.
+        :return: An iterator of the matching keys.
+        """
+
+        for segment in self._segments.values():
+            for key_number in segment.live_key_numbers(key_numbers=query._key_numbers(segment=segment)):
+                yield IndexHit(
+                    host=segment.host(key_number=key_number),
+                    key_path=segment.key_path(key_number=key_number)
+                )
+
+    def search_hosts(self, query: Query) -> list[str]:
+        """
+        Find the hosts having a key matching a query in their latest snapshots.
+
+        :param query: The query.
+        :return: The matching hosts, sorted.
+        """
+
+        hosts: set[str] = set()
+        for segment in self._segments.values():
+            for key_number in segment.live_key_numbers(key_numbers=query._key_numbers(segment=segment)):
+                hosts.add(segment.host(key_number=key_number))
+        return sorted(hosts)
+
+    def merge(self) -> None:
+        """
+        Merge all segments into one, dropping the superseded snapshots.
+
+        :return: None
+        """
+
+        if len(self._segments) <= 1 and all(
+            segment.num_live_keys == segment.num_keys for segment in self._segments.values()
+        ):
+            return
+
+        segment_builder = _SegmentBuilder()
+        for segment in self._segments.values():
+            key_number_map: dict[int, int] = {}
+            for host, host_key_range in zip(segment.hosts, segment.host_key_ranges):
+                if self._host_to_segment_name.get(host) != segment.name:
+                    continue
+                segment_builder.start_host(host=host)
+                for key_number in host_key_range:
+                    key_number_map[key_number] = segment_builder.add_key(
+                        key_path=segment.key_path(key_number=key_number),
+                        terms=()
+                    )
+
+            for term_index in range(segment.num_terms):
+                merged_postings = [
+                    key_number_map[key_number]
+                    for key_number in segment.postings(term_index=term_index)
+                    if key_number in key_number_map
+                ]
+                if merged_postings:
+                    segment_builder.postings[segment.term(term_index=term_index)].extend(merged_postings)
+
+        segment_name = uuid4().hex
+        segment_builder.write(file_path=self._segment_path(segment_name=segment_name))
+
+        host_to_segment_name = {host: segment_name for host in self._host_to_segment_name}
+        self._commit(segment_names=[segment_name], host_to_segment_name=host_to_segment_name)
+
+        old_segments = list(self._segments.values())
+        self._segments = {segment_name: _Segment(file_path=self._segment_path(segment_name=segment_name))}
+        self._host_to_segment_name = host_to_segment_name
+        self._update_live_key_ranges()
+
+        for old_segment in old_segments:
+            old_segment.close()
+            self._segment_path(segment_name=old_segment.name).unlink()
@@ -0,0 +1,174 @@
+from __future__ import annotations
+from typing import BinaryIO, Iterator, Optional, Final
+from struct import Struct
+
+from ms_rrp.dump_archive import HIVE_BASE_BLOCK_SIZE
+from ms_rrp.structures.reg_value_type import RegValueType
+from ms_rrp.utils import WalkedKey
+
+# The layout of a registry hive file, as written by `BaseRegSaveKey`: a base block, followed by hive bins containing
+# cells. Cell offsets are relative to the start of the first hive bin, and each cell starts with its size, which is
+# negative if the cell is allocated.
+
+HIVE_SIGNATURE: Final[bytes] = b'regf'
+
+# Data larger than this is stored in segments, referenced by a big data (`db`) record.
+MAXIMUM_VALUE_DATA_SEGMENT_SIZE: Final[int] = 16344
+
+_KEY_COMP_NAME: Final[int] = 0x0020
+_VALUE_COMP_NAME: Final[int] = 0x0001
+_VALUE_DATA_INLINE: Final[int] = 0x80000000
+
+_REG_VALUE_TYPES: Final[frozenset[int]] = frozenset(RegValueType)
+
+_ROOT_CELL_OFFSET_STRUCT: Final[Struct] = Struct('<I')
+_ROOT_CELL_OFFSET_OFFSET: Final[int] = 0x24
+_CELL_SIZE_STRUCT: Final[Struct] = Struct('<i')
+_OFFSET_STRUCT: Final[Struct] = Struct('<I')
+_LIST_HEADER_STRUCT: Final[Struct] = Struct('<2sH')
+# Signature, flags, last-write time, access bits, parent, number of subkeys, number of volatile subkeys, subkey list
+# offset, volatile subkey list offset, number of values, value list offset, ...
+_KEY_NODE_STRUCT: Final[Struct] = Struct('<2sHQIIIIIIII')
+_KEY_NODE_NAME_LENGTH_STRUCT: Final[Struct] = Struct('<H')
+_KEY_NODE_NAME_LENGTH_OFFSET: Final[int] = 0x48
+_KEY_NODE_NAME_OFFSET: Final[int] = 0x4c
+# Signature, name length, data size, data offset, data type, flags, spare.
+_KEY_VALUE_STRUCT: Final[Struct] = Struct('<2sHIIIHH')
+_BIG_DATA_STRUCT: Final[Struct] = Struct('<2sHI')
+
+
+class _HiveReader:
+    def __init__(self, stream: BinaryIO):
+        self._stream = stream
+
+    def read_cell(self, cell_offset: int) -> bytes:
+        self._stream.seek(HIVE_BASE_BLOCK_SIZE + cell_offset)
+        cell_size: int = _CELL_SIZE_STRUCT.unpack(self._stream.read(_CELL_SIZE_STRUCT.size))[0]
+        return self._stream.read(abs(cell_size) - _CELL_SIZE_STRUCT.size)
+
+    def read_offsets(self, cell_offset: int, num_offsets: int) -> list[int]:
+        cell = self.read_cell(cell_offset=cell_offset)
+        return [offset for offset, in _OFFSET_STRUCT.iter_unpack(cell[:num_offsets * _OFFSET_STRUCT.size])]
+
+    def sub_key_offsets(self, list_offset: int) -> Iterator[int]:
+        cell = self.read_cell(cell_offset=list_offset)
+        signature, num_elements = _LIST_HEADER_STRUCT.unpack_from(cell)
+        elements = memoryview(cell)[_LIST_HEADER_STRUCT.size:]
+
+        if signature in {b'lf', b'lh'}:
+            # Each element is followed by a hash of the subkey name.
+            for i in range(num_elements):
+                yield _OFFSET_STRUCT.unpack_from(elements, 8 * i)[0]
+        elif signature == b'li':
+            for i in range(num_elements):
+                yield _OFFSET_STRUCT.unpack_from(elements, 4 * i)[0]
+        elif signature == b'ri':
+            # An index root references further subkey lists.
+            sub_list_offsets = [_OFFSET_STRUCT.unpack_from(elements, 4 * i)[0] for i in range(num_elements)]
+            for sub_list_offset in sub_list_offsets:
+                yield from self.sub_key_offsets(list_offset=sub_list_offset)
+        else:
+            raise ValueError(f'Unsupported subkey list signature at cell offset {list_offset:#x}: {signature!r}')
+
+    def value_data(self, data_size: int, data_offset: int) -> bytes:
+        if data_size & _VALUE_DATA_INLINE:
+            return _OFFSET_STRUCT.pack(data_offset)[:data_size & ~_VALUE_DATA_INLINE]
+
+        if data_size == 0:
+            return b''
+
+        cell = self.read_cell(cell_offset=data_offset)
+        if data_size > MAXIMUM_VALUE_DATA_SEGMENT_SIZE and cell.startswith(b'db'):
+            _, num_segments, segment_list_offset = _BIG_DATA_STRUCT.unpack_from(cell)
+            return b''.join(
+                self.read_cell(cell_offset=segment_offset)[:MAXIMUM_VALUE_DATA_SEGMENT_SIZE]
+                for segment_offset in self.read_offsets(cell_offset=segment_list_offset, num_offsets=num_segments)
+            )[:data_size]
+
+        return cell[:data_size]
+
+    def values(self, value_list_offset: int, num_values: int) -> dict[str, tuple[RegValueType, bytes]]:
+        values: dict[str, tuple[RegValueType, bytes]] = {}
+        if num_values == 0:
+            return values
+
+        for value_offset in self.read_offsets(cell_offset=value_list_offset, num_offsets=num_values):
+            cell = self.read_cell(cell_offset=value_offset)
+            signature, name_length, data_size, data_offset, data_type, flags, _ = _KEY_VALUE_STRUCT.unpack_from(cell)
+            if signature != b'vk':
+                raise ValueError(f'Unexpected value signature at cell offset {value_offset:#x}: {signature!r}')
+
+            # Values of non-standard types, as found in e.g. device property keys, have no `RegValueType`.
+            if data_type not in _REG_VALUE_TYPES:
+                continue
+
+            raw_name = cell[_KEY_VALUE_STRUCT.size:_KEY_VALUE_STRUCT.size + name_length]
+            values[raw_name.decode(encoding='latin-1' if flags & _VALUE_COMP_NAME else 'utf-16-le')] = (
+                RegValueType(data_type),
+                self.value_data(data_size=data_size, data_offset=data_offset)
+            )
+
+        return values
+
+
+def walk_hive(stream: BinaryIO, key_path: str = '', maximum_depth: Optional[int] = None) -> Iterator[WalkedKey]:
+    """
+    Walk the keys of a registry hive file, e.g. one dumped with `dump_reg`, depth-first, yielding each key with its
+    values as it is visited.
+
+    The file is read cell by cell as the keys are visited, so that only the values of the key being yielded and the
+    offsets of the pending subkeys are held at a time. Values of types that `RegValueType` does not define are
+    skipped.
+
+    :param stream: A readable and seekable binary stream of the hive file.
+    :param key_path: The path of the dumped key, e.g. `HKLM\\SOFTWARE`, used in place of the name of the root key of
+        the hive as the prefix of the paths of the walked keys.
+    :param maximum_depth: The maximum depth, relative to the root key of the hive, of keys to walk.
+    :return: An iterator of the walked keys.
+    """
+
+    stream.seek(0)
+    base_block = stream.read(HIVE_BASE_BLOCK_SIZE)
+    if not base_block.startswith(HIVE_SIGNATURE):
+        raise ValueError('The stream is not a registry hive file.')
+
+    hive_reader = _HiveReader(stream=stream)
+
+    # The offsets of the subkeys pending to be walked at each depth, with the paths of their parents.
+    pending_key_offsets: list[tuple[str, Iterator[int]]] = [
+        ('', iter([_ROOT_CELL_OFFSET_STRUCT.unpack_from(base_block, _ROOT_CELL_OFFSET_OFFSET)[0]]))
+    ]
+    while pending_key_offsets:
+        parent_key_path, key_offsets = pending_key_offsets[-1]
+        if (key_offset := next(key_offsets, None)) is None:
+            pending_key_offsets.pop()
+            continue
+
+        cell = hive_reader.read_cell(cell_offset=key_offset)
+        (
+            signature, flags, last_write_time, _, _, num_sub_keys, _, sub_key_list_offset, _, num_values,
+            value_list_offset
+        ) = _KEY_NODE_STRUCT.unpack_from(cell)
+        if signature != b'nk':
+            raise ValueError(f'Unexpected key signature at cell offset {key_offset:#x}: {signature!r}')
+
+        depth = len(pending_key_offsets) - 1
+        if depth == 0:
+            current_key_path = key_path
+        else:
+            name_length: int = _KEY_NODE_NAME_LENGTH_STRUCT.unpack_from(cell, _KEY_NODE_NAME_LENGTH_OFFSET)[0]
+            key_name = cell[_KEY_NODE_NAME_OFFSET:_KEY_NODE_NAME_OFFSET + name_length].decode(
+                encoding='latin-1' if flags & _KEY_COMP_NAME else 'utf-16-le'
+            )
+            current_key_path = f'{parent_key_path}\\{key_name}' if parent_key_path else key_name
+
+        yield WalkedKey(
+            key_path=current_key_path,
+            last_write_time=last_write_time,
+            values=hive_reader.values(value_list_offset=value_list_offset, num_values=num_values)
+        )
+
+        if num_sub_keys != 0 and (maximum_depth is None or depth < maximum_depth):
+            pending_key_offsets.append(
+                (current_key_path, iter(list(hive_reader.sub_key_offsets(list_offset=sub_key_list_offset))))
+            )
@@ -0,0 +1,49 @@
+from typing import Any, Iterable
+from json import dump as json_dump, load as json_load
+from pathlib import Path
+from urllib.parse import quote
+
+
+def host_cache_path(cache_directory: Path, host: str, build_key: str, qualifiers: Iterable[str] = ()) -> Path:
+    """
+    Obtain the path of the file in which data retrieved from a host is persisted.
+
+    The file is keyed by the case-insensitive host name and by the build key of the host, as obtained with
+    `get_build_key`, so that the data is retrieved again when the host is upgraded.
+
+    :param cache_directory: The directory of the cache files.
+    :param host: The name of the host.
+    :param build_key: The build key of the host.
+    :param qualifiers: Further parts of the key, telling apart different data of the same host and build.
+    :return: The path of the cache file.
+    """
+
+    return cache_directory / f'{quote("-".join((host.lower(), build_key, *qualifiers)), safe="")}.json'
+
+
+def read_host_cache(cache_path: Path) -> Any:
+    """
+    Read persisted data. An `OSError` is raised if there is no such file, and a `ValueError` if it is corrupt.
+
+    :param cache_path: The path of the cache file.
+    :return: The data decoded from the file.
+    """
+
+    with cache_path.open() as file:
+        return json_load(fp=file)
+
+
+def write_host_cache(cache_path: Path, data: Any) -> None:
+    """
+    Persist data, replacing the file atomically so that a concurrent reader does not observe a partial file.
+
+    :param cache_path: The path of the cache file.
+    :param data: The data to be encoded as JSON.
+    :return: None
+    """
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_cache_path = cache_path.with_suffix('.tmp')
+    with temporary_cache_path.open(mode='w') as file:
+        json_dump(obj=data, fp=file)
+    temporary_cache_path.replace(cache_path)
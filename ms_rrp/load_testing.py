@@ -0,0 +1,254 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Callable, Awaitable, Iterable, Mapping, Optional
+from asyncio import gather, get_running_loop
+from collections import defaultdict
+from random import Random
+from time import perf_counter
+
+from rpc.connection import Connection as RPCConnection
+
+from ms_rrp.operations import Operation
+from ms_rrp.operations.base_reg_query_info_key import base_reg_query_info_key, BaseRegQueryInfoKeyRequest
+from ms_rrp.operations.base_reg_query_value import base_reg_query_value, BaseRegQueryValueRequest
+from ms_rrp.operations.base_reg_create_key import base_reg_create_key, BaseRegCreateKeyRequest
+from ms_rrp.operations.base_reg_set_value import base_reg_set_value, BaseRegSetValueRequest
+from ms_rrp.structures.reg_value_type import RegValueType
+from ms_rrp.structures.root_keys import OPENABLE_ROOT_KEY_TO_OPERATION_AND_REQUEST
+from ms_rrp.structures.regsam import Regsam
+from ms_rrp.utils import open_key_path, split_key_path, walk_key
+
+Workload = Callable[[RPCConnection], Awaitable[None]]
+
+
+class TimingConnection:
+    """
+    Wrap an RPC connection, measuring the latency of each request made through it, per operation.
+
+    All attributes other than `request` are delegated to the wrapped connection.
+    """
+
+    def __init__(self, rpc_connection: RPCConnection):
+        self._rpc_connection = rpc_connection
+        self.latencies: defaultdict[Operation, list[float]] = defaultdict(list)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._rpc_connection, name)
+
+    async def request(self, request_message, *args, **kwargs):
+        start_time = perf_counter()
+        try:
+            return await self._rpc_connection.request(request_message, *args, **kwargs)
+        finally:
+            self.latencies[Operation(int(request_message.opnum))].append(perf_counter() - start_time)
+
+
+def make_open_query_close_workload(key_path: str, value_name: Optional[str] = None) -> Workload:
+    """
+    Make a workload that opens a key, queries it, and closes it.
+
+    :param key_path: The full path of the key, including the root key.
+    :param value_name: The name of a value to query. If not specified, the key is queried with `BaseRegQueryInfoKey`.
+    :return: The workload.
+    """
+
+    async def workload(rpc_connection: RPCConnection) -> None:
+        async with open_key_path(rpc_connection=rpc_connection, key_path=key_path) as key_handle:
+            if value_name is None:
+                await base_reg_query_info_key(
+                    rpc_connection=rpc_connection,
+                    request=BaseRegQueryInfoKeyRequest(key_handle=key_handle)
+                )
+            else:
+                await base_reg_query_value(
+                    rpc_connection=rpc_connection,
+                    request=BaseRegQueryValueRequest(key_handle=key_handle, value_name=value_name)
+                )
+
+    return workload
+
+
+def make_enum_crawl_workload(key_path: str, maximum_depth: Optional[int] = 2) -> Workload:
+    """
+    Make a workload that walks a key and its subkeys.
+
+    :param key_path: The full path of the key at which to start the walk, including the root key.
+    :param maximum_depth: The maximum depth of keys to walk.
+    :return: The workload.
+    """
+
+    async def workload(rpc_connection: RPCConnection) -> None:
+        async with open_key_path(rpc_connection=rpc_connection, key_path=key_path) as key_handle:
+            async for _ in walk_key(rpc_connection=rpc_connection, key_handle=key_handle, maximum_depth=maximum_depth):
+                pass
+
+    return workload
+
+
+def make_set_value_burst_workload(key_path: str, num_values: int = 16, value_size: int = 64) -> Workload:
+    """
+    Make a workload that creates a key and writes a burst of values to it.
+
+    :param key_path: The full path of the key to create, including the root key.
+    :param num_values: The number of values to write.
+    :param value_size: The size of each value, in bytes.
+    :return: The workload.
+    """
+
+    root_key, sub_key_name = split_key_path(key_path=key_path)
+    open_root_key, open_root_key_request_class = OPENABLE_ROOT_KEY_TO_OPERATION_AND_REQUEST[root_key]
+
+    async def workload(rpc_connection: RPCConnection) -> None:
+        open_root_key_options = dict(
+            rpc_connection=rpc_connection,
+            request=open_root_key_request_class(sam_desired=Regsam(maximum_allowed=True))
+        )
+        async with open_root_key(**open_root_key_options) as open_root_key_response:
+            base_reg_create_key_options = dict(
+                rpc_connection=rpc_connection,
+                request=BaseRegCreateKeyRequest(
+                    key_handle=open_root_key_response.key_handle,
+                    sub_key_name=sub_key_name,
+                    sam_desired=Regsam(maximum_allowed=True)
+                )
+            )
+            async with base_reg_create_key(**base_reg_create_key_options) as base_reg_create_key_response:
+                await gather(
+                    *(
+                        base_reg_set_value(
+                            rpc_connection=rpc_connection,
+                            request=BaseRegSetValueRequest(
+                                key_handle=base_reg_create_key_response.key_handle,
+                                sub_key_name=f'value{i}',
+                                value_type=RegValueType.REG_BINARY,
+                                value=bytes(value_size)
+                            )
+                        )
+                        for i in range(num_values)
+                    )
+                )
+
+    return workload
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+@dataclass
+class OperationLatencies:
+    count: int
+    mean: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+    @classmethod
+    def from_latencies(cls, latencies: list[float]) -> OperationLatencies:
+        sorted_latencies = sorted(latencies)
+        return cls(
+            count=len(sorted_latencies),
+            mean=sum(sorted_latencies) / len(sorted_latencies),
+            p50=_percentile(sorted_values=sorted_latencies, fraction=0.50),
+            p95=_percentile(sorted_values=sorted_latencies, fraction=0.95),
+            p99=_percentile(sorted_values=sorted_latencies, fraction=0.99),
+            max=sorted_latencies[-1]
+        )
+
+
+@dataclass
+class ConcurrencyLevelResult:
+    concurrency: int
+    duration: float
+    num_workload_runs: int
+    num_errors: int
+    workload_runs: dict[str, int] = field(default_factory=dict)
+    operations: dict[str, OperationLatencies] = field(default_factory=dict)
+
+    @property
+    def throughput(self) -> float:
+        return self.num_workload_runs / self.duration if self.duration else 0.0
+
+    @property
+    def requests_per_second(self) -> float:
+        return sum(latencies.count for latencies in self.operations.values()) / self.duration if self.duration else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'concurrency': self.concurrency,
+            'duration': self.duration,
+            'num_workload_runs': self.num_workload_runs,
+            'num_errors': self.num_errors,
+            'throughput': self.throughput,
+            'requests_per_second': self.requests_per_second,
+            'workload_runs': self.workload_runs,
+            'operations': {
+                operation_name: vars(operation_latencies)
+                for operation_name, operation_latencies in self.operations.items()
+            }
+        }
+
+
+async def run_load_test(
+    rpc_connection: RPCConnection,
+    workloads: Mapping[str, tuple[Workload, float]],
+    concurrency_levels: Iterable[int] = (1, 4, 16, 64),
+    duration: float = 10.0,
+    seed: Optional[int] = None
+) -> list[ConcurrencyLevelResult]:
+    """
+    Run a mix of workloads at increasing levels of concurrency and measure the throughput and the operation latencies.
+
+    At each level of concurrency, that number of workers repeatedly run a workload chosen at random according to the
+    weights of the workloads, until the duration has elapsed. The connection may be a stand-in, e.g. a
+    `ReplayConnection`, so that the client can be measured in isolation.
+
+    :param rpc_connection: An RPC connection with which to perform the operations.
+    :param workloads: A mapping of workload names to workloads and their relative weights.
+    :param concurrency_levels: The numbers of concurrent workers to sweep.
+    :param duration: The duration, in seconds, of each level of concurrency.
+    :param seed: The seed of the random choice of workloads.
+    :return: One result per level of concurrency. Use `to_dict` to obtain a JSON-serializable representation.
+    """
+
+    workload_names = list(workloads)
+    workload_weights = [workloads[workload_name][1] for workload_name in workload_names]
+    random = Random(seed)
+    loop = get_running_loop()
+
+    results: list[ConcurrencyLevelResult] = []
+    for concurrency in concurrency_levels:
+        timing_connection = TimingConnection(rpc_connection=rpc_connection)
+        workload_runs: defaultdict[str, int] = defaultdict(int)
+        num_errors = 0
+        end_time = loop.time() + duration
+
+        async def worker() -> None:
+            nonlocal num_errors
+            while loop.time() < end_time:
+                workload_name: str = random.choices(workload_names, weights=workload_weights)[0]
+                try:
+                    await workloads[workload_name][0](timing_connection)
+                except Exception:
+                    num_errors += 1
+                workload_runs[workload_name] += 1
+
+        start_time = loop.time()
+        await gather(*(worker() for _ in range(concurrency)))
+
+        results.append(
+            ConcurrencyLevelResult(
+                concurrency=concurrency,
+                duration=loop.time() - start_time,
+                num_workload_runs=sum(workload_runs.values()),
+                num_errors=num_errors,
+                workload_runs=dict(workload_runs),
+                operations={
+                    operation.name: OperationLatencies.from_latencies(latencies=latencies)
+                    for operation, latencies in sorted(timing_connection.latencies.items())
+                }
+            )
+        )
+
+    return results
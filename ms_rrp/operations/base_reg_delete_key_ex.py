@@ -0,0 +1,66 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import ClassVar, cast
+
+from msdsalgs.win32_error import Win32ErrorCode
+from rpc.connection import Connection as RPCConnection
+from rpc.utils.client_protocol_message import ClientProtocolRequestBase, ClientProtocolResponseBase, obtain_response
+from rpc.utils.types import DWORD
+
+from ms_rrp.operations import Operation
+from ms_rrp.structures.regsam import Regsam
+from ms_rrp.structures.rpc_hkey import RpcHkey
+from ms_rrp.structures.rrp_unicode_string import RRPUnicodeString
+
+
+@dataclass
+class BaseRegDeleteKeyExResponse(ClientProtocolResponseBase):
+    _STRUCTURE: ClassVar[dict[str, tuple[...]]] = {
+        'return_code': (DWORD, Win32ErrorCode)
+    }
+
+
+@dataclass
+class BaseRegDeleteKeyExRequest(ClientProtocolRequestBase):
+    OPERATION: ClassVar[Operation] = Operation.BASE_REG_DELETE_KEY_EX
+
+    key_handle: bytes
+    sub_key_name: str
+    sam_desired: Regsam = Regsam()
+
+    _STRUCTURE: ClassVar[dict[str, tuple[...]]] = {
+        'key_handle': (RpcHkey,),
+        'sub_key_name': (RRPUnicodeString,),
+        'sam_desired': (DWORD, Regsam.from_int),
+        '__reserved': (DWORD,)
+    }
+
+    @property
+    def reserved(self) -> int:
+        return 0
+
+
+BaseRegDeleteKeyExResponse.REQUEST_CLASS = BaseRegDeleteKeyExRequest
+BaseRegDeleteKeyExRequest.RESPONSE_CLASS = BaseRegDeleteKeyExResponse
+
+
+async def base_reg_delete_key_ex(
+    rpc_connection: RPCConnection,
+    request: BaseRegDeleteKeyExRequest,
+    raise_exception: bool = True
+) -> BaseRegDeleteKeyExResponse:
+    """
+    Perform the `BaseRegDeleteKeyEx` operation.
+
+    [MS-RRP] section 3.1.5.31
+
+    :param rpc_connection: An RPC connection with which to perform the operation.
+    :param request: The `BaseRegDeleteKeyEx` request.
+    :param raise_exception: Whether to raise an exception in case the response indicates an error occurred.
+    :return: The `BaseRegDeleteKeyEx` response.
+    """
+
+    return cast(
+        BaseRegDeleteKeyExResponse,
+        await obtain_response(rpc_connection=rpc_connection, request=request, raise_exception=raise_exception)
+    )
@@ -0,0 +1,144 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import ClassVar, ByteString, Optional, cast
+from datetime import datetime
+
+from msdsalgs.win32_error import Win32ErrorCode
+from rpc.connection import Connection as RPCConnection
+from rpc.utils.client_protocol_message import ClientProtocolRequestBase, ClientProtocolResponseBase, obtain_response
+
+from ms_rrp.operations import Operation
+from ms_rrp.structures.filetime import filetime_to_datetime
+from ms_rrp.structures.ndr_helpers import pack_rrp_unicode_string, unpack_rrp_unicode_string, pack_unique_pointer, \
+    unpack_unique_pointer, ULONG_STRUCT, FILETIME_STRUCT, RRP_UNICODE_STRING_HEADER_STRUCT
+
+
+@dataclass
+class BaseRegEnumKeyResponse(ClientProtocolResponseBase):
+    sub_key_name: str
+    class_name: Optional[str] = None
+    last_write_time: Optional[int] = None
+
+    @property
+    def last_write_datetime(self) -> Optional[datetime]:
+        return filetime_to_datetime(filetime=self.last_write_time) if self.last_write_time is not None else None
+
+    @classmethod
+    def from_bytes(cls, data: ByteString, base_offset: int = 0) -> BaseRegEnumKeyResponse:
+        sub_key_name, offset = unpack_rrp_unicode_string(data=data, offset=base_offset)
+
+        class_name: Optional[str] = None
+        class_name_present, offset = unpack_unique_pointer(data=data, offset=offset)
+        if class_name_present:
+            class_name, offset = unpack_rrp_unicode_string(data=data, offset=offset)
+
+        last_write_time: Optional[int] = None
+        last_write_time_present, offset = unpack_unique_pointer(data=data, offset=offset)
+        if last_write_time_present:
+            last_write_time = FILETIME_STRUCT.unpack_from(data, offset)[0]
+            offset += FILETIME_STRUCT.size
+
+        return cls(
+            sub_key_name=sub_key_name,
+            class_name=class_name,
+            last_write_time=last_write_time,
+            return_code=Win32ErrorCode(ULONG_STRUCT.unpack_from(data, offset)[0])
+        )
+
+    def __bytes__(self) -> bytes:
+        return b''.join([
+            pack_rrp_unicode_string(value=self.sub_key_name),
+            pack_unique_pointer(
+                referent=(
+                    pack_rrp_unicode_string(value=self.class_name, referent_id=0x00020004)
+                    if self.class_name is not None else None
+                )
+            ),
+            pack_unique_pointer(
+                referent=(
+                    FILETIME_STRUCT.pack(self.last_write_time) if self.last_write_time is not None else None
+                ),
+                referent_id=0x00020008
+            ),
+            ULONG_STRUCT.pack(self.return_code)
+        ])
+
+    def __len__(self) -> int:
+        return len(self.__bytes__())
+
+
+@dataclass
+class BaseRegEnumKeyRequest(ClientProtocolRequestBase):
+    OPERATION: ClassVar[Operation] = Operation.BASE_REG_ENUM_KEY
+
+    key_handle: bytes
+    index: int
+    sub_key_name_buffer_size: int = 512
+    class_buffer_size: int = 512
+
+    @classmethod
+    def from_bytes(cls, data: ByteString, base_offset: int = 0) -> BaseRegEnumKeyRequest:
+        data = memoryview(data)[base_offset:]
+
+        key_handle = bytes(data[:20])
+        index: int = ULONG_STRUCT.unpack_from(data, 20)[0]
+
+        _, sub_key_name_buffer_size, _ = RRP_UNICODE_STRING_HEADER_STRUCT.unpack_from(data, 24)
+        _, offset = unpack_rrp_unicode_string(data=data, offset=24)
+
+        class_buffer_size = 0
+        class_present, offset = unpack_unique_pointer(data=data, offset=offset)
+        if class_present:
+            _, class_buffer_size, _ = RRP_UNICODE_STRING_HEADER_STRUCT.unpack_from(data, offset)
+
+        return cls(
+            key_handle=key_handle,
+            index=index,
+            sub_key_name_buffer_size=sub_key_name_buffer_size,
+            class_buffer_size=class_buffer_size
+        )
+
+    def __bytes__(self) -> bytes:
+        return b''.join([
+            self.key_handle,
+            ULONG_STRUCT.pack(self.index),
+            pack_rrp_unicode_string(value='', maximum_length=self.sub_key_name_buffer_size),
+            pack_unique_pointer(
+                referent=pack_rrp_unicode_string(
+                    value='',
+                    maximum_length=self.class_buffer_size,
+                    referent_id=0x00020008
+                ),
+                referent_id=0x00020004
+            ),
+            pack_unique_pointer(referent=FILETIME_STRUCT.pack(0), referent_id=0x0002000c)
+        ])
+
+    def __len__(self) -> int:
+        return len(self.__bytes__())
+
+
+BaseRegEnumKeyResponse.REQUEST_CLASS = BaseRegEnumKeyRequest
+BaseRegEnumKeyRequest.RESPONSE_CLASS = BaseRegEnumKeyResponse
+
+
+async def base_reg_enum_key(
+    rpc_connection: RPCConnection,
+    request: BaseRegEnumKeyRequest,
+    raise_exception: bool = True
+) -> BaseRegEnumKeyResponse:
+    """
+    Perform the `BaseRegEnumKey` operation.
+
+    https://docs.microsoft.com/en-us/openspecs/windows_protocols/ms-rrp/668627e9-e0eb-4ab1-911f-0af589beeac3
+
+    :param rpc_connection: An RPC connection with which to perform the operation.
+    :param request: The `BaseRegEnumKey` request.
+    :param raise_exception: Whether to raise an exception in case the response indicates an error occurred.
+    :return: The `BaseRegEnumKey` response.
+    """
+
+    return cast(
+        BaseRegEnumKeyResponse,
+        await obtain_response(rpc_connection=rpc_connection, request=request, raise_exception=raise_exception)
+    )
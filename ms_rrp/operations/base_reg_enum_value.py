@@ -0,0 +1,152 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import ClassVar, ByteString, Optional, cast
+
+from msdsalgs.win32_error import Win32ErrorCode
+from rpc.connection import Connection as RPCConnection
+from rpc.utils.client_protocol_message import ClientProtocolRequestBase, ClientProtocolResponseBase, obtain_response
+
+from ms_rrp.operations import Operation
+from ms_rrp.structures.reg_value_type import RegValueType
+from ms_rrp.structures.ndr_helpers import pack_rrp_unicode_string, unpack_rrp_unicode_string, pack_unique_pointer, \
+    unpack_unique_pointer, pack_conformant_varying_bytes, unpack_conformant_varying_bytes, ULONG_STRUCT, \
+    RRP_UNICODE_STRING_HEADER_STRUCT, CONFORMANT_VARYING_HEADER_STRUCT
+
+
+def _unpack_unique_ulong(data: ByteString, offset: int) -> tuple[int, int]:
+    present, offset = unpack_unique_pointer(data=data, offset=offset)
+    if not present:
+        return 0, offset
+
+    return ULONG_STRUCT.unpack_from(data, offset)[0], offset + ULONG_STRUCT.size
+
+
+@dataclass
+class BaseRegEnumValueResponse(ClientProtocolResponseBase):
+    value_name: str
+    value_type: RegValueType
+    value: bytes
+    data_size: int
+
+    @property
+    def data_len(self) -> int:
+        return len(self.value)
+
+    @classmethod
+    def from_bytes(cls, data: ByteString, base_offset: int = 0) -> BaseRegEnumValueResponse:
+        value_name, offset = unpack_rrp_unicode_string(data=data, offset=base_offset)
+        value_type, offset = _unpack_unique_ulong(data=data, offset=offset)
+
+        value = b''
+        value_present, offset = unpack_unique_pointer(data=data, offset=offset)
+        if value_present:
+            value, offset = unpack_conformant_varying_bytes(data=data, offset=offset)
+
+        data_size, offset = _unpack_unique_ulong(data=data, offset=offset)
+        _, offset = _unpack_unique_ulong(data=data, offset=offset)
+
+        return cls(
+            value_name=value_name,
+            value_type=RegValueType(value_type),
+            value=value,
+            data_size=data_size,
+            return_code=Win32ErrorCode(ULONG_STRUCT.unpack_from(data, offset)[0])
+        )
+
+    def __bytes__(self) -> bytes:
+        return b''.join([
+            pack_rrp_unicode_string(value=self.value_name),
+            pack_unique_pointer(referent=ULONG_STRUCT.pack(self.value_type), referent_id=0x00020004),
+            pack_unique_pointer(
+                referent=pack_conformant_varying_bytes(data=self.value, maximum_count=self.data_size),
+                referent_id=0x00020008
+            ),
+            pack_unique_pointer(referent=ULONG_STRUCT.pack(self.data_size), referent_id=0x0002000c),
+            pack_unique_pointer(referent=ULONG_STRUCT.pack(self.data_len), referent_id=0x00020010),
+            ULONG_STRUCT.pack(self.return_code)
+        ])
+
+    def __len__(self) -> int:
+        return len(self.__bytes__())
+
+
+@dataclass
+class BaseRegEnumValueRequest(ClientProtocolRequestBase):
+    # A `value_buffer_size` of `None` omits the data buffer, so that only the name, type, and data size of the value
+    # are retrieved.
+
+    OPERATION: ClassVar[Operation] = Operation.BASE_REG_ENUM_VALUE
+
+    key_handle: bytes
+    index: int
+    value_name_buffer_size: int = 512
+    value_buffer_size: Optional[int] = 256
+
+    @classmethod
+    def from_bytes(cls, data: ByteString, base_offset: int = 0) -> BaseRegEnumValueRequest:
+        data = memoryview(data)[base_offset:]
+
+        key_handle = bytes(data[:20])
+        index: int = ULONG_STRUCT.unpack_from(data, 20)[0]
+
+        _, value_name_buffer_size, _ = RRP_UNICODE_STRING_HEADER_STRUCT.unpack_from(data, 24)
+        _, offset = unpack_rrp_unicode_string(data=data, offset=24)
+        _, offset = _unpack_unique_ulong(data=data, offset=offset)
+
+        value_buffer_size: Optional[int] = None
+        value_present, offset = unpack_unique_pointer(data=data, offset=offset)
+        if value_present:
+            value_buffer_size = CONFORMANT_VARYING_HEADER_STRUCT.unpack_from(data, offset)[0]
+
+        return cls(
+            key_handle=key_handle,
+            index=index,
+            value_name_buffer_size=value_name_buffer_size,
+            value_buffer_size=value_buffer_size
+        )
+
+    def __bytes__(self) -> bytes:
+        return b''.join([
+            self.key_handle,
+            ULONG_STRUCT.pack(self.index),
+            pack_rrp_unicode_string(value='', maximum_length=self.value_name_buffer_size),
+            pack_unique_pointer(referent=ULONG_STRUCT.pack(RegValueType.REG_NONE), referent_id=0x00020004),
+            pack_unique_pointer(
+                referent=(
+                    pack_conformant_varying_bytes(data=b'', maximum_count=self.value_buffer_size)
+                    if self.value_buffer_size is not None else None
+                ),
+                referent_id=0x00020008
+            ),
+            pack_unique_pointer(referent=ULONG_STRUCT.pack(self.value_buffer_size or 0), referent_id=0x0002000c),
+            pack_unique_pointer(referent=ULONG_STRUCT.pack(0), referent_id=0x00020010)
+        ])
+
+    def __len__(self) -> int:
+        return len(self.__bytes__())
+
+
+BaseRegEnumValueResponse.REQUEST_CLASS = BaseRegEnumValueRequest
+BaseRegEnumValueRequest.RESPONSE_CLASS = BaseRegEnumValueResponse
+
+
+async def base_reg_enum_value(
+    rpc_connection: RPCConnection,
+    request: BaseRegEnumValueRequest,
+    raise_exception: bool = True
+) -> BaseRegEnumValueResponse:
+    """
+    Perform the `BaseRegEnumValue` operation.
+
+    https://docs.microsoft.com/en-us/openspecs/windows_protocols/ms-rrp/56e99ef9-05dc-4f24-bcd5-9cff00412f30
+
+    :param rpc_connection: An RPC connection with which to perform the operation.
+    :param request: The `BaseRegEnumValue` request.
+    :param raise_exception: Whether to raise an exception in case the response indicates an error occurred.
+    :return: The `BaseRegEnumValue` response.
+    """
+
+    return cast(
+        BaseRegEnumValueResponse,
+        await obtain_response(rpc_connection=rpc_connection, request=request, raise_exception=raise_exception)
+    )
@@ -0,0 +1,55 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import ClassVar, cast
+
+from msdsalgs.win32_error import Win32ErrorCode
+from rpc.connection import Connection as RPCConnection
+from rpc.utils.client_protocol_message import ClientProtocolRequestBase, ClientProtocolResponseBase, obtain_response
+from rpc.utils.types import DWORD
+
+from ms_rrp.operations import Operation
+from ms_rrp.structures.rpc_hkey import RpcHkey
+
+
+@dataclass
+class BaseRegFlushKeyResponse(ClientProtocolResponseBase):
+    _STRUCTURE: ClassVar[dict[str, tuple[...]]] = {
+        'return_code': (DWORD, Win32ErrorCode)
+    }
+
+
+@dataclass
+class BaseRegFlushKeyRequest(ClientProtocolRequestBase):
+    OPERATION: ClassVar[Operation] = Operation.BASE_REG_FLUSH_KEY
+
+    key_handle: bytes
+
+    _STRUCTURE: ClassVar[dict[str, tuple[...]]] = {
+        'key_handle': (RpcHkey,),
+    }
+
+
+BaseRegFlushKeyResponse.REQUEST_CLASS = BaseRegFlushKeyRequest
+BaseRegFlushKeyRequest.RESPONSE_CLASS = BaseRegFlushKeyResponse
+
+
+async def base_reg_flush_key(
+    rpc_connection: RPCConnection,
+    request: BaseRegFlushKeyRequest,
+    raise_exception: bool = True
+) -> BaseRegFlushKeyResponse:
+    """
+    Perform the `BaseRegFlushKey` operation.
+
+    [MS-RRP] section 3.1.5.12
+
+    :param rpc_connection: An RPC connection with which to perform the operation.
+    :param request: The `BaseRegFlushKey` request.
+    :param raise_exception: Whether to raise an exception in case the response indicates an error occurred.
+    :return: The `BaseRegFlushKey` response.
+    """
+
+    return cast(
+        BaseRegFlushKeyResponse,
+        await obtain_response(rpc_connection=rpc_connection, request=request, raise_exception=raise_exception)
+    )
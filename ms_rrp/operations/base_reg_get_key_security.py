@@ -0,0 +1,105 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import ClassVar, ByteString, cast
+
+from msdsalgs.win32_error import Win32ErrorCode
+from rpc.connection import Connection as RPCConnection
+from rpc.utils.client_protocol_message import ClientProtocolRequestBase, ClientProtocolResponseBase, obtain_response
+
+from ms_rrp.operations import Operation
+from ms_rrp.structures.ndr_helpers import ULONG_STRUCT
+from ms_rrp.structures.rpc_security_descriptor import pack_rpc_security_descriptor, unpack_rpc_security_descriptor
+from ms_rrp.structures.security_information import SecurityInformation
+
+
+@dataclass
+class BaseRegGetKeySecurityResponse(ClientProtocolResponseBase):
+    security_descriptor: bytes
+    # In case the buffer was too small, the size of the buffer required to hold the security descriptor.
+    security_descriptor_size: int
+
+    @classmethod
+    def from_bytes(cls, data: ByteString, base_offset: int = 0) -> BaseRegGetKeySecurityResponse:
+        security_descriptor, security_descriptor_size, offset = unpack_rpc_security_descriptor(
+            data=data,
+            offset=base_offset
+        )
+
+        return cls(
+            security_descriptor=security_descriptor,
+            security_descriptor_size=security_descriptor_size,
+            return_code=Win32ErrorCode(ULONG_STRUCT.unpack_from(data, offset)[0])
+        )
+
+    def __bytes__(self) -> bytes:
+        return b''.join([
+            pack_rpc_security_descriptor(
+                security_descriptor=self.security_descriptor,
+                buffer_size=self.security_descriptor_size
+            ),
+            ULONG_STRUCT.pack(self.return_code)
+        ])
+
+    def __len__(self) -> int:
+        return len(self.__bytes__())
+
+
+@dataclass
+class BaseRegGetKeySecurityRequest(ClientProtocolRequestBase):
+    OPERATION: ClassVar[Operation] = Operation.BASE_REG_GET_KEY_SECURITY
+
+    key_handle: bytes
+    security_information: SecurityInformation = (
+        SecurityInformation.OWNER_SECURITY_INFORMATION
+        | SecurityInformation.GROUP_SECURITY_INFORMATION
+        | SecurityInformation.DACL_SECURITY_INFORMATION
+    )
+    security_descriptor_buffer_size: int = 1024
+
+    @classmethod
+    def from_bytes(cls, data: ByteString, base_offset: int = 0) -> BaseRegGetKeySecurityRequest:
+        data = memoryview(data)[base_offset:]
+
+        _, security_descriptor_buffer_size, _ = unpack_rpc_security_descriptor(data=data, offset=24)
+
+        return cls(
+            key_handle=bytes(data[:20]),
+            security_information=SecurityInformation(ULONG_STRUCT.unpack_from(data, 20)[0]),
+            security_descriptor_buffer_size=security_descriptor_buffer_size
+        )
+
+    def __bytes__(self) -> bytes:
+        return b''.join([
+            self.key_handle,
+            ULONG_STRUCT.pack(self.security_information),
+            pack_rpc_security_descriptor(security_descriptor=b'', buffer_size=self.security_descriptor_buffer_size)
+        ])
+
+    def __len__(self) -> int:
+        return len(self.__bytes__())
+
+
+BaseRegGetKeySecurityResponse.REQUEST_CLASS = BaseRegGetKeySecurityRequest
+BaseRegGetKeySecurityRequest.RESPONSE_CLASS = BaseRegGetKeySecurityResponse
+
+
+async def base_reg_get_key_security(
+    rpc_connection: RPCConnection,
+    request: BaseRegGetKeySecurityRequest,
+    raise_exception: bool = True
+) -> BaseRegGetKeySecurityResponse:
+    """
+    Perform the `BaseRegGetKeySecurity` operation.
+
+    [MS-RRP] section 3.1.5.13
+
+    :param rpc_connection: An RPC connection with which to perform the operation.
+    :param request: The `BaseRegGetKeySecurity` request.
+    :param raise_exception: Whether to raise an exception in case the response indicates an error occurred.
+    :return: The `BaseRegGetKeySecurity` response.
+    """
+
+    return cast(
+        BaseRegGetKeySecurityResponse,
+        await obtain_response(rpc_connection=rpc_connection, request=request, raise_exception=raise_exception)
+    )
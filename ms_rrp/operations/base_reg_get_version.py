@@ -0,0 +1,58 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import ClassVar, cast
+
+from msdsalgs.win32_error import Win32ErrorCode
+from rpc.connection import Connection as RPCConnection
+from rpc.utils.client_protocol_message import ClientProtocolRequestBase, ClientProtocolResponseBase, obtain_response
+from rpc.utils.types import DWORD
+
+from ms_rrp.operations import Operation
+from ms_rrp.structures.rpc_hkey import RpcHkey
+
+
+@dataclass
+class BaseRegGetVersionResponse(ClientProtocolResponseBase):
+    version: int
+
+    _STRUCTURE: ClassVar[dict[str, tuple[...]]] = {
+        'version': (DWORD,),
+        'return_code': (DWORD, Win32ErrorCode)
+    }
+
+
+@dataclass
+class BaseRegGetVersionRequest(ClientProtocolRequestBase):
+    OPERATION: ClassVar[Operation] = Operation.BASE_REG_GET_VERSION
+
+    key_handle: bytes
+
+    _STRUCTURE: ClassVar[dict[str, tuple[...]]] = {
+        'key_handle': (RpcHkey,),
+    }
+
+
+BaseRegGetVersionResponse.REQUEST_CLASS = BaseRegGetVersionRequest
+BaseRegGetVersionRequest.RESPONSE_CLASS = BaseRegGetVersionResponse
+
+
+async def base_reg_get_version(
+    rpc_connection: RPCConnection,
+    request: BaseRegGetVersionRequest,
+    raise_exception: bool = True
+) -> BaseRegGetVersionResponse:
+    """
+    Perform the `BaseRegGetVersion` operation.
+
+    [MS-RRP] section 3.1.5.24
+
+    :param rpc_connection: An RPC connection with which to perform the operation.
+    :param request: The `BaseRegGetVersion` request.
+    :param raise_exception: Whether to raise an exception in case the response indicates an error occurred.
+    :return: The `BaseRegGetVersion` response.
+    """
+
+    return cast(
+        BaseRegGetVersionResponse,
+        await obtain_response(rpc_connection=rpc_connection, request=request, raise_exception=raise_exception)
+    )
@@ -0,0 +1,126 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import ClassVar, ByteString, cast
+from struct import Struct
+from datetime import datetime
+
+from msdsalgs.win32_error import Win32ErrorCode
+from rpc.connection import Connection as RPCConnection
+from rpc.utils.client_protocol_message import ClientProtocolRequestBase, ClientProtocolResponseBase, obtain_response
+
+from ms_rrp.operations import Operation
+from ms_rrp.structures.filetime import filetime_to_datetime
+from ms_rrp.structures.ndr_helpers import pack_rrp_unicode_string, unpack_rrp_unicode_string
+
+
+@dataclass
+class BaseRegQueryInfoKeyResponse(ClientProtocolResponseBase):
+    class_name: str
+    num_sub_keys: int
+    max_sub_key_name_length: int
+    max_class_length: int
+    num_values: int
+    max_value_name_length: int
+    max_value_length: int
+    security_descriptor_size: int
+    last_write_time: int
+
+    _INFO_STRUCT: ClassVar[Struct] = Struct('<7IQI')
+
+    @property
+    def last_write_datetime(self) -> datetime:
+        return filetime_to_datetime(filetime=self.last_write_time)
+
+    @classmethod
+    def from_bytes(cls, data: ByteString, base_offset: int = 0) -> BaseRegQueryInfoKeyResponse:
+        class_name, offset = unpack_rrp_unicode_string(data=data, offset=base_offset)
+
+        (
+            num_sub_keys,
+            max_sub_key_name_length,
+            max_class_length,
+            num_values,
+            max_value_name_length,
+            max_value_length,
+            security_descriptor_size,
+            last_write_time,
+            return_code
+        ) = cls._INFO_STRUCT.unpack_from(data, offset)
+
+        return cls(
+            class_name=class_name,
+            num_sub_keys=num_sub_keys,
+            max_sub_key_name_length=max_sub_key_name_length,
+            max_class_length=max_class_length,
+            num_values=num_values,
+            max_value_name_length=max_value_name_length,
+            max_value_length=max_value_length,
+            security_descriptor_size=security_descriptor_size,
+            last_write_time=last_write_time,
+            return_code=Win32ErrorCode(return_code)
+        )
+
+    def __bytes__(self) -> bytes:
+        return pack_rrp_unicode_string(value=self.class_name) + self._INFO_STRUCT.pack(
+            self.num_sub_keys,
+            self.max_sub_key_name_length,
+            self.max_class_length,
+            self.num_values,
+            self.max_value_name_length,
+            self.max_value_length,
+            self.security_descriptor_size,
+            self.last_write_time,
+            self.return_code
+        )
+
+    def __len__(self) -> int:
+        return len(self.__bytes__())
+
+
+@dataclass
+class BaseRegQueryInfoKeyRequest(ClientProtocolRequestBase):
+    OPERATION: ClassVar[Operation] = Operation.BASE_REG_QUERY_INFO_KEY
+
+    key_handle: bytes
+    class_buffer_size: int = 512
+
+    @classmethod
+    def from_bytes(cls, data: ByteString, base_offset: int = 0) -> BaseRegQueryInfoKeyRequest:
+        data = memoryview(data)[base_offset:]
+
+        return cls(
+            key_handle=bytes(data[:20]),
+            class_buffer_size=Struct('<H').unpack_from(data, 22)[0]
+        )
+
+    def __bytes__(self) -> bytes:
+        return self.key_handle + pack_rrp_unicode_string(value='', maximum_length=self.class_buffer_size)
+
+    def __len__(self) -> int:
+        return len(self.__bytes__())
+
+
+BaseRegQueryInfoKeyResponse.REQUEST_CLASS = BaseRegQueryInfoKeyRequest
+BaseRegQueryInfoKeyRequest.RESPONSE_CLASS = BaseRegQueryInfoKeyResponse
+
+
+async def base_reg_query_info_key(
+    rpc_connection: RPCConnection,
+    request: BaseRegQueryInfoKeyRequest,
+    raise_exception: bool = True
+) -> BaseRegQueryInfoKeyResponse:
+    """
+    Perform the `BaseRegQueryInfoKey` operation.
+
+    https://docs.microsoft.com/en-us/openspecs/windows_protocols/ms-rrp/a886ba66-5c7b-4331-bacd-7c77edc95d85
+
+    :param rpc_connection: An RPC connection with which to perform the operation.
+    :param request: The `BaseRegQueryInfoKey` request.
+    :param raise_exception: Whether to raise an exception in case the response indicates an error occurred.
+    :return: The `BaseRegQueryInfoKey` response.
+    """
+
+    return cast(
+        BaseRegQueryInfoKeyResponse,
+        await obtain_response(rpc_connection=rpc_connection, request=request, raise_exception=raise_exception)
+    )
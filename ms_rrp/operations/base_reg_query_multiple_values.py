@@ -0,0 +1,182 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import ClassVar, ByteString, cast
+from struct import Struct
+
+from msdsalgs.win32_error import Win32ErrorCode
+from rpc.connection import Connection as RPCConnection
+from rpc.utils.client_protocol_message import ClientProtocolRequestBase, ClientProtocolResponseBase, obtain_response
+
+from ms_rrp.operations import Operation
+from ms_rrp.structures.reg_value_type import RegValueType
+from ms_rrp.structures.ndr_helpers import pack_rrp_unicode_string, unpack_rrp_unicode_string, pack_unique_pointer, \
+    unpack_unique_pointer, pack_conformant_varying_bytes, unpack_conformant_varying_bytes, ULONG_STRUCT, \
+    CONFORMANT_VARYING_HEADER_STRUCT, DEFAULT_REFERENT_ID
+
+_RVALENT_STRUCT = Struct('<4I')
+
+
+@dataclass
+class ValueEntry:
+    value_name: str
+    value_type: RegValueType
+    value: bytes
+
+
+def _pack_value_entries(value_names: list[str], value_entries: list[tuple[int, int, int]]) -> bytes:
+    return b''.join([
+        CONFORMANT_VARYING_HEADER_STRUCT.pack(len(value_names), 0, len(value_names)),
+        *(
+            _RVALENT_STRUCT.pack(DEFAULT_REFERENT_ID + 4 * (2 * i + 1), value_len, value_offset, value_type)
+            for i, (value_len, value_offset, value_type) in enumerate(value_entries)
+        ),
+        *(
+            pack_rrp_unicode_string(value=value_name, referent_id=DEFAULT_REFERENT_ID + 4 * (2 * i + 2))
+            for i, value_name in enumerate(value_names)
+        )
+    ])
+
+
+def _unpack_value_entries(data: ByteString, offset: int) -> tuple[list[str], list[tuple[int, int, int]], int]:
+    _, _, num_values = CONFORMANT_VARYING_HEADER_STRUCT.unpack_from(data, offset)
+    offset += CONFORMANT_VARYING_HEADER_STRUCT.size
+
+    name_pointers: list[int] = []
+    value_entries: list[tuple[int, int, int]] = []
+    for _ in range(num_values):
+        name_pointer, value_len, value_offset, value_type = _RVALENT_STRUCT.unpack_from(data, offset)
+        offset += _RVALENT_STRUCT.size
+        name_pointers.append(name_pointer)
+        value_entries.append((value_len, value_offset, value_type))
+
+    value_names: list[str] = []
+    for name_pointer in name_pointers:
+        value_name = ''
+        if name_pointer != 0:
+            value_name, offset = unpack_rrp_unicode_string(data=data, offset=offset)
+        value_names.append(value_name)
+
+    return value_names, value_entries, offset
+
+
+@dataclass
+class BaseRegQueryMultipleValuesResponse(ClientProtocolResponseBase):
+    value_entries: list[ValueEntry]
+    total_size: int
+
+    @classmethod
+    def from_bytes(cls, data: ByteString, base_offset: int = 0) -> BaseRegQueryMultipleValuesResponse:
+        value_names, raw_value_entries, offset = _unpack_value_entries(data=data, offset=base_offset)
+
+        value_buffer = b''
+        value_buffer_present, offset = unpack_unique_pointer(data=data, offset=offset)
+        if value_buffer_present:
+            value_buffer, offset = unpack_conformant_varying_bytes(data=data, offset=offset)
+
+        total_size: int = ULONG_STRUCT.unpack_from(data, offset)[0]
+        offset += ULONG_STRUCT.size
+
+        return cls(
+            value_entries=[
+                ValueEntry(
+                    value_name=value_name,
+                    value_type=RegValueType(value_type),
+                    value=value_buffer[value_offset:value_offset + value_len]
+                )
+                for value_name, (value_len, value_offset, value_type) in zip(value_names, raw_value_entries)
+            ],
+            total_size=total_size,
+            return_code=Win32ErrorCode(ULONG_STRUCT.unpack_from(data, offset)[0])
+        )
+
+    def __bytes__(self) -> bytes:
+        raw_value_entries: list[tuple[int, int, int]] = []
+        value_offset = 0
+        for value_entry in self.value_entries:
+            raw_value_entries.append((len(value_entry.value), value_offset, value_entry.value_type))
+            value_offset += len(value_entry.value)
+
+        return b''.join([
+            _pack_value_entries(
+                value_names=[value_entry.value_name for value_entry in self.value_entries],
+                value_entries=raw_value_entries
+            ),
+            pack_unique_pointer(
+                referent=pack_conformant_varying_bytes(
+                    data=b''.join(value_entry.value for value_entry in self.value_entries),
+                    maximum_count=self.total_size
+                )
+            ),
+            ULONG_STRUCT.pack(self.total_size),
+            ULONG_STRUCT.pack(self.return_code)
+        ])
+
+    def __len__(self) -> int:
+        return len(self.__bytes__())
+
+
+@dataclass
+class BaseRegQueryMultipleValuesRequest(ClientProtocolRequestBase):
+    OPERATION: ClassVar[Operation] = Operation.BASE_REG_QUERY_MULTIPLE_VALUES
+
+    key_handle: bytes
+    value_names: list[str]
+    value_buffer_size: int
+
+    @classmethod
+    def from_bytes(cls, data: ByteString, base_offset: int = 0) -> BaseRegQueryMultipleValuesRequest:
+        data = memoryview(data)[base_offset:]
+
+        value_names, _, offset = _unpack_value_entries(data=data, offset=20)
+        # Skip `num_vals`, which is the same as the number of value names.
+        offset += ULONG_STRUCT.size
+
+        _, offset = unpack_unique_pointer(data=data, offset=offset)
+        _, offset = unpack_conformant_varying_bytes(data=data, offset=offset)
+
+        return cls(
+            key_handle=bytes(data[:20]),
+            value_names=value_names,
+            value_buffer_size=ULONG_STRUCT.unpack_from(data, offset)[0]
+        )
+
+    def __bytes__(self) -> bytes:
+        return b''.join([
+            self.key_handle,
+            _pack_value_entries(value_names=self.value_names, value_entries=[(0, 0, 0)] * len(self.value_names)),
+            ULONG_STRUCT.pack(len(self.value_names)),
+            pack_unique_pointer(
+                referent=pack_conformant_varying_bytes(data=bytes(self.value_buffer_size)),
+                referent_id=DEFAULT_REFERENT_ID + 4 * (2 * len(self.value_names) + 1)
+            ),
+            ULONG_STRUCT.pack(self.value_buffer_size)
+        ])
+
+    def __len__(self) -> int:
+        return len(self.__bytes__())
+
+
+BaseRegQueryMultipleValuesResponse.REQUEST_CLASS = BaseRegQueryMultipleValuesRequest
+BaseRegQueryMultipleValuesRequest.RESPONSE_CLASS = BaseRegQueryMultipleValuesResponse
+
+
+async def base_reg_query_multiple_values(
+    rpc_connection: RPCConnection,
+    request: BaseRegQueryMultipleValuesRequest,
+    raise_exception: bool = True
+) -> BaseRegQueryMultipleValuesResponse:
+    """
+    Perform the `BaseRegQueryMultipleValues` operation.
+
+    [MS-RRP] section 3.1.5.26
+
+    :param rpc_connection: An RPC connection with which to perform the operation.
+    :param request: The `BaseRegQueryMultipleValues` request.
+    :param raise_exception: Whether to raise an exception in case the response indicates an error occurred.
+    :return: The `BaseRegQueryMultipleValues` response.
+    """
+
+    return cast(
+        BaseRegQueryMultipleValuesResponse,
+        await obtain_response(rpc_connection=rpc_connection, request=request, raise_exception=raise_exception)
+    )
@@ -0,0 +1,48 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import ClassVar, cast
+
+from rpc.connection import Connection as RPCConnection
+from rpc.utils.client_protocol_message import obtain_response
+
+from ms_rrp.operations import Operation
+from ms_rrp.operations.base_reg_query_multiple_values import BaseRegQueryMultipleValuesRequest, \
+    BaseRegQueryMultipleValuesResponse
+
+
+@dataclass
+class BaseRegQueryMultipleValues2Response(BaseRegQueryMultipleValuesResponse):
+    # The layout is that of the `BaseRegQueryMultipleValues` response, except that `total_size` is the size of the
+    # buffer required to hold the values rather than the size of the buffer.
+    pass
+
+
+@dataclass
+class BaseRegQueryMultipleValues2Request(BaseRegQueryMultipleValuesRequest):
+    OPERATION: ClassVar[Operation] = Operation.BASE_REG_QUERY_MULTIPLE_VALUES2
+
+
+BaseRegQueryMultipleValues2Response.REQUEST_CLASS = BaseRegQueryMultipleValues2Request
+BaseRegQueryMultipleValues2Request.RESPONSE_CLASS = BaseRegQueryMultipleValues2Response
+
+
+async def base_reg_query_multiple_values2(
+    rpc_connection: RPCConnection,
+    request: BaseRegQueryMultipleValues2Request,
+    raise_exception: bool = True
+) -> BaseRegQueryMultipleValues2Response:
+    """
+    Perform the `BaseRegQueryMultipleValues2` operation.
+
+    [MS-RRP] section 3.1.5.30
+
+    :param rpc_connection: An RPC connection with which to perform the operation.
+    :param request: The `BaseRegQueryMultipleValues2` request.
+    :param raise_exception: Whether to raise an exception in case the response indicates an error occurred.
+    :return: The `BaseRegQueryMultipleValues2` response.
+    """
+
+    return cast(
+        BaseRegQueryMultipleValues2Response,
+        await obtain_response(rpc_connection=rpc_connection, request=request, raise_exception=raise_exception)
+    )
@@ -1,6 +1,6 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import ClassVar, cast
+from typing import ClassVar, ByteString, cast
 
 from msdsalgs.win32_error import Win32ErrorCode
 from rpc.connection import Connection as RPCConnection
@@ -9,8 +9,8 @@ from rpc.utils.types import LPDWORD, DWORD, LPBYTE_VAR
 
 from ms_rrp.operations import Operation
 from ms_rrp.structures.reg_value_type import RegValueType
-from ms_rrp.structures.rrp_unicode_string import RRPUnicodeString
-from ms_rrp.structures.rpc_hkey import RpcHkey
+from ms_rrp.structures.ndr_helpers import pack_rrp_unicode_string, unpack_rrp_unicode_string, pack_unique_pointer, \
+    unpack_unique_pointer, pack_conformant_varying_bytes, ULONG_STRUCT, CONFORMANT_VARYING_HEADER_STRUCT
 
 
 @dataclass
@@ -39,6 +39,8 @@ class BaseRegQueryValueResponse(ClientProtocolResponseBase):
 
 @dataclass
 class BaseRegQueryValueRequest(ClientProtocolRequestBase):
+    # Only the size of the data buffer is transmitted; the server allocates the buffer and returns its contents.
+
     OPERATION: ClassVar[Operation] = Operation.BASE_REG_QUERY_VALUE
 
     key_handle: bytes
@@ -46,26 +48,46 @@ class BaseRegQueryValueRequest(ClientProtocolRequestBase):
     value_buffer_size: int = 32
     value_type: RegValueType = RegValueType.REG_NONE
 
-    _STRUCTURE: ClassVar[dict[str, tuple[...]]] = {
-        'key_handle': (RpcHkey,),
-        'value_name': (RRPUnicodeString,),
-        'value_type': (LPDWORD, RegValueType),
-        '__data': (LPBYTE_VAR,),
-        '__data_len': (LPDWORD,),
-        '__data_size': (LPDWORD,)
-    }
-
-    @property
-    def data(self) -> bytes:
-        return bytes(self.value_buffer_size)
-
-    @property
-    def data_len(self) -> int:
-        return self.value_buffer_size
-
-    @property
-    def data_size(self) -> int:
-        return self.value_buffer_size
+    @classmethod
+    def from_bytes(cls, data: ByteString, base_offset: int = 0) -> BaseRegQueryValueRequest:
+        data = memoryview(data)[base_offset:]
+
+        key_handle = bytes(data[:20])
+        value_name, offset = unpack_rrp_unicode_string(data=data, offset=20)
+
+        value_type = RegValueType.REG_NONE
+        value_type_present, offset = unpack_unique_pointer(data=data, offset=offset)
+        if value_type_present:
+            value_type = RegValueType(ULONG_STRUCT.unpack_from(data, offset)[0])
+            offset += ULONG_STRUCT.size
+
+        value_buffer_size = 0
+        value_present, offset = unpack_unique_pointer(data=data, offset=offset)
+        if value_present:
+            value_buffer_size = CONFORMANT_VARYING_HEADER_STRUCT.unpack_from(data, offset)[0]
+
+        return cls(
+            key_handle=key_handle,
+            value_name=value_name,
+            value_buffer_size=value_buffer_size,
+            value_type=value_type
+        )
+
+    def __bytes__(self) -> bytes:
+        return b''.join([
+            self.key_handle,
+            pack_rrp_unicode_string(value=self.value_name),
+            pack_unique_pointer(referent=ULONG_STRUCT.pack(self.value_type), referent_id=0x00020004),
+            pack_unique_pointer(
+                referent=pack_conformant_varying_bytes(data=b'', maximum_count=self.value_buffer_size),
+                referent_id=0x00020008
+            ),
+            pack_unique_pointer(referent=ULONG_STRUCT.pack(self.value_buffer_size), referent_id=0x0002000c),
+            pack_unique_pointer(referent=ULONG_STRUCT.pack(0), referent_id=0x00020010)
+        ])
+
+    def __len__(self) -> int:
+        return len(self.__bytes__())
 
 
 BaseRegQueryValueResponse.REQUEST_CLASS = BaseRegQueryValueRequest
@@ -0,0 +1,62 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import ClassVar, cast
+
+from msdsalgs.win32_error import Win32ErrorCode
+from rpc.connection import Connection as RPCConnection
+from rpc.utils.client_protocol_message import ClientProtocolRequestBase, ClientProtocolResponseBase, obtain_response
+from rpc.utils.types import DWORD
+
+from ms_rrp.operations import Operation
+from ms_rrp.structures.rpc_hkey import RpcHkey
+from ms_rrp.structures.rrp_unicode_string import RRPUnicodeString
+
+
+@dataclass
+class BaseRegReplaceKeyResponse(ClientProtocolResponseBase):
+    _STRUCTURE: ClassVar[dict[str, tuple[...]]] = {
+        'return_code': (DWORD, Win32ErrorCode)
+    }
+
+
+@dataclass
+class BaseRegReplaceKeyRequest(ClientProtocolRequestBase):
+    OPERATION: ClassVar[Operation] = Operation.BASE_REG_REPLACE_KEY
+
+    key_handle: bytes
+    sub_key_name: str
+    new_file_path: str
+    old_file_path: str
+
+    _STRUCTURE: ClassVar[dict[str, tuple[...]]] = {
+        'key_handle': (RpcHkey,),
+        'sub_key_name': (RRPUnicodeString,),
+        'new_file_path': (RRPUnicodeString,),
+        'old_file_path': (RRPUnicodeString,)
+    }
+
+
+BaseRegReplaceKeyResponse.REQUEST_CLASS = BaseRegReplaceKeyRequest
+BaseRegReplaceKeyRequest.RESPONSE_CLASS = BaseRegReplaceKeyResponse
+
+
+async def base_reg_replace_key(
+    rpc_connection: RPCConnection,
+    request: BaseRegReplaceKeyRequest,
+    raise_exception: bool = True
+) -> BaseRegReplaceKeyResponse:
+    """
+    Perform the `BaseRegReplaceKey` operation.
+
+    [MS-RRP] section 3.1.5.18
+
+    :param rpc_connection: An RPC connection with which to perform the operation.
+    :param request: The `BaseRegReplaceKey` request.
+    :param raise_exception: Whether to raise an exception in case the response indicates an error occurred.
+    :return: The `BaseRegReplaceKey` response.
+    """
+
+    return cast(
+        BaseRegReplaceKeyResponse,
+        await obtain_response(rpc_connection=rpc_connection, request=request, raise_exception=raise_exception)
+    )
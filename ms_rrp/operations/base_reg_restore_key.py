@@ -0,0 +1,61 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import ClassVar, cast
+
+from msdsalgs.win32_error import Win32ErrorCode
+from rpc.connection import Connection as RPCConnection
+from rpc.utils.client_protocol_message import ClientProtocolRequestBase, ClientProtocolResponseBase, obtain_response
+from rpc.utils.types import DWORD
+
+from ms_rrp.operations import Operation
+from ms_rrp.structures.restore_key_flags import RestoreKeyFlags
+from ms_rrp.structures.rpc_hkey import RpcHkey
+from ms_rrp.structures.rrp_unicode_string import RRPUnicodeString
+
+
+@dataclass
+class BaseRegRestoreKeyResponse(ClientProtocolResponseBase):
+    _STRUCTURE: ClassVar[dict[str, tuple[...]]] = {
+        'return_code': (DWORD, Win32ErrorCode)
+    }
+
+
+@dataclass
+class BaseRegRestoreKeyRequest(ClientProtocolRequestBase):
+    OPERATION: ClassVar[Operation] = Operation.BASE_REG_RESTORE_KEY
+
+    key_handle: bytes
+    file_path: str
+    flags: RestoreKeyFlags = RestoreKeyFlags()
+
+    _STRUCTURE: ClassVar[dict[str, tuple[...]]] = {
+        'key_handle': (RpcHkey,),
+        'file_path': (RRPUnicodeString,),
+        'flags': (DWORD, RestoreKeyFlags.from_int)
+    }
+
+
+BaseRegRestoreKeyResponse.REQUEST_CLASS = BaseRegRestoreKeyRequest
+BaseRegRestoreKeyRequest.RESPONSE_CLASS = BaseRegRestoreKeyResponse
+
+
+async def base_reg_restore_key(
+    rpc_connection: RPCConnection,
+    request: BaseRegRestoreKeyRequest,
+    raise_exception: bool = True
+) -> BaseRegRestoreKeyResponse:
+    """
+    Perform the `BaseRegRestoreKey` operation.
+
+    [MS-RRP] section 3.1.5.19
+
+    :param rpc_connection: An RPC connection with which to perform the operation.
+    :param request: The `BaseRegRestoreKey` request.
+    :param raise_exception: Whether to raise an exception in case the response indicates an error occurred.
+    :return: The `BaseRegRestoreKey` response.
+    """
+
+    return cast(
+        BaseRegRestoreKeyResponse,
+        await obtain_response(rpc_connection=rpc_connection, request=request, raise_exception=raise_exception)
+    )
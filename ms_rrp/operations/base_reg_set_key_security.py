@@ -0,0 +1,77 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import ClassVar, ByteString, cast
+
+from msdsalgs.win32_error import Win32ErrorCode
+from rpc.connection import Connection as RPCConnection
+from rpc.utils.client_protocol_message import ClientProtocolRequestBase, ClientProtocolResponseBase, obtain_response
+from rpc.utils.types import DWORD
+
+from ms_rrp.operations import Operation
+from ms_rrp.structures.ndr_helpers import ULONG_STRUCT
+from ms_rrp.structures.rpc_security_descriptor import pack_rpc_security_descriptor, unpack_rpc_security_descriptor
+from ms_rrp.structures.security_information import SecurityInformation
+
+
+@dataclass
+class BaseRegSetKeySecurityResponse(ClientProtocolResponseBase):
+    _STRUCTURE: ClassVar[dict[str, tuple[...]]] = {
+        'return_code': (DWORD, Win32ErrorCode)
+    }
+
+
+@dataclass
+class BaseRegSetKeySecurityRequest(ClientProtocolRequestBase):
+    OPERATION: ClassVar[Operation] = Operation.BASE_REG_SET_KEY_SECURITY
+
+    key_handle: bytes
+    security_information: SecurityInformation
+    security_descriptor: bytes
+
+    @classmethod
+    def from_bytes(cls, data: ByteString, base_offset: int = 0) -> BaseRegSetKeySecurityRequest:
+        data = memoryview(data)[base_offset:]
+
+        security_descriptor, _, _ = unpack_rpc_security_descriptor(data=data, offset=24)
+
+        return cls(
+            key_handle=bytes(data[:20]),
+            security_information=SecurityInformation(ULONG_STRUCT.unpack_from(data, 20)[0]),
+            security_descriptor=security_descriptor
+        )
+
+    def __bytes__(self) -> bytes:
+        return b''.join([
+            self.key_handle,
+            ULONG_STRUCT.pack(self.security_information),
+            pack_rpc_security_descriptor(security_descriptor=self.security_descriptor)
+        ])
+
+    def __len__(self) -> int:
+        return len(self.__bytes__())
+
+
+BaseRegSetKeySecurityResponse.REQUEST_CLASS = BaseRegSetKeySecurityRequest
+BaseRegSetKeySecurityRequest.RESPONSE_CLASS = BaseRegSetKeySecurityResponse
+
+
+async def base_reg_set_key_security(
+    rpc_connection: RPCConnection,
+    request: BaseRegSetKeySecurityRequest,
+    raise_exception: bool = True
+) -> BaseRegSetKeySecurityResponse:
+    """
+    Perform the `BaseRegSetKeySecurity` operation.
+
+    [MS-RRP] section 3.1.5.21
+
+    :param rpc_connection: An RPC connection with which to perform the operation.
+    :param request: The `BaseRegSetKeySecurity` request.
+    :param raise_exception: Whether to raise an exception in case the response indicates an error occurred.
+    :return: The `BaseRegSetKeySecurity` response.
+    """
+
+    return cast(
+        BaseRegSetKeySecurityResponse,
+        await obtain_response(rpc_connection=rpc_connection, request=request, raise_exception=raise_exception)
+    )
@@ -0,0 +1,58 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import ClassVar, cast
+
+from msdsalgs.win32_error import Win32ErrorCode
+from rpc.connection import Connection as RPCConnection
+from rpc.utils.client_protocol_message import ClientProtocolRequestBase, ClientProtocolResponseBase, obtain_response
+from rpc.utils.types import DWORD
+
+from ms_rrp.operations import Operation
+from ms_rrp.structures.rpc_hkey import RpcHkey
+from ms_rrp.structures.rrp_unicode_string import RRPUnicodeString
+
+
+@dataclass
+class BaseRegUnLoadKeyResponse(ClientProtocolResponseBase):
+    _STRUCTURE: ClassVar[dict[str, tuple[...]]] = {
+        'return_code': (DWORD, Win32ErrorCode)
+    }
+
+
+@dataclass
+class BaseRegUnLoadKeyRequest(ClientProtocolRequestBase):
+    OPERATION: ClassVar[Operation] = Operation.BASE_REG_UN_LOAD_KEY
+
+    key_handle: bytes
+    sub_key_name: str
+
+    _STRUCTURE: ClassVar[dict[str, tuple[...]]] = {
+        'key_handle': (RpcHkey,),
+        'sub_key_name': (RRPUnicodeString,)
+    }
+
+
+BaseRegUnLoadKeyResponse.REQUEST_CLASS = BaseRegUnLoadKeyRequest
+BaseRegUnLoadKeyRequest.RESPONSE_CLASS = BaseRegUnLoadKeyResponse
+
+
+async def base_reg_un_load_key(
+    rpc_connection: RPCConnection,
+    request: BaseRegUnLoadKeyRequest,
+    raise_exception: bool = True
+) -> BaseRegUnLoadKeyResponse:
+    """
+    Perform the `BaseRegUnLoadKey` operation.
+
+    [MS-RRP] section 3.1.5.23
+
+    :param rpc_connection: An RPC connection with which to perform the operation.
+    :param request: The `BaseRegUnLoadKey` request.
+    :param raise_exception: Whether to raise an exception in case the response indicates an error occurred.
+    :return: The `BaseRegUnLoadKey` response.
+    """
+
+    return cast(
+        BaseRegUnLoadKeyResponse,
+        await obtain_response(rpc_connection=rpc_connection, request=request, raise_exception=raise_exception)
+    )
@@ -0,0 +1,60 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import ClassVar, AsyncIterator, cast
+from contextlib import asynccontextmanager
+
+from rpc.connection import Connection as RPCConnection
+from rpc.utils.client_protocol_message import obtain_response
+
+from ms_rrp.operations import Operation, OpenRootKeyRequest, OpenRootKeyResponse
+from ms_rrp.operations.base_reg_close_key import base_reg_close_key, BaseRegCloseKeyRequest
+
+
+@dataclass
+class OpenCurrentConfigResponse(OpenRootKeyResponse):
+    pass
+
+
+@dataclass
+class OpenCurrentConfigRequest(OpenRootKeyRequest):
+    OPERATION: ClassVar[Operation] = Operation.OPEN_CURRENT_CONFIG
+
+
+OpenCurrentConfigResponse.REQUEST_CLASS = OpenCurrentConfigRequest
+OpenCurrentConfigRequest.RESPONSE_CLASS = OpenCurrentConfigResponse
+
+
+@asynccontextmanager
+async def open_current_config(
+    rpc_connection: RPCConnection,
+    request: OpenCurrentConfigRequest,
+    raise_exception: bool = True
+) -> AsyncIterator[OpenCurrentConfigResponse]:
+    """
+    Perform the `OpenCurrentConfig` operation.
+
+    [MS-RRP] section 3.1.5.25
+
+    :param rpc_connection: An RPC connection with which to perform the operation.
+    :param request: The `OpenCurrentConfig` request.
+    :param raise_exception: Whether to raise an exception in case the response indicates an error occurred.
+    :return: The `OpenCurrentConfig` response.
+    """
+
+    open_current_config_response = cast(
+        OpenCurrentConfigResponse,
+        await obtain_response(
+            rpc_connection=rpc_connection,
+            request=request,
+            raise_exception=raise_exception
+        )
+    )
+
+    yield open_current_config_response
+
+    await base_reg_close_key(
+        rpc_connection=rpc_connection,
+        request=BaseRegCloseKeyRequest(
+            key_handle=open_current_config_response.key_handle
+        )
+    )
@@ -0,0 +1,60 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import ClassVar, AsyncIterator, cast
+from contextlib import asynccontextmanager
+
+from rpc.connection import Connection as RPCConnection
+from rpc.utils.client_protocol_message import obtain_response
+
+from ms_rrp.operations import Operation, OpenRootKeyRequest, OpenRootKeyResponse
+from ms_rrp.operations.base_reg_close_key import base_reg_close_key, BaseRegCloseKeyRequest
+
+
+@dataclass
+class OpenPerformanceNlsTextResponse(OpenRootKeyResponse):
+    pass
+
+
+@dataclass
+class OpenPerformanceNlsTextRequest(OpenRootKeyRequest):
+    OPERATION: ClassVar[Operation] = Operation.OPEN_PERFORMANCE_NLS_TEXT
+
+
+OpenPerformanceNlsTextResponse.REQUEST_CLASS = OpenPerformanceNlsTextRequest
+OpenPerformanceNlsTextRequest.RESPONSE_CLASS = OpenPerformanceNlsTextResponse
+
+
+@asynccontextmanager
+async def open_performance_nls_text(
+    rpc_connection: RPCConnection,
+    request: OpenPerformanceNlsTextRequest,
+    raise_exception: bool = True
+) -> AsyncIterator[OpenPerformanceNlsTextResponse]:
+    """
+    Perform the `OpenPerformanceNlsText` operation.
+
+    [MS-RRP] section 3.1.5.29
+
+    :param rpc_connection: An RPC connection with which to perform the operation.
+    :param request: The `OpenPerformanceNlsText` request.
+    :param raise_exception: Whether to raise an exception in case the response indicates an error occurred.
+    :return: The `OpenPerformanceNlsText` response.
+    """
+
+    open_performance_nls_text_response = cast(
+        OpenPerformanceNlsTextResponse,
+        await obtain_response(
+            rpc_connection=rpc_connection,
+            request=request,
+            raise_exception=raise_exception
+        )
+    )
+
+    yield open_performance_nls_text_response
+
+    await base_reg_close_key(
+        rpc_connection=rpc_connection,
+        request=BaseRegCloseKeyRequest(
+            key_handle=open_performance_nls_text_response.key_handle
+        )
+    )
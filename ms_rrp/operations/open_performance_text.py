@@ -0,0 +1,60 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import ClassVar, AsyncIterator, cast
+from contextlib import asynccontextmanager
+
+from rpc.connection import Connection as RPCConnection
+from rpc.utils.client_protocol_message import obtain_response
+
+from ms_rrp.operations import Operation, OpenRootKeyRequest, OpenRootKeyResponse
+from ms_rrp.operations.base_reg_close_key import base_reg_close_key, BaseRegCloseKeyRequest
+
+
+@dataclass
+class OpenPerformanceTextResponse(OpenRootKeyResponse):
+    pass
+
+
+@dataclass
+class OpenPerformanceTextRequest(OpenRootKeyRequest):
+    OPERATION: ClassVar[Operation] = Operation.OPEN_PERFORMANCE_TEXT
+
+
+OpenPerformanceTextResponse.REQUEST_CLASS = OpenPerformanceTextRequest
+OpenPerformanceTextRequest.RESPONSE_CLASS = OpenPerformanceTextResponse
+
+
+@asynccontextmanager
+async def open_performance_text(
+    rpc_connection: RPCConnection,
+    request: OpenPerformanceTextRequest,
+    raise_exception: bool = True
+) -> AsyncIterator[OpenPerformanceTextResponse]:
+    """
+    Perform the `OpenPerformanceText` operation.
+
+    [MS-RRP] section 3.1.5.28
+
+    :param rpc_connection: An RPC connection with which to perform the operation.
+    :param request: The `OpenPerformanceText` request.
+    :param raise_exception: Whether to raise an exception in case the response indicates an error occurred.
+    :return: The `OpenPerformanceText` response.
+    """
+
+    open_performance_text_response = cast(
+        OpenPerformanceTextResponse,
+        await obtain_response(
+            rpc_connection=rpc_connection,
+            request=request,
+            raise_exception=raise_exception
+        )
+    )
+
+    yield open_performance_text_response
+
+    await base_reg_close_key(
+        rpc_connection=rpc_connection,
+        request=BaseRegCloseKeyRequest(
+            key_handle=open_performance_text_response.key_handle
+        )
+    )
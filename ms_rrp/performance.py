@@ -0,0 +1,517 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Optional, Iterable, AsyncIterator, Final, Any, Union
+from array import array
+from asyncio import sleep, get_running_loop
+from contextlib import AsyncExitStack
+from pathlib import Path
+
+from msdsalgs.win32_error import Win32ErrorCode
+from rpc.connection import Connection as RPCConnection
+
+from ms_rrp.capabilities import get_build_key
+from ms_rrp.host_cache import host_cache_path, read_host_cache, write_host_cache
+from ms_rrp.operations.base_reg_query_value import base_reg_query_value, BaseRegQueryValueRequest
+from ms_rrp.operations.open_performance_data import open_performance_data, OpenPerformanceDataRequest
+from ms_rrp.structures.perf_data_block import PerfDataBlock, PerfObject, PERF_NO_UNIQUE_ID
+from ms_rrp.structures.regsam import Regsam
+from ms_rrp.structures.root_keys import OpenableRootKey, OPENABLE_ROOT_KEY_TO_OPERATION_AND_REQUEST
+from ms_rrp.utils import query_value, win32_error_code
+
+DEFAULT_PERFORMANCE_DATA_BUFFER_SIZE: Final[int] = 256 * 1024
+DEFAULT_MAXIMUM_PERFORMANCE_DATA_BUFFER_SIZE: Final[int] = 64 * 1024 * 1024
+
+# Fields of the counter type of a counter definition.
+_PERF_TYPE_MASK: Final[int] = 0x00000C00
+_PERF_TYPE_COUNTER: Final[int] = 0x00000400
+_PERF_COUNTER_SUBTYPE_MASK: Final[int] = 0x000F0000
+_PERF_COUNTER_RATE: Final[int] = 0x00010000
+_PERF_TIMER_MASK: Final[int] = 0x00300000
+_PERF_TIMER_100NS: Final[int] = 0x00100000
+_PERF_DELTA_COUNTER: Final[int] = 0x00400000
+_PERF_INVERSE_COUNTER: Final[int] = 0x01000000
+_PERF_MULTI_COUNTER: Final[int] = 0x02000000
+_PERF_DISPLAY_MASK: Final[int] = 0xF0000000
+_PERF_DISPLAY_PER_SEC: Final[int] = 0x10000000
+_PERF_DISPLAY_PERCENT: Final[int] = 0x20000000
+
+_100NS_TICKS_PER_SECOND: Final[int] = 10_000_000
+
+
+async def query_performance_data(
+    rpc_connection: RPCConnection,
+    key_handle: bytes,
+    object_indices: Optional[Iterable[int]] = None,
+    value_buffer_size: int = DEFAULT_PERFORMANCE_DATA_BUFFER_SIZE,
+    maximum_value_buffer_size: int = DEFAULT_MAXIMUM_PERFORMANCE_DATA_BUFFER_SIZE
+) -> PerfDataBlock:
+    """
+    Query performance data and parse the returned performance data block.
+
+    The size of the performance data is not known in advance, so the query is retried with a doubled buffer, up to
+    `maximum_value_buffer_size`, for as long as the server responds with `ERROR_MORE_DATA`.
+
+    :param rpc_connection: An RPC connection with which to perform the operations.
+    :param key_handle: A handle to the `HKEY_PERFORMANCE_DATA` root key.
+    :param object_indices: The name indices of the performance objects to query. If not specified, all objects in the
+        `Global` set are queried.
+    :param value_buffer_size: The initial size of the buffer in which to receive the performance data.
+    :param maximum_value_buffer_size: The largest size of the buffer in which to receive the performance data.
+    :return: The parsed performance data block.
+    """
+
+    return PerfDataBlock.from_bytes(
+        data=(
+            await query_value(
+                rpc_connection=rpc_connection,
+                key_handle=key_handle,
+                value_name=(
+                    ' '.join(str(object_index) for object_index in object_indices) if object_indices else 'Global'
+                ),
+                value_buffer_size=value_buffer_size,
+                maximum_value_buffer_size=maximum_value_buffer_size
+            )
+        ).value
+    )
+
+
+def parse_counter_text(value: bytes) -> dict[int, str]:
+    """
+    Parse a `Counter` or `Help` value of the performance text root keys.
+
+    The values are `REG_MULTI_SZ` strings that alternate between a name index and the text for that index.
+
+    :param value: The value data.
+    :return: A mapping of name indices to texts.
+    """
+
+    strings = value.decode(encoding='utf-16-le', errors='replace').split('\x00')
+
+    index_to_text: dict[int, str] = {}
+    for index_string, text in zip(strings[0::2], strings[1::2]):
+        if index_string.isdigit():
+            index_to_text[int(index_string)] = text
+
+    return index_to_text
+
+
+@dataclass
+class CounterNames:
+    names: dict[int, str]
+    help: dict[int, str] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'names': {str(index): name for index, name in self.names.items()},
+            'help': {str(index): help_text for index, help_text in self.help.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> CounterNames:
+        return cls(
+            names={int(index): name for index, name in data['names'].items()},
+            help={int(index): help_text for index, help_text in data['help'].items()}
+        )
+
+
+async def fetch_counter_names(
+    rpc_connection: RPCConnection,
+    include_help: bool = False,
+    nls: bool = False,
+    sam_desired: Regsam = Regsam(maximum_allowed=True)
+) -> CounterNames:
+    """
+    Retrieve the names, and optionally the help texts, of the performance objects and counters.
+
+    :param rpc_connection: An RPC connection with which to perform the operations.
+    :param include_help: Whether to retrieve the help texts in addition to the names.
+    :param nls: Whether to retrieve the texts in the language of the server rather than in English, by opening
+        `HKEY_PERFORMANCE_NLSTEXT` rather than `HKEY_PERFORMANCE_TEXT`.
+    :param sam_desired: The desired access when opening the root key.
+    :return: The names and help texts, keyed by name index.
+    """
+
+    open_root_key, open_root_key_request_class = OPENABLE_ROOT_KEY_TO_OPERATION_AND_REQUEST[
+        OpenableRootKey.HKEY_PERFORMANCE_NLSTEXT if nls else OpenableRootKey.HKEY_PERFORMANCE_TEXT
+    ]
+
+    open_root_key_options = dict(
+        rpc_connection=rpc_connection,
+        request=open_root_key_request_class(sam_desired=sam_desired)
+    )
+    async with open_root_key(**open_root_key_options) as open_root_key_response:
+        counter_names = CounterNames(
+            names=parse_counter_text(
+                value=(
+                    await query_value(
+                        rpc_connection=rpc_connection,
+                        key_handle=open_root_key_response.key_handle,
+                        value_name='Counter',
+                        value_buffer_size=DEFAULT_PERFORMANCE_DATA_BUFFER_SIZE
+                    )
+                ).value
+            )
+        )
+
+        if include_help:
+            counter_names.help = parse_counter_text(
+                value=(
+                    await query_value(
+                        rpc_connection=rpc_connection,
+                        key_handle=open_root_key_response.key_handle,
+                        value_name='Help',
+                        value_buffer_size=DEFAULT_PERFORMANCE_DATA_BUFFER_SIZE
+                    )
+                ).value
+            )
+
+    return counter_names
+
+
+class CounterNameCache:
+    """
+    Cache the names of the performance objects and counters of hosts, in memory and as files in a directory.
+
+    The persisted texts are keyed by host and by the registry version (from `BaseRegGetVersion`) and the build number
+    of the host, so that they are retrieved again only when the host is upgraded. Texts that are already held in memory
+    for a host are returned without contacting it.
+    """
+
+    def __init__(self, cache_directory: Union[str, Path], include_help: bool = False, nls: bool = False):
+        """
+        :param cache_directory: The directory in which to persist the texts.
+        :param include_help: Whether to retrieve and cache the help texts in addition to the names.
+        :param nls: Whether to retrieve the texts in the language of the server rather than in English.
+        """
+
+        self.cache_directory = Path(cache_directory)
+        self.include_help = include_help
+        self.nls = nls
+
+        self._cache: dict[str, CounterNames] = {}
+
+    async def get(self, rpc_connection: RPCConnection, host: str) -> CounterNames:
+        """
+        Obtain the names of the performance objects and counters of a host.
+
+        :param rpc_connection: An RPC connection to the host.
+        :param host: The name of the host, used as part of the cache key.
+        :return: The names and help texts, keyed by name index.
+        """
+
+        if (counter_names := self._cache.get(host.lower())) is not None:
+            return counter_names
+
+        cache_path = host_cache_path(
+            cache_directory=self.cache_directory,
+            host=host,
+            build_key=await get_build_key(rpc_connection=rpc_connection),
+            qualifiers=('nls' if self.nls else 'en', *(('help',) if self.include_help else ()))
+        )
+        try:
+            counter_names = CounterNames.from_dict(data=read_host_cache(cache_path=cache_path))
+        except (OSError, ValueError, KeyError):
+            counter_names = await fetch_counter_names(
+                rpc_connection=rpc_connection,
+                include_help=self.include_help,
+                nls=self.nls
+            )
+            write_host_cache(cache_path=cache_path, data=counter_names.to_dict())
+
+        self._cache[host.lower()] = counter_names
+        return counter_names
+
+
+@dataclass
+class PerfObjectSample:
+    """
+    The changes of the counters of a performance object between two consecutive samples.
+
+    `deltas[i]` holds the change of `perf_object.counters[i]` for each instance of `perf_object`, or `None` if the
+    counter has no values. Instances that are not present in the previous sample have a delta of zero.
+
+    `rates[i]` holds the change per second of a counter that counts events, e.g. `PERF_COUNTER_COUNTER` and
+    `PERF_COUNTER_BULK_COUNT`, and `percentages[i]` the percentage of the elapsed time measured by a 100-nanosecond
+    timer, e.g. `PERF_100NSEC_TIMER` and `PERF_100NSEC_TIMER_INV`. They are `None` for other counter types, such as
+    the gauges `PERF_COUNTER_RAWCOUNT` and `PERF_COUNTER_LARGE_RAWCOUNT`, and those computed from a base counter.
+    """
+
+    perf_object: PerfObject
+    elapsed_seconds: float
+    deltas: list[Optional[array]]
+    rates: list[Optional[array]]
+    percentages: list[Optional[array]] = field(default_factory=list)
+
+    def delta(self, counter_name_index: int) -> Optional[array]:
+        for counter, delta in zip(self.perf_object.counters, self.deltas):
+            if counter.name_index == counter_name_index:
+                return delta
+        return None
+
+    def rate(self, counter_name_index: int) -> Optional[array]:
+        for counter, rate in zip(self.perf_object.counters, self.rates):
+            if counter.name_index == counter_name_index:
+                return rate
+        return None
+
+    def percentage(self, counter_name_index: int) -> Optional[array]:
+        for counter, percentage in zip(self.perf_object.counters, self.percentages):
+            if counter.name_index == counter_name_index:
+                return percentage
+        return None
+
+
+@dataclass
+class PerformanceSample:
+    perf_data_block: PerfDataBlock
+    elapsed_seconds: float
+    objects: dict[int, PerfObjectSample]
+
+
+def _elapsed_seconds(perf_time: int, previous_perf_time: int, perf_freq: int) -> float:
+    return (perf_time - previous_perf_time) / perf_freq if perf_freq else 0.0
+
+
+def _instance_keys(perf_object: PerfObject) -> list[tuple[int, ...]]:
+    """
+    Identify the instances of a performance object across samples.
+
+    An instance is identified by its unique ID if it has one, and otherwise by its name, its parent instance, and the
+    number of preceding instances with the same name and parent, so that e.g. the many `svchost` instances of the
+    `Process` object are told apart.
+
+    :param perf_object: The performance object.
+    :return: One key per instance, in the order of the instances.
+    """
+
+    instance_keys: list[tuple] = []
+    name_and_parent_to_count: dict[tuple[str, int, int], int] = {}
+    for instance_name, unique_id, parent_object_index, parent_instance in zip(
+        perf_object.instance_names,
+        perf_object.instance_unique_ids,
+        perf_object.instance_parent_object_indices,
+        perf_object.instance_parent_instances
+    ):
+        if unique_id != PERF_NO_UNIQUE_ID:
+            instance_keys.append((unique_id,))
+            continue
+
+        name_and_parent = (instance_name, parent_object_index, parent_instance)
+        ordinal = name_and_parent_to_count.get(name_and_parent, 0)
+        name_and_parent_to_count[name_and_parent] = ordinal + 1
+        instance_keys.append((*name_and_parent, ordinal))
+
+    return instance_keys
+
+
+def _column_deltas(column: array, previous_column: array, instance_indices: Optional[list[int]]) -> array:
+    modulus = 1 << (8 * column.itemsize)
+    half_modulus = modulus >> 1
+
+    if instance_indices is None:
+        previous_values = previous_column
+    else:
+        previous_values = [
+            previous_column[previous_index] if previous_index >= 0 else value
+            for value, previous_index in zip(column, instance_indices)
+        ]
+
+    return array(
+        'q',
+        [
+            (value - previous_value + half_modulus) % modulus - half_modulus
+            for value, previous_value in zip(column, previous_values)
+        ]
+    )
+
+
+def compute_object_sample(
+    perf_object: PerfObject,
+    previous_perf_object: PerfObject,
+    default_elapsed_seconds: float
+) -> PerfObjectSample:
+    """
+    Compute the changes of the counters of a performance object between two samples.
+
+    Instances are matched by position when the instances of the two samples are the same, which is the usual case,
+    and otherwise by their unique IDs, or by their names, parent instances, and positions among the instances with the
+    same name and parent. Deltas are computed modulo the size of the counter and interpreted as signed, so that both
+    counters that wrap around and counters that decrease yield the expected delta. Rates and percentages are computed
+    according to the type of each counter.
+
+    :param perf_object: The performance object of the newer sample.
+    :param previous_perf_object: The same performance object of the older sample.
+    :param default_elapsed_seconds: The elapsed time to use if the object does not have its own time base.
+    :return: The changes of the counters of the performance object.
+    """
+
+    elapsed_seconds = (
+        _elapsed_seconds(
+            perf_time=perf_object.perf_time,
+            previous_perf_time=previous_perf_object.perf_time,
+            perf_freq=perf_object.perf_freq
+        )
+        if perf_object.perf_freq else default_elapsed_seconds
+    )
+
+    instance_indices: Optional[list[int]] = None
+    instance_keys = _instance_keys(perf_object=perf_object)
+    previous_instance_keys = _instance_keys(perf_object=previous_perf_object)
+    if instance_keys != previous_instance_keys:
+        previous_instance_key_to_index = {
+            instance_key: index for index, instance_key in enumerate(previous_instance_keys)
+        }
+        instance_indices = [
+            previous_instance_key_to_index.get(instance_key, -1) for instance_key in instance_keys
+        ]
+
+    previous_counter_name_index_to_column = {
+        counter.name_index: column
+        for counter, column in zip(previous_perf_object.counters, previous_perf_object.columns)
+    }
+
+    deltas: list[Optional[array]] = []
+    rates: list[Optional[array]] = []
+    percentages: list[Optional[array]] = []
+    for counter, column in zip(perf_object.counters, perf_object.columns):
+        previous_column = previous_counter_name_index_to_column.get(counter.name_index)
+        if column is None or previous_column is None or previous_column.typecode != column.typecode:
+            deltas.append(None)
+            rates.append(None)
+            percentages.append(None)
+            continue
+
+        column_deltas = _column_deltas(
+            column=column,
+            previous_column=previous_column,
+            instance_indices=instance_indices
+        )
+        deltas.append(column_deltas)
+        rates.append(None)
+        percentages.append(None)
+
+        counter_type = counter.counter_type
+        if (
+            counter_type & _PERF_TYPE_MASK != _PERF_TYPE_COUNTER
+            or counter_type & _PERF_COUNTER_SUBTYPE_MASK != _PERF_COUNTER_RATE
+            or not counter_type & _PERF_DELTA_COUNTER
+            or counter_type & _PERF_MULTI_COUNTER
+        ):
+            continue
+
+        display = counter_type & _PERF_DISPLAY_MASK
+        if display == _PERF_DISPLAY_PER_SEC:
+            rates[-1] = (
+                array('d', [delta / elapsed_seconds for delta in column_deltas])
+                if elapsed_seconds > 0 else array('d', bytes(8 * len(column_deltas)))
+            )
+        elif display == _PERF_DISPLAY_PERCENT and counter_type & _PERF_TIMER_MASK == _PERF_TIMER_100NS:
+            elapsed_ticks = elapsed_seconds * _100NS_TICKS_PER_SECOND
+            busy_percentages = (
+                [100.0 * delta / elapsed_ticks for delta in column_deltas]
+                if elapsed_ticks > 0 else [0.0] * len(column_deltas)
+            )
+            percentages[-1] = array(
+                'd',
+                [100.0 - percentage for percentage in busy_percentages]
+                if counter_type & _PERF_INVERSE_COUNTER else busy_percentages
+            )
+
+    return PerfObjectSample(
+        perf_object=perf_object,
+        elapsed_seconds=elapsed_seconds,
+        deltas=deltas,
+        rates=rates,
+        percentages=percentages
+    )
+
+
+async def sample_performance_data(
+    rpc_connection: RPCConnection,
+    object_indices: Optional[Iterable[int]] = None,
+    interval: float = 5.0,
+    sam_desired: Regsam = Regsam(maximum_allowed=True),
+    maximum_value_buffer_size: int = DEFAULT_MAXIMUM_PERFORMANCE_DATA_BUFFER_SIZE
+) -> AsyncIterator[PerformanceSample]:
+    """
+    Repeatedly sample performance data and yield the changes of the counters between consecutive samples.
+
+    The `HKEY_PERFORMANCE_DATA` root key is opened once and its handle is reused for all samples. Each query starts
+    with the buffer size of the last successful query, and is sent again with a doubled buffer only if the server
+    responds with `ERROR_MORE_DATA`, so that the buffer is grown once rather than for every sample. The elapsed time
+    between two samples is computed from the performance counter time and frequency of the performance data block, or
+    of the object if it has its own time base, rather than from the local clock.
+
+    :param rpc_connection: An RPC connection with which to perform the operations.
+    :param object_indices: The name indices of the performance objects to sample. If not specified, all objects in
+        the `Global` set are sampled.
+    :param interval: The interval, in seconds, with which to sample.
+    :param sam_desired: The desired access when opening the `HKEY_PERFORMANCE_DATA` root key.
+    :param maximum_value_buffer_size: The largest size of the buffer in which to receive the performance data.
+    :return: An asynchronous iterator of samples, starting with the second one.
+    """
+
+    value_name = ' '.join(str(object_index) for object_index in object_indices or ()) or 'Global'
+    value_buffer_size = DEFAULT_PERFORMANCE_DATA_BUFFER_SIZE
+    previous_perf_data_block: Optional[PerfDataBlock] = None
+    loop = get_running_loop()
+
+    open_performance_data_options = dict(
+        rpc_connection=rpc_connection,
+        request=OpenPerformanceDataRequest(sam_desired=sam_desired)
+    )
+    # The handle is closed explicitly, rather than by leaving an `async with` block, so that it is also closed when the
+    # caller stops the iteration, which raises `GeneratorExit` at the `yield`.
+    exit_stack = AsyncExitStack()
+    open_performance_data_response = await exit_stack.enter_async_context(
+        open_performance_data(**open_performance_data_options)
+    )
+    try:
+        while True:
+            start_time = loop.time()
+
+            while True:
+                try:
+                    query_value_response = await base_reg_query_value(
+                        rpc_connection=rpc_connection,
+                        request=BaseRegQueryValueRequest(
+                            key_handle=open_performance_data_response.key_handle,
+                            value_name=value_name,
+                            value_buffer_size=value_buffer_size
+                        )
+                    )
+                    break
+                except Exception as exception:
+                    if (
+                        win32_error_code(exception=exception) is not Win32ErrorCode.ERROR_MORE_DATA
+                        or value_buffer_size >= maximum_value_buffer_size
+                    ):
+                        raise
+                value_buffer_size = min(value_buffer_size * 2, maximum_value_buffer_size)
+
+            perf_data_block = PerfDataBlock.from_bytes(data=query_value_response.value)
+
+            if previous_perf_data_block is not None:
+                elapsed_seconds = _elapsed_seconds(
+                    perf_time=perf_data_block.perf_time,
+                    previous_perf_time=previous_perf_data_block.perf_time,
+                    perf_freq=perf_data_block.perf_freq
+                )
+                yield PerformanceSample(
+                    perf_data_block=perf_data_block,
+                    elapsed_seconds=elapsed_seconds,
+                    objects={
+                        object_index: compute_object_sample(
+                            perf_object=perf_object,
+                            previous_perf_object=previous_perf_object,
+                            default_elapsed_seconds=elapsed_seconds
+                        )
+                        for object_index, perf_object in perf_data_block.objects.items()
+                        if (previous_perf_object := previous_perf_data_block.objects.get(object_index)) is not None
+                    }
+                )
+
+            previous_perf_data_block = perf_data_block
+            await sleep(max(0.0, interval - (loop.time() - start_time)))
+    finally:
+        await exit_stack.aclose()
@@ -0,0 +1,327 @@
+from __future__ import annotations
+from typing import Optional, AsyncIterator, Final
+from asyncio import Lock
+from collections import OrderedDict
+from contextlib import AsyncExitStack, asynccontextmanager
+
+from msdsalgs.win32_error import Win32ErrorCode
+from rpc.connection import Connection as RPCConnection
+
+from ms_rrp.operations.base_reg_open_key import base_reg_open_key, BaseRegOpenKeyRequest
+from ms_rrp.operations.base_reg_query_info_key import base_reg_query_info_key, BaseRegQueryInfoKeyRequest, \
+    BaseRegQueryInfoKeyResponse
+from ms_rrp.structures.reg_value_type import RegValueType
+from ms_rrp.structures.regsam import Regsam
+from ms_rrp.structures.root_keys import OpenableRootKey, OPENABLE_ROOT_KEY_TO_OPERATION_AND_REQUEST
+from ms_rrp.utils import split_key_path, enumerate_sub_keys, enumerate_values, query_value, win32_error_code
+
+DEFAULT_MAX_OPEN_HANDLES: Final[int] = 64
+
+
+class RemoteKey:
+    """
+    A registry key whose handle, metadata, subkeys, and values are retrieved on first access and then cached.
+
+    Obtain instances with `RemoteRegistry.key` or `RemoteKey.sub_key`, rather than constructing them directly.
+    """
+
+    def __init__(self, registry: RemoteRegistry, root_key: OpenableRootKey, sub_key_path: str):
+        self.registry = registry
+        self.root_key = root_key
+        self.sub_key_path = sub_key_path
+
+        self._handle_lock = Lock()
+        self._exit_stack: Optional[AsyncExitStack] = None
+        self._key_handle: Optional[bytes] = None
+        # The number of operations using the handle, during which it is not closed to bound the open handles.
+        self._num_users = 0
+
+        self._info: Optional[BaseRegQueryInfoKeyResponse] = None
+        self._sub_key_names: Optional[list[str]] = None
+        self._values: Optional[dict[str, tuple[RegValueType, bytes]]] = None
+        self._queried_values: dict[str, tuple[RegValueType, bytes]] = {}
+
+    @property
+    def key_path(self) -> str:
+        return f'{self.root_key.name}\\{self.sub_key_path}' if self.sub_key_path else self.root_key.name
+
+    @property
+    def name(self) -> str:
+        return self.sub_key_path.rpartition('\\')[2] if self.sub_key_path else self.root_key.name
+
+    @property
+    def is_open(self) -> bool:
+        return self._key_handle is not None
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({self.key_path!r})'
+
+    async def handle(self) -> bytes:
+        """
+        Obtain a handle to the key, opening it if it is not already open.
+
+        A subkey is opened relative to the handle of its root key, so that opening a key deep in the tree takes one
+        operation and does not keep the keys in between open.
+
+        The handle of a subkey may be closed once more than the registry's `max_open_handles` other subkeys have been
+        used since the key was last used, after which it is reopened on the next access.
+
+        :return: A handle to the key.
+        """
+
+        async with self._handle_lock:
+            if self._key_handle is None:
+                exit_stack = AsyncExitStack()
+
+                if not self.sub_key_path:
+                    open_root_key, open_root_key_request_class = OPENABLE_ROOT_KEY_TO_OPERATION_AND_REQUEST[
+                        self.root_key
+                    ]
+                    open_key_context = open_root_key(
+                        rpc_connection=self.registry.rpc_connection,
+                        request=open_root_key_request_class(sam_desired=self.registry.sam_desired)
+                    )
+                else:
+                    open_key_context = base_reg_open_key(
+                        rpc_connection=self.registry.rpc_connection,
+                        request=BaseRegOpenKeyRequest(
+                            key_handle=await self.registry.root(root_key=self.root_key).handle(),
+                            sub_key_name=self.sub_key_path,
+                            sam_desired=self.registry.sam_desired
+                        )
+                    )
+
+                self._key_handle = (await exit_stack.enter_async_context(open_key_context)).key_handle
+                self._exit_stack = exit_stack
+
+            key_handle = self._key_handle
+
+        if self.sub_key_path:
+            self.registry._open_sub_keys[self] = None
+            self.registry._open_sub_keys.move_to_end(self)
+            # The key is in use during the sweep, so that the handle being returned is not the one closed.
+            self._num_users += 1
+            try:
+                await self.registry._close_least_recently_used()
+            finally:
+                self._num_users -= 1
+
+        return key_handle
+
+    @asynccontextmanager
+    async def _used_handle(self) -> AsyncIterator[bytes]:
+        self._num_users += 1
+        try:
+            yield await self.handle()
+        finally:
+            self._num_users -= 1
+            await self.registry._close_least_recently_used()
+
+    async def close(self) -> None:
+        """
+        Close the handle to the key, if it is open. The cached data is kept, and the key is reopened if needed.
+
+        :return: None
+        """
+
+        async with self._handle_lock:
+            self.registry._open_sub_keys.pop(self, None)
+            if self._exit_stack is not None:
+                exit_stack, self._exit_stack, self._key_handle = self._exit_stack, None, None
+                await exit_stack.aclose()
+
+    def invalidate(self) -> None:
+        """
+        Discard the cached metadata, subkey names, and values, so that they are retrieved again on next access.
+
+        :return: None
+        """
+
+        self._info = None
+        self._sub_key_names = None
+        self._values = None
+        self._queried_values.clear()
+
+    async def info(self) -> BaseRegQueryInfoKeyResponse:
+        if self._info is None:
+            async with self._used_handle() as key_handle:
+                self._info = await base_reg_query_info_key(
+                    rpc_connection=self.registry.rpc_connection,
+                    request=BaseRegQueryInfoKeyRequest(key_handle=key_handle)
+                )
+        return self._info
+
+    async def last_write_time(self) -> int:
+        return (await self.info()).last_write_time
+
+    async def sub_key_names(self) -> list[str]:
+        if self._sub_key_names is None:
+            query_info_key_response = await self.info()
+            async with self._used_handle() as key_handle:
+                self._sub_key_names = [
+                    enum_key_response.sub_key_name
+                    async for enum_key_response in enumerate_sub_keys(
+                        rpc_connection=self.registry.rpc_connection,
+                        key_handle=key_handle,
+                        query_info_key_response=query_info_key_response
+                    )
+                ]
+        return self._sub_key_names
+
+    async def sub_keys(self) -> list[RemoteKey]:
+        return [self.sub_key(sub_key_name=sub_key_name) for sub_key_name in await self.sub_key_names()]
+
+    def sub_key(self, sub_key_name: str) -> RemoteKey:
+        """
+        Obtain a subkey of the key. The subkey is not opened until its data is accessed.
+
+        :param sub_key_name: The name, or relative path, of the subkey.
+        :return: The subkey.
+        """
+
+        return self.registry.key(key_path=f'{self.key_path}\\{sub_key_name}')
+
+    async def values(self) -> dict[str, tuple[RegValueType, bytes]]:
+        """
+        Obtain all the values of the key, enumerating them on first access.
+
+        :return: A mapping of value names to the types and data of the values.
+        """
+
+        if self._values is None:
+            query_info_key_response = await self.info()
+            async with self._used_handle() as key_handle:
+                self._values = {
+                    enum_value_response.value_name: (enum_value_response.value_type, enum_value_response.value)
+                    async for enum_value_response in enumerate_values(
+                        rpc_connection=self.registry.rpc_connection,
+                        key_handle=key_handle,
+                        query_info_key_response=query_info_key_response
+                    )
+                }
+        return self._values
+
+    async def value(self, value_name: str) -> tuple[RegValueType, bytes]:
+        """
+        Obtain one value of the key.
+
+        If the values of the key have already been enumerated, the value is taken from them; otherwise only the one
+        value is queried, with a buffer sized from the cached metadata if there is one. Either way, the name is matched
+        case-insensitively, and a `KeyError` is raised if the key has no such value.
+
+        :param value_name: The name of the value.
+        :return: The type and data of the value.
+        """
+
+        if self._values is not None:
+            folded_value_name = value_name.casefold()
+            for enumerated_value_name, enumerated_value in self._values.items():
+                if enumerated_value_name.casefold() == folded_value_name:
+                    return enumerated_value
+            raise KeyError(value_name)
+
+        if (queried_value := self._queried_values.get(value_name)) is None:
+            async with self._used_handle() as key_handle:
+                try:
+                    base_reg_query_value_response = await query_value(
+                        rpc_connection=self.registry.rpc_connection,
+                        key_handle=key_handle,
+                        value_name=value_name,
+                        value_buffer_size=max(self._info.max_value_length, 1) if self._info is not None else 256
+                    )
+                except Exception as exception:
+                    if win32_error_code(exception=exception) is not Win32ErrorCode.ERROR_FILE_NOT_FOUND:
+                        raise
+                    raise KeyError(value_name) from exception
+            queried_value = (base_reg_query_value_response.value_type, base_reg_query_value_response.value)
+            self._queried_values[value_name] = queried_value
+
+        return queried_value
+
+
+class RemoteRegistry:
+    """
+    A lazily-accessed view of the registry of a remote host.
+
+    Keys are obtained by their paths without issuing any operations; a key is opened, and its data retrieved, only
+    when the data is first accessed. Every key obtained is cached by its case-insensitive path, so that each key is
+    opened and each piece of data retrieved at most once.
+
+    At most `max_open_handles` subkeys are kept open; when more are opened, the handles of the least recently used ones
+    are closed, their cached data being kept, and are reopened if they are needed again. The remaining open handles
+    are closed when the registry is closed, e.g. at the end of an `async with` block, or individually with
+    `RemoteKey.close`.
+    """
+
+    def __init__(
+        self,
+        rpc_connection: RPCConnection,
+        sam_desired: Regsam = Regsam(maximum_allowed=True),
+        max_open_handles: int = DEFAULT_MAX_OPEN_HANDLES
+    ):
+        """
+        :param rpc_connection: An RPC connection with which to perform the operations.
+        :param sam_desired: The desired access when opening the keys.
+        :param max_open_handles: The maximum number of subkey handles kept open, not counting the handles of subkeys
+            that are in use by an operation.
+        """
+
+        self.rpc_connection = rpc_connection
+        self.sam_desired = sam_desired
+        self.max_open_handles = max_open_handles
+
+        self._keys: dict[str, RemoteKey] = {}
+        # The subkeys with open handles, from the least to the most recently used.
+        self._open_sub_keys: OrderedDict[RemoteKey, None] = OrderedDict()
+
+    async def __aenter__(self) -> RemoteRegistry:
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+    def root(self, root_key: OpenableRootKey) -> RemoteKey:
+        if (remote_key := self._keys.get(root_key.name.lower())) is None:
+            remote_key = RemoteKey(registry=self, root_key=root_key, sub_key_path='')
+            self._keys[root_key.name.lower()] = remote_key
+        return remote_key
+
+    async def _close_least_recently_used(self) -> None:
+        while len(self._open_sub_keys) > self.max_open_handles:
+            least_recently_used_key = next(
+                (open_sub_key for open_sub_key in self._open_sub_keys if not open_sub_key._num_users),
+                None
+            )
+            if least_recently_used_key is None:
+                break
+            await least_recently_used_key.close()
+
+    def key(self, key_path: str) -> RemoteKey:
+        """
+        Obtain a registry key by its full path, including the root key. No operation is performed until the key's
+        data is accessed.
+
+        :param key_path: A registry key path, e.g. `HKLM\\SOFTWARE\\Microsoft`.
+        :return: The registry key.
+        """
+
+        root_key, sub_key_path = split_key_path(key_path=key_path)
+        sub_key_path = '\\'.join(part for part in sub_key_path.split('\\') if part)
+        if not sub_key_path:
+            return self.root(root_key=root_key)
+
+        cache_key = f'{root_key.name}\\{sub_key_path}'.lower()
+        if (remote_key := self._keys.get(cache_key)) is None:
+            remote_key = RemoteKey(registry=self, root_key=root_key, sub_key_path=sub_key_path)
+            self._keys[cache_key] = remote_key
+        return remote_key
+
+    async def close(self) -> None:
+        """
+        Close all open handles, the handles of subkeys before those of the root keys they were opened relative to.
+
+        :return: None
+        """
+
+        for remote_key in sorted(self._keys.values(), key=lambda remote_key: not remote_key.sub_key_path):
+            await remote_key.close()
@@ -0,0 +1,190 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Optional, Final
+from asyncio import Future, get_running_loop, shield, CancelledError
+from collections import OrderedDict
+
+from rpc.connection import Connection as RPCConnection
+
+from ms_rrp.operations import Operation
+
+# The operations whose results depend only on their request and the state of the registry.
+CACHEABLE_OPERATIONS: Final[frozenset[Operation]] = frozenset({
+    Operation.BASE_REG_ENUM_KEY,
+    Operation.BASE_REG_ENUM_VALUE,
+    Operation.BASE_REG_GET_KEY_SECURITY,
+    Operation.BASE_REG_GET_VERSION,
+    Operation.BASE_REG_QUERY_INFO_KEY,
+    Operation.BASE_REG_QUERY_MULTIPLE_VALUES,
+    Operation.BASE_REG_QUERY_MULTIPLE_VALUES2,
+    Operation.BASE_REG_QUERY_VALUE
+})
+
+# The operations that change the registry, after which no cached result can be trusted.
+WRITE_OPERATIONS: Final[frozenset[Operation]] = frozenset({
+    Operation.BASE_REG_CREATE_KEY,
+    Operation.BASE_REG_DELETE_KEY,
+    Operation.BASE_REG_DELETE_KEY_EX,
+    Operation.BASE_REG_DELETE_VALUE,
+    Operation.BASE_REG_LOAD_KEY,
+    Operation.BASE_REG_REPLACE_KEY,
+    Operation.BASE_REG_RESTORE_KEY,
+    Operation.BASE_REG_SET_KEY_SECURITY,
+    Operation.BASE_REG_SET_VALUE,
+    Operation.BASE_REG_UN_LOAD_KEY
+})
+
+# Every request of a cacheable operation starts with the handle of the key, and every response ends with the return
+# code.
+_KEY_HANDLE_LENGTH: Final[int] = 20
+_SUCCESS_RETURN_CODE: Final[bytes] = bytes(4)
+
+
+@dataclass
+class CacheStatistics:
+    num_hits: int = 0
+    num_misses: int = 0
+    num_coalesced: int = 0
+    num_evictions: int = 0
+    num_invalidations: int = 0
+
+
+class CachingConnection:
+    """
+    Wrap an RPC connection, coalescing and caching the requests of read-only operations.
+
+    Concurrent identical requests (with the same operation number and request data, which includes the key handle and
+    the arguments) share one in-flight request. Successful responses are cached for `ttl` seconds, with the least
+    recently used responses evicted beyond `max_entries`. A request of a write operation made through the wrapper
+    invalidates the whole cache, and closing a handle invalidates the responses for that handle, since the server may
+    reuse it. Responses for `HKEY_PERFORMANCE_DATA` handles are never cached.
+
+    The wrapper can be passed as `rpc_connection` to the operation functions. All attributes other than `request`
+    are delegated to the wrapped connection.
+    """
+
+    def __init__(self, rpc_connection: RPCConnection, ttl: float = 5.0, max_entries: int = 10_000):
+        """
+        :param rpc_connection: The RPC connection with which to perform the requests.
+        :param ttl: The number of seconds for which a response is cached.
+        :param max_entries: The maximum number of cached responses.
+        """
+
+        self._rpc_connection = rpc_connection
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self.statistics = CacheStatistics()
+
+        self._entries: OrderedDict[tuple[int, bytes], tuple[float, Any]] = OrderedDict()
+        self._in_flight: dict[tuple[int, bytes], Future] = {}
+        self._uncacheable_key_handles: set[bytes] = set()
+        # Incremented on each invalidation, so that responses to requests made before it are not cached.
+        self._generation = 0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._rpc_connection, name)
+
+    def invalidate(self, key_handle: Optional[bytes] = None) -> None:
+        """
+        Discard cached responses.
+
+        :param key_handle: The handle of the key whose responses to discard. If not specified, all responses are
+            discarded.
+        :return: None
+        """
+
+        self._generation += 1
+        self.statistics.num_invalidations += 1
+
+        if key_handle is None:
+            self._entries.clear()
+        else:
+            stale_cache_keys = [
+                cache_key for cache_key in self._entries if cache_key[1][:_KEY_HANDLE_LENGTH] == key_handle
+            ]
+            for cache_key in stale_cache_keys:
+                del self._entries[cache_key]
+
+    async def _request_coalesced(self, cache_key: tuple[int, bytes], request_message, *args, **kwargs):
+        loop = get_running_loop()
+
+        # The in-flight request is shielded, so that a cancelled request does not cancel it for the others waiting on
+        # it. If the request that made it is cancelled instead, the waiting requests retry, one of them making a new
+        # request on which the others wait.
+        while (in_flight_future := self._in_flight.get(cache_key)) is not None:
+            self.statistics.num_coalesced += 1
+            try:
+                return await shield(in_flight_future)
+            except CancelledError:
+                if not in_flight_future.cancelled():
+                    raise
+
+        self.statistics.num_misses += 1
+        generation = self._generation
+        future: Future = loop.create_future()
+        self._in_flight[cache_key] = future
+
+        try:
+            response_message = await self._rpc_connection.request(request_message, *args, **kwargs)
+        except CancelledError:
+            if not future.done():
+                future.cancel()
+            raise
+        except Exception as exception:
+            if not future.done():
+                future.set_exception(exception)
+                # Mark the exception as retrieved, in case no other request is waiting for it.
+                future.exception()
+            raise
+        else:
+            if not future.done():
+                future.set_result(response_message)
+        finally:
+            del self._in_flight[cache_key]
+
+        key_handle = cache_key[1][:_KEY_HANDLE_LENGTH]
+        if (
+            generation == self._generation
+            and key_handle not in self._uncacheable_key_handles
+            and bytes(response_message.stub_data[-len(_SUCCESS_RETURN_CODE):]) == _SUCCESS_RETURN_CODE
+        ):
+            self._entries[cache_key] = (loop.time() + self.ttl, response_message)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.statistics.num_evictions += 1
+
+        return response_message
+
+    async def request(self, request_message, *args, **kwargs):
+        opnum = int(request_message.opnum)
+
+        if opnum in CACHEABLE_OPERATIONS:
+            cache_key = (opnum, bytes(request_message.stub_data))
+            if (entry := self._entries.get(cache_key)) is not None:
+                expiry_time, response_message = entry
+                if get_running_loop().time() < expiry_time:
+                    self._entries.move_to_end(cache_key)
+                    self.statistics.num_hits += 1
+                    return response_message
+                del self._entries[cache_key]
+
+            return await self._request_coalesced(cache_key, request_message, *args, **kwargs)
+
+        if opnum in WRITE_OPERATIONS:
+            self.invalidate()
+        elif opnum == Operation.BASE_REG_CLOSE_KEY:
+            key_handle = bytes(request_message.stub_data[:_KEY_HANDLE_LENGTH])
+            self.invalidate(key_handle=key_handle)
+            self._uncacheable_key_handles.discard(key_handle)
+
+        response_message = await self._rpc_connection.request(request_message, *args, **kwargs)
+
+        if opnum == Operation.OPEN_PERFORMANCE_DATA:
+            self._uncacheable_key_handles.add(bytes(response_message.stub_data[:_KEY_HANDLE_LENGTH]))
+        elif opnum in WRITE_OPERATIONS:
+            # Responses to reads made while the write was in flight may reflect either state.
+            self.invalidate()
+
+        return response_message
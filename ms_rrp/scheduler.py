@@ -0,0 +1,239 @@
+from __future__ import annotations
+from dataclasses import dataclass, field, replace
+from typing import Any, Optional, Iterable
+from asyncio import Future, TimerHandle, get_running_loop, CancelledError
+from heapq import heappush, heappop
+from itertools import count
+from math import ceil, inf
+
+from rpc.connection import Connection as RPCConnection
+
+
+@dataclass(frozen=True)
+class PriorityClass:
+    """
+    A class of requests sharing a priority.
+
+    :param name: The name of the class.
+    :param priority: The priority of the class; waiting requests of classes with higher priorities are dispatched first.
+    :param share: The largest fraction of the scheduler's concurrency that requests of the class may occupy at once.
+    :param deadline: The default number of seconds a request of the class may wait before it is abandoned, or `None`
+        for no deadline.
+    """
+
+    name: str
+    priority: int
+    share: float = 1.0
+    deadline: Optional[float] = None
+
+
+@dataclass
+class PriorityClassMetrics:
+    queue_depth: int = 0
+    in_flight: int = 0
+    num_dispatched: int = 0
+    num_expired: int = 0
+    total_wait_time: float = 0.0
+    max_wait_time: float = 0.0
+
+    @property
+    def mean_wait_time(self) -> float:
+        return self.total_wait_time / self.num_dispatched if self.num_dispatched else 0.0
+
+
+@dataclass(order=True)
+class _WaitingRequest:
+    deadline: float
+    sequence_number: int
+    enqueue_time: float = field(compare=False)
+    future: Future = field(compare=False)
+    timer_handle: Optional[TimerHandle] = field(default=None, compare=False)
+
+
+class RequestScheduler:
+    """
+    Schedule the requests of several priority classes over one RPC connection.
+
+    At most `max_concurrency` requests are in flight at once. When a slot is free, the waiting request of the
+    highest-priority class that is below its share of the slots is dispatched; within a class, requests are dispatched
+    by earliest deadline, then in order of arrival. A request whose deadline passes while it waits is abandoned with a
+    `TimeoutError`. A low-priority class with a share below one thus uses all the capacity not used by other classes
+    while always leaving some free for them.
+
+    Requests of a class are made through the connection returned by `connection`, which can be passed as
+    `rpc_connection` to the operation functions.
+    """
+
+    def __init__(self, rpc_connection: RPCConnection, priority_classes: Iterable[PriorityClass], max_concurrency: int):
+        """
+        :param rpc_connection: The RPC connection with which to perform the requests.
+        :param priority_classes: The priority classes of the requests.
+        :param max_concurrency: The maximum number of requests in flight at once.
+        """
+
+        self.rpc_connection = rpc_connection
+        self.max_concurrency = max_concurrency
+
+        self.priority_classes: dict[str, PriorityClass] = {
+            priority_class.name: priority_class for priority_class in priority_classes
+        }
+        self._priority_class_names: list[str] = sorted(
+            self.priority_classes,
+            key=lambda name: self.priority_classes[name].priority,
+            reverse=True
+        )
+        self._max_in_flight: dict[str, int] = {
+            name: max(1, ceil(priority_class.share * max_concurrency))
+            for name, priority_class in self.priority_classes.items()
+        }
+
+        self._waiting_requests: dict[str, list[_WaitingRequest]] = {name: [] for name in self.priority_classes}
+        self._metrics: dict[str, PriorityClassMetrics] = {
+            name: PriorityClassMetrics() for name in self.priority_classes
+        }
+        self._num_in_flight = 0
+        self._sequence_numbers = count()
+
+    def connection(self, priority_class_name: str, deadline: Optional[float] = None) -> ScheduledConnection:
+        """
+        Obtain a connection through which requests are made with a priority class.
+
+        :param priority_class_name: The name of the priority class of the requests.
+        :param deadline: The number of seconds a request may wait, overriding the default of the priority class.
+        :return: The connection.
+        """
+
+        if priority_class_name not in self.priority_classes:
+            raise KeyError(f'Unknown priority class: {priority_class_name!r}')
+
+        return ScheduledConnection(scheduler=self, priority_class_name=priority_class_name, deadline=deadline)
+
+    def metrics(self) -> dict[str, PriorityClassMetrics]:
+        """
+        Obtain the current metrics of each priority class.
+
+        :return: A mapping of the names of the priority classes to copies of their metrics.
+        """
+
+        return {name: replace(metrics) for name, metrics in self._metrics.items()}
+
+    def _expire(self, priority_class_name: str, waiting_request: _WaitingRequest) -> None:
+        if not waiting_request.future.done():
+            waiting_request.future.set_exception(
+                TimeoutError(f'The request waited past its deadline in the {priority_class_name!r} class.')
+            )
+            metrics = self._metrics[priority_class_name]
+            metrics.queue_depth -= 1
+            metrics.num_expired += 1
+
+    def _dispatch(self) -> None:
+        loop = get_running_loop()
+
+        while self._num_in_flight < self.max_concurrency:
+            for name in self._priority_class_names:
+                waiting_requests = self._waiting_requests[name]
+                metrics = self._metrics[name]
+
+                # Discard requests that expired or whose callers were cancelled while waiting.
+                while waiting_requests and waiting_requests[0].future.done():
+                    heappop(waiting_requests)
+
+                if waiting_requests and metrics.in_flight < self._max_in_flight[name]:
+                    waiting_request = heappop(waiting_requests)
+                    if waiting_request.timer_handle is not None:
+                        waiting_request.timer_handle.cancel()
+
+                    wait_time = loop.time() - waiting_request.enqueue_time
+                    metrics.queue_depth -= 1
+                    metrics.in_flight += 1
+                    metrics.num_dispatched += 1
+                    metrics.total_wait_time += wait_time
+                    metrics.max_wait_time = max(metrics.max_wait_time, wait_time)
+                    self._num_in_flight += 1
+
+                    waiting_request.future.set_result(None)
+                    break
+            else:
+                return
+
+    async def _acquire(self, priority_class_name: str, deadline: Optional[float]) -> None:
+        loop = get_running_loop()
+
+        now = loop.time()
+        waiting_request = _WaitingRequest(
+            deadline=now + deadline if deadline is not None else inf,
+            sequence_number=next(self._sequence_numbers),
+            enqueue_time=now,
+            future=loop.create_future()
+        )
+        if deadline is not None:
+            waiting_request.timer_handle = loop.call_at(
+                waiting_request.deadline,
+                self._expire,
+                priority_class_name,
+                waiting_request
+            )
+
+        heappush(self._waiting_requests[priority_class_name], waiting_request)
+        self._metrics[priority_class_name].queue_depth += 1
+        self._dispatch()
+
+        try:
+            await waiting_request.future
+        except CancelledError:
+            if waiting_request.timer_handle is not None:
+                waiting_request.timer_handle.cancel()
+
+            if not waiting_request.future.cancelled() and waiting_request.future.exception() is None:
+                # The slot was granted just as the caller was cancelled.
+                self._release(priority_class_name=priority_class_name)
+            elif waiting_request.future.cancelled():
+                self._metrics[priority_class_name].queue_depth -= 1
+            raise
+
+    def _release(self, priority_class_name: str) -> None:
+        self._metrics[priority_class_name].in_flight -= 1
+        self._num_in_flight -= 1
+        self._dispatch()
+
+    async def request(
+        self,
+        priority_class_name: str,
+        request_message,
+        *args,
+        deadline: Optional[float] = None,
+        **kwargs
+    ):
+        await self._acquire(
+            priority_class_name=priority_class_name,
+            deadline=deadline if deadline is not None else self.priority_classes[priority_class_name].deadline
+        )
+        try:
+            return await self.rpc_connection.request(request_message, *args, **kwargs)
+        finally:
+            self._release(priority_class_name=priority_class_name)
+
+
+class ScheduledConnection:
+    """
+    A connection whose requests are made through a `RequestScheduler` with a priority class.
+
+    All attributes other than `request` are delegated to the scheduler's connection.
+    """
+
+    def __init__(self, scheduler: RequestScheduler, priority_class_name: str, deadline: Optional[float] = None):
+        self.scheduler = scheduler
+        self.priority_class_name = priority_class_name
+        self.deadline = deadline
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.scheduler.rpc_connection, name)
+
+    async def request(self, request_message, *args, **kwargs):
+        return await self.scheduler.request(
+            self.priority_class_name,
+            request_message,
+            *args,
+            deadline=self.deadline,
+            **kwargs
+        )
@@ -0,0 +1,248 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Optional, Union, AsyncIterator
+from fnmatch import translate
+from re import compile as re_compile, IGNORECASE, Pattern
+from struct import unpack_from
+
+from msdsalgs.win32_error import Win32ErrorCode
+from rpc.connection import Connection as RPCConnection
+
+from ms_rrp.capabilities import HostCapabilities
+from ms_rrp.operations import Operation
+from ms_rrp.operations.base_reg_open_key import base_reg_open_key, BaseRegOpenKeyRequest
+from ms_rrp.operations.base_reg_query_info_key import base_reg_query_info_key, BaseRegQueryInfoKeyRequest
+from ms_rrp.operations.base_reg_query_multiple_values import base_reg_query_multiple_values, \
+    BaseRegQueryMultipleValuesRequest, BaseRegQueryMultipleValuesResponse
+from ms_rrp.operations.base_reg_query_multiple_values2 import base_reg_query_multiple_values2, \
+    BaseRegQueryMultipleValues2Request
+from ms_rrp.structures.reg_value_type import RegValueType
+from ms_rrp.structures.ndr_helpers import align_offset
+from ms_rrp.utils import enumerate_sub_keys, enumerate_values, is_operation_error
+
+SearchPattern = Union[str, Pattern]
+
+
+@dataclass
+class SearchHit:
+    key_path: str
+    value_name: Optional[str] = None
+    value_type: Optional[RegValueType] = None
+    value: Optional[bytes] = None
+
+
+def compile_search_pattern(pattern: SearchPattern) -> Pattern:
+    """
+    Compile a search pattern.
+
+    Search patterns are matched with `Pattern.search`, so a regular expression matches anywhere in a string unless it
+    is anchored, whereas a glob pattern is anchored to match the whole string.
+
+    :param pattern: Either a compiled regular expression, which is used as is, or a glob pattern, which is matched
+        case-insensitively against the whole string.
+    :return: A compiled regular expression.
+    """
+
+    return pattern if isinstance(pattern, Pattern) else re_compile(rf'\A{translate(pattern)}', flags=IGNORECASE)
+
+
+def value_to_text(value_type: RegValueType, value: bytes) -> Optional[str]:
+    """
+    Produce a text representation of registry value data, against which a data pattern can be matched.
+
+    :param value_type: The type of the registry value.
+    :param value: The data of the registry value.
+    :return: The text representation of the data, or `None` if the type has no text representation.
+    """
+
+    if value_type in {RegValueType.REG_SZ, RegValueType.REG_EXPAND_SZ, RegValueType.REG_LINK}:
+        return value.decode(encoding='utf-16-le', errors='replace').rstrip('\x00')
+    elif value_type is RegValueType.REG_MULTI_SZ:
+        return '\n'.join(value.decode(encoding='utf-16-le', errors='replace').rstrip('\x00').split('\x00'))
+    elif value_type is RegValueType.REG_DWORD and len(value) >= 4:
+        return str(unpack_from('<I', value)[0])
+    elif value_type is RegValueType.REG_DWORD_BIG_ENDIAN and len(value) >= 4:
+        return str(unpack_from('>I', value)[0])
+    elif value_type is RegValueType.REG_QWORD and len(value) >= 8:
+        return str(unpack_from('<Q', value)[0])
+    else:
+        return None
+
+
+async def find(
+    rpc_connection: RPCConnection,
+    key_handle: bytes,
+    key_path: str = '',
+    key_name_pattern: Optional[SearchPattern] = None,
+    value_name_pattern: Optional[SearchPattern] = None,
+    value_data_pattern: Optional[SearchPattern] = None,
+    value_key_path_pattern: Optional[SearchPattern] = None,
+    exclude_key_path_pattern: Optional[SearchPattern] = None,
+    maximum_depth: Optional[int] = None,
+    host_capabilities: Optional[HostCapabilities] = None,
+    errors: Optional[dict[str, Exception]] = None
+) -> AsyncIterator[SearchHit]:
+    """
+    Search a registry key and its subkeys, yielding hits as they are found.
+
+    Subkeys whose paths match `exclude_key_path_pattern`, or that are deeper than `maximum_depth`, are not opened.
+    Values are only enumerated in keys whose paths match `value_key_path_pattern`, and only their names, types, and
+    sizes are enumerated at first; the data of the values whose names match is then retrieved with one
+    `BaseRegQueryMultipleValues` operation per key, which is retried once with the size that the server responds with
+    should the values have grown in the meantime. `BaseRegQueryMultipleValues2` is used instead on hosts that support
+    it according to `host_capabilities`. Should the operation fail, the values are instead enumerated with their data.
+
+    A key hit is yielded for each key whose name matches `key_name_pattern`. A value hit is yielded for each value
+    whose name matches `value_name_pattern` and whose data matches `value_data_pattern`; at least one of the two
+    patterns must be specified for values to be searched. Patterns are either compiled regular expressions or glob
+    patterns, and are matched as described in `compile_search_pattern`.
+
+    Subkeys that cannot be opened or searched, e.g. because access is denied, are skipped and the search continues.
+
+    :param rpc_connection: An RPC connection with which to perform the operations.
+    :param key_handle: A handle to the registry key at which to start the search.
+    :param key_path: The path of the registry key, used as a prefix of the paths in the hits.
+    :param key_name_pattern: A pattern matched against the names of keys.
+    :param value_name_pattern: A pattern matched against the names of values.
+    :param value_data_pattern: A pattern matched against the text representation of the data of values.
+    :param value_key_path_pattern: A pattern matched against the paths of keys whose values to search.
+    :param exclude_key_path_pattern: A pattern matched against the paths of keys whose subtrees not to search.
+    :param maximum_depth: The maximum depth, relative to the start key, of keys to search.
+    :param host_capabilities: The capabilities of the host, with which to choose how to retrieve values.
+    :param errors: A dictionary in which to record the paths of the skipped subkeys, mapped to their errors.
+    :return: An asynchronous iterator of search hits.
+    """
+
+    key_name_pattern = compile_search_pattern(key_name_pattern) if key_name_pattern is not None else None
+    value_name_pattern = compile_search_pattern(value_name_pattern) if value_name_pattern is not None else None
+    value_data_pattern = compile_search_pattern(value_data_pattern) if value_data_pattern is not None else None
+    value_key_path_pattern = (
+        compile_search_pattern(value_key_path_pattern) if value_key_path_pattern is not None else None
+    )
+    exclude_key_path_pattern = (
+        compile_search_pattern(exclude_key_path_pattern) if exclude_key_path_pattern is not None else None
+    )
+
+    search_values = value_name_pattern is not None or value_data_pattern is not None
+    query_multiple_values, query_multiple_values_request_class = (
+        (base_reg_query_multiple_values2, BaseRegQueryMultipleValues2Request)
+        if host_capabilities is not None and host_capabilities.supports(Operation.BASE_REG_QUERY_MULTIPLE_VALUES2)
+        else (base_reg_query_multiple_values, BaseRegQueryMultipleValuesRequest)
+    )
+
+    async def search_key(current_key_handle: bytes, current_key_path: str, depth: int) -> AsyncIterator[SearchHit]:
+        query_info_key_response = await base_reg_query_info_key(
+            rpc_connection=rpc_connection,
+            request=BaseRegQueryInfoKeyRequest(key_handle=current_key_handle)
+        )
+
+        if search_values and (value_key_path_pattern is None or value_key_path_pattern.search(current_key_path)):
+            matching_values: Optional[list[tuple[str, RegValueType, bytes]]] = None
+
+            matching_value_names: list[str] = []
+            value_buffer_size = 0
+            async for enum_value_response in enumerate_values(
+                rpc_connection=rpc_connection,
+                key_handle=current_key_handle,
+                query_info_key_response=query_info_key_response,
+                retrieve_values=False
+            ):
+                if value_name_pattern is None or value_name_pattern.search(enum_value_response.value_name):
+                    matching_value_names.append(enum_value_response.value_name)
+                    value_buffer_size += align_offset(enum_value_response.data_size, 8)
+
+            query_multiple_values_response: Optional[BaseRegQueryMultipleValuesResponse] = None
+            if matching_value_names:
+                query_multiple_values_response = await query_multiple_values(
+                    rpc_connection=rpc_connection,
+                    request=query_multiple_values_request_class(
+                        key_handle=current_key_handle,
+                        value_names=matching_value_names,
+                        value_buffer_size=value_buffer_size
+                    ),
+                    raise_exception=False
+                )
+                if query_multiple_values_response.return_code is Win32ErrorCode.ERROR_MORE_DATA:
+                    query_multiple_values_response = await query_multiple_values(
+                        rpc_connection=rpc_connection,
+                        request=query_multiple_values_request_class(
+                            key_handle=current_key_handle,
+                            value_names=matching_value_names,
+                            value_buffer_size=query_multiple_values_response.total_size
+                        )
+                    )
+
+            if query_multiple_values_response is None:
+                matching_values = []
+            elif query_multiple_values_response.return_code is Win32ErrorCode.ERROR_SUCCESS:
+                matching_values = [
+                    (value_name, value_entry.value_type, value_entry.value)
+                    for value_name, value_entry in zip(
+                        matching_value_names,
+                        query_multiple_values_response.value_entries
+                    )
+                ]
+
+            if matching_values is None:
+                matching_values = [
+                    (enum_value_response.value_name, enum_value_response.value_type, enum_value_response.value)
+                    async for enum_value_response in enumerate_values(
+                        rpc_connection=rpc_connection,
+                        key_handle=current_key_handle,
+                        query_info_key_response=query_info_key_response
+                    )
+                    if value_name_pattern is None or value_name_pattern.search(enum_value_response.value_name)
+                ]
+
+            for value_name, value_type, value in matching_values:
+                if value_data_pattern is not None:
+                    value_text = value_to_text(value_type=value_type, value=value)
+                    if value_text is None or not value_data_pattern.search(value_text):
+                        continue
+
+                yield SearchHit(key_path=current_key_path, value_name=value_name, value_type=value_type, value=value)
+
+        if maximum_depth is not None and depth >= maximum_depth:
+            return
+
+        sub_key_names = [
+            enum_key_response.sub_key_name
+            async for enum_key_response in enumerate_sub_keys(
+                rpc_connection=rpc_connection,
+                key_handle=current_key_handle,
+                query_info_key_response=query_info_key_response
+            )
+        ]
+
+        for sub_key_name in sub_key_names:
+            sub_key_path = f'{current_key_path}\\{sub_key_name}' if current_key_path else sub_key_name
+
+            if exclude_key_path_pattern is not None and exclude_key_path_pattern.search(sub_key_path):
+                continue
+
+            if key_name_pattern is not None and key_name_pattern.search(sub_key_name):
+                yield SearchHit(key_path=sub_key_path)
+
+            if not search_values and maximum_depth is not None and depth + 1 >= maximum_depth:
+                continue
+
+            base_reg_open_key_options = dict(
+                rpc_connection=rpc_connection,
+                request=BaseRegOpenKeyRequest(key_handle=current_key_handle, sub_key_name=sub_key_name)
+            )
+            try:
+                async with base_reg_open_key(**base_reg_open_key_options) as base_reg_open_key_response:
+                    async for search_hit in search_key(
+                        current_key_handle=base_reg_open_key_response.key_handle,
+                        current_key_path=sub_key_path,
+                        depth=depth + 1
+                    ):
+                        yield search_hit
+            except Exception as exception:
+                if not is_operation_error(exception=exception):
+                    raise
+                if errors is not None:
+                    errors[sub_key_path] = exception
+
+    async for hit in search_key(current_key_handle=key_handle, current_key_path=key_path, depth=0):
+        yield hit
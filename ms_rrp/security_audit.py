@@ -0,0 +1,194 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Optional, Union
+from array import array
+from asyncio import Queue, create_task, gather
+
+from msdsalgs.win32_error import Win32ErrorCode
+from rpc.connection import Connection as RPCConnection
+
+from ms_rrp.operations.base_reg_open_key import base_reg_open_key, BaseRegOpenKeyRequest
+from ms_rrp.operations.base_reg_query_info_key import base_reg_query_info_key, BaseRegQueryInfoKeyRequest
+from ms_rrp.operations.base_reg_get_key_security import base_reg_get_key_security, BaseRegGetKeySecurityRequest
+from ms_rrp.structures.regsam import Regsam
+from ms_rrp.structures.security_information import SecurityInformation
+from ms_rrp.utils import enumerate_sub_keys
+
+
+@dataclass
+class KeySecurityAudit:
+    """
+    The security descriptors of the keys of a registry tree.
+
+    Identical security descriptors are stored once, in `security_descriptors`; each key refers to its security
+    descriptor by an index into it, so that memory use is proportional to the number of distinct security descriptors
+    rather than to the number of keys.
+    """
+
+    key_paths: list[str] = field(default_factory=list)
+    security_descriptor_indices: array = field(default_factory=lambda: array('L'))
+    security_descriptors: list[bytes] = field(default_factory=list)
+    errors: dict[str, Union[Win32ErrorCode, Exception]] = field(default_factory=dict)
+    _security_descriptor_to_index: dict[bytes, int] = field(default_factory=dict, repr=False)
+
+    def add(self, key_path: str, security_descriptor: bytes) -> int:
+        """
+        Record the security descriptor of a key, interning it.
+
+        :param key_path: The path of the key.
+        :param security_descriptor: The self-relative security descriptor of the key.
+        :return: The index of the security descriptor in `security_descriptors`.
+        """
+
+        if (index := self._security_descriptor_to_index.get(security_descriptor)) is None:
+            index = len(self.security_descriptors)
+            self.security_descriptors.append(security_descriptor)
+            self._security_descriptor_to_index[security_descriptor] = index
+
+        self.key_paths.append(key_path)
+        self.security_descriptor_indices.append(index)
+
+        return index
+
+    def key_paths_by_security_descriptor(self) -> dict[bytes, list[str]]:
+        """
+        Group the paths of the keys by their security descriptors.
+
+        :return: A mapping of each distinct security descriptor to the paths of the keys that have it.
+        """
+
+        key_paths_by_index: list[list[str]] = [[] for _ in self.security_descriptors]
+        for key_path, index in zip(self.key_paths, self.security_descriptor_indices):
+            key_paths_by_index[index].append(key_path)
+
+        return dict(zip(self.security_descriptors, key_paths_by_index))
+
+
+async def audit_key_security(
+    rpc_connection: RPCConnection,
+    key_handle: bytes,
+    key_path: str = '',
+    security_information: SecurityInformation = (
+        SecurityInformation.OWNER_SECURITY_INFORMATION
+        | SecurityInformation.GROUP_SECURITY_INFORMATION
+        | SecurityInformation.DACL_SECURITY_INFORMATION
+    ),
+    maximum_depth: Optional[int] = None,
+    max_concurrency: int = 16,
+    sam_desired: Regsam = Regsam(maximum_allowed=True)
+) -> KeySecurityAudit:
+    """
+    Retrieve the security descriptors of a registry key and all of its subkeys.
+
+    The keys are processed by `max_concurrency` workers, each of which opens one key at a time relative to the start
+    key, so that at most `max_concurrency` keys are open, and no key is kept open while its subkeys are processed. The
+    `BaseRegQueryInfoKey` operation performed to enumerate the subkeys of a key also provides the size of its security
+    descriptor, so that each security descriptor is usually retrieved with one `BaseRegGetKeySecurity` operation. If the
+    security descriptor has grown in between, the operation is retried once with the size returned by the server.
+
+    A failure to open a key, to query it, or to retrieve its security descriptor, including for the start key, does
+    not abort the audit of the rest of the tree; it is recorded in `errors`.
+
+    :param rpc_connection: An RPC connection with which to perform the operations.
+    :param key_handle: A handle to the registry key at which to start the audit.
+    :param key_path: The path of the registry key, used as a prefix of the paths of the audited keys.
+    :param security_information: The parts of the security descriptors to retrieve.
+    :param maximum_depth: The maximum depth, relative to the start key, of keys to audit.
+    :param max_concurrency: The maximum number of keys being processed at once.
+    :param sam_desired: The desired access when opening the subkeys.
+    :return: The interned security descriptors of the audited keys.
+    """
+
+    key_security_audit = KeySecurityAudit()
+    # The paths of the keys to audit, relative to the start key, and their depths.
+    queue: Queue[tuple[str, int]] = Queue()
+
+    async def audit_key(audited_key_handle: bytes, audited_key_path: str, relative_key_path: str, depth: int) -> None:
+        query_info_key_response = await base_reg_query_info_key(
+            rpc_connection=rpc_connection,
+            request=BaseRegQueryInfoKeyRequest(key_handle=audited_key_handle)
+        )
+
+        security_descriptor_buffer_size = query_info_key_response.security_descriptor_size
+        for _ in range(2):
+            base_reg_get_key_security_response = await base_reg_get_key_security(
+                rpc_connection=rpc_connection,
+                request=BaseRegGetKeySecurityRequest(
+                    key_handle=audited_key_handle,
+                    security_information=security_information,
+                    security_descriptor_buffer_size=security_descriptor_buffer_size
+                ),
+                raise_exception=False
+            )
+            # The security descriptor may have grown since the key was queried, in which case the server responds with
+            # the size that it requires.
+            if base_reg_get_key_security_response.return_code is not Win32ErrorCode.ERROR_INSUFFICIENT_BUFFER:
+                break
+            security_descriptor_buffer_size = base_reg_get_key_security_response.security_descriptor_size
+
+        if base_reg_get_key_security_response.return_code is Win32ErrorCode.ERROR_SUCCESS:
+            key_security_audit.add(
+                key_path=audited_key_path,
+                security_descriptor=base_reg_get_key_security_response.security_descriptor
+            )
+        else:
+            key_security_audit.errors[audited_key_path] = base_reg_get_key_security_response.return_code
+
+        if maximum_depth is not None and depth >= maximum_depth:
+            return
+
+        async for enum_key_response in enumerate_sub_keys(
+            rpc_connection=rpc_connection,
+            key_handle=audited_key_handle,
+            query_info_key_response=query_info_key_response
+        ):
+            queue.put_nowait((
+                f'{relative_key_path}\\{enum_key_response.sub_key_name}'
+                if relative_key_path else enum_key_response.sub_key_name,
+                depth + 1
+            ))
+
+    async def worker() -> None:
+        while True:
+            relative_key_path, depth = await queue.get()
+            audited_key_path = '\\'.join(filter(None, (key_path, relative_key_path)))
+            try:
+                if not relative_key_path:
+                    await audit_key(
+                        audited_key_handle=key_handle,
+                        audited_key_path=audited_key_path,
+                        relative_key_path=relative_key_path,
+                        depth=depth
+                    )
+                    continue
+
+                base_reg_open_key_options = dict(
+                    rpc_connection=rpc_connection,
+                    request=BaseRegOpenKeyRequest(
+                        key_handle=key_handle,
+                        sub_key_name=relative_key_path,
+                        sam_desired=sam_desired
+                    )
+                )
+                async with base_reg_open_key(**base_reg_open_key_options) as base_reg_open_key_response:
+                    await audit_key(
+                        audited_key_handle=base_reg_open_key_response.key_handle,
+                        audited_key_path=audited_key_path,
+                        relative_key_path=relative_key_path,
+                        depth=depth
+                    )
+            except Exception as exception:
+                key_security_audit.errors.setdefault(audited_key_path, exception)
+            finally:
+                queue.task_done()
+
+    queue.put_nowait(('', 0))
+    workers = [create_task(worker()) for _ in range(max_concurrency)]
+    try:
+        await queue.join()
+    finally:
+        for worker_task in workers:
+            worker_task.cancel()
+        await gather(*workers, return_exceptions=True)
+
+    return key_security_audit
@@ -0,0 +1,364 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Callable, AsyncIterator, Iterator, Iterable, Optional, Final
+from asyncio import Semaphore, Lock, Task, gather, run, sleep, create_task, get_running_loop
+from multiprocessing import get_context
+from multiprocessing.connection import Connection as PipeConnection, wait
+from multiprocessing.context import BaseContext
+from os import cpu_count
+from struct import Struct
+from time import monotonic
+
+from ms_rrp.structures.reg_value_type import RegValueType
+from ms_rrp.utils import WalkedKey
+
+# A function that connects to a host and walks its registry, e.g. with `walk_key`. It is called in the worker
+# processes, so it must be picklable, i.e. defined at the top level of a module.
+HostCrawler = Callable[[str], AsyncIterator[WalkedKey]]
+
+# The workers send frames of records. A key record consists of the header (the kind, the host index, the last-write
+# time, and the number of values) followed by the key path and, per value, the name, the type, and the data. A host
+# record consists of the header (the kind, the host index, and whether the crawl failed) followed by an error message.
+# Strings and data are prefixed with their lengths.
+
+_KEY_RECORD_KIND: Final[int] = 0
+_HOST_RECORD_KIND: Final[int] = 1
+
+_KIND_STRUCT: Final[Struct] = Struct('<B')
+_KEY_RECORD_HEADER_STRUCT: Final[Struct] = Struct('<BIQI')
+_HOST_RECORD_HEADER_STRUCT: Final[Struct] = Struct('<BI?')
+_LENGTH_STRUCT: Final[Struct] = Struct('<I')
+_VALUE_TYPE_STRUCT: Final[Struct] = Struct('<I')
+
+DEFAULT_FRAME_SIZE: Final[int] = 256 * 1024
+DEFAULT_FLUSH_INTERVAL: Final[float] = 1.0
+
+
+def _pack_bytes(data: bytes) -> bytes:
+    return _LENGTH_STRUCT.pack(len(data)) + data
+
+
+def _pack_string(string: str) -> bytes:
+    return _pack_bytes(string.encode(encoding='utf-8', errors='surrogatepass'))
+
+
+def _unpack_bytes(data: memoryview, offset: int) -> tuple[bytes, int]:
+    length: int = _LENGTH_STRUCT.unpack_from(data, offset)[0]
+    offset += _LENGTH_STRUCT.size
+    return bytes(data[offset:offset + length]), offset + length
+
+
+def _unpack_string(data: memoryview, offset: int) -> tuple[str, int]:
+    string_data, offset = _unpack_bytes(data=data, offset=offset)
+    return string_data.decode(encoding='utf-8', errors='surrogatepass'), offset
+
+
+def pack_key_record(host_index: int, walked_key: WalkedKey) -> bytes:
+    return b''.join([
+        _KEY_RECORD_HEADER_STRUCT.pack(
+            _KEY_RECORD_KIND,
+            host_index,
+            walked_key.last_write_time,
+            len(walked_key.values)
+        ),
+        _pack_string(walked_key.key_path),
+        *(
+            _pack_string(value_name) + _VALUE_TYPE_STRUCT.pack(value_type) + _pack_bytes(value)
+            for value_name, (value_type, value) in walked_key.values.items()
+        )
+    ])
+
+
+def pack_host_record(host_index: int, error_message: Optional[str] = None) -> bytes:
+    return b''.join([
+        _HOST_RECORD_HEADER_STRUCT.pack(_HOST_RECORD_KIND, host_index, error_message is not None),
+        _pack_string(error_message or '')
+    ])
+
+
+def unpack_records(frame: bytes) -> Iterator[tuple[int, Optional[WalkedKey], Optional[str]]]:
+    """
+    Unpack the records of a frame.
+
+    :param frame: A frame sent by a worker.
+    :return: An iterator of the host index and either the walked key, for key records, or `None` and the error
+        message, if any, for host records.
+    """
+
+    with memoryview(frame) as data:
+        offset = 0
+        while offset < len(data):
+            if _KIND_STRUCT.unpack_from(data, offset)[0] == _KEY_RECORD_KIND:
+                _, host_index, last_write_time, num_values = _KEY_RECORD_HEADER_STRUCT.unpack_from(data, offset)
+                key_path, offset = _unpack_string(data=data, offset=offset + _KEY_RECORD_HEADER_STRUCT.size)
+
+                values: dict[str, tuple[RegValueType, bytes]] = {}
+                for _ in range(num_values):
+                    value_name, offset = _unpack_string(data=data, offset=offset)
+                    value_type: int = _VALUE_TYPE_STRUCT.unpack_from(data, offset)[0]
+                    value, offset = _unpack_bytes(data=data, offset=offset + _VALUE_TYPE_STRUCT.size)
+                    values[value_name] = (RegValueType(value_type), value)
+
+                yield host_index, WalkedKey(key_path=key_path, last_write_time=last_write_time, values=values), None
+            else:
+                _, host_index, failed = _HOST_RECORD_HEADER_STRUCT.unpack_from(data, offset)
+                error_message, offset = _unpack_string(data=data, offset=offset + _HOST_RECORD_HEADER_STRUCT.size)
+                yield host_index, None, error_message if failed else None
+
+
+class _FrameWriter:
+    """
+    Buffer records into frames and send them over a pipe from a thread, so that a full pipe does not block the event
+    loop.
+
+    A frame is sent once `frame_size` bytes of records are buffered, or every `flush_interval` seconds, so that the
+    keys of slow hosts are not held back. One frame is sent at a time, in order; a write that fills a frame while
+    another is being sent waits for it, so that the buffered records are bounded when the parent falls behind.
+    """
+
+    def __init__(self, pipe_connection: PipeConnection, frame_size: int, flush_interval: float):
+        self._pipe_connection = pipe_connection
+        self._frame_size = frame_size
+        self._flush_interval = flush_interval
+        self._buffer = bytearray()
+        self._send_lock = Lock()
+        self._flush_task: Optional[Task] = None
+
+    async def __aenter__(self) -> _FrameWriter:
+        self._flush_task = create_task(self._flush_periodically())
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        # The periodic flush is cancelled while it is not sending, as a send in a thread cannot be interrupted.
+        async with self._send_lock:
+            self._flush_task.cancel()
+        await self.flush()
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await sleep(self._flush_interval)
+            await self.flush()
+
+    async def write(self, record: bytes) -> None:
+        self._buffer += record
+        if len(self._buffer) >= self._frame_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        async with self._send_lock:
+            if self._buffer:
+                frame = bytes(self._buffer)
+                self._buffer.clear()
+                await get_running_loop().run_in_executor(None, self._pipe_connection.send_bytes, frame)
+
+
+async def _crawl_shard(
+    host_crawler: HostCrawler,
+    shard: list[tuple[int, str]],
+    pipe_connection: PipeConnection,
+    max_concurrent_hosts: int,
+    frame_size: int,
+    flush_interval: float
+) -> None:
+    semaphore = Semaphore(max_concurrent_hosts)
+
+    async with _FrameWriter(
+        pipe_connection=pipe_connection,
+        frame_size=frame_size,
+        flush_interval=flush_interval
+    ) as frame_writer:
+        async def crawl_host(host_index: int, host: str) -> None:
+            async with semaphore:
+                try:
+                    async for walked_key in host_crawler(host):
+                        await frame_writer.write(record=pack_key_record(host_index=host_index, walked_key=walked_key))
+                except Exception as exception:
+                    await frame_writer.write(
+                        record=pack_host_record(
+                            host_index=host_index,
+                            error_message=f'{type(exception).__name__}: {exception}'
+                        )
+                    )
+                else:
+                    await frame_writer.write(record=pack_host_record(host_index=host_index))
+
+        await gather(*(crawl_host(host_index=host_index, host=host) for host_index, host in shard))
+
+
+def _run_worker(
+    host_crawler: HostCrawler,
+    shard: list[tuple[int, str]],
+    pipe_connection: PipeConnection,
+    max_concurrent_hosts: int,
+    frame_size: int,
+    flush_interval: float
+) -> None:
+    try:
+        run(
+            _crawl_shard(
+                host_crawler=host_crawler,
+                shard=shard,
+                pipe_connection=pipe_connection,
+                max_concurrent_hosts=max_concurrent_hosts,
+                frame_size=frame_size,
+                flush_interval=flush_interval
+            )
+        )
+    finally:
+        pipe_connection.close()
+
+
+@dataclass
+class ShardedCrawlProgress:
+    num_hosts: int
+    num_workers: int
+    num_hosts_done: int = 0
+    num_keys: int = 0
+    num_values: int = 0
+    num_bytes_received: int = 0
+    num_frames_received: int = 0
+    num_keys_per_worker: list[int] = field(default_factory=list)
+    failed_hosts: dict[str, str] = field(default_factory=dict)
+    start_time: float = field(default_factory=monotonic)
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return monotonic() - self.start_time
+
+    @property
+    def keys_per_second(self) -> float:
+        return self.num_keys / elapsed_seconds if (elapsed_seconds := self.elapsed_seconds) else 0.0
+
+    @property
+    def hosts_per_second(self) -> float:
+        return self.num_hosts_done / elapsed_seconds if (elapsed_seconds := self.elapsed_seconds) else 0.0
+
+
+class ShardedCrawl:
+    """
+    Crawl the registries of many hosts with several worker processes.
+
+    The hosts are split round-robin into one shard per worker. Each worker process runs its own event loop, in which
+    it crawls the hosts of its shard concurrently with `host_crawler`, which is responsible for establishing the
+    connections. The walked keys are sent back to the parent process over pipes, batched into frames of compact binary
+    records, so that marshalling the requests and parsing the responses, which are CPU-bound, are spread across cores.
+
+    Iterating over the crawl starts the workers and yields the walked keys as they arrive, while `progress` is kept up
+    to date. Hosts whose crawl fails are reported in `progress.failed_hosts`.
+    """
+
+    def __init__(
+        self,
+        host_crawler: HostCrawler,
+        hosts: Iterable[str],
+        num_workers: Optional[int] = None,
+        max_concurrent_hosts: int = 32,
+        frame_size: int = DEFAULT_FRAME_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        mp_context: Optional[BaseContext] = None,
+        progress_callback: Optional[Callable[[ShardedCrawlProgress], None]] = None
+    ):
+        """
+        :param host_crawler: A picklable function that connects to a host and yields its walked keys.
+        :param hosts: The hosts to crawl.
+        :param num_workers: The number of worker processes. Defaults to the number of CPUs.
+        :param max_concurrent_hosts: The maximum number of hosts being crawled at once by each worker.
+        :param frame_size: The number of bytes of records a worker buffers before sending them.
+        :param flush_interval: The number of seconds after which a worker sends the records it has buffered, even if
+            they do not fill a frame.
+        :param mp_context: The multiprocessing context with which to start the workers. Defaults to the `spawn` context,
+            so that the workers do not inherit the state of an event loop from the parent.
+        :param progress_callback: A function called with the progress after each frame is received.
+        """
+
+        self.host_crawler = host_crawler
+        self.hosts: list[str] = list(hosts)
+        self.num_workers = max(1, min(num_workers or cpu_count() or 1, len(self.hosts) or 1))
+        self.max_concurrent_hosts = max_concurrent_hosts
+        self.frame_size = frame_size
+        self.flush_interval = flush_interval
+        self.mp_context = mp_context or get_context('spawn')
+        self.progress_callback = progress_callback
+
+        self.progress = ShardedCrawlProgress(num_hosts=len(self.hosts), num_workers=self.num_workers)
+
+    def __iter__(self) -> Iterator[tuple[str, WalkedKey]]:
+        """
+        Run the crawl.
+
+        :return: An iterator of the hosts and their walked keys, in the order in which they are received.
+        """
+
+        self.progress = ShardedCrawlProgress(
+            num_hosts=len(self.hosts),
+            num_workers=self.num_workers,
+            num_keys_per_worker=[0] * self.num_workers
+        )
+
+        processes = []
+        pipe_connection_to_worker_index: dict[PipeConnection, int] = {}
+        done_host_indices: set[int] = set()
+        try:
+            for worker_index in range(self.num_workers):
+                receive_connection, send_connection = self.mp_context.Pipe(duplex=False)
+                process = self.mp_context.Process(
+                    target=_run_worker,
+                    kwargs=dict(
+                        host_crawler=self.host_crawler,
+                        shard=[
+                            (host_index, self.hosts[host_index])
+                            for host_index in range(worker_index, len(self.hosts), self.num_workers)
+                        ],
+                        pipe_connection=send_connection,
+                        max_concurrent_hosts=self.max_concurrent_hosts,
+                        frame_size=self.frame_size,
+                        flush_interval=self.flush_interval
+                    ),
+                    daemon=True
+                )
+                process.start()
+                # The parent's copy of the sending end must be closed for the end of the pipe to be detected.
+                send_connection.close()
+                processes.append(process)
+                pipe_connection_to_worker_index[receive_connection] = worker_index
+
+            while pipe_connection_to_worker_index:
+                for pipe_connection in wait(list(pipe_connection_to_worker_index)):
+                    try:
+                        frame: bytes = pipe_connection.recv_bytes()
+                    except EOFError:
+                        pipe_connection.close()
+                        del pipe_connection_to_worker_index[pipe_connection]
+                        continue
+
+                    worker_index = pipe_connection_to_worker_index[pipe_connection]
+                    self.progress.num_frames_received += 1
+                    self.progress.num_bytes_received += len(frame)
+
+                    for host_index, walked_key, error_message in unpack_records(frame=frame):
+                        if walked_key is not None:
+                            self.progress.num_keys += 1
+                            self.progress.num_values += len(walked_key.values)
+                            self.progress.num_keys_per_worker[worker_index] += 1
+                            yield self.hosts[host_index], walked_key
+                        else:
+                            done_host_indices.add(host_index)
+                            self.progress.num_hosts_done += 1
+                            if error_message is not None:
+                                self.progress.failed_hosts[self.hosts[host_index]] = error_message
+
+                    if self.progress_callback is not None:
+                        self.progress_callback(self.progress)
+
+            # Hosts of a worker that exited prematurely, e.g. because it crashed, were never reported.
+            for host_index, host in enumerate(self.hosts):
+                if host_index not in done_host_indices:
+                    self.progress.num_hosts_done += 1
+                    self.progress.failed_hosts[host] = 'The worker process exited before the crawl of the host ended.'
+        finally:
+            for pipe_connection in pipe_connection_to_worker_index:
+                pipe_connection.close()
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                process.join()
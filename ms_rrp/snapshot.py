@@ -0,0 +1,233 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Optional, Iterator, Any, TextIO
+from enum import Enum
+from base64 import b64encode, b64decode
+from json import dump as json_dump, load as json_load
+
+from rpc.connection import Connection as RPCConnection
+
+from ms_rrp.operations.base_reg_open_key import base_reg_open_key, BaseRegOpenKeyRequest
+from ms_rrp.operations.base_reg_query_info_key import base_reg_query_info_key, BaseRegQueryInfoKeyRequest
+from ms_rrp.structures.reg_value_type import RegValueType
+from ms_rrp.utils import enumerate_sub_keys, enumerate_values, is_operation_error
+
+
+@dataclass
+class KeySnapshot:
+    last_write_time: int
+    values: dict[str, tuple[RegValueType, bytes]] = field(default_factory=dict)
+    sub_keys: dict[str, KeySnapshot] = field(default_factory=dict)
+    # The subkeys of which no snapshot could be taken, e.g. because access was denied, mapped to the error.
+    errors: dict[str, str] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'last_write_time': self.last_write_time,
+            'values': {
+                value_name: [value_type.value, b64encode(value).decode()]
+                for value_name, (value_type, value) in self.values.items()
+            },
+            'sub_keys': {sub_key_name: sub_key.to_dict() for sub_key_name, sub_key in self.sub_keys.items()},
+            'errors': self.errors
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> KeySnapshot:
+        return cls(
+            last_write_time=data['last_write_time'],
+            values={
+                value_name: (RegValueType(value_type), b64decode(value))
+                for value_name, (value_type, value) in data['values'].items()
+            },
+            sub_keys={
+                sub_key_name: cls.from_dict(data=sub_key_data)
+                for sub_key_name, sub_key_data in data['sub_keys'].items()
+            },
+            errors=data.get('errors', {})
+        )
+
+
+class ChangeKind(Enum):
+    KEY_ADDED = 'key_added'
+    KEY_REMOVED = 'key_removed'
+    VALUE_ADDED = 'value_added'
+    VALUE_REMOVED = 'value_removed'
+    VALUE_MODIFIED = 'value_modified'
+
+
+@dataclass(frozen=True)
+class SnapshotChange:
+    kind: ChangeKind
+    key_path: str
+    value_name: Optional[str] = None
+    old_value: Optional[tuple[RegValueType, bytes]] = None
+    new_value: Optional[tuple[RegValueType, bytes]] = None
+
+
+async def take_snapshot(
+    rpc_connection: RPCConnection,
+    key_handle: bytes,
+    previous_snapshot: Optional[KeySnapshot] = None
+) -> KeySnapshot:
+    """
+    Take a snapshot of a registry key, its values, and its subkeys.
+
+    If a previous snapshot is provided, the values and the subkey names of keys whose last-write time has not changed
+    since that snapshot are reused rather than enumerated. A key's last-write time is updated when its values are
+    modified or when subkeys are added or removed, but not when its descendants are modified, so every key is still
+    visited with one `BaseRegQueryInfoKey` operation.
+
+    A subkey that cannot be opened or read, e.g. `HKLM\\SAM\\SAM` or `HKLM\\SECURITY` without the necessary
+    privileges, does not abort the snapshot; the error is recorded in the `errors` of its parent key's snapshot and
+    the remaining subkeys are visited.
+
+    :param rpc_connection: An RPC connection with which to perform the operations.
+    :param key_handle: A handle to the registry key of which to take a snapshot.
+    :param previous_snapshot: A previous snapshot of the same key.
+    :return: A snapshot of the registry key.
+    """
+
+    query_info_key_response = await base_reg_query_info_key(
+        rpc_connection=rpc_connection,
+        request=BaseRegQueryInfoKeyRequest(key_handle=key_handle)
+    )
+
+    if previous_snapshot is not None and previous_snapshot.last_write_time == query_info_key_response.last_write_time:
+        values = previous_snapshot.values
+        sub_key_names = [*previous_snapshot.sub_keys.keys(), *previous_snapshot.errors.keys()]
+    else:
+        values = {
+            enum_value_response.value_name: (enum_value_response.value_type, enum_value_response.value)
+            async for enum_value_response in enumerate_values(
+                rpc_connection=rpc_connection,
+                key_handle=key_handle,
+                query_info_key_response=query_info_key_response
+            )
+        }
+        sub_key_names = [
+            enum_key_response.sub_key_name
+            async for enum_key_response in enumerate_sub_keys(
+                rpc_connection=rpc_connection,
+                key_handle=key_handle,
+                query_info_key_response=query_info_key_response
+            )
+        ]
+
+    sub_keys: dict[str, KeySnapshot] = {}
+    errors: dict[str, str] = {}
+    for sub_key_name in sub_key_names:
+        base_reg_open_key_options = dict(
+            rpc_connection=rpc_connection,
+            request=BaseRegOpenKeyRequest(key_handle=key_handle, sub_key_name=sub_key_name)
+        )
+        try:
+            async with base_reg_open_key(**base_reg_open_key_options) as base_reg_open_key_response:
+                sub_keys[sub_key_name] = await take_snapshot(
+                    rpc_connection=rpc_connection,
+                    key_handle=base_reg_open_key_response.key_handle,
+                    previous_snapshot=previous_snapshot.sub_keys.get(sub_key_name) if previous_snapshot else None
+                )
+        except Exception as exception:
+            if not is_operation_error(exception=exception):
+                raise
+            errors[sub_key_name] = repr(exception)
+
+    return KeySnapshot(
+        last_write_time=query_info_key_response.last_write_time,
+        values=values,
+        sub_keys=sub_keys,
+        errors=errors
+    )
+
+
+def _iter_key_changes(snapshot: KeySnapshot, key_path: str, kind: ChangeKind) -> Iterator[SnapshotChange]:
+    yield SnapshotChange(kind=kind, key_path=key_path)
+    for sub_key_name, sub_key in snapshot.sub_keys.items():
+        yield from _iter_key_changes(snapshot=sub_key, key_path=f'{key_path}\\{sub_key_name}', kind=kind)
+
+
+def diff_snapshots(old_snapshot: KeySnapshot, new_snapshot: KeySnapshot, key_path: str = '') -> Iterator[SnapshotChange]:
+    """
+    Compare two snapshots of the same registry key.
+
+    Values that were reused from the old snapshot by `take_snapshot` are not compared, nor are subkeys of which
+    either snapshot could not be taken.
+
+    :param old_snapshot: The older snapshot.
+    :param new_snapshot: The newer snapshot.
+    :param key_path: The path of the registry key, used as a prefix of the paths in the changes.
+    :return: An iterator of the added, removed, and modified keys and values.
+    """
+
+    if old_snapshot.values is not new_snapshot.values:
+        # Value names are case-insensitive, so a value whose name only changed case is the same value.
+        folded_name_to_new_value_name = {value_name.casefold(): value_name for value_name in new_snapshot.values}
+        folded_old_value_names = {value_name.casefold() for value_name in old_snapshot.values}
+
+        for value_name, old_value in old_snapshot.values.items():
+            if (new_value_name := folded_name_to_new_value_name.get(value_name.casefold())) is None:
+                yield SnapshotChange(
+                    kind=ChangeKind.VALUE_REMOVED,
+                    key_path=key_path,
+                    value_name=value_name,
+                    old_value=old_value
+                )
+            elif (new_value := new_snapshot.values[new_value_name]) != old_value:
+                yield SnapshotChange(
+                    kind=ChangeKind.VALUE_MODIFIED,
+                    key_path=key_path,
+                    value_name=new_value_name,
+                    old_value=old_value,
+                    new_value=new_value
+                )
+
+        for value_name, new_value in new_snapshot.values.items():
+            if value_name.casefold() not in folded_old_value_names:
+                yield SnapshotChange(
+                    kind=ChangeKind.VALUE_ADDED,
+                    key_path=key_path,
+                    value_name=value_name,
+                    new_value=new_value
+                )
+
+    for sub_key_name, old_sub_key in old_snapshot.sub_keys.items():
+        if sub_key_name in new_snapshot.errors:
+            continue
+
+        sub_key_path = f'{key_path}\\{sub_key_name}' if key_path else sub_key_name
+        if (new_sub_key := new_snapshot.sub_keys.get(sub_key_name)) is None:
+            yield from _iter_key_changes(snapshot=old_sub_key, key_path=sub_key_path, kind=ChangeKind.KEY_REMOVED)
+        else:
+            yield from diff_snapshots(old_snapshot=old_sub_key, new_snapshot=new_sub_key, key_path=sub_key_path)
+
+    for sub_key_name, new_sub_key in new_snapshot.sub_keys.items():
+        if sub_key_name not in old_snapshot.sub_keys and sub_key_name not in old_snapshot.errors:
+            yield from _iter_key_changes(
+                snapshot=new_sub_key,
+                key_path=f'{key_path}\\{sub_key_name}' if key_path else sub_key_name,
+                kind=ChangeKind.KEY_ADDED
+            )
+
+
+def dump_snapshot(snapshot: KeySnapshot, file: TextIO) -> None:
+    """
+    Persist a snapshot as JSON.
+
+    :param snapshot: The snapshot to persist.
+    :param file: A text file to which to write the snapshot.
+    :return: None
+    """
+
+    json_dump(obj=snapshot.to_dict(), fp=file)
+
+
+def load_snapshot(file: TextIO) -> KeySnapshot:
+    """
+    Load a snapshot persisted with `dump_snapshot`.
+
+    :param file: A text file from which to read the snapshot.
+    :return: The loaded snapshot.
+    """
+
+    return KeySnapshot.from_dict(data=json_load(fp=file))
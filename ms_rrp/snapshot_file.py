@@ -0,0 +1,341 @@
+from __future__ import annotations
+from typing import Optional, Iterator, Union, Final
+from struct import Struct
+from mmap import mmap, ACCESS_READ
+from pathlib import Path
+
+from ms_rrp.crawl_store import CrawlStore
+from ms_rrp.snapshot import ChangeKind, SnapshotChange
+from ms_rrp.structures.reg_value_type import RegValueType
+from ms_rrp.utils import WalkedKey
+
+# The layout of a snapshot file, in which all integers are little-endian:
+#
+#   header
+#   string offsets  (num_strings + 1) * u64, offsets of the strings relative to the string data
+#   string data     UTF-8 encoded strings
+#   key records     num_keys * (path string index u32, last-write time u64, first value index u32, num values u32),
+#                   sorted by the lowercase key path
+#   value records   num_values * (name string index u32, value type u32, data offset u64, data length u64)
+#   value data
+
+SNAPSHOT_FILE_MAGIC: Final[bytes] = b'RRPSNAP\x00'
+SNAPSHOT_FILE_VERSION: Final[int] = 1
+
+_HEADER_STRUCT: Final[Struct] = Struct('<8sIIII5Q')
+_STRING_OFFSET_STRUCT: Final[Struct] = Struct('<Q')
+_STRING_OFFSET_PAIR_STRUCT: Final[Struct] = Struct('<2Q')
+_KEY_RECORD_STRUCT: Final[Struct] = Struct('<IQII')
+_VALUE_RECORD_STRUCT: Final[Struct] = Struct('<IIQQ')
+
+
+def write_snapshot_file(file_path: Union[str, Path], crawl_store: CrawlStore) -> None:
+    """
+    Write the keys and values of a crawl store to a snapshot file.
+
+    :param file_path: The path of the snapshot file to write.
+    :param crawl_store: The crawl store whose keys and values to write.
+    :return: None
+    """
+
+    key_paths: list[str] = [crawl_store.key_path(key_index=key_index) for key_index in range(len(crawl_store))]
+    sorted_key_indices: list[int] = sorted(range(len(crawl_store)), key=lambda key_index: key_paths[key_index].lower())
+
+    strings: list[str] = []
+    string_to_index: dict[str, int] = {}
+
+    def intern(string: str) -> int:
+        if (index := string_to_index.get(string)) is None:
+            index = len(strings)
+            strings.append(string)
+            string_to_index[string] = index
+        return index
+
+    key_records = bytearray()
+    value_records = bytearray()
+    value_data_offset = 0
+    num_values = 0
+    for key_index in sorted_key_indices:
+        value_range = crawl_store.value_range(key_index=key_index)
+        key_records += _KEY_RECORD_STRUCT.pack(
+            intern(key_paths[key_index]),
+            crawl_store.key_last_write_times[key_index],
+            num_values,
+            len(value_range)
+        )
+        for value_index in value_range:
+            value_length = crawl_store.value_data_offsets[value_index + 1] - crawl_store.value_data_offsets[value_index]
+            value_records += _VALUE_RECORD_STRUCT.pack(
+                intern(crawl_store.strings[crawl_store.value_names[value_index]]),
+                crawl_store.value_types[value_index],
+                value_data_offset,
+                value_length
+            )
+            value_data_offset += value_length
+            num_values += 1
+
+    encoded_strings: list[bytes] = [string.encode(encoding='utf-8', errors='surrogatepass') for string in strings]
+    string_offsets = bytearray(_STRING_OFFSET_STRUCT.pack(0))
+    string_data_length = 0
+    for encoded_string in encoded_strings:
+        string_data_length += len(encoded_string)
+        string_offsets += _STRING_OFFSET_STRUCT.pack(string_data_length)
+
+    string_offsets_offset = _HEADER_STRUCT.size
+    string_data_offset = string_offsets_offset + len(string_offsets)
+    key_records_offset = string_data_offset + string_data_length
+    value_records_offset = key_records_offset + len(key_records)
+    value_data_section_offset = value_records_offset + len(value_records)
+
+    with open(file_path, mode='wb') as file:
+        file.write(
+            _HEADER_STRUCT.pack(
+                SNAPSHOT_FILE_MAGIC,
+                SNAPSHOT_FILE_VERSION,
+                len(sorted_key_indices),
+                num_values,
+                len(strings),
+                string_offsets_offset,
+                string_data_offset,
+                key_records_offset,
+                value_records_offset,
+                value_data_section_offset
+            )
+        )
+        file.write(string_offsets)
+        file.writelines(encoded_strings)
+        file.write(key_records)
+        file.write(value_records)
+        for key_index in sorted_key_indices:
+            value_range = crawl_store.value_range(key_index=key_index)
+            if value_range:
+                with memoryview(crawl_store.data) as data:
+                    file.write(
+                        data[
+                            crawl_store.value_data_offsets[value_range.start]
+                            :crawl_store.value_data_offsets[value_range.stop]
+                        ]
+                    )
+
+
+class SnapshotFile:
+    """
+    A snapshot file, memory-mapped for reading.
+
+    Opening a snapshot file only reads its header; keys, values, and strings are read from the mapping as they are
+    accessed. Keys are ordered by their lowercase paths, so that a key is found with a binary search and the keys
+    whose paths start with a prefix form a contiguous range.
+    """
+
+    def __init__(self, file_path: Union[str, Path]):
+        """
+        :param file_path: The path of the snapshot file to open.
+        """
+
+        with open(file_path, mode='rb') as file:
+            self._mmap = mmap(file.fileno(), 0, access=ACCESS_READ)
+
+        (
+            magic,
+            version,
+            self.num_keys,
+            self.num_values,
+            self.num_strings,
+            self._string_offsets_offset,
+            self._string_data_offset,
+            self._key_records_offset,
+            self._value_records_offset,
+            self._value_data_offset
+        ) = _HEADER_STRUCT.unpack_from(self._mmap, 0)
+
+        if magic != SNAPSHOT_FILE_MAGIC:
+            self._mmap.close()
+            raise ValueError(f'Bad snapshot file magic: {magic!r}')
+
+        if version != SNAPSHOT_FILE_VERSION:
+            self._mmap.close()
+            raise ValueError(f'Unsupported snapshot file version: {version}')
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def __enter__(self) -> SnapshotFile:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.num_keys
+
+    def string(self, string_index: int) -> str:
+        start_offset, end_offset = _STRING_OFFSET_PAIR_STRUCT.unpack_from(
+            self._mmap,
+            self._string_offsets_offset + string_index * _STRING_OFFSET_STRUCT.size
+        )
+        return self._mmap[
+            self._string_data_offset + start_offset:self._string_data_offset + end_offset
+        ].decode(encoding='utf-8', errors='surrogatepass')
+
+    def _key_record(self, position: int) -> tuple[int, int, int, int]:
+        return _KEY_RECORD_STRUCT.unpack_from(self._mmap, self._key_records_offset + position * _KEY_RECORD_STRUCT.size)
+
+    def key_path(self, position: int) -> str:
+        return self.string(string_index=self._key_record(position=position)[0])
+
+    def last_write_time(self, position: int) -> int:
+        return self._key_record(position=position)[1]
+
+    def value_data(self, value_index: int) -> memoryview:
+        """
+        Obtain the data of a value without copying it.
+
+        The returned view must be released, e.g. by using it in a `with` statement, before the snapshot file is closed,
+        as the mapping cannot be closed while it is being viewed; `close` raises `BufferError` otherwise. `values` and
+        `walked_key` return copies of the data, which remain valid after the file is closed.
+
+        :param value_index: The index of the value.
+        :return: A view of the data of the value in the mapping.
+        """
+
+        _, _, data_offset, data_length = _VALUE_RECORD_STRUCT.unpack_from(
+            self._mmap,
+            self._value_records_offset + value_index * _VALUE_RECORD_STRUCT.size
+        )
+        start_offset = self._value_data_offset + data_offset
+        return memoryview(self._mmap)[start_offset:start_offset + data_length]
+
+    def values(self, position: int) -> dict[str, tuple[RegValueType, bytes]]:
+        _, _, first_value_index, num_values = self._key_record(position=position)
+
+        values: dict[str, tuple[RegValueType, bytes]] = {}
+        for value_index in range(first_value_index, first_value_index + num_values):
+            name_index, value_type, _, _ = _VALUE_RECORD_STRUCT.unpack_from(
+                self._mmap,
+                self._value_records_offset + value_index * _VALUE_RECORD_STRUCT.size
+            )
+            with self.value_data(value_index=value_index) as value_data:
+                values[self.string(string_index=name_index)] = (RegValueType(value_type), bytes(value_data))
+
+        return values
+
+    def walked_key(self, position: int) -> WalkedKey:
+        path_index, last_write_time, _, _ = self._key_record(position=position)
+        return WalkedKey(
+            key_path=self.string(string_index=path_index),
+            last_write_time=last_write_time,
+            values=self.values(position=position)
+        )
+
+    def _lower_bound(self, lowercase_key_path: str) -> int:
+        low, high = 0, self.num_keys
+        while low < high:
+            middle = (low + high) // 2
+            if self.key_path(position=middle).lower() < lowercase_key_path:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def find(self, key_path: str) -> Optional[int]:
+        """
+        Find a key by its path, case-insensitively.
+
+        :param key_path: The path of the key.
+        :return: The position of the key, or `None` if the snapshot has no such key.
+        """
+
+        lowercase_key_path = key_path.lower()
+        position = self._lower_bound(lowercase_key_path=lowercase_key_path)
+        if position < self.num_keys and self.key_path(position=position).lower() == lowercase_key_path:
+            return position
+        return None
+
+    def scan_prefix(self, key_path_prefix: str) -> Iterator[WalkedKey]:
+        """
+        Iterate over the keys whose paths start with a prefix, case-insensitively, in path order.
+
+        To iterate over a key and its descendants only, `key_path_prefix` should end with a backslash, and the key
+        itself looked up with `find`.
+
+        :param key_path_prefix: The prefix of the key paths.
+        :return: An iterator of the matching keys.
+        """
+
+        lowercase_key_path_prefix = key_path_prefix.lower()
+        for position in range(self._lower_bound(lowercase_key_path=lowercase_key_path_prefix), self.num_keys):
+            if not self.key_path(position=position).lower().startswith(lowercase_key_path_prefix):
+                break
+            yield self.walked_key(position=position)
+
+    def __iter__(self) -> Iterator[WalkedKey]:
+        for position in range(self.num_keys):
+            yield self.walked_key(position=position)
+
+
+def diff_snapshot_files(old_snapshot_file: SnapshotFile, new_snapshot_file: SnapshotFile) -> Iterator[SnapshotChange]:
+    """
+    Compare two snapshot files of the same registry tree with a merge-join over their sorted key paths.
+
+    The values of keys whose last-write time is the same in both snapshots are not compared.
+
+    :param old_snapshot_file: The older snapshot file.
+    :param new_snapshot_file: The newer snapshot file.
+    :return: An iterator of the added, removed, and modified keys and values, in path order.
+    """
+
+    num_old_keys = len(old_snapshot_file)
+    num_new_keys = len(new_snapshot_file)
+
+    old_position = new_position = 0
+    while old_position < num_old_keys or new_position < num_new_keys:
+        old_key_path = old_snapshot_file.key_path(position=old_position) if old_position < num_old_keys else None
+        new_key_path = new_snapshot_file.key_path(position=new_position) if new_position < num_new_keys else None
+
+        if new_key_path is None or (old_key_path is not None and old_key_path.lower() < new_key_path.lower()):
+            yield SnapshotChange(kind=ChangeKind.KEY_REMOVED, key_path=old_key_path)
+            old_position += 1
+            continue
+
+        if old_key_path is None or new_key_path.lower() < old_key_path.lower():
+            yield SnapshotChange(kind=ChangeKind.KEY_ADDED, key_path=new_key_path)
+            new_position += 1
+            continue
+
+        old_last_write_time = old_snapshot_file.last_write_time(position=old_position)
+        if old_last_write_time != new_snapshot_file.last_write_time(position=new_position):
+            old_values = old_snapshot_file.values(position=old_position)
+            new_values = new_snapshot_file.values(position=new_position)
+
+            # Value names are case-insensitive, so a value whose name only changed case is the same value.
+            folded_name_to_new_value_name = {value_name.casefold(): value_name for value_name in new_values}
+            folded_old_value_names = {value_name.casefold() for value_name in old_values}
+
+            for value_name, old_value in old_values.items():
+                if (new_value_name := folded_name_to_new_value_name.get(value_name.casefold())) is None:
+                    yield SnapshotChange(
+                        kind=ChangeKind.VALUE_REMOVED,
+                        key_path=new_key_path,
+                        value_name=value_name,
+                        old_value=old_value
+                    )
+                elif (new_value := new_values[new_value_name]) != old_value:
+                    yield SnapshotChange(
+                        kind=ChangeKind.VALUE_MODIFIED,
+                        key_path=new_key_path,
+                        value_name=new_value_name,
+                        old_value=old_value,
+                        new_value=new_value
+                    )
+
+            for value_name, new_value in new_values.items():
+                if value_name.casefold() not in folded_old_value_names:
+                    yield SnapshotChange(
+                        kind=ChangeKind.VALUE_ADDED,
+                        key_path=new_key_path,
+                        value_name=value_name,
+                        new_value=new_value
+                    )
+
+        old_position += 1
+        new_position += 1
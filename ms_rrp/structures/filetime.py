@@ -0,0 +1,15 @@
+from datetime import datetime, timedelta, timezone
+from typing import Final
+
+FILETIME_EPOCH: Final[datetime] = datetime(year=1601, month=1, day=1, tzinfo=timezone.utc)
+
+
+def filetime_to_datetime(filetime: int) -> datetime:
+    """
+    Convert a `FILETIME` value to a timezone-aware datetime.
+
+    :param filetime: The number of 100-nanosecond intervals since January 1, 1601 (UTC).
+    :return: The corresponding datetime.
+    """
+
+    return FILETIME_EPOCH + timedelta(microseconds=filetime // 10)
@@ -0,0 +1,129 @@
+from __future__ import annotations
+from typing import ByteString, Optional
+from struct import Struct
+
+# Helpers for marshalling the NDR constructs of requests and responses whose layouts are not covered by the
+# declarative `_STRUCTURE` machinery (in/out string buffers, unique pointers to conformant varying arrays, etc.).
+
+ULONG_STRUCT = Struct('<I')
+FILETIME_STRUCT = Struct('<Q')
+RRP_UNICODE_STRING_HEADER_STRUCT = Struct('<HHI')
+CONFORMANT_VARYING_HEADER_STRUCT = Struct('<III')
+
+DEFAULT_REFERENT_ID = 0x00020000
+
+
+def align_offset(offset: int, alignment: int = 4) -> int:
+    return (offset + alignment - 1) & ~(alignment - 1)
+
+
+def pad_to_alignment(data: bytes, alignment: int = 4) -> bytes:
+    return data + bytes(align_offset(len(data), alignment) - len(data))
+
+
+def pack_conformant_varying_bytes(data: ByteString, maximum_count: Optional[int] = None) -> bytes:
+    """
+    Marshal a conformant varying byte array, as it appears when deferred from a pointer.
+
+    :param data: The bytes to be transmitted.
+    :param maximum_count: The allocated size of the array. Defaults to the length of `data`.
+    :return: The marshalled array, padded to a four-byte boundary.
+    """
+
+    return pad_to_alignment(
+        CONFORMANT_VARYING_HEADER_STRUCT.pack(max(maximum_count or 0, len(data)), 0, len(data)) + bytes(data)
+    )
+
+
+def unpack_conformant_varying_bytes(data: ByteString, offset: int = 0, element_size: int = 1) -> tuple[bytes, int]:
+    """
+    Unmarshal a conformant varying array.
+
+    :param data: The buffer from which to unmarshal the array.
+    :param offset: The offset in `data` where the array starts.
+    :param element_size: The size of each array element in bytes.
+    :return: The transmitted bytes of the array and the four-byte aligned offset following it.
+    """
+
+    _, _, actual_count = CONFORMANT_VARYING_HEADER_STRUCT.unpack_from(data, offset)
+    offset += CONFORMANT_VARYING_HEADER_STRUCT.size
+    end_offset = offset + actual_count * element_size
+
+    return bytes(data[offset:end_offset]), align_offset(end_offset)
+
+
+def pack_unique_pointer(referent: Optional[bytes], referent_id: int = DEFAULT_REFERENT_ID) -> bytes:
+    """
+    Marshal a top-level unique pointer followed by its referent.
+
+    :param referent: The marshalled referent, or `None` to marshal a null pointer.
+    :param referent_id: The referent ID to use in case the pointer is not null.
+    :return: The marshalled pointer.
+    """
+
+    if referent is None:
+        return ULONG_STRUCT.pack(0)
+
+    return ULONG_STRUCT.pack(referent_id) + referent
+
+
+def unpack_unique_pointer(data: ByteString, offset: int = 0) -> tuple[bool, int]:
+    """
+    Unmarshal the referent ID of a unique pointer.
+
+    :param data: The buffer from which to unmarshal the pointer.
+    :param offset: The offset in `data` where the pointer starts.
+    :return: Whether the pointer is not null and the offset following the referent ID.
+    """
+
+    return ULONG_STRUCT.unpack_from(data, offset)[0] != 0, offset + ULONG_STRUCT.size
+
+
+def pack_rrp_unicode_string(
+    value: str,
+    maximum_length: int = 0,
+    referent_id: int = DEFAULT_REFERENT_ID
+) -> bytes:
+    """
+    Marshal an `RRP_UNICODE_STRING` structure followed by its deferred buffer.
+
+    A string that is empty and has no maximum length is marshalled with a null buffer pointer. An empty string with
+    a maximum length is marshalled as an empty buffer that the server can write into.
+
+    :param value: The string value.
+    :param maximum_length: The size of the buffer, in bytes. Defaults to the size of the encoded value.
+    :param referent_id: The referent ID of the buffer pointer.
+    :return: The marshalled structure, padded to a four-byte boundary.
+    """
+
+    encoded_value: bytes = (value + '\x00').encode(encoding='utf-16-le') if value else b''
+    maximum_length = max(maximum_length, len(encoded_value))
+
+    if maximum_length == 0:
+        return RRP_UNICODE_STRING_HEADER_STRUCT.pack(0, 0, 0)
+
+    return b''.join([
+        RRP_UNICODE_STRING_HEADER_STRUCT.pack(len(encoded_value), maximum_length, referent_id),
+        CONFORMANT_VARYING_HEADER_STRUCT.pack(maximum_length // 2, 0, len(encoded_value) // 2),
+        pad_to_alignment(encoded_value)
+    ])
+
+
+def unpack_rrp_unicode_string(data: ByteString, offset: int = 0) -> tuple[str, int]:
+    """
+    Unmarshal an `RRP_UNICODE_STRING` structure followed by its deferred buffer.
+
+    :param data: The buffer from which to unmarshal the structure.
+    :param offset: The offset in `data` where the structure starts.
+    :return: The string value, without its null terminator, and the four-byte aligned offset following it.
+    """
+
+    _, _, referent_id = RRP_UNICODE_STRING_HEADER_STRUCT.unpack_from(data, offset)
+    offset += RRP_UNICODE_STRING_HEADER_STRUCT.size
+
+    if referent_id == 0:
+        return '', offset
+
+    encoded_value, offset = unpack_conformant_varying_bytes(data=data, offset=offset, element_size=2)
+
+    return encoded_value.decode(encoding='utf-16-le').partition('\x00')[0], offset
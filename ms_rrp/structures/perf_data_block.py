@@ -0,0 +1,325 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import ByteString, Optional, Final
+from struct import Struct, iter_unpack
+from array import array
+from datetime import datetime
+
+PERF_NO_INSTANCES: Final[int] = -1
+PERF_NO_UNIQUE_ID: Final[int] = -1
+
+_PERF_DATA_BLOCK_STRUCT = Struct('<8s6Il8H4x3q2I')
+_PERF_OBJECT_TYPE_STRUCT = Struct('<9I2lI2q')
+_PERF_COUNTER_DEFINITION_STRUCT = Struct('<5Il4I')
+_PERF_INSTANCE_DEFINITION_STRUCT = Struct('<3Il2I')
+_PERF_COUNTER_BLOCK_STRUCT = Struct('<I')
+
+_COUNTER_SIZE_TO_TYPE_CODE: Final[dict[int, str]] = {4: 'I', 8: 'Q'}
+
+
+@dataclass
+class PerfCounterDefinition:
+    name_index: int
+    help_index: int
+    default_scale: int
+    detail_level: int
+    counter_type: int
+    counter_size: int
+    counter_offset: int
+
+    @classmethod
+    def from_bytes(cls, data: ByteString, base_offset: int = 0) -> PerfCounterDefinition:
+        (
+            _,
+            name_index,
+            _,
+            help_index,
+            _,
+            default_scale,
+            detail_level,
+            counter_type,
+            counter_size,
+            counter_offset
+        ) = _PERF_COUNTER_DEFINITION_STRUCT.unpack_from(data, base_offset)
+
+        return cls(
+            name_index=name_index,
+            help_index=help_index,
+            default_scale=default_scale,
+            detail_level=detail_level,
+            counter_type=counter_type,
+            counter_size=counter_size,
+            counter_offset=counter_offset
+        )
+
+
+@dataclass
+class PerfObject:
+    """
+    A performance object and the values of its counters.
+
+    The counter values are stored column-wise: `columns[i]` holds the values of `counters[i]` for all instances, in
+    the order of `instance_names`, or `None` if the counter does not have a 4- or 8-byte size. An object without
+    instances has one value per column.
+    """
+
+    name_index: int
+    help_index: int
+    detail_level: int
+    default_counter: int
+    code_page: int
+    perf_time: int
+    perf_freq: int
+    counters: list[PerfCounterDefinition]
+    columns: list[Optional[array]]
+    instance_names: list[str] = field(default_factory=list)
+    instance_unique_ids: array = field(default_factory=lambda: array('l'))
+    instance_parent_object_indices: array = field(default_factory=lambda: array('L'))
+    instance_parent_instances: array = field(default_factory=lambda: array('L'))
+    has_instances: bool = False
+
+    @property
+    def num_instances(self) -> int:
+        return len(self.instance_names) if self.has_instances else 1
+
+    def column(self, counter_name_index: int) -> Optional[array]:
+        """
+        Retrieve the column of a counter by its name index.
+
+        :param counter_name_index: The name index of the counter.
+        :return: The values of the counter for all instances, or `None` if the object has no such counter.
+        """
+
+        for counter, column in zip(self.counters, self.columns):
+            if counter.name_index == counter_name_index:
+                return column
+        return None
+
+    @classmethod
+    def from_bytes(cls, data: ByteString, base_offset: int = 0) -> PerfObject:
+        data = memoryview(data)
+
+        (
+            _,
+            definition_length,
+            header_length,
+            name_index,
+            _,
+            help_index,
+            _,
+            detail_level,
+            num_counters,
+            default_counter,
+            num_instances,
+            code_page,
+            perf_time,
+            perf_freq
+        ) = _PERF_OBJECT_TYPE_STRUCT.unpack_from(data, base_offset)
+
+        counters: list[PerfCounterDefinition] = []
+        counter_definition_offset = base_offset + header_length
+        for _ in range(num_counters):
+            counters.append(PerfCounterDefinition.from_bytes(data=data, base_offset=counter_definition_offset))
+            counter_definition_length: int = _PERF_COUNTER_DEFINITION_STRUCT.unpack_from(
+                data,
+                counter_definition_offset
+            )[0]
+            counter_definition_offset += counter_definition_length
+
+        perf_object = cls(
+            name_index=name_index,
+            help_index=help_index,
+            detail_level=detail_level,
+            default_counter=default_counter,
+            code_page=code_page,
+            perf_time=perf_time,
+            perf_freq=perf_freq,
+            counters=counters,
+            columns=[],
+            has_instances=num_instances != PERF_NO_INSTANCES
+        )
+
+        offset = base_offset + definition_length
+        counter_block_offsets = array('L')
+        for _ in range(num_instances if perf_object.has_instances else 0):
+            (
+                instance_length,
+                parent_object_index,
+                parent_instance,
+                unique_id,
+                name_offset,
+                name_length
+            ) = _PERF_INSTANCE_DEFINITION_STRUCT.unpack_from(data, offset)
+
+            perf_object.instance_names.append(
+                bytes(data[offset + name_offset:offset + name_offset + name_length])
+                .decode(encoding='utf-16-le', errors='replace')
+                .partition('\x00')[0]
+            )
+            perf_object.instance_unique_ids.append(unique_id)
+            perf_object.instance_parent_object_indices.append(parent_object_index)
+            perf_object.instance_parent_instances.append(parent_instance)
+
+            offset += instance_length
+            counter_block_offsets.append(offset)
+            offset += _PERF_COUNTER_BLOCK_STRUCT.unpack_from(data, offset)[0]
+
+        if not perf_object.has_instances:
+            counter_block_offsets.append(offset)
+
+        perf_object.columns = _read_counter_columns(
+            data=data,
+            counters=counters,
+            counter_block_offsets=counter_block_offsets
+        )
+
+        return perf_object
+
+
+def _read_counter_columns(
+    data: memoryview,
+    counters: list[PerfCounterDefinition],
+    counter_block_offsets: array
+) -> list[Optional[array]]:
+    """
+    Read the values of each counter across all counter blocks into one array per counter.
+
+    When all counter blocks have the same length, which is the usual case, they are gathered into one contiguous
+    buffer and each counter column is read with a single `iter_unpack` over it.
+    """
+
+    if not counter_block_offsets:
+        return [
+            array(type_code) if (type_code := _COUNTER_SIZE_TO_TYPE_CODE.get(counter.counter_size)) else None
+            for counter in counters
+        ]
+
+    counter_block_lengths = {
+        _PERF_COUNTER_BLOCK_STRUCT.unpack_from(data, counter_block_offset)[0]
+        for counter_block_offset in counter_block_offsets
+    }
+
+    contiguous_counter_blocks: Optional[bytes] = None
+    counter_block_length: int = next(iter(counter_block_lengths))
+    if len(counter_block_lengths) == 1 and counter_block_length > 0:
+        contiguous_counter_blocks = b''.join(
+            data[counter_block_offset:counter_block_offset + counter_block_length]
+            for counter_block_offset in counter_block_offsets
+        )
+
+    columns: list[Optional[array]] = []
+    for counter in counters:
+        type_code: Optional[str] = _COUNTER_SIZE_TO_TYPE_CODE.get(counter.counter_size)
+        if type_code is None:
+            columns.append(None)
+            continue
+
+        if contiguous_counter_blocks is not None:
+            column = array(
+                type_code,
+                (
+                    value for value, in iter_unpack(
+                        f'<{counter.counter_offset}x{type_code}'
+                        f'{counter_block_length - counter.counter_offset - counter.counter_size}x',
+                        contiguous_counter_blocks
+                    )
+                )
+            )
+        else:
+            counter_struct = Struct(f'<{type_code}')
+            column = array(
+                type_code,
+                (
+                    counter_struct.unpack_from(data, counter_block_offset + counter.counter_offset)[0]
+                    for counter_block_offset in counter_block_offsets
+                )
+            )
+
+        columns.append(column)
+
+    return columns
+
+
+@dataclass
+class PerfDataBlock:
+    version: int
+    revision: int
+    total_byte_length: int
+    system_time: datetime
+    perf_time: int
+    perf_freq: int
+    perf_time_100nsec: int
+    system_name: str
+    default_object: int
+    objects: dict[int, PerfObject]
+
+    @classmethod
+    def from_bytes(cls, data: ByteString, base_offset: int = 0) -> PerfDataBlock:
+        """
+        Parse a `PERF_DATA_BLOCK` structure, as returned when querying the `HKEY_PERFORMANCE_DATA` root key.
+
+        :param data: The buffer from which to parse the structure.
+        :param base_offset: The offset in `data` where the structure starts.
+        :return: The parsed performance data block.
+        """
+
+        data = memoryview(data)
+
+        (
+            signature,
+            _,
+            version,
+            revision,
+            total_byte_length,
+            header_length,
+            num_object_types,
+            default_object,
+            year,
+            month,
+            _,
+            day,
+            hour,
+            minute,
+            second,
+            milliseconds,
+            perf_time,
+            perf_freq,
+            perf_time_100nsec,
+            system_name_length,
+            system_name_offset
+        ) = _PERF_DATA_BLOCK_STRUCT.unpack_from(data, base_offset)
+
+        if signature != 'PERF'.encode(encoding='utf-16-le'):
+            raise ValueError(f'Bad performance data block signature: {signature!r}')
+
+        objects: dict[int, PerfObject] = {}
+        offset = base_offset + header_length
+        for _ in range(num_object_types):
+            perf_object = PerfObject.from_bytes(data=data, base_offset=offset)
+            objects[perf_object.name_index] = perf_object
+            offset += _PERF_OBJECT_TYPE_STRUCT.unpack_from(data, offset)[0]
+
+        return cls(
+            version=version,
+            revision=revision,
+            total_byte_length=total_byte_length,
+            system_time=datetime(
+                year=year,
+                month=month,
+                day=day,
+                hour=hour,
+                minute=minute,
+                second=second,
+                microsecond=milliseconds * 1000
+            ),
+            perf_time=perf_time,
+            perf_freq=perf_freq,
+            perf_time_100nsec=perf_time_100nsec,
+            system_name=(
+                bytes(data[base_offset + system_name_offset:base_offset + system_name_offset + system_name_length])
+                .decode(encoding='utf-16-le', errors='replace')
+                .partition('\x00')[0]
+            ),
+            default_object=default_object,
+            objects=objects
+        )
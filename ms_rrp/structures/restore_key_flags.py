@@ -0,0 +1,15 @@
+from enum import IntFlag
+from msdsalgs.utils import Mask
+
+
+class RestoreKeyFlagsFlag(IntFlag):
+    REG_WHOLE_HIVE_VOLATILE = 0x00000001
+    REG_REFRESH_HIVE = 0x00000002
+    REG_NO_LAZY_FLUSH = 0x00000004
+    REG_FORCE_RESTORE = 0x00000008
+
+
+RestoreKeyFlags = Mask.make_class(
+    int_flag_class=RestoreKeyFlagsFlag,
+    prefix='REG_'
+)
@@ -0,0 +1,56 @@
+from __future__ import annotations
+from typing import ByteString
+from struct import Struct
+
+from ms_rrp.structures.ndr_helpers import pack_conformant_varying_bytes, unpack_conformant_varying_bytes, \
+    DEFAULT_REFERENT_ID
+
+_RPC_SECURITY_DESCRIPTOR_STRUCT = Struct('<3I')
+
+
+def pack_rpc_security_descriptor(
+    security_descriptor: bytes,
+    buffer_size: int = 0,
+    referent_id: int = DEFAULT_REFERENT_ID
+) -> bytes:
+    """
+    Marshal an `RPC_SECURITY_DESCRIPTOR` structure followed by its deferred buffer.
+
+    An empty security descriptor is marshalled with a null buffer pointer, with `buffer_size` indicating the size of
+    the buffer the server may use for its response.
+
+    :param security_descriptor: The self-relative security descriptor.
+    :param buffer_size: The size of the buffer, in bytes. Defaults to the size of `security_descriptor`.
+    :param referent_id: The referent ID of the buffer pointer.
+    :return: The marshalled structure, padded to a four-byte boundary.
+    """
+
+    buffer_size = max(buffer_size, len(security_descriptor))
+
+    if not security_descriptor:
+        return _RPC_SECURITY_DESCRIPTOR_STRUCT.pack(0, buffer_size, 0)
+
+    return b''.join([
+        _RPC_SECURITY_DESCRIPTOR_STRUCT.pack(referent_id, buffer_size, len(security_descriptor)),
+        pack_conformant_varying_bytes(data=security_descriptor, maximum_count=buffer_size)
+    ])
+
+
+def unpack_rpc_security_descriptor(data: ByteString, offset: int = 0) -> tuple[bytes, int, int]:
+    """
+    Unmarshal an `RPC_SECURITY_DESCRIPTOR` structure followed by its deferred buffer.
+
+    :param data: The buffer from which to unmarshal the structure.
+    :param offset: The offset in `data` where the structure starts.
+    :return: The security descriptor, the buffer size indicated in the structure, and the four-byte aligned offset
+        following it.
+    """
+
+    referent_id, buffer_size, _ = _RPC_SECURITY_DESCRIPTOR_STRUCT.unpack_from(data, offset)
+    offset += _RPC_SECURITY_DESCRIPTOR_STRUCT.size
+
+    security_descriptor = b''
+    if referent_id != 0:
+        security_descriptor, offset = unpack_conformant_varying_bytes(data=data, offset=offset)
+
+    return security_descriptor, buffer_size, offset
@@ -0,0 +1,8 @@
+from enum import IntFlag
+
+
+class SecurityInformation(IntFlag):
+    OWNER_SECURITY_INFORMATION = 0x00000001
+    GROUP_SECURITY_INFORMATION = 0x00000002
+    DACL_SECURITY_INFORMATION = 0x00000004
+    SACL_SECURITY_INFORMATION = 0x00000008
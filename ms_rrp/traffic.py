@@ -0,0 +1,179 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Iterator, Iterable, Optional, Final
+from struct import Struct
+from time import perf_counter_ns
+from asyncio import sleep
+from collections import deque, defaultdict
+
+from rpc.connection import Connection as RPCConnection
+
+# A traffic file consists of the magic followed by records, each consisting of a header (the operation number, the
+# lengths of the request and response stub data, and the duration of the exchange in nanoseconds) followed by the
+# request and response stub data.
+
+TRAFFIC_FILE_MAGIC: Final[bytes] = b'RRPTRAF\x01'
+
+_RECORD_HEADER_STRUCT: Final[Struct] = Struct('<HIIQ')
+
+
+@dataclass
+class TrafficRecord:
+    opnum: int
+    request_stub_data: bytes
+    response_stub_data: bytes
+    duration_ns: int
+
+
+class TrafficRecorder:
+    """
+    Write exchanged RPC requests and responses to a binary stream.
+    """
+
+    def __init__(self, stream: BinaryIO):
+        """
+        :param stream: A writable binary stream to which to write the records.
+        """
+
+        self._stream = stream
+        self._stream.write(TRAFFIC_FILE_MAGIC)
+
+    def record(self, traffic_record: TrafficRecord) -> None:
+        self._stream.write(
+            b''.join([
+                _RECORD_HEADER_STRUCT.pack(
+                    traffic_record.opnum,
+                    len(traffic_record.request_stub_data),
+                    len(traffic_record.response_stub_data),
+                    traffic_record.duration_ns
+                ),
+                traffic_record.request_stub_data,
+                traffic_record.response_stub_data
+            ])
+        )
+
+    def flush(self) -> None:
+        self._stream.flush()
+
+
+def read_traffic(stream: BinaryIO) -> Iterator[TrafficRecord]:
+    """
+    Read the records written by a `TrafficRecorder`.
+
+    :param stream: A readable binary stream from which to read the records.
+    :return: An iterator of the records, in the order in which they were recorded.
+    """
+
+    if (magic := stream.read(len(TRAFFIC_FILE_MAGIC))) != TRAFFIC_FILE_MAGIC:
+        raise ValueError(f'Bad traffic file magic: {magic!r}')
+
+    while record_header := stream.read(_RECORD_HEADER_STRUCT.size):
+        if len(record_header) != _RECORD_HEADER_STRUCT.size:
+            raise ValueError('Truncated traffic record header.')
+
+        opnum, request_length, response_length, duration_ns = _RECORD_HEADER_STRUCT.unpack(record_header)
+        request_stub_data = stream.read(request_length)
+        response_stub_data = stream.read(response_length)
+        if len(request_stub_data) != request_length or len(response_stub_data) != response_length:
+            raise ValueError('Truncated traffic record data.')
+
+        yield TrafficRecord(
+            opnum=opnum,
+            request_stub_data=request_stub_data,
+            response_stub_data=response_stub_data,
+            duration_ns=duration_ns
+        )
+
+
+class RecordingConnection:
+    """
+    Wrap an RPC connection, recording each request made through it.
+
+    The wrapper can be passed as `rpc_connection` to the operation functions. All attributes other than `request`
+    are delegated to the wrapped connection.
+    """
+
+    def __init__(self, rpc_connection: RPCConnection, traffic_recorder: TrafficRecorder):
+        """
+        :param rpc_connection: The RPC connection with which to perform the requests.
+        :param traffic_recorder: The recorder with which to record the requests and responses.
+        """
+
+        self._rpc_connection = rpc_connection
+        self._traffic_recorder = traffic_recorder
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._rpc_connection, name)
+
+    async def request(self, request_message, *args, **kwargs):
+        start_time_ns = perf_counter_ns()
+        response_message = await self._rpc_connection.request(request_message, *args, **kwargs)
+
+        self._traffic_recorder.record(
+            traffic_record=TrafficRecord(
+                opnum=int(request_message.opnum),
+                request_stub_data=bytes(request_message.stub_data),
+                response_stub_data=bytes(response_message.stub_data),
+                duration_ns=perf_counter_ns() - start_time_ns
+            )
+        )
+
+        return response_message
+
+
+@dataclass
+class ReplayedResponseMessage:
+    stub_data: bytes
+
+
+class ReplayConnection:
+    """
+    Serve recorded responses in place of an RPC connection.
+
+    A request is answered with the response of the earliest unused record with the same operation number and request
+    stub data or, if there is none, with the same operation number only, so that replays remain possible when the
+    client issues slightly different requests than during the recording, e.g. because of changed buffer sizes.
+    """
+
+    def __init__(self, traffic_records: Iterable[TrafficRecord], latency_scale: Optional[float] = 1.0):
+        """
+        :param traffic_records: The records to replay.
+        :param latency_scale: The factor by which to scale the recorded durations before responding, or `None` to
+            respond immediately.
+        """
+
+        self.latency_scale = latency_scale
+
+        self._exact_records: defaultdict[tuple[int, bytes], deque[TrafficRecord]] = defaultdict(deque)
+        self._opnum_records: defaultdict[int, deque[TrafficRecord]] = defaultdict(deque)
+        for traffic_record in traffic_records:
+            self._exact_records[(traffic_record.opnum, traffic_record.request_stub_data)].append(traffic_record)
+            self._opnum_records[traffic_record.opnum].append(traffic_record)
+
+        self._used_record_ids: set[int] = set()
+
+    @staticmethod
+    def _pop_unused(records: deque[TrafficRecord], used_record_ids: set[int]) -> Optional[TrafficRecord]:
+        while records:
+            traffic_record = records.popleft()
+            if id(traffic_record) not in used_record_ids:
+                return traffic_record
+        return None
+
+    async def request(self, request_message, *args, **kwargs) -> ReplayedResponseMessage:
+        opnum = int(request_message.opnum)
+
+        traffic_record = self._pop_unused(
+            records=self._exact_records.get((opnum, bytes(request_message.stub_data)), deque()),
+            used_record_ids=self._used_record_ids
+        ) or self._pop_unused(records=self._opnum_records[opnum], used_record_ids=self._used_record_ids)
+
+        if traffic_record is None:
+            raise LookupError(f'No recorded response left for operation number {opnum}.')
+
+        self._used_record_ids.add(id(traffic_record))
+
+        if self.latency_scale is not None:
+            await sleep(traffic_record.duration_ns * self.latency_scale / 1e9)
+
+        return ReplayedResponseMessage(stub_data=traffic_record.response_stub_data)
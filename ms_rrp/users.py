@@ -0,0 +1,119 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Optional, Iterable, Final
+from asyncio import Semaphore, gather
+
+from rpc.connection import Connection as RPCConnection
+
+from ms_rrp.operations.open_users import open_users, OpenUsersRequest
+from ms_rrp.operations.base_reg_open_key import base_reg_open_key, BaseRegOpenKeyRequest
+from ms_rrp.operations.base_reg_query_info_key import base_reg_query_info_key, BaseRegQueryInfoKeyRequest
+from ms_rrp.structures.reg_value_type import RegValueType
+from ms_rrp.structures.regsam import Regsam
+from ms_rrp.utils import enumerate_sub_keys, enumerate_values
+
+CLASSES_HIVE_SUFFIX: Final[str] = '_Classes'
+
+
+@dataclass
+class UserKeyResult:
+    sid: str
+    relative_key_path: str
+    last_write_time: Optional[int] = None
+    values: dict[str, tuple[RegValueType, bytes]] = field(default_factory=dict)
+    exception: Optional[Exception] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.exception is None
+
+
+async def query_users(
+    rpc_connection: RPCConnection,
+    relative_key_paths: Iterable[str],
+    skip_classes_hives: bool = False,
+    max_concurrency: int = 16,
+    sam_desired: Regsam = Regsam(maximum_allowed=True)
+) -> dict[str, dict[str, UserKeyResult]]:
+    """
+    Retrieve the values of the same registry keys under the hive of every user loaded in `HKEY_USERS`.
+
+    `HKEY_USERS` is opened once, its subkeys (the SIDs of the loaded user hives) are enumerated once, and each key is
+    then opened relative to the one `HKEY_USERS` handle, with at most `max_concurrency` keys being queried at once.
+
+    A failure to open or query a key, e.g. because it does not exist in a user's hive, does not abort the other
+    queries; it is reported in the key's result.
+
+    :param rpc_connection: An RPC connection with which to perform the operations.
+    :param relative_key_paths: The paths of the keys to query, relative to each user's hive, e.g.
+        `Software\\Microsoft\\Windows\\CurrentVersion\\Run`.
+    :param skip_classes_hives: Whether to skip the `<SID>_Classes` hives.
+    :param max_concurrency: The maximum number of keys being queried at once.
+    :param sam_desired: The desired access when opening `HKEY_USERS` and the keys.
+    :return: A mapping of SIDs to mappings of the relative key paths to their results.
+    """
+
+    relative_key_paths = [relative_key_path.strip('\\') for relative_key_path in relative_key_paths]
+    semaphore = Semaphore(max_concurrency)
+
+    async def query_key(users_key_handle: bytes, result: UserKeyResult) -> None:
+        async with semaphore:
+            try:
+                base_reg_open_key_options = dict(
+                    rpc_connection=rpc_connection,
+                    request=BaseRegOpenKeyRequest(
+                        key_handle=users_key_handle,
+                        sub_key_name=(
+                            f'{result.sid}\\{result.relative_key_path}' if result.relative_key_path else result.sid
+                        ),
+                        sam_desired=sam_desired
+                    )
+                )
+                async with base_reg_open_key(**base_reg_open_key_options) as base_reg_open_key_response:
+                    query_info_key_response = await base_reg_query_info_key(
+                        rpc_connection=rpc_connection,
+                        request=BaseRegQueryInfoKeyRequest(key_handle=base_reg_open_key_response.key_handle)
+                    )
+                    result.last_write_time = query_info_key_response.last_write_time
+                    result.values = {
+                        enum_value_response.value_name: (enum_value_response.value_type, enum_value_response.value)
+                        async for enum_value_response in enumerate_values(
+                            rpc_connection=rpc_connection,
+                            key_handle=base_reg_open_key_response.key_handle,
+                            query_info_key_response=query_info_key_response
+                        )
+                    }
+            except Exception as exception:
+                result.exception = exception
+
+    open_users_options = dict(
+        rpc_connection=rpc_connection,
+        request=OpenUsersRequest(sam_desired=sam_desired)
+    )
+    async with open_users(**open_users_options) as open_users_response:
+        sids: list[str] = [
+            enum_key_response.sub_key_name
+            async for enum_key_response in enumerate_sub_keys(
+                rpc_connection=rpc_connection,
+                key_handle=open_users_response.key_handle
+            )
+            if not (skip_classes_hives and enum_key_response.sub_key_name.endswith(CLASSES_HIVE_SUFFIX))
+        ]
+
+        sid_to_results: dict[str, dict[str, UserKeyResult]] = {
+            sid: {
+                relative_key_path: UserKeyResult(sid=sid, relative_key_path=relative_key_path)
+                for relative_key_path in relative_key_paths
+            }
+            for sid in sids
+        }
+
+        await gather(
+            *(
+                query_key(users_key_handle=open_users_response.key_handle, result=result)
+                for relative_key_path_to_result in sid_to_results.values()
+                for result in relative_key_path_to_result.values()
+            )
+        )
+
+    return sid_to_results
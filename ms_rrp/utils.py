@@ -1,15 +1,78 @@
-from pathlib import PureWindowsPath
-from typing import Optional
+from dataclasses import dataclass
+from pathlib import Path, PureWindowsPath
+from typing import Optional, AsyncIterator, Union, Final
 from uuid import uuid4
+from contextlib import asynccontextmanager
+from asyncio import gather, get_running_loop
+from itertools import count
 
+from msdsalgs.win32_error import Win32ErrorCode
 from rpc.connection import Connection as RPCConnection
 from smb.v2.session import Session as SMBv2Session
 from smb.v2.structures.create_options import CreateOptions
+from smb.v2.structures.create_disposition import CreateDisposition
 from smb.v2.structures.access_mask import FilePipePrinterAccessMask
 
 from ms_rrp.operations.base_reg_save_key import base_reg_save_key, BaseRegSaveKeyRequest
+from ms_rrp.operations.base_reg_restore_key import base_reg_restore_key, BaseRegRestoreKeyRequest
+from ms_rrp.operations.base_reg_load_key import base_reg_load_key, BaseRegLoadKeyRequest
 from ms_rrp.operations.base_reg_open_key import base_reg_open_key, BaseRegOpenKeyRequest
+from ms_rrp.operations.base_reg_query_info_key import base_reg_query_info_key, BaseRegQueryInfoKeyRequest, \
+    BaseRegQueryInfoKeyResponse
+from ms_rrp.operations.base_reg_enum_key import base_reg_enum_key, BaseRegEnumKeyRequest, BaseRegEnumKeyResponse
+from ms_rrp.operations.base_reg_enum_value import base_reg_enum_value, BaseRegEnumValueRequest, \
+    BaseRegEnumValueResponse
+from ms_rrp.operations.base_reg_query_value import base_reg_query_value, BaseRegQueryValueRequest, \
+    BaseRegQueryValueResponse
 from ms_rrp.structures.regsam import Regsam
+from ms_rrp.structures.reg_value_type import RegValueType
+from ms_rrp.structures.restore_key_flags import RestoreKeyFlags
+from ms_rrp.structures.root_keys import OpenableRootKey, OPENABLE_ROOT_KEY_TO_OPERATION_AND_REQUEST
+
+
+DEFAULT_MAXIMUM_VALUE_BUFFER_SIZE: Final[int] = 16 * 1024 * 1024
+
+
+@dataclass
+class WalkedKey:
+    key_path: str
+    last_write_time: int
+    values: dict[str, tuple[RegValueType, bytes]]
+
+
+def win32_error_code(exception: BaseException) -> Optional[Win32ErrorCode]:
+    """
+    Obtain the return code of an error raised for an operation whose response indicates that an error occurred.
+
+    :param exception: The raised exception.
+    :return: The return code of the response, or `None` if the exception was not raised for an error response.
+    """
+
+    return_code = getattr(exception, 'return_code', None)
+    return return_code if isinstance(return_code, Win32ErrorCode) else None
+
+
+def rpc_fault_status(exception: BaseException) -> Optional[int]:
+    """
+    Obtain the status of an error raised for an operation that the server rejected with an RPC fault.
+
+    :param exception: The raised exception.
+    :return: The status of the fault, or `None` if the exception was not raised for an RPC fault.
+    """
+
+    status = getattr(exception, 'status', None)
+    return status if isinstance(status, int) and not isinstance(status, bool) else None
+
+
+def is_operation_error(exception: BaseException) -> bool:
+    """
+    Tell whether an exception was raised because an operation failed on the server, as opposed to e.g. a bug.
+
+    :param exception: The raised exception.
+    :return: Whether the exception was raised for an error response or an RPC fault.
+    """
+
+    return win32_error_code(exception=exception) is not None or rpc_fault_status(exception=exception) is not None
 
 
 async def dump_reg(
@@ -64,3 +127,396 @@ async def dump_reg(
             file_size=create_response.endof_file,
             tree_id=tree_id
         )
+
+
+async def upload_file(
+    smb_session: SMBv2Session,
+    tree_id: int,
+    local_path: Union[str, Path],
+    remote_path: PureWindowsPath,
+    chunk_size: int = 64 * 1024,
+    max_concurrency: int = 8
+) -> int:
+    """
+    Upload a local file to a remote system using concurrent SMB `WRITE` operations.
+
+    The file is streamed from disk in chunks, so that at most `max_concurrency` chunks are held in memory at once.
+
+    :param smb_session: An SMB session with which to upload the file.
+    :param tree_id: An ID of an opened share via which to write the file on the remote system.
+    :param local_path: The path of the local file to upload.
+    :param remote_path: The path of the file on the remote system, relative to the share.
+    :param chunk_size: The number of bytes to write per `WRITE` operation.
+    :param max_concurrency: The maximum number of `WRITE` operations in flight at once.
+    :return: The number of bytes uploaded.
+    """
+
+    loop = get_running_loop()
+    file_size: int = Path(local_path).stat().st_size
+    chunk_offsets = count(start=0, step=chunk_size)
+
+    create_kwargs = dict(
+        path=remote_path,
+        tree_id=tree_id,
+        create_disposition=CreateDisposition.FILE_OVERWRITE_IF,
+        create_options=CreateOptions(non_directory_file=True),
+        desired_access=FilePipePrinterAccessMask(file_write_data=True)
+    )
+    async with smb_session.create(**create_kwargs) as create_response:
+        async def write_chunks() -> None:
+            # Each worker reads via its own file object, as the chunks are read concurrently in the executor.
+            with open(local_path, mode='rb') as file:
+                while (offset := next(chunk_offsets)) < file_size:
+                    file.seek(offset)
+                    chunk: bytes = await loop.run_in_executor(None, file.read, chunk_size)
+                    await smb_session.write(
+                        write_data=chunk,
+                        offset=offset,
+                        file_id=create_response.file_id,
+                        tree_id=tree_id
+                    )
+
+        await gather(*(write_chunks() for _ in range(max(1, min(max_concurrency, -(-file_size // chunk_size))))))
+
+    return file_size
+
+
+async def restore_reg(
+    rpc_connection: RPCConnection,
+    smb_session: SMBv2Session,
+    root_key_handle: bytes,
+    tree_id: int,
+    sub_key_name: str,
+    local_path: Union[str, Path],
+    upload_path: Optional[PureWindowsPath] = None,
+    load: bool = False,
+    flags: RestoreKeyFlags = RestoreKeyFlags(),
+    sam_desired: Regsam = Regsam(maximum_allowed=True),
+    chunk_size: int = 64 * 1024,
+    max_concurrency: int = 8
+) -> None:
+    """
+    Upload a local registry hive file to a remote system and restore it into, or load it as, a specified key.
+
+    This is the reverse of `dump_reg`. The file is uploaded with concurrent SMB `WRITE` operations. It is then either
+    restored over the key, its subkeys, and values using the `MS-RRP` `BaseRegRestoreKey` operation, or loaded as a new
+    subkey of the root key using the `BaseRegLoadKey` operation. The uploaded file is deleted afterwards, also if the
+    operation fails, unless it was loaded: a loaded hive file remains in use until it is unloaded with
+    `BaseRegUnLoadKey`.
+
+    :param rpc_connection: An RPC connection with which to perform the restore or load operation.
+    :param smb_session: An SMB session with which to upload the hive file.
+    :param root_key_handle: A handle to a root registry key. To load a hive, it must be `HKEY_LOCAL_MACHINE` or
+        `HKEY_USERS`.
+    :param tree_id: An ID of an opened share via which to upload the file to the remote system.
+    :param sub_key_name: The name of the registry subkey to restore, or the name under which to load the hive.
+    :param local_path: The path of the local hive file, e.g. one retrieved with `dump_reg`.
+    :param upload_path: The path where the hive file is to be uploaded on the remote system.
+    :param load: Whether to load the hive as a new subkey rather than restore it over an existing key.
+    :param flags: The flags of the `BaseRegRestoreKey` operation.
+    :param sam_desired: The desired access when opening the specified registry key.
+    :param chunk_size: The number of bytes to write per SMB `WRITE` operation.
+    :param max_concurrency: The maximum number of SMB `WRITE` operations in flight at once.
+    :return: None
+    """
+
+    upload_path = upload_path or PureWindowsPath(f'C:\\Windows\\Temp\\{uuid4()}')
+    remote_path = PureWindowsPath(*upload_path.parts[1:])
+    loaded = False
+
+    # Nothing is deleted if the upload fails, so that an error of the deletion does not replace the error of the upload.
+    await upload_file(
+        smb_session=smb_session,
+        tree_id=tree_id,
+        local_path=local_path,
+        remote_path=remote_path,
+        chunk_size=chunk_size,
+        max_concurrency=max_concurrency
+    )
+
+    try:
+        if load:
+            await base_reg_load_key(
+                rpc_connection=rpc_connection,
+                request=BaseRegLoadKeyRequest(
+                    key_handle=root_key_handle,
+                    sub_key_name=sub_key_name,
+                    file_path=str(upload_path)
+                )
+            )
+            loaded = True
+        else:
+            base_reg_open_key_options = dict(
+                rpc_connection=rpc_connection,
+                request=BaseRegOpenKeyRequest(
+                    key_handle=root_key_handle,
+                    sub_key_name=sub_key_name,
+                    sam_desired=sam_desired
+                )
+            )
+            async with base_reg_open_key(**base_reg_open_key_options) as base_reg_open_key_response:
+                await base_reg_restore_key(
+                    rpc_connection=rpc_connection,
+                    request=BaseRegRestoreKeyRequest(
+                        key_handle=base_reg_open_key_response.key_handle,
+                        file_path=str(upload_path),
+                        flags=flags
+                    )
+                )
+    finally:
+        if not loaded:
+            create_kwargs = dict(
+                path=remote_path,
+                tree_id=tree_id,
+                create_options=CreateOptions(non_directory_file=True, delete_on_close=True),
+                desired_access=FilePipePrinterAccessMask(delete=True)
+            )
+            async with smb_session.create(**create_kwargs):
+                pass
+
+
+def split_key_path(key_path: str) -> tuple[OpenableRootKey, str]:
+    """
+    Split a registry key path into its root key and its subkey path.
+
+    The root key may be specified either by its full name (e.g. `HKEY_LOCAL_MACHINE`) or by its abbreviation (e.g.
+    `HKLM`).
+
+    :param key_path: A registry key path, e.g. `HKLM\\SOFTWARE\\Microsoft`.
+    :return: The root key and the path of the subkey relative to it.
+    """
+
+    root_key_name, _, sub_key_name = key_path.strip('\\').partition('\\')
+    root_key_name = root_key_name.upper()
+
+    try:
+        root_key = OpenableRootKey[root_key_name]
+    except KeyError:
+        root_key = OpenableRootKey(root_key_name)
+
+    return root_key, sub_key_name
+
+
+@asynccontextmanager
+async def open_key_path(
+    rpc_connection: RPCConnection,
+    key_path: str,
+    sam_desired: Regsam = Regsam(maximum_allowed=True)
+) -> AsyncIterator[bytes]:
+    """
+    Open a registry key by its full path, including the root key.
+
+    :param rpc_connection: An RPC connection with which to perform the operations.
+    :param key_path: A registry key path, e.g. `HKLM\\SOFTWARE\\Microsoft`.
+    :param sam_desired: The desired access when opening the root key and the subkey.
+    :return: A handle to the registry key.
+    """
+
+    root_key, sub_key_name = split_key_path(key_path=key_path)
+    open_root_key, open_root_key_request_class = OPENABLE_ROOT_KEY_TO_OPERATION_AND_REQUEST[root_key]
+
+    open_root_key_options = dict(
+        rpc_connection=rpc_connection,
+        request=open_root_key_request_class(sam_desired=sam_desired)
+    )
+    async with open_root_key(**open_root_key_options) as open_root_key_response:
+        if not sub_key_name:
+            yield open_root_key_response.key_handle
+            return
+
+        base_reg_open_key_options = dict(
+            rpc_connection=rpc_connection,
+            request=BaseRegOpenKeyRequest(
+                key_handle=open_root_key_response.key_handle,
+                sub_key_name=sub_key_name,
+                sam_desired=sam_desired
+            )
+        )
+        async with base_reg_open_key(**base_reg_open_key_options) as base_reg_open_key_response:
+            yield base_reg_open_key_response.key_handle
+
+
+async def enumerate_sub_keys(
+    rpc_connection: RPCConnection,
+    key_handle: bytes,
+    query_info_key_response: Optional[BaseRegQueryInfoKeyResponse] = None
+) -> AsyncIterator[BaseRegEnumKeyResponse]:
+    """
+    Enumerate the subkeys of a registry key.
+
+    The number of subkeys and the sizes of the name and class buffers are obtained with the `BaseRegQueryInfoKey`
+    operation, so that each subkey is retrieved with exactly one `BaseRegEnumKey` operation.
+
+    :param rpc_connection: An RPC connection with which to perform the operations.
+    :param key_handle: A handle to the registry key whose subkeys to enumerate.
+    :param query_info_key_response: A `BaseRegQueryInfoKey` response for the key, if one has already been obtained.
+    :return: An asynchronous iterator of `BaseRegEnumKey` responses, one per subkey.
+    """
+
+    query_info_key_response = query_info_key_response or await base_reg_query_info_key(
+        rpc_connection=rpc_connection,
+        request=BaseRegQueryInfoKeyRequest(key_handle=key_handle)
+    )
+
+    for index in range(query_info_key_response.num_sub_keys):
+        yield await base_reg_enum_key(
+            rpc_connection=rpc_connection,
+            request=BaseRegEnumKeyRequest(
+                key_handle=key_handle,
+                index=index,
+                sub_key_name_buffer_size=(query_info_key_response.max_sub_key_name_length + 1) * 2,
+                class_buffer_size=(query_info_key_response.max_class_length + 1) * 2
+            )
+        )
+
+
+async def enumerate_values(
+    rpc_connection: RPCConnection,
+    key_handle: bytes,
+    query_info_key_response: Optional[BaseRegQueryInfoKeyResponse] = None,
+    retrieve_values: bool = True
+) -> AsyncIterator[BaseRegEnumValueResponse]:
+    """
+    Enumerate the values of a registry key.
+
+    The number of values and the sizes of the name and data buffers are obtained with the `BaseRegQueryInfoKey`
+    operation, so that each value is retrieved with exactly one `BaseRegEnumValue` operation.
+
+    :param rpc_connection: An RPC connection with which to perform the operations.
+    :param key_handle: A handle to the registry key whose values to enumerate.
+    :param query_info_key_response: A `BaseRegQueryInfoKey` response for the key, if one has already been obtained.
+    :param retrieve_values: Whether to retrieve the data of the values, or only their names, types, and data sizes.
+    :return: An asynchronous iterator of `BaseRegEnumValue` responses, one per value.
+    """
+
+    query_info_key_response = query_info_key_response or await base_reg_query_info_key(
+        rpc_connection=rpc_connection,
+        request=BaseRegQueryInfoKeyRequest(key_handle=key_handle)
+    )
+
+    for index in range(query_info_key_response.num_values):
+        yield await base_reg_enum_value(
+            rpc_connection=rpc_connection,
+            request=BaseRegEnumValueRequest(
+                key_handle=key_handle,
+                index=index,
+                value_name_buffer_size=(query_info_key_response.max_value_name_length + 1) * 2,
+                value_buffer_size=query_info_key_response.max_value_length if retrieve_values else None
+            )
+        )
+
+
+async def query_value(
+    rpc_connection: RPCConnection,
+    key_handle: bytes,
+    value_name: str,
+    value_buffer_size: int = 256,
+    maximum_value_buffer_size: int = DEFAULT_MAXIMUM_VALUE_BUFFER_SIZE
+) -> BaseRegQueryValueResponse:
+    """
+    Query a value whose size is not known in advance.
+
+    The query is retried with a doubled buffer, up to `maximum_value_buffer_size`, for as long as the server responds
+    with `ERROR_MORE_DATA`. If the query fails otherwise, or the value does not fit in the maximum buffer size, the
+    error of the failed query is raised, as with `raise_exception` for any other operation.
+
+    :param rpc_connection: An RPC connection with which to perform the operations.
+    :param key_handle: A handle to the registry key whose value to query.
+    :param value_name: The name of the value to query.
+    :param value_buffer_size: The initial size of the buffer in which to receive the value.
+    :param maximum_value_buffer_size: The largest size of the buffer in which to receive the value.
+    :return: The `BaseRegQueryValue` response of the successful query.
+    """
+
+    while True:
+        try:
+            return await base_reg_query_value(
+                rpc_connection=rpc_connection,
+                request=BaseRegQueryValueRequest(
+                    key_handle=key_handle,
+                    value_name=value_name,
+                    value_buffer_size=value_buffer_size
+                )
+            )
+        except Exception as exception:
+            if (
+                win32_error_code(exception=exception) is not Win32ErrorCode.ERROR_MORE_DATA
+                or value_buffer_size >= maximum_value_buffer_size
+            ):
+                raise
+
+        value_buffer_size = min(value_buffer_size * 2, maximum_value_buffer_size)
+
+
+async def walk_key(
+    rpc_connection: RPCConnection,
+    key_handle: bytes,
+    key_path: str = '',
+    maximum_depth: Optional[int] = None,
+    errors: Optional[dict[str, Exception]] = None
+) -> AsyncIterator[WalkedKey]:
+    """
+    Walk a registry key and its subkeys depth-first, yielding each key with its values as it is visited.
+
+    Only the values of the key being yielded and one handle per level of depth are held at a time. Subkeys that
+    cannot be opened or read, e.g. because access is denied, are skipped and the walk continues.
+
+    :param rpc_connection: An RPC connection with which to perform the operations.
+    :param key_handle: A handle to the registry key at which to start the walk.
+    :param key_path: The path of the registry key, used as a prefix of the paths of the walked keys.
+    :param maximum_depth: The maximum depth, relative to the start key, of keys to walk.
+    :param errors: A dictionary in which to record the paths of the skipped subkeys, mapped to their errors.
+    :return: An asynchronous iterator of the walked keys.
+    """
+
+    query_info_key_response = await base_reg_query_info_key(
+        rpc_connection=rpc_connection,
+        request=BaseRegQueryInfoKeyRequest(key_handle=key_handle)
+    )
+
+    yield WalkedKey(
+        key_path=key_path,
+        last_write_time=query_info_key_response.last_write_time,
+        values={
+            enum_value_response.value_name: (enum_value_response.value_type, enum_value_response.value)
+            async for enum_value_response in enumerate_values(
+                rpc_connection=rpc_connection,
+                key_handle=key_handle,
+                query_info_key_response=query_info_key_response
+            )
+        }
+    )
+
+    if maximum_depth is not None and maximum_depth <= 0:
+        return
+
+    sub_key_names = [
+        enum_key_response.sub_key_name
+        async for enum_key_response in enumerate_sub_keys(
+            rpc_connection=rpc_connection,
+            key_handle=key_handle,
+            query_info_key_response=query_info_key_response
+        )
+    ]
+
+    for sub_key_name in sub_key_names:
+        sub_key_path = f'{key_path}\\{sub_key_name}' if key_path else sub_key_name
+        base_reg_open_key_options = dict(
+            rpc_connection=rpc_connection,
+            request=BaseRegOpenKeyRequest(key_handle=key_handle, sub_key_name=sub_key_name)
+        )
+        try:
+            async with base_reg_open_key(**base_reg_open_key_options) as base_reg_open_key_response:
+                async for walked_key in walk_key(
+                    rpc_connection=rpc_connection,
+                    key_handle=base_reg_open_key_response.key_handle,
+                    key_path=sub_key_path,
+                    maximum_depth=maximum_depth - 1 if maximum_depth is not None else None,
+                    errors=errors
+                ):
+                    yield walked_key
+        except Exception as exception:
+            if not is_operation_error(exception=exception):
+                raise
+            if errors is not None:
+                errors[sub_key_path] = exception
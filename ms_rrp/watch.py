@@ -0,0 +1,269 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Optional, Iterable, AsyncIterator, Union
+from asyncio import Queue, Task, sleep, create_task, CancelledError
+from contextlib import AsyncExitStack
+
+from rpc.connection import Connection as RPCConnection
+
+from ms_rrp.operations.base_reg_query_info_key import base_reg_query_info_key, BaseRegQueryInfoKeyRequest, \
+    BaseRegQueryInfoKeyResponse
+from ms_rrp.structures.reg_value_type import RegValueType
+from ms_rrp.structures.regsam import Regsam
+from ms_rrp.utils import open_key_path, enumerate_values, is_operation_error
+
+
+@dataclass
+class KeyChange:
+    key_path: str
+    query_info_key_response: BaseRegQueryInfoKeyResponse
+    values: dict[str, tuple[RegValueType, bytes]]
+    previous_values: Optional[dict[str, tuple[RegValueType, bytes]]] = None
+
+
+@dataclass
+class KeyWatchError:
+    key_path: str
+    exception: Exception
+
+
+@dataclass
+class _WatchedKey:
+    key_path: str
+    key_handle: bytes
+    exit_stack: AsyncExitStack
+    query_info_key_response: BaseRegQueryInfoKeyResponse
+    interval: float
+    values: Optional[dict[str, tuple[RegValueType, bytes]]] = None
+    queues: list[Queue] = field(default_factory=list)
+    poll_task: Optional[Task] = None
+
+
+class KeyWatcher:
+    """
+    Watch registry keys for changes by polling them with the `BaseRegQueryInfoKey` operation.
+
+    Each watched key is opened once and its handle is kept for as long as it is watched. The values of a key are
+    enumerated when it is first watched, and thereafter only when its last-write time or its number of subkeys or
+    values differ from the previous poll. The polling interval of each key adapts to how often it changes, and
+    concurrent watchers of the same key share one poll. If opening or polling a key fails, e.g. because it was deleted,
+    the error is reported to its watchers and the key is no longer polled until it is watched again; the other keys of
+    a watch are still polled.
+
+    The bookkeeping of the watched keys is done without awaiting in between, so no lock is held while performing
+    operations.
+    """
+
+    def __init__(
+        self,
+        rpc_connection: RPCConnection,
+        minimum_interval: float = 1.0,
+        maximum_interval: float = 60.0,
+        sam_desired: Regsam = Regsam(maximum_allowed=True)
+    ):
+        """
+        :param rpc_connection: An RPC connection with which to perform the operations.
+        :param minimum_interval: The shortest interval, in seconds, with which a frequently changing key is polled.
+        :param maximum_interval: The longest interval, in seconds, with which a rarely changing key is polled.
+        :param sam_desired: The desired access when opening the watched keys.
+        """
+
+        self.rpc_connection = rpc_connection
+        self.minimum_interval = minimum_interval
+        self.maximum_interval = maximum_interval
+        self.sam_desired = sam_desired
+
+        self._watched_keys: dict[str, _WatchedKey] = {}
+
+    async def _fetch_values(self, watched_key: _WatchedKey) -> dict[str, tuple[RegValueType, bytes]]:
+        return {
+            enum_value_response.value_name: (enum_value_response.value_type, enum_value_response.value)
+            async for enum_value_response in enumerate_values(
+                rpc_connection=self.rpc_connection,
+                key_handle=watched_key.key_handle,
+                query_info_key_response=watched_key.query_info_key_response
+            )
+        }
+
+    async def _poll(self, watched_key: _WatchedKey) -> None:
+        try:
+            while True:
+                await sleep(watched_key.interval)
+
+                query_info_key_response = await base_reg_query_info_key(
+                    rpc_connection=self.rpc_connection,
+                    request=BaseRegQueryInfoKeyRequest(key_handle=watched_key.key_handle)
+                )
+
+                previous_response = watched_key.query_info_key_response
+                watched_key.query_info_key_response = query_info_key_response
+
+                changed = (
+                    (
+                        query_info_key_response.last_write_time,
+                        query_info_key_response.num_sub_keys,
+                        query_info_key_response.num_values
+                    ) != (
+                        previous_response.last_write_time,
+                        previous_response.num_sub_keys,
+                        previous_response.num_values
+                    )
+                )
+
+                if not changed:
+                    watched_key.interval = min(watched_key.interval * 1.5, self.maximum_interval)
+                    continue
+
+                watched_key.interval = max(watched_key.interval / 2, self.minimum_interval)
+
+                previous_values = watched_key.values
+                watched_key.values = await self._fetch_values(watched_key=watched_key)
+
+                key_change = KeyChange(
+                    key_path=watched_key.key_path,
+                    query_info_key_response=query_info_key_response,
+                    values=watched_key.values,
+                    previous_values=previous_values
+                )
+                for queue in watched_key.queues:
+                    queue.put_nowait(key_change)
+        except CancelledError:
+            raise
+        except Exception as exception:
+            # Stop watching the key, so that a later subscription opens it anew rather than waiting on a dead poll.
+            if self._watched_keys.get(watched_key.key_path.lower()) is watched_key:
+                del self._watched_keys[watched_key.key_path.lower()]
+
+            for queue in watched_key.queues:
+                queue.put_nowait(KeyWatchError(key_path=watched_key.key_path, exception=exception))
+
+            try:
+                await watched_key.exit_stack.aclose()
+            except Exception as close_exception:
+                if not is_operation_error(exception=close_exception):
+                    raise
+
+    async def _open(self, key_path: str, interval: float) -> _WatchedKey:
+        exit_stack = AsyncExitStack()
+        try:
+            key_handle: bytes = await exit_stack.enter_async_context(
+                open_key_path(rpc_connection=self.rpc_connection, key_path=key_path, sam_desired=self.sam_desired)
+            )
+            watched_key = _WatchedKey(
+                key_path=key_path,
+                key_handle=key_handle,
+                exit_stack=exit_stack,
+                query_info_key_response=await base_reg_query_info_key(
+                    rpc_connection=self.rpc_connection,
+                    request=BaseRegQueryInfoKeyRequest(key_handle=key_handle)
+                ),
+                interval=max(interval, self.minimum_interval)
+            )
+            # The values at the time of subscription are the previous values of the first change.
+            watched_key.values = await self._fetch_values(watched_key=watched_key)
+        except BaseException:
+            await exit_stack.aclose()
+            raise
+
+        return watched_key
+
+    async def _subscribe(self, key_path: str, queue: Queue, interval: float) -> None:
+        opened_watched_key: Optional[_WatchedKey] = None
+        if key_path.lower() not in self._watched_keys:
+            opened_watched_key = await self._open(key_path=key_path, interval=interval)
+
+        # A concurrent subscription may have started watching the key while it was being opened.
+        if (watched_key := self._watched_keys.get(key_path.lower())) is None:
+            watched_key = opened_watched_key
+            watched_key.poll_task = create_task(self._poll(watched_key=watched_key))
+            self._watched_keys[key_path.lower()] = watched_key
+        else:
+            watched_key.interval = max(min(watched_key.interval, interval), self.minimum_interval)
+
+        watched_key.queues.append(queue)
+
+        if opened_watched_key is not None and opened_watched_key is not watched_key:
+            await opened_watched_key.exit_stack.aclose()
+
+    async def _unsubscribe(self, key_path: str, queue: Queue) -> None:
+        watched_key = self._watched_keys.get(key_path.lower())
+        # The key may no longer be watched because polling it failed, or be watched anew since.
+        if watched_key is None or queue not in watched_key.queues:
+            return
+
+        watched_key.queues.remove(queue)
+        if watched_key.queues:
+            return
+
+        del self._watched_keys[key_path.lower()]
+
+        watched_key.poll_task.cancel()
+        try:
+            await watched_key.poll_task
+        except CancelledError:
+            pass
+
+        await watched_key.exit_stack.aclose()
+
+    async def watch(
+        self,
+        key_paths: Iterable[str],
+        interval: float = 5.0
+    ) -> AsyncIterator[Union[KeyChange, KeyWatchError]]:
+        """
+        Watch registry keys for changes.
+
+        A key that cannot be opened or polled is reported once with a `KeyWatchError` and is then no longer watched;
+        the watch ends when none of its keys are watched anymore.
+
+        :param key_paths: The paths of the registry keys to watch, including their root keys.
+        :param interval: The initial polling interval of each key, in seconds. Keys that do not change are polled less
+            often, up to the watcher's maximum interval; keys that change are polled more often, down to its minimum
+            interval.
+        :return: An asynchronous iterator of changes to the watched keys, and of errors of keys no longer watched.
+        """
+
+        key_paths = list(key_paths)
+        queue: Queue[Union[KeyChange, KeyWatchError]] = Queue()
+
+        subscribed_key_paths: list[str] = []
+        try:
+            for key_path in key_paths:
+                try:
+                    await self._subscribe(key_path=key_path, queue=queue, interval=interval)
+                except Exception as exception:
+                    if not is_operation_error(exception=exception):
+                        raise
+                    yield KeyWatchError(key_path=key_path, exception=exception)
+                else:
+                    subscribed_key_paths.append(key_path)
+
+            num_watched_keys = len(subscribed_key_paths)
+            while num_watched_keys > 0:
+                item = await queue.get()
+                if isinstance(item, KeyWatchError):
+                    if not is_operation_error(exception=item.exception):
+                        raise item.exception
+                    num_watched_keys -= 1
+                yield item
+        finally:
+            for key_path in subscribed_key_paths:
+                await self._unsubscribe(key_path=key_path, queue=queue)
+
+
+async def watch(
+    rpc_connection: RPCConnection,
+    key_paths: Iterable[str],
+    interval: float = 5.0
+) -> AsyncIterator[Union[KeyChange, KeyWatchError]]:
+    """
+    Watch registry keys for changes with a dedicated `KeyWatcher`.
+
+    :param rpc_connection: An RPC connection with which to perform the operations.
+    :param key_paths: The paths of the registry keys to watch, including their root keys.
+    :param interval: The initial polling interval of each key, in seconds.
+    :return: An asynchronous iterator of changes to the watched keys, and of errors of keys no longer watched.
+    """
+
+    async for key_change in KeyWatcher(rpc_connection=rpc_connection).watch(key_paths=key_paths, interval=interval):
+        yield key_change
@@ -8,5 +8,8 @@ setup(
         'msdsalgs @ git+https://github.com/vphpersson/msdsalgs.git#egg=msdsalgs',
         'ndr @ git+https://github.com/vphpersson/ndr.git#egg=ndr',
         'smb @ git+https://github.com/vphpersson/smb.git#egg=smb'
-    ]
+    ],
+    extras_require={
+        'zstd': ['zstandard']
+    }
 )
@@ -0,0 +1,24 @@
+from importlib import import_module
+from pkgutil import iter_modules
+
+from pytest import fixture
+
+import ms_rrp.operations
+from tests.fakes import FakeRegistry
+
+
+@fixture
+def fake_registry(monkeypatch) -> FakeRegistry:
+    """
+    Provide an in-memory registry to which the requests of the operation functions are routed.
+    """
+
+    async def obtain_response(rpc_connection: FakeRegistry, request, raise_exception: bool = True):
+        return await rpc_connection.respond(request=request, raise_exception=raise_exception)
+
+    for module_info in iter_modules(ms_rrp.operations.__path__):
+        module = import_module(f'{ms_rrp.operations.__name__}.{module_info.name}')
+        if hasattr(module, 'obtain_response'):
+            monkeypatch.setattr(module, 'obtain_response', obtain_response)
+
+    return FakeRegistry()
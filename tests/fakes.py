@@ -0,0 +1,406 @@
+from __future__ import annotations
+from typing import Optional, Callable
+from asyncio import sleep
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import PureWindowsPath
+from os import urandom
+
+from msdsalgs.win32_error import Win32ErrorCode
+
+from ms_rrp.operations import Operation, OpenRootKeyRequest
+from ms_rrp.operations.base_reg_query_multiple_values import ValueEntry
+from ms_rrp.structures.disposition import Disposition
+from ms_rrp.structures.reg_value_type import RegValueType
+from ms_rrp.structures.root_keys import OPENABLE_ROOT_KEY_TO_OPERATION_AND_REQUEST
+from ms_rrp.utils import split_key_path
+
+_NULL_KEY_HANDLE = bytes(20)
+
+
+@dataclass
+class Message:
+    """
+    A request or response message, with the attributes of the RPC library's messages that the connections use.
+    """
+
+    opnum: int
+    stub_data: bytes
+
+
+class FakeConnection:
+    """
+    An RPC connection that responds to request messages with `respond` after `delay` seconds.
+
+    By default, the request message itself is returned as the response.
+    """
+
+    def __init__(
+        self,
+        respond: Callable[[Message], Message] = lambda request_message: request_message,
+        delay: float = 0.0
+    ):
+        self.respond = respond
+        self.delay = delay
+        # The request messages, in the order in which they were received.
+        self.request_messages: list[Message] = []
+
+    @property
+    def num_requests(self) -> int:
+        return len(self.request_messages)
+
+    async def request(self, request_message: Message) -> Message:
+        self.request_messages.append(request_message)
+        await sleep(self.delay)
+        return self.respond(request_message)
+
+
+@dataclass
+class FakeCreateResponse:
+    file_id: bytes
+    endof_file: int
+
+
+class FakeSMBSession:
+    """
+    An SMB session with an in-memory file system, supporting the operations with which files are uploaded and deleted.
+    """
+
+    def __init__(self):
+        self.files: dict[PureWindowsPath, bytearray] = {}
+        self.num_writes_in_flight = 0
+        self.max_num_writes_in_flight = 0
+
+        self._file_id_to_path: dict[bytes, PureWindowsPath] = {}
+
+    @asynccontextmanager
+    async def create(self, path: PureWindowsPath, tree_id: int, create_options, desired_access, **kwargs):
+        await sleep(0)
+        if desired_access.delete and path not in self.files:
+            raise FileNotFoundError(path)
+
+        file_id = urandom(16)
+        self._file_id_to_path[file_id] = path
+        data = self.files.setdefault(path, bytearray())
+        try:
+            yield FakeCreateResponse(file_id=file_id, endof_file=len(data))
+        finally:
+            del self._file_id_to_path[file_id]
+            if create_options.delete_on_close:
+                del self.files[path]
+
+    async def write(self, write_data: bytes, offset: int, file_id: bytes, tree_id: int) -> None:
+        self.num_writes_in_flight += 1
+        self.max_num_writes_in_flight = max(self.max_num_writes_in_flight, self.num_writes_in_flight)
+        # The write lasts long enough for the chunks read concurrently in the executor to be written concurrently.
+        await sleep(0.01)
+        self.num_writes_in_flight -= 1
+
+        data = self.files[self._file_id_to_path[file_id]]
+        data[len(data):offset] = bytes(max(0, offset - len(data)))
+        data[offset:offset + len(write_data)] = write_data
+
+
+class FakeRegistryError(Exception):
+    def __init__(self, return_code: Win32ErrorCode):
+        super().__init__(return_code)
+        self.return_code = return_code
+
+
+class FakeRPCFault(Exception):
+    def __init__(self, status: int):
+        super().__init__(status)
+        self.status = status
+
+
+class FakeKey:
+    def __init__(self, last_write_time: int = 1):
+        self.last_write_time = last_write_time
+        self.values: dict[str, tuple[RegValueType, bytes]] = {}
+        self.sub_keys: dict[str, FakeKey] = {}
+        self.security_descriptor = bytes.fromhex('0100048014000000000000000000000000000000')
+        # Whether opening the key fails with `ERROR_ACCESS_DENIED`, like e.g. `HKLM\SAM\SAM`.
+        self.access_denied = False
+        # Whether querying the key via an open handle fails with `ERROR_KEY_DELETED`.
+        self.deleted = False
+
+    def sub_key(self, sub_key_name: str) -> Optional[FakeKey]:
+        for name, sub_key in self.sub_keys.items():
+            if name.lower() == sub_key_name.lower():
+                return sub_key
+        return None
+
+    def find(self, sub_key_path: str) -> Optional[FakeKey]:
+        key = self
+        for sub_key_name in filter(None, sub_key_path.split('\\')):
+            if (key := key.sub_key(sub_key_name=sub_key_name)) is None:
+                return None
+        return key
+
+
+class FakeRegistry:
+    """
+    An in-memory registry, to be passed as the RPC connection to the operation functions.
+
+    The `fake_registry` fixture routes the operation functions' requests to the registry's `respond` method.
+    """
+
+    def __init__(self):
+        self.root_keys: defaultdict[Operation, FakeKey] = defaultdict(FakeKey)
+        self.operations: list[Operation] = []
+        self.max_num_open_handles = 0
+        # Return codes with which requests of an operation are to fail.
+        self.failures: dict[Operation, Win32ErrorCode] = {}
+        # RPC fault statuses with which requests of an operation are to be rejected.
+        self.faults: dict[Operation, int] = {}
+
+        self._handles: dict[bytes, FakeKey] = {}
+        self._clock = 1
+
+    @property
+    def num_open_handles(self) -> int:
+        return len(self._handles)
+
+    def operation_count(self, operation: Operation) -> int:
+        return self.operations.count(operation)
+
+    def add_key(self, key_path: str, values: Optional[dict[str, tuple[RegValueType, bytes]]] = None) -> FakeKey:
+        root_key, sub_key_path = split_key_path(key_path=key_path)
+        key = self.root_keys[OPENABLE_ROOT_KEY_TO_OPERATION_AND_REQUEST[root_key][1].OPERATION]
+        for sub_key_name in filter(None, sub_key_path.split('\\')):
+            key = key.sub_key(sub_key_name=sub_key_name) or key.sub_keys.setdefault(sub_key_name, FakeKey())
+        key.values.update(values or {})
+        return key
+
+    def touch(self, key: FakeKey) -> None:
+        self._clock += 1
+        key.last_write_time = self._clock
+
+    def _open_handle(self, key: FakeKey) -> bytes:
+        key_handle = b'\x00' * 4 + urandom(16)
+        self._handles[key_handle] = key
+        self.max_num_open_handles = max(self.max_num_open_handles, len(self._handles))
+        return key_handle
+
+    async def respond(self, request, raise_exception: bool = True):
+        self.operations.append(request.OPERATION)
+        # Yield to the event loop, as a request over a real connection would.
+        await sleep(0)
+
+        if (status := self.faults.get(request.OPERATION)) is not None:
+            raise FakeRPCFault(status=status)
+
+        if (return_code := self.failures.get(request.OPERATION)) is not None:
+            response = request.RESPONSE_CLASS(**self._empty_response_fields(operation=request.OPERATION))
+            response.return_code = return_code
+        elif isinstance(request, OpenRootKeyRequest):
+            response = request.RESPONSE_CLASS(
+                key_handle=self._open_handle(key=self.root_keys[request.OPERATION]),
+                return_code=Win32ErrorCode.ERROR_SUCCESS
+            )
+        else:
+            response = getattr(self, f'_{request.OPERATION.name.lower()}')(request)
+
+        if raise_exception and response.return_code is not Win32ErrorCode.ERROR_SUCCESS:
+            raise FakeRegistryError(return_code=response.return_code)
+
+        return response
+
+    @staticmethod
+    def _empty_response_fields(operation: Operation) -> dict:
+        if operation is Operation.BASE_REG_CREATE_KEY:
+            return dict(
+                key_handle=_NULL_KEY_HANDLE,
+                disposition=Disposition.REG_CREATED_NEW_KEY,
+                return_code=Win32ErrorCode.ERROR_SUCCESS
+            )
+        if 'OPEN' in operation.name or operation is Operation.BASE_REG_CLOSE_KEY:
+            return dict(key_handle=_NULL_KEY_HANDLE, return_code=Win32ErrorCode.ERROR_SUCCESS)
+        if operation is Operation.BASE_REG_QUERY_INFO_KEY:
+            return dict(
+                class_name='',
+                num_sub_keys=0,
+                max_sub_key_name_length=0,
+                max_class_length=0,
+                num_values=0,
+                max_value_name_length=0,
+                max_value_length=0,
+                security_descriptor_size=0,
+                last_write_time=0,
+                return_code=Win32ErrorCode.ERROR_SUCCESS
+            )
+        if operation is Operation.BASE_REG_QUERY_VALUE:
+            return dict(value_type=RegValueType.REG_NONE, value=b'', return_code=Win32ErrorCode.ERROR_SUCCESS)
+        return dict(return_code=Win32ErrorCode.ERROR_SUCCESS)
+
+    def _base_reg_close_key(self, request):
+        self._handles.pop(request.key_handle, None)
+        return request.RESPONSE_CLASS(key_handle=_NULL_KEY_HANDLE, return_code=Win32ErrorCode.ERROR_SUCCESS)
+
+    def _base_reg_open_key(self, request):
+        key = self._handles[request.key_handle].find(sub_key_path=request.sub_key_name)
+        if key is None or key.access_denied:
+            return request.RESPONSE_CLASS(
+                key_handle=_NULL_KEY_HANDLE,
+                return_code=Win32ErrorCode.ERROR_FILE_NOT_FOUND if key is None else Win32ErrorCode.ERROR_ACCESS_DENIED
+            )
+        return request.RESPONSE_CLASS(key_handle=self._open_handle(key=key), return_code=Win32ErrorCode.ERROR_SUCCESS)
+
+    def _base_reg_create_key(self, request):
+        key = self._handles[request.key_handle]
+        disposition = Disposition.REG_OPENED_EXISTING_KEY
+        for sub_key_name in filter(None, request.sub_key_name.split('\\')):
+            if (sub_key := key.sub_key(sub_key_name=sub_key_name)) is None:
+                self.touch(key=key)
+                sub_key = key.sub_keys.setdefault(sub_key_name, FakeKey(last_write_time=self._clock))
+                disposition = Disposition.REG_CREATED_NEW_KEY
+            key = sub_key
+        return request.RESPONSE_CLASS(
+            key_handle=self._open_handle(key=key),
+            disposition=disposition,
+            return_code=Win32ErrorCode.ERROR_SUCCESS
+        )
+
+    def _base_reg_query_info_key(self, request):
+        key = self._handles[request.key_handle]
+        if key.deleted:
+            response = request.RESPONSE_CLASS(**self._empty_response_fields(operation=request.OPERATION))
+            response.return_code = Win32ErrorCode.ERROR_KEY_DELETED
+            return response
+
+        return request.RESPONSE_CLASS(
+            class_name='',
+            num_sub_keys=len(key.sub_keys),
+            max_sub_key_name_length=max((len(name) for name in key.sub_keys), default=0),
+            max_class_length=0,
+            num_values=len(key.values),
+            max_value_name_length=max((len(name) for name in key.values), default=0),
+            max_value_length=max((len(value) for _, value in key.values.values()), default=0),
+            security_descriptor_size=len(key.security_descriptor),
+            last_write_time=key.last_write_time,
+            return_code=Win32ErrorCode.ERROR_SUCCESS
+        )
+
+    def _base_reg_enum_key(self, request):
+        key = self._handles[request.key_handle]
+        if request.index >= len(key.sub_keys):
+            return request.RESPONSE_CLASS(sub_key_name='', return_code=Win32ErrorCode.ERROR_NO_MORE_ITEMS)
+        sub_key_name, sub_key = list(key.sub_keys.items())[request.index]
+        return request.RESPONSE_CLASS(
+            sub_key_name=sub_key_name,
+            class_name='',
+            last_write_time=sub_key.last_write_time,
+            return_code=Win32ErrorCode.ERROR_SUCCESS
+        )
+
+    def _base_reg_enum_value(self, request):
+        key = self._handles[request.key_handle]
+        if request.index >= len(key.values):
+            return request.RESPONSE_CLASS(
+                value_name='',
+                value_type=RegValueType.REG_NONE,
+                value=b'',
+                data_size=0,
+                return_code=Win32ErrorCode.ERROR_NO_MORE_ITEMS
+            )
+        value_name, (value_type, value) = list(key.values.items())[request.index]
+        return request.RESPONSE_CLASS(
+            value_name=value_name,
+            value_type=value_type,
+            value=value if request.value_buffer_size is not None else b'',
+            data_size=len(value),
+            return_code=Win32ErrorCode.ERROR_SUCCESS
+        )
+
+    def _base_reg_query_value(self, request):
+        key = self._handles[request.key_handle]
+        if (entry := key.values.get(request.value_name)) is None:
+            return request.RESPONSE_CLASS(
+                value_type=RegValueType.REG_NONE,
+                value=b'',
+                return_code=Win32ErrorCode.ERROR_FILE_NOT_FOUND
+            )
+        value_type, value = entry
+        if len(value) > request.value_buffer_size:
+            return request.RESPONSE_CLASS(value_type=value_type, value=b'', return_code=Win32ErrorCode.ERROR_MORE_DATA)
+        return request.RESPONSE_CLASS(value_type=value_type, value=value, return_code=Win32ErrorCode.ERROR_SUCCESS)
+
+    def _base_reg_query_multiple_values(self, request):
+        key = self._handles[request.key_handle]
+        if any(value_name not in key.values for value_name in request.value_names):
+            return request.RESPONSE_CLASS(
+                value_entries=[],
+                total_size=0,
+                return_code=Win32ErrorCode.ERROR_FILE_NOT_FOUND
+            )
+        value_entries = [
+            ValueEntry(value_name=value_name, value_type=key.values[value_name][0], value=key.values[value_name][1])
+            for value_name in request.value_names
+        ]
+        total_size = sum(len(value_entry.value) for value_entry in value_entries)
+        return request.RESPONSE_CLASS(
+            value_entries=value_entries if total_size <= request.value_buffer_size else [],
+            total_size=total_size,
+            return_code=(
+                Win32ErrorCode.ERROR_SUCCESS if total_size <= request.value_buffer_size
+                else Win32ErrorCode.ERROR_MORE_DATA
+            )
+        )
+
+    def _base_reg_query_multiple_values2(self, request):
+        return self._base_reg_query_multiple_values(request=request)
+
+    def _base_reg_set_value(self, request):
+        key = self._handles[request.key_handle]
+        key.values[request.sub_key_name] = (request.value_type, request.value)
+        self.touch(key=key)
+        return request.RESPONSE_CLASS(return_code=Win32ErrorCode.ERROR_SUCCESS)
+
+    def _base_reg_delete_value(self, request):
+        key = self._handles[request.key_handle]
+        if key.values.pop(request.value_name, None) is None:
+            return request.RESPONSE_CLASS(return_code=Win32ErrorCode.ERROR_FILE_NOT_FOUND)
+        self.touch(key=key)
+        return request.RESPONSE_CLASS(return_code=Win32ErrorCode.ERROR_SUCCESS)
+
+    def _base_reg_delete_key(self, request):
+        parent_key_path, _, sub_key_name = request.sub_key_name.rpartition('\\')
+        parent_key = self._handles[request.key_handle].find(sub_key_path=parent_key_path)
+        if parent_key is None or (key := parent_key.sub_key(sub_key_name=sub_key_name)) is None:
+            return request.RESPONSE_CLASS(return_code=Win32ErrorCode.ERROR_FILE_NOT_FOUND)
+        if key.sub_keys or key.access_denied:
+            return request.RESPONSE_CLASS(return_code=Win32ErrorCode.ERROR_ACCESS_DENIED)
+        parent_key.sub_keys = {name: sub_key for name, sub_key in parent_key.sub_keys.items() if sub_key is not key}
+        self.touch(key=parent_key)
+        return request.RESPONSE_CLASS(return_code=Win32ErrorCode.ERROR_SUCCESS)
+
+    _base_reg_delete_key_ex = _base_reg_delete_key
+
+    def _base_reg_flush_key(self, request):
+        return request.RESPONSE_CLASS(return_code=Win32ErrorCode.ERROR_SUCCESS)
+
+    def _base_reg_restore_key(self, request):
+        self.touch(key=self._handles[request.key_handle])
+        return request.RESPONSE_CLASS(return_code=Win32ErrorCode.ERROR_SUCCESS)
+
+    def _base_reg_load_key(self, request):
+        self._handles[request.key_handle].sub_keys[request.sub_key_name] = FakeKey(last_write_time=self._clock)
+        return request.RESPONSE_CLASS(return_code=Win32ErrorCode.ERROR_SUCCESS)
+
+    def _base_reg_get_version(self, request):
+        return request.RESPONSE_CLASS(version=6, return_code=Win32ErrorCode.ERROR_SUCCESS)
+
+    def _base_reg_get_key_security(self, request):
+        key = self._handles[request.key_handle]
+        if request.security_descriptor_buffer_size < len(key.security_descriptor):
+            return request.RESPONSE_CLASS(
+                security_descriptor=b'',
+                security_descriptor_size=len(key.security_descriptor),
+                return_code=Win32ErrorCode.ERROR_INSUFFICIENT_BUFFER
+            )
+        return request.RESPONSE_CLASS(
+            security_descriptor=key.security_descriptor,
+            security_descriptor_size=len(key.security_descriptor),
+            return_code=Win32ErrorCode.ERROR_SUCCESS
+        )
@@ -0,0 +1,42 @@
+from ms_rrp.operations.base_reg_delete_key_ex import BaseRegDeleteKeyExRequest, BaseRegDeleteKeyExResponse
+from ms_rrp.structures.regsam import Regsam, RegsamFlag
+
+from msdsalgs.win32_error import Win32ErrorCode
+
+
+class TestBaseRegDeleteKeyExRequest:
+    REQUEST = BaseRegDeleteKeyExRequest.from_bytes(
+        data=bytes.fromhex('00000000084a756c463558459d00e2b2e277b6d90a000a00532200000500000000000000050000004200450054004f00000000000002000000000000')
+    )
+
+    def test_key_handle(self, request: BaseRegDeleteKeyExRequest = REQUEST):
+        assert request.key_handle == bytes.fromhex('00000000084a756c463558459d00e2b2e277b6d9')
+
+    def test_sub_key_name(self, request: BaseRegDeleteKeyExRequest = REQUEST):
+        assert request.sub_key_name == 'BETO'
+
+    def test_sam_desired(self, request: BaseRegDeleteKeyExRequest = REQUEST):
+        assert request.sam_desired == Regsam.from_int(RegsamFlag.KEY_WOW64_32KEY)
+
+    def test_reserved(self, request: BaseRegDeleteKeyExRequest = REQUEST):
+        assert request.reserved == 0
+
+    def test_redeserialization(self):
+        request = BaseRegDeleteKeyExRequest.from_bytes(data=bytes(self.REQUEST))
+
+        self.test_key_handle(request=request)
+        self.test_sub_key_name(request=request)
+        self.test_sam_desired(request=request)
+        self.test_reserved(request=request)
+
+
+class TestBaseRegDeleteKeyExResponse:
+    RESPONSE = BaseRegDeleteKeyExResponse.from_bytes(data=bytes.fromhex('00000000'))
+
+    def test_return_code(self, response: BaseRegDeleteKeyExResponse = RESPONSE):
+        assert response.return_code is Win32ErrorCode.ERROR_SUCCESS
+
+    def test_redeserialization(self):
+        response = BaseRegDeleteKeyExResponse.from_bytes(data=bytes(self.RESPONSE))
+
+        self.test_return_code(response=response)
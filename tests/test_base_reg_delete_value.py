@@ -0,0 +1,33 @@
+from ms_rrp.operations.base_reg_delete_value import BaseRegDeleteValueRequest, BaseRegDeleteValueResponse
+
+from msdsalgs.win32_error import Win32ErrorCode
+
+
+class TestBaseRegDeleteValueRequest:
+    REQUEST = BaseRegDeleteValueRequest.from_bytes(
+        data=bytes.fromhex('00000000084a756c463558459d00e2b2e277b6d90c000c00532200000600000000000000060000004200450054004f0032000000')
+    )
+
+    def test_key_handle(self, request: BaseRegDeleteValueRequest = REQUEST):
+        assert request.key_handle == bytes.fromhex('00000000084a756c463558459d00e2b2e277b6d9')
+
+    def test_value_name(self, request: BaseRegDeleteValueRequest = REQUEST):
+        assert request.value_name == 'BETO2'
+
+    def test_redeserialization(self):
+        request = BaseRegDeleteValueRequest.from_bytes(data=bytes(self.REQUEST))
+
+        self.test_key_handle(request=request)
+        self.test_value_name(request=request)
+
+
+class TestBaseRegDeleteValueResponse:
+    RESPONSE = BaseRegDeleteValueResponse.from_bytes(data=bytes.fromhex('00000000'))
+
+    def test_return_code(self, response: BaseRegDeleteValueResponse = RESPONSE):
+        assert response.return_code is Win32ErrorCode.ERROR_SUCCESS
+
+    def test_redeserialization(self):
+        response = BaseRegDeleteValueResponse.from_bytes(data=bytes(self.RESPONSE))
+
+        self.test_return_code(response=response)
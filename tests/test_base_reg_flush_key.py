@@ -0,0 +1,25 @@
+from ms_rrp.operations.base_reg_flush_key import BaseRegFlushKeyRequest, BaseRegFlushKeyResponse
+
+from msdsalgs.win32_error import Win32ErrorCode
+
+
+class TestBaseRegFlushKeyRequest:
+    REQUEST = BaseRegFlushKeyRequest.from_bytes(data=bytes.fromhex('00000000084a756c463558459d00e2b2e277b6d9'))
+
+    def test_key_handle(self, request: BaseRegFlushKeyRequest = REQUEST):
+        assert request.key_handle == bytes.fromhex('00000000084a756c463558459d00e2b2e277b6d9')
+
+    def test_redeserialization(self):
+        request = BaseRegFlushKeyRequest.from_bytes(data=bytes(self.REQUEST))
+        self.test_key_handle(request=request)
+
+
+class TestBaseRegFlushKeyResponse:
+    RESPONSE = BaseRegFlushKeyResponse.from_bytes(data=bytes.fromhex('00000000'))
+
+    def test_return_code(self, response: BaseRegFlushKeyResponse = RESPONSE):
+        assert response.return_code is Win32ErrorCode.ERROR_SUCCESS
+
+    def test_redeserialization(self):
+        response = BaseRegFlushKeyResponse.from_bytes(data=bytes(self.RESPONSE))
+        self.test_return_code(response=response)
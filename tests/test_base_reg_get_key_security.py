@@ -0,0 +1,54 @@
+from ms_rrp.operations.base_reg_get_key_security import BaseRegGetKeySecurityRequest, BaseRegGetKeySecurityResponse
+from ms_rrp.structures.security_information import SecurityInformation
+
+from msdsalgs.win32_error import Win32ErrorCode
+
+
+class TestBaseRegGetKeySecurityRequest:
+    REQUEST = BaseRegGetKeySecurityRequest.from_bytes(
+        data=bytes.fromhex('00000000084a756c463558459d00e2b2e277b6d907000000000000001400000000000000')
+    )
+
+    def test_key_handle(self, request: BaseRegGetKeySecurityRequest = REQUEST):
+        assert request.key_handle == bytes.fromhex('00000000084a756c463558459d00e2b2e277b6d9')
+
+    def test_security_information(self, request: BaseRegGetKeySecurityRequest = REQUEST):
+        assert request.security_information == (
+            SecurityInformation.OWNER_SECURITY_INFORMATION
+            | SecurityInformation.GROUP_SECURITY_INFORMATION
+            | SecurityInformation.DACL_SECURITY_INFORMATION
+        )
+
+    def test_security_descriptor_buffer_size(self, request: BaseRegGetKeySecurityRequest = REQUEST):
+        assert request.security_descriptor_buffer_size == 20
+
+    def test_redeserialization(self):
+        request = BaseRegGetKeySecurityRequest.from_bytes(data=bytes(self.REQUEST))
+
+        self.test_key_handle(request=request)
+        self.test_security_information(request=request)
+        self.test_security_descriptor_buffer_size(request=request)
+
+
+class TestBaseRegGetKeySecurityResponse:
+    RESPONSE = BaseRegGetKeySecurityResponse.from_bytes(
+        data=bytes.fromhex(
+            '000002001400000014000000140000000000000014000000010004801400000000000000000000000000000000000000'
+        )
+    )
+
+    def test_security_descriptor(self, response: BaseRegGetKeySecurityResponse = RESPONSE):
+        assert response.security_descriptor == bytes.fromhex('0100048014000000000000000000000000000000')
+
+    def test_security_descriptor_size(self, response: BaseRegGetKeySecurityResponse = RESPONSE):
+        assert response.security_descriptor_size == 20
+
+    def test_return_code(self, response: BaseRegGetKeySecurityResponse = RESPONSE):
+        assert response.return_code is Win32ErrorCode.ERROR_SUCCESS
+
+    def test_redeserialization(self):
+        response = BaseRegGetKeySecurityResponse.from_bytes(data=bytes(self.RESPONSE))
+
+        self.test_security_descriptor(response=response)
+        self.test_security_descriptor_size(response=response)
+        self.test_return_code(response=response)
@@ -0,0 +1,29 @@
+from ms_rrp.operations.base_reg_get_version import BaseRegGetVersionRequest, BaseRegGetVersionResponse
+
+from msdsalgs.win32_error import Win32ErrorCode
+
+
+class TestBaseRegGetVersionRequest:
+    REQUEST = BaseRegGetVersionRequest.from_bytes(data=bytes.fromhex('00000000084a756c463558459d00e2b2e277b6d9'))
+
+    def test_key_handle(self, request: BaseRegGetVersionRequest = REQUEST):
+        assert request.key_handle == bytes.fromhex('00000000084a756c463558459d00e2b2e277b6d9')
+
+    def test_redeserialization(self):
+        request = BaseRegGetVersionRequest.from_bytes(data=bytes(self.REQUEST))
+        self.test_key_handle(request=request)
+
+
+class TestBaseRegGetVersionResponse:
+    RESPONSE = BaseRegGetVersionResponse.from_bytes(data=bytes.fromhex('0600000000000000'))
+
+    def test_version(self, response: BaseRegGetVersionResponse = RESPONSE):
+        assert response.version == 6
+
+    def test_return_code(self, response: BaseRegGetVersionResponse = RESPONSE):
+        assert response.return_code is Win32ErrorCode.ERROR_SUCCESS
+
+    def test_redeserialization(self):
+        response = BaseRegGetVersionResponse.from_bytes(data=bytes(self.RESPONSE))
+        self.test_version(response=response)
+        self.test_return_code(response=response)
@@ -0,0 +1,40 @@
+from ms_rrp.operations.base_reg_load_key import BaseRegLoadKeyRequest, BaseRegLoadKeyResponse
+
+from msdsalgs.win32_error import Win32ErrorCode
+
+
+class TestBaseRegLoadKeyRequest:
+    REQUEST = BaseRegLoadKeyRequest.from_bytes(
+        data=bytes.fromhex(
+            '00000000084a756c463558459d00e2b2e277b6d90a000a00532200000500000000000000050000004200450054004f000000'
+            '00000a000a005322000005000000000000000500000043003a005c0068000000'
+        )
+    )
+
+    def test_key_handle(self, request: BaseRegLoadKeyRequest = REQUEST):
+        assert request.key_handle == bytes.fromhex('00000000084a756c463558459d00e2b2e277b6d9')
+
+    def test_sub_key_name(self, request: BaseRegLoadKeyRequest = REQUEST):
+        assert request.sub_key_name == 'BETO'
+
+    def test_file_path(self, request: BaseRegLoadKeyRequest = REQUEST):
+        assert request.file_path == 'C:\\h'
+
+    def test_redeserialization(self):
+        request = BaseRegLoadKeyRequest.from_bytes(data=bytes(self.REQUEST))
+
+        self.test_key_handle(request=request)
+        self.test_sub_key_name(request=request)
+        self.test_file_path(request=request)
+
+
+class TestBaseRegLoadKeyResponse:
+    RESPONSE = BaseRegLoadKeyResponse.from_bytes(data=bytes.fromhex('00000000'))
+
+    def test_return_code(self, response: BaseRegLoadKeyResponse = RESPONSE):
+        assert response.return_code is Win32ErrorCode.ERROR_SUCCESS
+
+    def test_redeserialization(self):
+        response = BaseRegLoadKeyResponse.from_bytes(data=bytes(self.RESPONSE))
+
+        self.test_return_code(response=response)
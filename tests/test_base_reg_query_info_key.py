@@ -0,0 +1,67 @@
+from ms_rrp.operations.base_reg_query_info_key import BaseRegQueryInfoKeyRequest, BaseRegQueryInfoKeyResponse
+
+from msdsalgs.win32_error import Win32ErrorCode
+
+
+class TestBaseRegQueryInfoKeyRequest:
+    REQUEST = BaseRegQueryInfoKeyRequest.from_bytes(
+        data=bytes.fromhex('00000000084a756c463558459d00e2b2e277b6d90000000200000200000100000000000000000000')
+    )
+
+    def test_key_handle(self, request: BaseRegQueryInfoKeyRequest = REQUEST):
+        assert request.key_handle == bytes.fromhex('00000000084a756c463558459d00e2b2e277b6d9')
+
+    def test_class_buffer_size(self, request: BaseRegQueryInfoKeyRequest = REQUEST):
+        assert request.class_buffer_size == 512
+
+    def test_redeserialization(self):
+        request = BaseRegQueryInfoKeyRequest.from_bytes(data=bytes(self.REQUEST))
+
+        self.test_key_handle(request=request)
+        self.test_class_buffer_size(request=request)
+
+
+class TestBaseRegQueryInfoKeyResponse:
+    RESPONSE = BaseRegQueryInfoKeyResponse.from_bytes(
+        data=bytes.fromhex('0000000200000200000100000000000000000000030000001a00000000000000020000001000000020000000b8000000e0b4c6f0a8d5d60100000000')
+    )
+
+    def test_class_name(self, response: BaseRegQueryInfoKeyResponse = RESPONSE):
+        assert response.class_name == ''
+
+    def test_num_sub_keys(self, response: BaseRegQueryInfoKeyResponse = RESPONSE):
+        assert response.num_sub_keys == 3
+
+    def test_max_sub_key_name_length(self, response: BaseRegQueryInfoKeyResponse = RESPONSE):
+        assert response.max_sub_key_name_length == 26
+
+    def test_num_values(self, response: BaseRegQueryInfoKeyResponse = RESPONSE):
+        assert response.num_values == 2
+
+    def test_max_value_name_length(self, response: BaseRegQueryInfoKeyResponse = RESPONSE):
+        assert response.max_value_name_length == 16
+
+    def test_max_value_length(self, response: BaseRegQueryInfoKeyResponse = RESPONSE):
+        assert response.max_value_length == 32
+
+    def test_security_descriptor_size(self, response: BaseRegQueryInfoKeyResponse = RESPONSE):
+        assert response.security_descriptor_size == 184
+
+    def test_last_write_time(self, response: BaseRegQueryInfoKeyResponse = RESPONSE):
+        assert response.last_write_time == 0x01d6d5a8f0c6b4e0
+
+    def test_return_code(self, response: BaseRegQueryInfoKeyResponse = RESPONSE):
+        assert response.return_code is Win32ErrorCode.ERROR_SUCCESS
+
+    def test_redeserialization(self):
+        response = BaseRegQueryInfoKeyResponse.from_bytes(data=bytes(self.RESPONSE))
+
+        self.test_class_name(response=response)
+        self.test_num_sub_keys(response=response)
+        self.test_max_sub_key_name_length(response=response)
+        self.test_num_values(response=response)
+        self.test_max_value_name_length(response=response)
+        self.test_max_value_length(response=response)
+        self.test_security_descriptor_size(response=response)
+        self.test_last_write_time(response=response)
+        self.test_return_code(response=response)
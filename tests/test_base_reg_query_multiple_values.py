@@ -0,0 +1,65 @@
+from ms_rrp.operations.base_reg_query_multiple_values import BaseRegQueryMultipleValuesRequest, \
+    BaseRegQueryMultipleValuesResponse, ValueEntry
+from ms_rrp.structures.reg_value_type import RegValueType
+
+from msdsalgs.win32_error import Win32ErrorCode
+
+
+class TestBaseRegQueryMultipleValuesRequest:
+    REQUEST = BaseRegQueryMultipleValuesRequest.from_bytes(
+        data=bytes.fromhex(
+            '00000000084a756c463558459d00e2b2e277b6d9020000000000000002000000040002000000000000000000000000000c00'
+            '02000000000000000000000000000a000a00080002000500000000000000050000005000610074006800000000001000100010'
+            '000200080000000000000008000000560065007200730069006f006e0000000200000014000200100000000000000010000000'
+            '0000000000000000000000000000000010000000'
+        )
+    )
+
+    def test_key_handle(self, request: BaseRegQueryMultipleValuesRequest = REQUEST):
+        assert request.key_handle == bytes.fromhex('00000000084a756c463558459d00e2b2e277b6d9')
+
+    def test_value_names(self, request: BaseRegQueryMultipleValuesRequest = REQUEST):
+        assert request.value_names == ['Path', 'Version']
+
+    def test_value_buffer_size(self, request: BaseRegQueryMultipleValuesRequest = REQUEST):
+        assert request.value_buffer_size == 16
+
+    def test_redeserialization(self):
+        request = BaseRegQueryMultipleValuesRequest.from_bytes(data=bytes(self.REQUEST))
+
+        self.test_key_handle(request=request)
+        self.test_value_names(request=request)
+        self.test_value_buffer_size(request=request)
+
+
+class TestBaseRegQueryMultipleValuesResponse:
+    RESPONSE = BaseRegQueryMultipleValuesResponse.from_bytes(
+        data=bytes.fromhex(
+            '020000000000000002000000040002000800000000000000010000000c0002000400000008000000040000000a000a00080002'
+            '000500000000000000050000005000610074006800000000001000100010000200080000000000000008000000560065007200'
+            '730069006f006e000000000002000c000000000000000c00000043003a005c000000020000000c00000000000000'
+        )
+    )
+
+    def test_value_entries(self, response: BaseRegQueryMultipleValuesResponse = RESPONSE):
+        assert response.value_entries == [
+            ValueEntry(
+                value_name='Path',
+                value_type=RegValueType.REG_SZ,
+                value='C:\\\x00'.encode(encoding='utf-16-le')
+            ),
+            ValueEntry(value_name='Version', value_type=RegValueType.REG_DWORD, value=b'\x02\x00\x00\x00')
+        ]
+
+    def test_total_size(self, response: BaseRegQueryMultipleValuesResponse = RESPONSE):
+        assert response.total_size == 12
+
+    def test_return_code(self, response: BaseRegQueryMultipleValuesResponse = RESPONSE):
+        assert response.return_code is Win32ErrorCode.ERROR_SUCCESS
+
+    def test_redeserialization(self):
+        response = BaseRegQueryMultipleValuesResponse.from_bytes(data=bytes(self.RESPONSE))
+
+        self.test_value_entries(response=response)
+        self.test_total_size(response=response)
+        self.test_return_code(response=response)
@@ -0,0 +1,33 @@
+from ms_rrp.operations.base_reg_query_value import BaseRegQueryValueRequest
+from ms_rrp.structures.reg_value_type import RegValueType
+
+
+class TestBaseRegQueryValueRequest:
+    REQUEST = BaseRegQueryValueRequest(
+        key_handle=bytes.fromhex('00000000084a756c463558459d00e2b2e277b6d9'),
+        value_name='Global',
+        value_buffer_size=256 * 1024
+    )
+
+    def test_key_handle(self, request: BaseRegQueryValueRequest = REQUEST):
+        assert request.key_handle == bytes.fromhex('00000000084a756c463558459d00e2b2e277b6d9')
+
+    def test_value_name(self, request: BaseRegQueryValueRequest = REQUEST):
+        assert request.value_name == 'Global'
+
+    def test_value_buffer_size(self, request: BaseRegQueryValueRequest = REQUEST):
+        assert request.value_buffer_size == 256 * 1024
+
+    def test_value_type(self, request: BaseRegQueryValueRequest = REQUEST):
+        assert request.value_type is RegValueType.REG_NONE
+
+    def test_buffer_contents_not_transmitted(self):
+        assert len(bytes(self.REQUEST)) < 128
+
+    def test_redeserialization(self):
+        request = BaseRegQueryValueRequest.from_bytes(data=bytes(self.REQUEST))
+
+        self.test_key_handle(request=request)
+        self.test_value_name(request=request)
+        self.test_value_buffer_size(request=request)
+        self.test_value_type(request=request)
@@ -0,0 +1,45 @@
+from ms_rrp.operations.base_reg_replace_key import BaseRegReplaceKeyRequest, BaseRegReplaceKeyResponse
+
+from msdsalgs.win32_error import Win32ErrorCode
+
+
+class TestBaseRegReplaceKeyRequest:
+    REQUEST = BaseRegReplaceKeyRequest.from_bytes(
+        data=bytes.fromhex(
+            '00000000084a756c463558459d00e2b2e277b6d90a000a00532200000500000000000000050000004200450054004f000000'
+            '00000a000a005322000005000000000000000500000043003a005c006e00000000000a000a00532200000500000000000000'
+            '0500000043003a005c006f000000'
+        )
+    )
+
+    def test_key_handle(self, request: BaseRegReplaceKeyRequest = REQUEST):
+        assert request.key_handle == bytes.fromhex('00000000084a756c463558459d00e2b2e277b6d9')
+
+    def test_sub_key_name(self, request: BaseRegReplaceKeyRequest = REQUEST):
+        assert request.sub_key_name == 'BETO'
+
+    def test_new_file_path(self, request: BaseRegReplaceKeyRequest = REQUEST):
+        assert request.new_file_path == 'C:\\n'
+
+    def test_old_file_path(self, request: BaseRegReplaceKeyRequest = REQUEST):
+        assert request.old_file_path == 'C:\\o'
+
+    def test_redeserialization(self):
+        request = BaseRegReplaceKeyRequest.from_bytes(data=bytes(self.REQUEST))
+
+        self.test_key_handle(request=request)
+        self.test_sub_key_name(request=request)
+        self.test_new_file_path(request=request)
+        self.test_old_file_path(request=request)
+
+
+class TestBaseRegReplaceKeyResponse:
+    RESPONSE = BaseRegReplaceKeyResponse.from_bytes(data=bytes.fromhex('00000000'))
+
+    def test_return_code(self, response: BaseRegReplaceKeyResponse = RESPONSE):
+        assert response.return_code is Win32ErrorCode.ERROR_SUCCESS
+
+    def test_redeserialization(self):
+        response = BaseRegReplaceKeyResponse.from_bytes(data=bytes(self.RESPONSE))
+
+        self.test_return_code(response=response)
@@ -0,0 +1,41 @@
+from ms_rrp.operations.base_reg_restore_key import BaseRegRestoreKeyRequest, BaseRegRestoreKeyResponse
+from ms_rrp.structures.restore_key_flags import RestoreKeyFlags
+
+from msdsalgs.win32_error import Win32ErrorCode
+
+
+class TestBaseRegRestoreKeyRequest:
+    REQUEST = BaseRegRestoreKeyRequest.from_bytes(
+        data=bytes.fromhex(
+            '00000000084a756c463558459d00e2b2e277b6d90a000a005322000005000000000000000500000043003a005c0068000000'
+            '000008000000'
+        )
+    )
+
+    def test_key_handle(self, request: BaseRegRestoreKeyRequest = REQUEST):
+        assert request.key_handle == bytes.fromhex('00000000084a756c463558459d00e2b2e277b6d9')
+
+    def test_file_path(self, request: BaseRegRestoreKeyRequest = REQUEST):
+        assert request.file_path == 'C:\\h'
+
+    def test_flags(self, request: BaseRegRestoreKeyRequest = REQUEST):
+        assert request.flags == RestoreKeyFlags(force_restore=True)
+
+    def test_redeserialization(self):
+        request = BaseRegRestoreKeyRequest.from_bytes(data=bytes(self.REQUEST))
+
+        self.test_key_handle(request=request)
+        self.test_file_path(request=request)
+        self.test_flags(request=request)
+
+
+class TestBaseRegRestoreKeyResponse:
+    RESPONSE = BaseRegRestoreKeyResponse.from_bytes(data=bytes.fromhex('05000000'))
+
+    def test_return_code(self, response: BaseRegRestoreKeyResponse = RESPONSE):
+        assert response.return_code is Win32ErrorCode.ERROR_ACCESS_DENIED
+
+    def test_redeserialization(self):
+        response = BaseRegRestoreKeyResponse.from_bytes(data=bytes(self.RESPONSE))
+
+        self.test_return_code(response=response)
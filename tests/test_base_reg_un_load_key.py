@@ -0,0 +1,33 @@
+from ms_rrp.operations.base_reg_un_load_key import BaseRegUnLoadKeyRequest, BaseRegUnLoadKeyResponse
+
+from msdsalgs.win32_error import Win32ErrorCode
+
+
+class TestBaseRegUnLoadKeyRequest:
+    REQUEST = BaseRegUnLoadKeyRequest.from_bytes(
+        data=bytes.fromhex('00000000084a756c463558459d00e2b2e277b6d90a000a00532200000500000000000000050000004200450054004f000000')
+    )
+
+    def test_key_handle(self, request: BaseRegUnLoadKeyRequest = REQUEST):
+        assert request.key_handle == bytes.fromhex('00000000084a756c463558459d00e2b2e277b6d9')
+
+    def test_sub_key_name(self, request: BaseRegUnLoadKeyRequest = REQUEST):
+        assert request.sub_key_name == 'BETO'
+
+    def test_redeserialization(self):
+        request = BaseRegUnLoadKeyRequest.from_bytes(data=bytes(self.REQUEST))
+
+        self.test_key_handle(request=request)
+        self.test_sub_key_name(request=request)
+
+
+class TestBaseRegUnLoadKeyResponse:
+    RESPONSE = BaseRegUnLoadKeyResponse.from_bytes(data=bytes.fromhex('00000000'))
+
+    def test_return_code(self, response: BaseRegUnLoadKeyResponse = RESPONSE):
+        assert response.return_code is Win32ErrorCode.ERROR_SUCCESS
+
+    def test_redeserialization(self):
+        response = BaseRegUnLoadKeyResponse.from_bytes(data=bytes(self.RESPONSE))
+
+        self.test_return_code(response=response)
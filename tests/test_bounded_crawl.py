@@ -0,0 +1,127 @@
+from asyncio import run
+
+from ms_rrp.bounded_crawl import BoundedCrawl, CrawlStatistics, _SpillFile, _SpillingStack, _SpillingQueue
+from ms_rrp.structures.reg_value_type import RegValueType
+from ms_rrp.utils import WalkedKey, open_key_path, walk_key
+
+
+def test_spilling_stack(tmp_path):
+    statistics = CrawlStatistics()
+    spill_file = _SpillFile(spill_directory=tmp_path, statistics=statistics)
+    spilling_stack = _SpillingStack(memory_limit=1024, spill_file=spill_file)
+
+    items = [(f'Key{index}', index % 4) for index in range(100)]
+    for sub_key_path, depth in items[:60]:
+        spilling_stack.push(sub_key_path=sub_key_path, depth=depth)
+    assert statistics.num_spills > 0
+
+    popped_items = [spilling_stack.pop() for _ in range(30)]
+    for sub_key_path, depth in items[60:]:
+        spilling_stack.push(sub_key_path=sub_key_path, depth=depth)
+    while spilling_stack:
+        popped_items.append(spilling_stack.pop())
+
+    assert popped_items == [*reversed(items[30:60]), *reversed(items[60:]), *reversed(items[:30])]
+    assert spilling_stack.size == 0
+    spill_file.close()
+
+
+def test_spilling_queue(tmp_path):
+    statistics = CrawlStatistics()
+    spill_file = _SpillFile(spill_directory=tmp_path, statistics=statistics)
+    spilling_queue = _SpillingQueue(memory_limit=2048, spill_file=spill_file)
+
+    walked_keys = [
+        WalkedKey(
+            key_path=f'HKLM\\SOFTWARE\\Key{index}',
+            last_write_time=index,
+            values={'Value': (RegValueType.REG_BINARY, bytes(index))}
+        )
+        for index in range(50)
+    ]
+
+    async def main() -> list[WalkedKey]:
+        for walked_key in walked_keys[:30]:
+            spilling_queue.put(walked_key=walked_key)
+        assert statistics.num_spills > 0
+
+        dequeued_walked_keys = [await spilling_queue.get() for _ in range(10)]
+        for walked_key in walked_keys[30:]:
+            spilling_queue.put(walked_key=walked_key)
+        spilling_queue.finish()
+
+        while (walked_key := await spilling_queue.get()) is not None:
+            dequeued_walked_keys.append(walked_key)
+        return dequeued_walked_keys
+
+    assert run(main()) == walked_keys
+    assert spilling_queue.size == 0
+    spill_file.close()
+
+
+def test_bounded_crawl(fake_registry, tmp_path):
+    for index in range(20):
+        fake_registry.add_key(
+            key_path=f'HKLM\\SOFTWARE\\Vendor{index}\\App',
+            values={'Data': (RegValueType.REG_BINARY, bytes(64))}
+        )
+
+    async def main() -> tuple[list[WalkedKey], list[WalkedKey], CrawlStatistics]:
+        async with open_key_path(rpc_connection=fake_registry, key_path='HKLM\\SOFTWARE') as key_handle:
+            walked_keys = [
+                walked_key
+                async for walked_key in walk_key(
+                    rpc_connection=fake_registry,
+                    key_handle=key_handle,
+                    key_path='HKLM\\SOFTWARE'
+                )
+            ]
+            bounded_crawl = BoundedCrawl(
+                rpc_connection=fake_registry,
+                key_handle=key_handle,
+                key_path='HKLM\\SOFTWARE',
+                memory_limit=4096,
+                spill_directory=tmp_path
+            )
+            crawled_keys = [walked_key async for walked_key in bounded_crawl.walk()]
+        return walked_keys, crawled_keys, bounded_crawl.statistics
+
+    walked_keys, crawled_keys, statistics = run(main())
+
+    assert crawled_keys == walked_keys
+    assert statistics.num_keys == 41
+    assert statistics.num_spills > 0
+    assert fake_registry.num_open_handles == 0
+
+
+def test_bounded_crawl_denied_key(fake_registry, tmp_path):
+    fake_registry.add_key(key_path='HKLM\\SOFTWARE\\Vendor\\App', values={'Data': (RegValueType.REG_BINARY, b'\x01')})
+    fake_registry.add_key(key_path='HKLM\\SOFTWARE\\Locked\\App').access_denied = True
+    fake_registry.add_key(key_path='HKLM\\SOFTWARE\\Other')
+
+    async def main() -> tuple[list[WalkedKey], dict[str, Exception], list[WalkedKey], dict[str, Exception]]:
+        async with open_key_path(rpc_connection=fake_registry, key_path='HKLM\\SOFTWARE') as key_handle:
+            walk_key_errors: dict[str, Exception] = {}
+            walked_keys = [
+                walked_key
+                async for walked_key in walk_key(
+                    rpc_connection=fake_registry,
+                    key_handle=key_handle,
+                    key_path='HKLM\\SOFTWARE',
+                    errors=walk_key_errors
+                )
+            ]
+            bounded_crawl = BoundedCrawl(
+                rpc_connection=fake_registry,
+                key_handle=key_handle,
+                key_path='HKLM\\SOFTWARE',
+                spill_directory=tmp_path
+            )
+            crawled_keys = [walked_key async for walked_key in bounded_crawl.walk()]
+        return walked_keys, walk_key_errors, crawled_keys, bounded_crawl.errors
+
+    walked_keys, walk_key_errors, crawled_keys, bounded_crawl_errors = run(main())
+
+    assert crawled_keys == walked_keys
+    assert list(bounded_crawl_errors) == list(walk_key_errors) == ['HKLM\\SOFTWARE\\Locked\\App']
+    assert fake_registry.num_open_handles == 0
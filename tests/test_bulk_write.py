@@ -0,0 +1,81 @@
+from asyncio import run
+
+from msdsalgs.win32_error import Win32ErrorCode
+
+from ms_rrp.bulk_write import bulk_write
+from ms_rrp.operations import Operation
+from ms_rrp.structures.reg_value_type import RegValueType
+from ms_rrp.utils import open_key_path
+
+VALUE = (RegValueType.REG_DWORD, (1).to_bytes(length=4, byteorder='little'))
+
+
+def _bulk_write(fake_registry, key_path_to_values, **bulk_write_options):
+    async def main():
+        async with open_key_path(rpc_connection=fake_registry, key_path='HKLM\\SOFTWARE') as key_handle:
+            return await bulk_write(
+                rpc_connection=fake_registry,
+                root_key_handle=key_handle,
+                key_path_to_values=key_path_to_values,
+                **bulk_write_options
+            )
+
+    return run(main())
+
+
+def test_bulk_write(fake_registry):
+    software_key = fake_registry.add_key(key_path='HKLM\\SOFTWARE')
+
+    results = _bulk_write(
+        fake_registry=fake_registry,
+        key_path_to_values={
+            'Vendor\\App': {'Version': VALUE, 'Enabled': VALUE},
+            'Vendor': {'Installed': VALUE},
+            'Vendor\\App\\Plugins\\A': {'Version': VALUE},
+            '': {'Root': VALUE}
+        },
+        verify=True
+    )
+
+    assert [(result.key_path, result.value_name) for result in results] == [
+        ('Vendor\\App', 'Version'),
+        ('Vendor\\App', 'Enabled'),
+        ('Vendor', 'Installed'),
+        ('Vendor\\App\\Plugins\\A', 'Version'),
+        ('', 'Root')
+    ]
+    assert all(result.succeeded and result.verified for result in results)
+    assert software_key.values == {'Root': VALUE}
+    assert software_key.find(sub_key_path='Vendor').values == {'Installed': VALUE}
+    assert software_key.find(sub_key_path='Vendor\\App').values == {'Version': VALUE, 'Enabled': VALUE}
+    assert software_key.find(sub_key_path='Vendor\\App\\Plugins\\A').values == {'Version': VALUE}
+    # Each key is created once, relative to its closest created ancestor.
+    assert fake_registry.operation_count(Operation.BASE_REG_CREATE_KEY) == 3
+    assert fake_registry.operation_count(Operation.BASE_REG_FLUSH_KEY) == 1
+    assert fake_registry.num_open_handles == 0
+
+
+def test_bulk_write_closes_completed_keys(fake_registry):
+    fake_registry.add_key(key_path='HKLM\\SOFTWARE')
+
+    results = _bulk_write(
+        fake_registry=fake_registry,
+        key_path_to_values={f'Vendor\\App{index}': {'Version': VALUE} for index in range(32)},
+        flush=False
+    )
+
+    assert all(result.succeeded for result in results)
+    # The handle of each key is closed once its write has completed, rather than when all keys have been written.
+    assert fake_registry.max_num_open_handles < 10
+    assert fake_registry.num_open_handles == 0
+
+
+def test_bulk_write_failure(fake_registry):
+    fake_registry.add_key(key_path='HKLM\\SOFTWARE')
+    fake_registry.failures[Operation.BASE_REG_SET_VALUE] = Win32ErrorCode.ERROR_ACCESS_DENIED
+
+    results = _bulk_write(fake_registry=fake_registry, key_path_to_values={'Vendor': {'Version': VALUE}})
+
+    assert results[0].return_code is Win32ErrorCode.ERROR_ACCESS_DENIED
+    assert not results[0].succeeded
+    assert fake_registry.num_open_handles == 0
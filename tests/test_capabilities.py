@@ -0,0 +1,88 @@
+from asyncio import run, gather
+from pathlib import Path
+
+from msdsalgs.win32_error import Win32ErrorCode
+from pytest import raises
+
+from ms_rrp.capabilities import HostCapabilities, CapabilityCache, probe_capabilities, NCA_S_OP_RNG_ERROR
+from ms_rrp.operations import Operation
+from ms_rrp.structures.reg_value_type import RegValueType
+from tests.fakes import FakeRPCFault
+
+CURRENT_VERSION_VALUES = {'CurrentBuildNumber': (RegValueType.REG_SZ, '19045\x00'.encode(encoding='utf-16-le'))}
+
+
+def test_supports():
+    host_capabilities = HostCapabilities(
+        version=5,
+        build_number='2600',
+        supported_operations={Operation.BASE_REG_QUERY_MULTIPLE_VALUES2}
+    )
+
+    assert host_capabilities.supports(Operation.BASE_REG_QUERY_MULTIPLE_VALUES2)
+    assert not host_capabilities.supports(Operation.BASE_REG_DELETE_KEY_EX)
+    # Operations that are not probed are assumed to be supported.
+    assert host_capabilities.supports(Operation.BASE_REG_OPEN_KEY)
+
+
+def test_dict_round_trip():
+    host_capabilities = HostCapabilities(
+        version=6,
+        build_number='19045',
+        supported_operations={Operation.BASE_REG_DELETE_KEY_EX, Operation.BASE_REG_QUERY_MULTIPLE_VALUES2}
+    )
+
+    assert HostCapabilities.from_dict(data=host_capabilities.to_dict()) == host_capabilities
+    assert host_capabilities.build_key == '6-19045'
+
+
+def test_capability_cache(fake_registry, tmp_path: Path):
+    fake_registry.add_key(
+        key_path='HKLM\\SOFTWARE\\Microsoft\\Windows NT\\CurrentVersion',
+        values=CURRENT_VERSION_VALUES
+    )
+
+    async def main() -> None:
+        capability_cache = CapabilityCache(cache_directory=tmp_path)
+
+        # Concurrent requests for the same host share one probe.
+        all_host_capabilities = await gather(
+            *(capability_cache.get(rpc_connection=fake_registry, host=host) for host in ('HOST', 'host', 'Host'))
+        )
+        assert all(host_capabilities is all_host_capabilities[0] for host_capabilities in all_host_capabilities)
+        assert all_host_capabilities[0] == HostCapabilities(
+            version=6,
+            build_number='19045',
+            supported_operations={Operation.BASE_REG_DELETE_KEY_EX, Operation.BASE_REG_QUERY_MULTIPLE_VALUES2}
+        )
+        assert fake_registry.operation_count(Operation.BASE_REG_DELETE_KEY_EX) == 1
+        assert list(tmp_path.iterdir()) == [tmp_path / 'host-6-19045.json']
+
+        # Persisted capabilities are reused for the same build, which is looked up anew.
+        assert await CapabilityCache(cache_directory=tmp_path).get(rpc_connection=fake_registry, host='HOST') == (
+            all_host_capabilities[0]
+        )
+        assert fake_registry.operation_count(Operation.BASE_REG_DELETE_KEY_EX) == 1
+        # The version is looked up once per load, both to find the persisted capabilities and to probe the host.
+        assert fake_registry.operation_count(Operation.BASE_REG_GET_VERSION) == 2
+
+    run(main())
+
+
+def test_probe_capabilities_unsupported_operation(fake_registry):
+    fake_registry.add_key(
+        key_path='HKLM\\SOFTWARE\\Microsoft\\Windows NT\\CurrentVersion',
+        values=CURRENT_VERSION_VALUES
+    )
+    fake_registry.faults[Operation.BASE_REG_QUERY_MULTIPLE_VALUES2] = NCA_S_OP_RNG_ERROR
+    # An error response of a supported operation is an answer nonetheless.
+    fake_registry.failures[Operation.BASE_REG_DELETE_KEY_EX] = Win32ErrorCode.ERROR_INVALID_PARAMETER
+
+    assert run(probe_capabilities(rpc_connection=fake_registry)).supported_operations == {
+        Operation.BASE_REG_DELETE_KEY_EX
+    }
+
+    # Other errors are not taken to mean that an operation is unsupported.
+    fake_registry.faults[Operation.BASE_REG_QUERY_MULTIPLE_VALUES2] = 0x00000005
+    with raises(FakeRPCFault):
+        run(probe_capabilities(rpc_connection=fake_registry))
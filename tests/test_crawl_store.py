@@ -0,0 +1,89 @@
+from ms_rrp.crawl_store import CrawlStore
+from ms_rrp.structures.reg_value_type import RegValueType
+from ms_rrp.utils import WalkedKey
+
+WALKED_KEYS = [
+    WalkedKey(key_path='HKLM\\SOFTWARE', last_write_time=1, values={}),
+    WalkedKey(
+        key_path='HKLM\\SOFTWARE\\Vendor',
+        last_write_time=2,
+        values={'Name': (RegValueType.REG_SZ, 'vendor\x00'.encode(encoding='utf-16-le'))}
+    ),
+    WalkedKey(
+        key_path='HKLM\\SOFTWARE\\Vendor\\Product',
+        last_write_time=3,
+        values={'Version': (RegValueType.REG_DWORD, b'\x02\x00\x00\x00'), 'Name': (RegValueType.REG_BINARY, b'\x01')}
+    ),
+    WalkedKey(key_path='HKLM\\SOFTWARE\\Other', last_write_time=4, values={}),
+]
+
+
+def make_crawl_store() -> CrawlStore:
+    crawl_store = CrawlStore()
+    for walked_key in WALKED_KEYS:
+        crawl_store.add_walked_key(walked_key=walked_key)
+    return crawl_store
+
+
+class TestCrawlStore:
+    CRAWL_STORE = make_crawl_store()
+
+    def test_iteration(self, crawl_store: CrawlStore = CRAWL_STORE):
+        assert list(crawl_store) == WALKED_KEYS
+
+    def test_lengths(self, crawl_store: CrawlStore = CRAWL_STORE):
+        assert len(crawl_store) == 4
+        assert crawl_store.num_values == 3
+
+    def test_string_interning(self, crawl_store: CrawlStore = CRAWL_STORE):
+        assert crawl_store.strings.count('Name') == 1
+
+    def test_find_key(self, crawl_store: CrawlStore = CRAWL_STORE):
+        assert crawl_store.find_key(key_path='HKLM\\SOFTWARE') == 0
+        assert crawl_store.find_key(key_path='HKLM\\SOFTWARE\\Vendor\\Product') == 2
+        assert crawl_store.find_key(key_path='HKLM\\SOFTWARE\\Missing') is None
+        assert crawl_store.find_key(key_path='HKLM') is None
+
+    def test_find_key_case_insensitively(self, crawl_store: CrawlStore = CRAWL_STORE):
+        assert crawl_store.find_key(key_path='hklm\\software\\VENDOR\\product') == 2
+
+    def test_iter_prefix(self, crawl_store: CrawlStore = CRAWL_STORE):
+        assert list(crawl_store.iter_prefix(key_path_prefix='HKLM\\SOFTWARE\\Vendor')) == WALKED_KEYS[1:3]
+        assert list(crawl_store.iter_prefix(key_path_prefix='HKLM\\SOFTWARE\\Other')) == WALKED_KEYS[3:]
+
+    def test_value_data(self, crawl_store: CrawlStore = CRAWL_STORE):
+        value_index = crawl_store.value_range(key_index=2)[0]
+        with crawl_store.value_data(value_index=value_index) as value_data:
+            assert value_data == b'\x02\x00\x00\x00'
+
+
+def test_empty_root_key_path():
+    walked_keys = [
+        WalkedKey(key_path='', last_write_time=1, values={}),
+        WalkedKey(key_path='Vendor', last_write_time=2, values={}),
+        WalkedKey(key_path='Vendor\\Product', last_write_time=3, values={}),
+        WalkedKey(key_path='Other', last_write_time=4, values={})
+    ]
+    crawl_store = CrawlStore()
+    for walked_key in walked_keys:
+        crawl_store.add_walked_key(walked_key=walked_key)
+
+    assert list(crawl_store) == walked_keys
+    assert list(crawl_store.key_depths) == [0, 1, 2, 1]
+    assert crawl_store.find_key(key_path='') == 0
+    assert crawl_store.find_key(key_path='vendor\\PRODUCT') == 2
+    assert list(crawl_store.iter_prefix(key_path_prefix='')) == walked_keys
+
+
+def test_many_keys():
+    crawl_store = CrawlStore()
+    crawl_store.add_key(key_path='HKLM\\SOFTWARE')
+    for index in range(1000):
+        crawl_store.add_key(key_path=f'HKLM\\SOFTWARE\\Key{index}')
+        crawl_store.add_key(key_path=f'HKLM\\SOFTWARE\\Key{index}\\Sub')
+
+    assert all(
+        crawl_store.find_key(key_path=f'HKLM\\SOFTWARE\\key{index}\\sub') == 2 + 2 * index
+        for index in range(1000)
+    )
+    assert crawl_store.find_key(key_path='HKLM\\SOFTWARE\\Key1000') is None
@@ -0,0 +1,87 @@
+from asyncio import run
+
+from ms_rrp.capabilities import HostCapabilities
+from ms_rrp.delete_tree import KeyDeleteResult, delete_tree
+from ms_rrp.operations import Operation
+from ms_rrp.structures.regsam import RegsamFlag
+from ms_rrp.utils import open_key_path
+
+
+def _add_keys(fake_registry) -> None:
+    fake_registry.add_key(key_path='HKLM\\SOFTWARE\\Vendor\\App\\Plugins')
+    fake_registry.add_key(key_path='HKLM\\SOFTWARE\\Vendor\\App\\Settings')
+    fake_registry.add_key(key_path='HKLM\\SOFTWARE\\Vendor\\Other')
+
+
+def _delete_tree(fake_registry, **delete_tree_options) -> list[KeyDeleteResult]:
+    async def main() -> list[KeyDeleteResult]:
+        async with open_key_path(rpc_connection=fake_registry, key_path='HKLM\\SOFTWARE') as key_handle:
+            return await delete_tree(
+                rpc_connection=fake_registry,
+                key_handle=key_handle,
+                sub_key_name='Vendor',
+                **delete_tree_options
+            )
+
+    return run(main())
+
+
+def test_delete_tree(fake_registry):
+    _add_keys(fake_registry=fake_registry)
+
+    results = _delete_tree(fake_registry=fake_registry)
+
+    assert all(result.succeeded for result in results)
+    key_paths = [result.key_path for result in results]
+    assert sorted(key_paths) == [
+        'Vendor',
+        'Vendor\\App',
+        'Vendor\\App\\Plugins',
+        'Vendor\\App\\Settings',
+        'Vendor\\Other'
+    ]
+    # Each key is deleted after all of its subkeys.
+    for index, key_path in enumerate(key_paths):
+        assert not any(other_key_path.startswith(f'{key_path}\\') for other_key_path in key_paths[index:])
+
+    assert fake_registry.root_keys[Operation.OPEN_LOCAL_MACHINE].find(sub_key_path='SOFTWARE\\Vendor') is None
+    assert fake_registry.operation_count(Operation.BASE_REG_DELETE_KEY_EX) == 0
+    assert fake_registry.num_open_handles == 0
+
+
+def test_delete_tree_skips_ancestors_of_failed_keys(fake_registry):
+    _add_keys(fake_registry=fake_registry)
+    fake_registry.add_key(key_path='HKLM\\SOFTWARE\\Vendor\\App\\Settings').access_denied = True
+
+    results = {result.key_path: result for result in _delete_tree(fake_registry=fake_registry)}
+
+    assert results['Vendor\\App\\Settings'].exception is not None
+    assert results['Vendor\\App'].skipped
+    assert results['Vendor'].skipped
+    assert results['Vendor\\App\\Plugins'].succeeded
+    assert results['Vendor\\Other'].succeeded
+    assert fake_registry.root_keys[Operation.OPEN_LOCAL_MACHINE].find(sub_key_path='SOFTWARE\\Vendor\\App') is not None
+
+
+def test_delete_tree_wow64_view(fake_registry):
+    _add_keys(fake_registry=fake_registry)
+
+    results = _delete_tree(fake_registry=fake_registry, wow64_view=RegsamFlag.KEY_WOW64_32KEY)
+
+    assert all(result.succeeded for result in results)
+    assert fake_registry.operation_count(Operation.BASE_REG_DELETE_KEY_EX) == len(results)
+    assert fake_registry.operation_count(Operation.BASE_REG_DELETE_KEY) == 0
+
+
+def test_delete_tree_wow64_view_unsupported(fake_registry):
+    _add_keys(fake_registry=fake_registry)
+
+    results = _delete_tree(
+        fake_registry=fake_registry,
+        wow64_view=RegsamFlag.KEY_WOW64_32KEY,
+        host_capabilities=HostCapabilities(version=5, build_number='2600')
+    )
+
+    assert all(result.succeeded for result in results)
+    assert fake_registry.operation_count(Operation.BASE_REG_DELETE_KEY_EX) == 0
+    assert fake_registry.operation_count(Operation.BASE_REG_DELETE_KEY) == len(results)
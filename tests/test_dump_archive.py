@@ -0,0 +1,52 @@
+from io import BytesIO
+from struct import pack
+
+from ms_rrp.dump_archive import DumpArchive, iter_hive_blocks
+
+
+def _make_hive(hbin_fillers: list[bytes]) -> bytes:
+    base_block = b'regf' + bytes(4092)
+    hbins = b''.join(
+        b'hbin' + pack('<II', i * 0x2000, 0x2000) + filler * (0x2000 - 12)
+        for i, filler in enumerate(hbin_fillers)
+    )
+    return base_block + hbins
+
+
+def test_iter_hive_blocks():
+    hive = _make_hive(hbin_fillers=[b'a', b'b']) + b'trailing'
+    blocks = list(iter_hive_blocks(stream=BytesIO(hive)))
+
+    assert [len(block) for block in blocks] == [4096, 0x2000, 0x2000, 8]
+    assert b''.join(blocks) == hive
+
+
+def test_deduplication_and_reconstruction(tmp_path):
+    first_hive = _make_hive(hbin_fillers=[b'a', b'b', b'c'])
+    second_hive = _make_hive(hbin_fillers=[b'a', b'x', b'c'])
+
+    with DumpArchive(directory=tmp_path) as dump_archive:
+        first_statistics = dump_archive.add_dump(name='host/SYSTEM/day1', dump=first_hive)
+        second_statistics = dump_archive.add_dump(name='host/SYSTEM/day2', dump=BytesIO(second_hive))
+
+    assert (first_statistics.num_blocks, first_statistics.num_new_blocks) == (4, 4)
+    assert (second_statistics.num_blocks, second_statistics.num_new_blocks) == (4, 1)
+
+    with DumpArchive(directory=tmp_path) as dump_archive:
+        assert len(dump_archive) == 5
+        assert dump_archive.dump_names() == ['host/SYSTEM/day1', 'host/SYSTEM/day2']
+
+        stream = BytesIO()
+        assert dump_archive.write_dump(name='host/SYSTEM/day2', stream=stream) == len(second_hive)
+        assert stream.getvalue() == second_hive
+
+        with dump_archive.open_dump(name='host/SYSTEM/day1') as archived_dump:
+            assert len(archived_dump) == len(first_hive)
+            assert archived_dump[:4] == b'regf'
+            assert archived_dump[4090:4110] == first_hive[4090:4110]
+            assert archived_dump[-1] == first_hive[-1]
+
+            archived_dump.seek(0x1000 + 0x2000)
+            assert archived_dump.read(4) == b'hbin'
+            archived_dump.seek(0)
+            assert archived_dump.read() == first_hive
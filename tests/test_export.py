@@ -0,0 +1,98 @@
+from asyncio import run
+from gzip import decompress
+from io import BytesIO
+from json import loads as json_loads
+
+from pytest import raises
+
+from ms_rrp.export import RegFileExporter, JSONLinesExporter
+from ms_rrp.structures.reg_value_type import RegValueType
+from ms_rrp.utils import WalkedKey, open_key_path, walk_key
+
+WALKED_KEY = WalkedKey(
+    key_path='HKLM\\SOFTWARE\\Vendor',
+    last_write_time=1,
+    values={
+        '': (RegValueType.REG_SZ, 'C:\\"app"\x00'.encode(encoding='utf-16-le')),
+        'Version': (RegValueType.REG_DWORD, (2).to_bytes(length=4, byteorder='little')),
+        'Paths': (RegValueType.REG_MULTI_SZ, 'a\x00b\x00\x00'.encode(encoding='utf-16-le')),
+        'Blob': (RegValueType.REG_BINARY, b'\x01\xff')
+    }
+)
+
+
+def test_reg_file_exporter():
+    stream = BytesIO()
+    with RegFileExporter(stream=stream) as exporter:
+        exporter.write_key(walked_key=WALKED_KEY)
+
+    assert stream.getvalue().decode(encoding='utf-16') == (
+        'Windows Registry Editor Version 5.00\r\n'
+        '\r\n'
+        '[HKEY_LOCAL_MACHINE\\SOFTWARE\\Vendor]\r\n'
+        '@="C:\\\\\\"app\\""\r\n'
+        '"Version"=dword:00000002\r\n'
+        '"Paths"=hex(7):61,00,00,00,62,00,00,00,00,00\r\n'
+        '"Blob"=hex:01,ff\r\n'
+        '\r\n'
+    )
+
+
+def test_reg_file_exporter_requires_root_key():
+    with raises(ValueError):
+        RegFileExporter(stream=BytesIO()).write_key(walked_key=WalkedKey(key_path='', last_write_time=1, values={}))
+
+
+def test_json_lines_exporter():
+    stream = BytesIO()
+    with JSONLinesExporter(stream=stream, compression='gzip', buffer_size=1) as exporter:
+        exporter.write_key(walked_key=WALKED_KEY)
+        exporter.write_key(walked_key=WalkedKey(key_path='HKLM\\SOFTWARE', last_write_time=2, values={}))
+
+    lines = decompress(stream.getvalue()).splitlines()
+    assert [json_loads(line) for line in lines] == [
+        {
+            'key_path': 'HKLM\\SOFTWARE\\Vendor',
+            'last_write_time': 1,
+            'values': [
+                {'name': '', 'type': 'REG_SZ', 'data': 'C:\\"app"'},
+                {'name': 'Version', 'type': 'REG_DWORD', 'data': 2},
+                {'name': 'Paths', 'type': 'REG_MULTI_SZ', 'data': ['a', 'b']},
+                {'name': 'Blob', 'type': 'REG_BINARY', 'data': '01ff'}
+            ]
+        },
+        {'key_path': 'HKLM\\SOFTWARE', 'last_write_time': 2, 'values': []}
+    ]
+
+
+def test_export_walked_keys(fake_registry):
+    fake_registry.add_key(key_path='HKLM\\SOFTWARE\\Vendor\\App', values={'Version': WALKED_KEY.values['Version']})
+    fake_registry.add_key(key_path='HKLM\\SOFTWARE\\Locked\\App').access_denied = True
+    fake_registry.add_key(key_path='HKLM\\SOFTWARE\\Other')
+
+    async def main() -> tuple[bytes, dict[str, Exception]]:
+        stream = BytesIO()
+        errors: dict[str, Exception] = {}
+        async with open_key_path(rpc_connection=fake_registry, key_path='HKLM\\SOFTWARE') as key_handle:
+            with JSONLinesExporter(stream=stream) as exporter:
+                await exporter.export(
+                    walked_keys=walk_key(
+                        rpc_connection=fake_registry,
+                        key_handle=key_handle,
+                        key_path='HKLM\\SOFTWARE',
+                        errors=errors
+                    )
+                )
+        return stream.getvalue(), errors
+
+    data, errors = run(main())
+
+    assert [json_loads(line)['key_path'] for line in data.splitlines()] == [
+        'HKLM\\SOFTWARE',
+        'HKLM\\SOFTWARE\\Vendor',
+        'HKLM\\SOFTWARE\\Vendor\\App',
+        'HKLM\\SOFTWARE\\Locked',
+        'HKLM\\SOFTWARE\\Other'
+    ]
+    assert list(errors) == ['HKLM\\SOFTWARE\\Locked\\App']
+    assert fake_registry.num_open_handles == 0
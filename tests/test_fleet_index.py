@@ -0,0 +1,105 @@
+from ms_rrp.fleet_index import FleetIndex, IndexHit, Prefix, PATH_FIELD, DATA_FIELD, path_component, value_name, \
+    data_token
+from ms_rrp.structures.reg_value_type import RegValueType
+from ms_rrp.utils import WalkedKey
+
+
+def _walked_key(key_path: str, values: dict[str, str]) -> WalkedKey:
+    return WalkedKey(
+        key_path=key_path,
+        last_write_time=0,
+        values={
+            name: (RegValueType.REG_SZ, f'{data}\x00'.encode(encoding='utf-16-le'))
+            for name, data in values.items()
+        }
+    )
+
+
+_RUN_KEY_PATH = 'HKLM\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Run'
+
+
+def test_queries(tmp_path):
+    with FleetIndex(directory=tmp_path) as fleet_index:
+        fleet_index.add_snapshots(
+            snapshots=[
+                ('host1', [_walked_key(_RUN_KEY_PATH, {'OneDrive': 'C:\\Program Files\\OneDrive\\OneDrive.exe'})]),
+                ('host2', [_walked_key(_RUN_KEY_PATH, {'Updater': 'C:\\Users\\Public\\evil.exe /silent'})])
+            ]
+        )
+        fleet_index.add_snapshot(
+            host='host3',
+            walked_keys=[_walked_key('HKLM\\SOFTWARE\\Vendor', {'InstallPath': 'C:\\Vendor'})]
+        )
+
+        assert fleet_index.search_hosts(query=path_component('run')) == ['host1', 'host2']
+        assert list(fleet_index.search(query=path_component('Run') & data_token('EVIL'))) == [
+            IndexHit(host='host2', key_path=_RUN_KEY_PATH)
+        ]
+        assert fleet_index.search_hosts(query=value_name('onedrive') | value_name('installpath')) == ['host1', 'host3']
+        assert fleet_index.search_hosts(query=path_component('software') & ~path_component('run')) == ['host3']
+        assert fleet_index.search_hosts(query=Prefix(field=PATH_FIELD, text_prefix='curr')) == ['host1', 'host2']
+        assert fleet_index.search_hosts(query=Prefix(field=DATA_FIELD, text_prefix='ven')) == ['host3']
+        assert fleet_index.search_hosts(query=path_component('missing')) == []
+
+
+def test_superseded_snapshots_and_merge(tmp_path):
+    with FleetIndex(directory=tmp_path) as fleet_index:
+        fleet_index.add_snapshots(
+            snapshots=[
+                ('host1', [_walked_key(_RUN_KEY_PATH, {'Old': 'old.exe'})]),
+                ('host2', [_walked_key(_RUN_KEY_PATH, {'Kept': 'kept.exe'})])
+            ]
+        )
+        fleet_index.add_snapshot(host='host1', walked_keys=[_walked_key(_RUN_KEY_PATH, {'New': 'new.exe'})])
+
+        assert fleet_index.search_hosts(query=value_name('old')) == []
+        assert fleet_index.search_hosts(query=value_name('new')) == ['host1']
+
+    with FleetIndex(directory=tmp_path) as fleet_index:
+        assert fleet_index.hosts == ['host1', 'host2']
+        assert fleet_index.search_hosts(query=value_name('old')) == []
+
+        fleet_index.merge()
+        assert len(list(tmp_path.glob('*.segment'))) == 1
+        assert fleet_index.search_hosts(query=path_component('run')) == ['host1', 'host2']
+        assert fleet_index.search_hosts(query=value_name('new') | value_name('kept')) == ['host1', 'host2']
+        assert fleet_index.search_hosts(query=value_name('old')) == []
+
+    with FleetIndex(directory=tmp_path) as fleet_index:
+        assert fleet_index.search_hosts(query=data_token('kept')) == ['host2']
+
+
+def test_negation_and_intersection_of_live_keys(tmp_path):
+    with FleetIndex(directory=tmp_path) as fleet_index:
+        fleet_index.add_snapshots(
+            snapshots=[
+                ('host1', [_walked_key(f'HKLM\\SOFTWARE\\Old{i}', {'Name': 'old'}) for i in range(3)]),
+                ('host2', [_walked_key(f'HKLM\\SOFTWARE\\Key{i}', {'Name': f'key{i} value'}) for i in range(4)])
+            ]
+        )
+        fleet_index.add_snapshot(
+            host='host1',
+            walked_keys=[
+                _walked_key('HKLM\\SOFTWARE\\New', {'Name': 'new value', 'NameEx': 'newer'}),
+                _walked_key('HKLM\\SYSTEM', {})
+            ]
+        )
+
+        # The complement is taken within the latest snapshots only.
+        assert [hit.key_path for hit in fleet_index.search(query=~path_component('software'))] == ['HKLM\\SYSTEM']
+        assert fleet_index.search_hosts(query=~data_token('value') & ~path_component('system')) == []
+        assert list(fleet_index.search(query=path_component('software') & ~data_token('value'))) == []
+
+        query = data_token('value') & ~path_component('key1') & path_component('hklm')
+        assert list(fleet_index.search(query=query)) == [
+            IndexHit(host='host2', key_path='HKLM\\SOFTWARE\\Key0'),
+            IndexHit(host='host2', key_path='HKLM\\SOFTWARE\\Key2'),
+            IndexHit(host='host2', key_path='HKLM\\SOFTWARE\\Key3'),
+            IndexHit(host='host1', key_path='HKLM\\SOFTWARE\\New')
+        ]
+
+        # A key matching several terms with the prefix is found once.
+        assert list(fleet_index.search(query=Prefix(field=DATA_FIELD, text_prefix='new'))) == [
+            IndexHit(host='host1', key_path='HKLM\\SOFTWARE\\New')
+        ]
+        assert fleet_index.search_hosts(query=data_token('old') | path_component('old0')) == []
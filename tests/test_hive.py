@@ -0,0 +1,146 @@
+from io import BytesIO
+from json import loads as json_loads
+from struct import pack
+
+from pytest import raises
+
+from ms_rrp.export import JSONLinesExporter
+from ms_rrp.hive import walk_hive, MAXIMUM_VALUE_DATA_SEGMENT_SIZE
+from ms_rrp.structures.reg_value_type import RegValueType
+from ms_rrp.utils import WalkedKey
+
+LARGE_VALUE = bytes(range(256)) * 100
+
+
+class HiveBuilder:
+    """
+    Build a minimal registry hive file, with all cells in one hive bin.
+    """
+
+    def __init__(self):
+        self._cells = bytearray()
+
+    def add_cell(self, data: bytes) -> int:
+        # Cells are 8-byte aligned; the offset is relative to the start of the hive bin, after its 32-byte header.
+        cell_offset = 32 + len(self._cells)
+        cell_size = (4 + len(data) + 7) & ~7
+        self._cells += pack('<i', -cell_size) + data + bytes(cell_size - 4 - len(data))
+        return cell_offset
+
+    def add_value(self, name: str, value_type: RegValueType, data: bytes) -> int:
+        if len(data) <= 4:
+            data_size, data_offset = len(data) | 0x80000000, int.from_bytes(data.ljust(4, b'\x00'), 'little')
+        elif len(data) > MAXIMUM_VALUE_DATA_SEGMENT_SIZE:
+            segment_offsets = [
+                self.add_cell(data[i:i + MAXIMUM_VALUE_DATA_SEGMENT_SIZE])
+                for i in range(0, len(data), MAXIMUM_VALUE_DATA_SEGMENT_SIZE)
+            ]
+            segment_list_offset = self.add_cell(b''.join(pack('<I', offset) for offset in segment_offsets))
+            data_size = len(data)
+            data_offset = self.add_cell(pack('<2sHI', b'db', len(segment_offsets), segment_list_offset))
+        else:
+            data_size, data_offset = len(data), self.add_cell(data)
+
+        encoded_name = name.encode(encoding='latin-1')
+        return self.add_cell(
+            pack('<2sHIIIHH', b'vk', len(encoded_name), data_size, data_offset, value_type, 0x0001, 0) + encoded_name
+        )
+
+    def add_key(self, name: str, last_write_time: int, sub_key_offsets: list[int], value_offsets: list[int]) -> int:
+        sub_key_list_offset = self.add_cell(
+            pack('<2sH', b'lh', len(sub_key_offsets)) + b''.join(pack('<II', offset, 0) for offset in sub_key_offsets)
+        ) if sub_key_offsets else 0xffffffff
+        value_list_offset = self.add_cell(
+            b''.join(pack('<I', offset) for offset in value_offsets)
+        ) if value_offsets else 0xffffffff
+
+        encoded_name = name.encode(encoding='latin-1')
+        return self.add_cell(
+            pack(
+                '<2sHQIIIIIIIIIIIIIIIHH',
+                b'nk', 0x0020, last_write_time, 0, 0, len(sub_key_offsets), 0, sub_key_list_offset, 0xffffffff,
+                len(value_offsets), value_list_offset, 0xffffffff, 0xffffffff, 0, 0, 0, 0, 0, len(encoded_name), 0
+            ) + encoded_name
+        )
+
+    def build(self, root_cell_offset: int) -> bytes:
+        hbin_size = (32 + len(self._cells) + 4095) & ~4095
+        base_block = (b'regf' + bytes(0x20) + pack('<II', root_cell_offset, hbin_size)).ljust(4096, b'\x00')
+        hbin = (pack('<4sII', b'hbin', 0, hbin_size).ljust(32, b'\x00') + self._cells).ljust(hbin_size, b'\x00')
+        return base_block + hbin
+
+
+def build_hive() -> bytes:
+    hive_builder = HiveBuilder()
+    run_key_offset = hive_builder.add_key(
+        name='Run',
+        last_write_time=3,
+        sub_key_offsets=[],
+        value_offsets=[
+            hive_builder.add_value(
+                name='Updater',
+                value_type=RegValueType.REG_SZ,
+                data='C:\\app.exe\x00'.encode(encoding='utf-16-le')
+            ),
+            hive_builder.add_value(name='Large', value_type=RegValueType.REG_BINARY, data=LARGE_VALUE)
+        ]
+    )
+    vendor_key_offset = hive_builder.add_key(
+        name='Vendor',
+        last_write_time=2,
+        sub_key_offsets=[run_key_offset],
+        value_offsets=[
+            hive_builder.add_value(name='Version', value_type=RegValueType.REG_DWORD, data=pack('<I', 7)),
+            hive_builder.add_value(name='Property', value_type=0xffff0012, data=b'\x01')
+        ]
+    )
+    root_key_offset = hive_builder.add_key(
+        name='CMI-CreateHive{00000000}',
+        last_write_time=1,
+        sub_key_offsets=[vendor_key_offset],
+        value_offsets=[]
+    )
+    return hive_builder.build(root_cell_offset=root_key_offset)
+
+
+def test_walk_hive():
+    assert list(walk_hive(stream=BytesIO(build_hive()), key_path='HKLM\\SOFTWARE')) == [
+        WalkedKey(key_path='HKLM\\SOFTWARE', last_write_time=1, values={}),
+        WalkedKey(
+            key_path='HKLM\\SOFTWARE\\Vendor',
+            last_write_time=2,
+            values={'Version': (RegValueType.REG_DWORD, pack('<I', 7))}
+        ),
+        WalkedKey(
+            key_path='HKLM\\SOFTWARE\\Vendor\\Run',
+            last_write_time=3,
+            values={
+                'Updater': (RegValueType.REG_SZ, 'C:\\app.exe\x00'.encode(encoding='utf-16-le')),
+                'Large': (RegValueType.REG_BINARY, LARGE_VALUE)
+            }
+        )
+    ]
+
+
+def test_walk_hive_maximum_depth():
+    walked_keys = walk_hive(stream=BytesIO(build_hive()), key_path='HKLM\\SOFTWARE', maximum_depth=1)
+    assert [walked_key.key_path for walked_key in walked_keys] == ['HKLM\\SOFTWARE', 'HKLM\\SOFTWARE\\Vendor']
+
+
+def test_walk_non_hive():
+    with raises(ValueError):
+        list(walk_hive(stream=BytesIO(bytes(4096))))
+
+
+def test_export_hive():
+    stream = BytesIO()
+    with JSONLinesExporter(stream=stream) as exporter:
+        exporter.export_hive(hive_stream=BytesIO(build_hive()), key_path='HKLM\\SOFTWARE')
+
+    lines = [json_loads(line) for line in stream.getvalue().splitlines()]
+    assert [line['key_path'] for line in lines] == [
+        'HKLM\\SOFTWARE',
+        'HKLM\\SOFTWARE\\Vendor',
+        'HKLM\\SOFTWARE\\Vendor\\Run'
+    ]
+    assert lines[1]['values'] == [{'name': 'Version', 'type': 'REG_DWORD', 'data': 7}]
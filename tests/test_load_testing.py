@@ -0,0 +1,40 @@
+from asyncio import run
+
+from ms_rrp.load_testing import TimingConnection, OperationLatencies, run_load_test
+from ms_rrp.operations import Operation
+from tests.fakes import Message, FakeConnection
+
+
+def test_operation_latencies():
+    operation_latencies = OperationLatencies.from_latencies(latencies=[float(i) for i in range(100, 0, -1)])
+    assert (operation_latencies.count, operation_latencies.p50, operation_latencies.p95, operation_latencies.p99) == (
+        100, 51.0, 96.0, 100.0
+    )
+    assert operation_latencies.max == 100.0
+
+
+def test_timing_connection():
+    timing_connection = TimingConnection(rpc_connection=FakeConnection())
+    run(timing_connection.request(Message(opnum=Operation.BASE_REG_CLOSE_KEY.value, stub_data=b'')))
+    run(timing_connection.request(Message(opnum=Operation.BASE_REG_CLOSE_KEY.value, stub_data=b'')))
+    assert list(timing_connection.latencies) == [Operation.BASE_REG_CLOSE_KEY]
+    assert len(timing_connection.latencies[Operation.BASE_REG_CLOSE_KEY]) == 2
+
+
+def test_run_load_test():
+    async def workload(rpc_connection) -> None:
+        await rpc_connection.request(Message(opnum=Operation.BASE_REG_CLOSE_KEY.value, stub_data=b''))
+
+    results = run(
+        run_load_test(
+            rpc_connection=FakeConnection(),
+            workloads={'close': (workload, 1.0)},
+            concurrency_levels=(1, 2),
+            duration=0.01
+        )
+    )
+    assert [result.concurrency for result in results] == [1, 2]
+    for result in results:
+        assert result.num_errors == 0
+        assert result.operations['BASE_REG_CLOSE_KEY'].count == result.num_workload_runs
+        assert result.to_dict()['workload_runs'] == {'close': result.num_workload_runs}
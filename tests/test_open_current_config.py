@@ -0,0 +1,32 @@
+from ms_rrp.operations.open_current_config import OpenCurrentConfigRequest, OpenCurrentConfigResponse
+from ms_rrp.structures.regsam import Regsam
+
+from msdsalgs.win32_error import Win32ErrorCode
+
+
+class TestOpenCurrentConfigRequest:
+    REQUEST = OpenCurrentConfigRequest.from_bytes(data=bytes.fromhex('0000000000000002'))
+
+    def test_sam_desired(self, request: OpenCurrentConfigRequest = REQUEST):
+        assert request.sam_desired == Regsam(maximum_allowed=True)
+
+    def test_redeserialization(self):
+        request = OpenCurrentConfigRequest.from_bytes(data=bytes(self.REQUEST))
+        self.test_sam_desired(request=request)
+
+
+class TestOpenCurrentConfigResponse:
+    RESPONSE = OpenCurrentConfigResponse.from_bytes(
+        data=bytes.fromhex('00000000da3f1d7efe716e4caf5a0acb5b309b2500000000')
+    )
+
+    def test_key_handle(self, response: OpenCurrentConfigResponse = RESPONSE):
+        assert response.key_handle == bytes.fromhex('00000000da3f1d7efe716e4caf5a0acb5b309b25')
+
+    def test_return_code(self, response: OpenCurrentConfigResponse = RESPONSE):
+        assert response.return_code is Win32ErrorCode.ERROR_SUCCESS
+
+    def test_redeserialization(self):
+        response = OpenCurrentConfigResponse.from_bytes(data=bytes(self.RESPONSE))
+        self.test_key_handle(response=response)
+        self.test_return_code(response=response)
@@ -0,0 +1,62 @@
+from array import array
+from datetime import datetime
+
+from ms_rrp.structures.perf_data_block import PerfDataBlock
+
+PERF_DATA_BLOCK_DATA = bytes.fromhex(
+    '5000450052004600010000000100000001000000e00100006800000002000000ee000000ea070a00010013000c000000'
+    '0000050000000000881300000000000064000000000000007b000000000000000a0000005800000048004f0053005400'
+    '0000000000000000080100009000000040000000ee00000000000000ef00000000000000640000000200000000000000'
+    '0200000000000000e8030000000000000a00000000000000280000000600000000000000070000000000000000000000'
+    '64000000000441100800000008000000280000000a000000000000000b00000000000000000000006400000000000100'
+    '040000001000000020000000000000000000000001000000180000000400000030000000000000001800000000000000'
+    '6400000000000000070000000000000028000000000000000000000002000000180000000e0000005f0054006f007400'
+    '61006c00000000001800000000000000c800000000000000090000000000000070000000680000004000000004000000'
+    '000000000500000000000000640000000100000000000000ffffffff00000000e8030000000000000a00000000000000'
+    '280000000c000000000000000d000000000000000000000064000000000000000400000004000000080000002a000000'
+)
+
+
+class TestPerfDataBlock:
+    PERF_DATA_BLOCK = PerfDataBlock.from_bytes(data=PERF_DATA_BLOCK_DATA)
+
+    def test_header(self, perf_data_block: PerfDataBlock = PERF_DATA_BLOCK):
+        assert perf_data_block.version == 1
+        assert perf_data_block.revision == 1
+        assert perf_data_block.total_byte_length == 480
+        assert perf_data_block.default_object == 238
+        assert perf_data_block.perf_time == 5000
+        assert perf_data_block.perf_freq == 100
+        assert perf_data_block.perf_time_100nsec == 123
+
+    def test_system_time(self, perf_data_block: PerfDataBlock = PERF_DATA_BLOCK):
+        assert perf_data_block.system_time == datetime(2026, 10, 19, 12, 0, 0, 5000)
+
+    def test_system_name(self, perf_data_block: PerfDataBlock = PERF_DATA_BLOCK):
+        assert perf_data_block.system_name == 'HOST'
+
+    def test_objects(self, perf_data_block: PerfDataBlock = PERF_DATA_BLOCK):
+        assert list(perf_data_block.objects) == [238, 4]
+
+    def test_object_with_instances(self, perf_data_block: PerfDataBlock = PERF_DATA_BLOCK):
+        perf_object = perf_data_block.objects[238]
+
+        assert perf_object.has_instances
+        assert perf_object.num_instances == 2
+        assert perf_object.instance_names == ['0', '_Total']
+        assert perf_object.instance_unique_ids == array('l', [1, 2])
+        assert perf_object.perf_time == 1000
+        assert perf_object.perf_freq == 10
+        assert [counter.name_index for counter in perf_object.counters] == [6, 10]
+        assert perf_object.counters[0].counter_type == 0x10410400
+        assert perf_object.column(6) == array('Q', [100, 200])
+        assert perf_object.column(10) == array('I', [7, 9])
+        assert perf_object.column(12) is None
+
+    def test_object_without_instances(self, perf_data_block: PerfDataBlock = PERF_DATA_BLOCK):
+        perf_object = perf_data_block.objects[4]
+
+        assert not perf_object.has_instances
+        assert perf_object.num_instances == 1
+        assert perf_object.instance_names == []
+        assert perf_object.columns == [array('I', [42])]
@@ -0,0 +1,267 @@
+from array import array
+from asyncio import run
+from typing import Optional
+
+from msdsalgs.win32_error import Win32ErrorCode
+from pytest import raises
+
+from ms_rrp.operations import Operation
+from ms_rrp.performance import compute_object_sample, parse_counter_text, query_performance_data, CounterNameCache, \
+    sample_performance_data
+from ms_rrp.structures.perf_data_block import PerfObject, PerfCounterDefinition, PERF_NO_UNIQUE_ID
+from ms_rrp.structures.reg_value_type import RegValueType
+from ms_rrp.utils import open_key_path
+from tests.fakes import FakeRegistryError
+from tests.test_perf_data_block import PERF_DATA_BLOCK_DATA
+
+COUNTERS = [
+    PerfCounterDefinition(
+        name_index=6,
+        help_index=7,
+        default_scale=0,
+        detail_level=100,
+        counter_type=0x10410400,
+        counter_size=8,
+        counter_offset=8
+    ),
+    PerfCounterDefinition(
+        name_index=10,
+        help_index=11,
+        default_scale=0,
+        detail_level=100,
+        counter_type=0x10000,
+        counter_size=4,
+        counter_offset=16
+    )
+]
+
+
+def make_perf_object(
+    perf_time: int,
+    columns: list[array],
+    instance_names: list[str],
+    instance_unique_ids: Optional[list[int]] = None,
+    instance_parent_instances: Optional[list[int]] = None,
+    counters: Optional[list[PerfCounterDefinition]] = None
+) -> PerfObject:
+    return PerfObject(
+        name_index=238,
+        help_index=239,
+        detail_level=100,
+        default_counter=0,
+        code_page=0,
+        perf_time=perf_time,
+        perf_freq=10,
+        counters=counters or COUNTERS,
+        columns=columns,
+        instance_names=instance_names,
+        instance_unique_ids=array('l', instance_unique_ids or [PERF_NO_UNIQUE_ID] * len(instance_names)),
+        instance_parent_object_indices=array('L', [0] * len(instance_names)),
+        instance_parent_instances=array('L', instance_parent_instances or [0] * len(instance_names)),
+        has_instances=True
+    )
+
+
+class TestComputeObjectSample:
+    PREVIOUS_PERF_OBJECT = make_perf_object(
+        perf_time=1000,
+        columns=[array('Q', [100, 200]), array('I', [7, 2 ** 32 - 1])],
+        instance_names=['0', '_Total']
+    )
+
+    def test_same_instances(self):
+        perf_object_sample = compute_object_sample(
+            perf_object=make_perf_object(
+                perf_time=1050,
+                columns=[array('Q', [150, 190]), array('I', [17, 3])],
+                instance_names=['0', '_Total']
+            ),
+            previous_perf_object=self.PREVIOUS_PERF_OBJECT,
+            default_elapsed_seconds=1.0
+        )
+
+        assert perf_object_sample.elapsed_seconds == 5.0
+        assert perf_object_sample.delta(6) == array('q', [50, -10])
+        assert perf_object_sample.delta(10) == array('q', [10, 4])
+        assert perf_object_sample.rate(6) == array('d', [10.0, -2.0])
+        # `PERF_COUNTER_RAWCOUNT` is a gauge, whose change per second is not meaningful.
+        assert perf_object_sample.rate(10) is None
+
+    def test_changed_instances(self):
+        perf_object_sample = compute_object_sample(
+            perf_object=make_perf_object(
+                perf_time=1050,
+                columns=[array('Q', [300, 150, 5]), array('I', [3, 17, 5])],
+                instance_names=['_Total', '0', '1']
+            ),
+            previous_perf_object=self.PREVIOUS_PERF_OBJECT,
+            default_elapsed_seconds=1.0
+        )
+
+        assert perf_object_sample.delta(6) == array('q', [100, 50, 0])
+        assert perf_object_sample.delta(10) == array('q', [4, 10, 0])
+
+    def test_duplicate_instance_names(self):
+        previous_perf_object = make_perf_object(
+            perf_time=1000,
+            columns=[array('Q', [100, 200, 300]), array('I', [1, 2, 3])],
+            instance_names=['svchost', 'svchost', 'explorer']
+        )
+        perf_object_sample = compute_object_sample(
+            perf_object=make_perf_object(
+                perf_time=1050,
+                columns=[array('Q', [310, 110, 210, 5]), array('I', [3, 1, 2, 0])],
+                instance_names=['explorer', 'svchost', 'svchost', 'svchost']
+            ),
+            previous_perf_object=previous_perf_object,
+            default_elapsed_seconds=1.0
+        )
+
+        assert perf_object_sample.delta(6) == array('q', [10, 10, 10, 0])
+
+    def test_instance_unique_ids(self):
+        previous_perf_object = make_perf_object(
+            perf_time=1000,
+            columns=[array('Q', [100, 200]), array('I', [1, 2])],
+            instance_names=['thread', 'thread'],
+            instance_unique_ids=[4, 8]
+        )
+        perf_object_sample = compute_object_sample(
+            perf_object=make_perf_object(
+                perf_time=1050,
+                columns=[array('Q', [205, 103]), array('I', [2, 1])],
+                instance_names=['thread', 'thread'],
+                instance_unique_ids=[8, 4]
+            ),
+            previous_perf_object=previous_perf_object,
+            default_elapsed_seconds=1.0
+        )
+
+        assert perf_object_sample.delta(6) == array('q', [5, 3])
+
+    def test_100ns_timers(self):
+        counters = [
+            PerfCounterDefinition(
+                name_index=6,
+                help_index=7,
+                default_scale=0,
+                detail_level=100,
+                counter_type=0x20510500,
+                counter_size=8,
+                counter_offset=8
+            ),
+            PerfCounterDefinition(
+                name_index=1350,
+                help_index=1351,
+                default_scale=0,
+                detail_level=100,
+                counter_type=0x21510500,
+                counter_size=8,
+                counter_offset=16
+            )
+        ]
+        perf_object_sample = compute_object_sample(
+            perf_object=make_perf_object(
+                perf_time=1050,
+                columns=[array('Q', [30_000_000]), array('Q', [40_000_000])],
+                instance_names=['0'],
+                counters=counters
+            ),
+            previous_perf_object=make_perf_object(
+                perf_time=1000,
+                columns=[array('Q', [20_000_000]), array('Q', [0])],
+                instance_names=['0'],
+                counters=counters
+            ),
+            default_elapsed_seconds=1.0
+        )
+
+        # 1 of 5 elapsed seconds were spent busy, and 4 of 5 idle.
+        assert perf_object_sample.percentage(6) == array('d', [20.0])
+        assert perf_object_sample.percentage(1350) == array('d', [20.0])
+        assert perf_object_sample.rate(6) is None
+
+
+def test_parse_counter_text():
+    assert parse_counter_text(
+        value='1\x001847\x002\x00System\x004\x00Memory\x00\x00'.encode(encoding='utf-16-le')
+    ) == {1: '1847', 2: 'System', 4: 'Memory'}
+
+
+def test_query_performance_data_maximum_buffer_size(fake_registry):
+    fake_registry.add_key(key_path='HKLM\\SOFTWARE', values={'Global': (RegValueType.REG_BINARY, bytes(1024))})
+
+    async def main() -> None:
+        async with open_key_path(rpc_connection=fake_registry, key_path='HKLM\\SOFTWARE') as key_handle:
+            await query_performance_data(
+                rpc_connection=fake_registry,
+                key_handle=key_handle,
+                value_buffer_size=64,
+                maximum_value_buffer_size=512
+            )
+
+    with raises(FakeRegistryError) as exception_info:
+        run(main())
+
+    assert exception_info.value.return_code is Win32ErrorCode.ERROR_MORE_DATA
+    # The buffer is doubled from 64 to 512 bytes, and the error of the last request is raised without repeating it.
+    assert fake_registry.operation_count(Operation.BASE_REG_QUERY_VALUE) == 4
+
+
+def test_sample_performance_data_buffer_size(fake_registry, monkeypatch):
+    monkeypatch.setattr('ms_rrp.performance.DEFAULT_PERFORMANCE_DATA_BUFFER_SIZE', 128)
+    fake_registry.root_keys[Operation.OPEN_PERFORMANCE_DATA].values['Global'] = (
+        RegValueType.REG_BINARY,
+        PERF_DATA_BLOCK_DATA
+    )
+
+    value_buffer_sizes: list[int] = []
+    base_reg_query_value_handler = fake_registry._base_reg_query_value
+
+    def base_reg_query_value(request):
+        value_buffer_sizes.append(request.value_buffer_size)
+        return base_reg_query_value_handler(request)
+
+    fake_registry._base_reg_query_value = base_reg_query_value
+
+    async def main() -> None:
+        performance_samples = sample_performance_data(rpc_connection=fake_registry, interval=0)
+        assert list((await performance_samples.__anext__()).objects) == [238, 4]
+        await performance_samples.aclose()
+
+    run(main())
+
+    # The buffer is grown for the first sample only, and the second sample starts with the size that succeeded.
+    assert value_buffer_sizes == [128, 256, 512, 512]
+    assert fake_registry.num_open_handles == 0
+
+
+def test_counter_name_cache(fake_registry, tmp_path):
+    fake_registry.add_key(
+        key_path='HKLM\\SOFTWARE\\Microsoft\\Windows NT\\CurrentVersion',
+        values={'CurrentBuildNumber': (RegValueType.REG_SZ, '19045\x00'.encode(encoding='utf-16-le'))}
+    )
+    fake_registry.root_keys[Operation.OPEN_PERFORMANCE_TEXT].values['Counter'] = (
+        RegValueType.REG_MULTI_SZ,
+        '2\x00System\x004\x00Memory\x00\x00'.encode(encoding='utf-16-le')
+    )
+
+    async def main() -> None:
+        counter_name_cache = CounterNameCache(cache_directory=tmp_path)
+        assert (await counter_name_cache.get(rpc_connection=fake_registry, host='HOST')).names == {
+            2: 'System',
+            4: 'Memory'
+        }
+        assert fake_registry.operation_count(Operation.OPEN_PERFORMANCE_TEXT) == 1
+
+        # Texts in memory are returned without contacting the host.
+        num_operations = len(fake_registry.operations)
+        await counter_name_cache.get(rpc_connection=fake_registry, host='host')
+        assert len(fake_registry.operations) == num_operations
+
+        # Persisted texts are reused for the same build, which is looked up anew.
+        await CounterNameCache(cache_directory=tmp_path).get(rpc_connection=fake_registry, host='HOST')
+        assert fake_registry.operation_count(Operation.OPEN_PERFORMANCE_TEXT) == 1
+        assert fake_registry.operation_count(Operation.BASE_REG_GET_VERSION) == 2
+
+    run(main())
@@ -0,0 +1,101 @@
+from asyncio import run, gather
+
+from pytest import raises
+
+from ms_rrp.operations import Operation
+from ms_rrp.remote_registry import RemoteRegistry
+from ms_rrp.structures.reg_value_type import RegValueType
+
+VALUE = (RegValueType.REG_DWORD, b'\x02\x00\x00\x00')
+
+
+def test_cached_access(fake_registry):
+    fake_registry.add_key(key_path='HKLM\\SOFTWARE\\Vendor\\App', values={'Version': VALUE})
+    fake_registry.add_key(key_path='HKLM\\SOFTWARE\\Other')
+
+    async def main() -> None:
+        async with RemoteRegistry(rpc_connection=fake_registry) as remote_registry:
+            software_key = remote_registry.key(key_path='HKLM\\SOFTWARE\\')
+            assert software_key is remote_registry.key(key_path='hklm\\software')
+            assert fake_registry.operations == []
+
+            assert [sub_key.name for sub_key in await software_key.sub_keys()] == ['Vendor', 'Other']
+
+            app_key = software_key.sub_key(sub_key_name='Vendor\\App')
+            assert await app_key.value(value_name='Version') == VALUE
+            assert await app_key.values() == {'Version': VALUE}
+            assert await app_key.value(value_name='Version') == VALUE
+            assert fake_registry.operation_count(Operation.BASE_REG_QUERY_VALUE) == 1
+            assert fake_registry.operation_count(Operation.BASE_REG_ENUM_VALUE) == 1
+
+        assert fake_registry.num_open_handles == 0
+
+    run(main())
+
+
+def test_bounded_open_handles(fake_registry):
+    for index in range(10):
+        fake_registry.add_key(key_path=f'HKLM\\SOFTWARE\\Key{index}', values={'Version': VALUE})
+
+    async def main() -> None:
+        async with RemoteRegistry(rpc_connection=fake_registry, max_open_handles=3) as remote_registry:
+            software_key = remote_registry.key(key_path='HKLM\\SOFTWARE')
+            sub_keys = await software_key.sub_keys()
+            for sub_key in sub_keys:
+                assert await sub_key.values() == {'Version': VALUE}
+
+            # Besides the root key, the three most recently used subkeys are kept open; a fourth one is opened before
+            # the least recently used one is closed.
+            assert fake_registry.max_num_open_handles == 1 + 3 + 1
+            assert [sub_key.is_open for sub_key in sub_keys] == [False] * 7 + [True] * 3
+            assert not software_key.is_open
+
+            # The subkeys in use at once are kept open, and are closed down to the bound once they are no longer used.
+            for sub_key in sub_keys:
+                sub_key.invalidate()
+            assert await gather(*(sub_key.values() for sub_key in sub_keys)) == [{'Version': VALUE}] * 10
+            assert fake_registry.max_num_open_handles == 1 + 10
+            assert fake_registry.num_open_handles == 1 + 3
+
+            # A key whose handle was closed is reopened on demand, while its cached data is kept.
+            assert not sub_keys[0].is_open
+            num_open_key_operations = fake_registry.operation_count(Operation.BASE_REG_OPEN_KEY)
+            assert await sub_keys[0].values() == {'Version': VALUE}
+            assert fake_registry.operation_count(Operation.BASE_REG_OPEN_KEY) == num_open_key_operations
+            fake_registry.add_key(key_path='HKLM\\SOFTWARE\\Key0', values={'Name': VALUE})
+            sub_keys[0].invalidate()
+            assert await sub_keys[0].values() == {'Version': VALUE, 'Name': VALUE}
+            assert fake_registry.operation_count(Operation.BASE_REG_OPEN_KEY) == num_open_key_operations + 1
+
+        assert fake_registry.num_open_handles == 0
+
+    run(main())
+
+
+def test_handle_not_closed_when_returned(fake_registry):
+    fake_registry.add_key(key_path='HKLM\\SOFTWARE\\Vendor')
+
+    async def main() -> None:
+        async with RemoteRegistry(rpc_connection=fake_registry, max_open_handles=0) as remote_registry:
+            vendor_key = remote_registry.key(key_path='HKLM\\SOFTWARE\\Vendor')
+            await vendor_key.handle()
+            assert vendor_key.is_open
+
+    run(main())
+
+
+def test_missing_value(fake_registry):
+    fake_registry.add_key(key_path='HKLM\\SOFTWARE\\Vendor', values={'Version': VALUE})
+
+    async def main() -> None:
+        async with RemoteRegistry(rpc_connection=fake_registry) as remote_registry:
+            vendor_key = remote_registry.key(key_path='HKLM\\SOFTWARE\\Vendor')
+            with raises(KeyError):
+                await vendor_key.value(value_name='Missing')
+
+            await vendor_key.values()
+            with raises(KeyError):
+                await vendor_key.value(value_name='Missing')
+            assert await vendor_key.value(value_name='VERSION') == VALUE
+
+    run(main())
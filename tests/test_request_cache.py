@@ -0,0 +1,97 @@
+from asyncio import run, sleep, gather, create_task
+
+from ms_rrp.operations import Operation
+from ms_rrp.request_cache import CachingConnection
+from tests.fakes import Message, FakeConnection
+
+KEY_HANDLE = b'\x01' * 20
+SUCCESS = bytes(4)
+
+
+def make_fake_connection() -> FakeConnection:
+    return FakeConnection(
+        respond=lambda request_message: Message(opnum=request_message.opnum, stub_data=b'response' + SUCCESS),
+        delay=0.001
+    )
+
+
+def _query_info_key() -> Message:
+    return Message(opnum=Operation.BASE_REG_QUERY_INFO_KEY.value, stub_data=KEY_HANDLE)
+
+
+def test_coalescing_and_caching():
+    async def main() -> None:
+        fake_connection = make_fake_connection()
+        caching_connection = CachingConnection(rpc_connection=fake_connection)
+
+        await gather(*(caching_connection.request(_query_info_key()) for _ in range(10)))
+        assert fake_connection.num_requests == 1
+        assert caching_connection.statistics.num_coalesced == 9
+
+        await caching_connection.request(_query_info_key())
+        assert fake_connection.num_requests == 1
+        assert caching_connection.statistics.num_hits == 1
+
+    run(main())
+
+
+def test_invalidation_on_write():
+    async def main() -> None:
+        fake_connection = make_fake_connection()
+        caching_connection = CachingConnection(rpc_connection=fake_connection)
+
+        await caching_connection.request(_query_info_key())
+        await caching_connection.request(
+            Message(opnum=Operation.BASE_REG_SET_VALUE.value, stub_data=KEY_HANDLE + b'value')
+        )
+        await caching_connection.request(_query_info_key())
+        assert fake_connection.num_requests == 3
+
+    run(main())
+
+
+def test_eviction_and_ttl():
+    async def main() -> None:
+        fake_connection = make_fake_connection()
+        caching_connection = CachingConnection(rpc_connection=fake_connection, ttl=0.05, max_entries=1)
+
+        await caching_connection.request(_query_info_key())
+        await caching_connection.request(Message(opnum=Operation.BASE_REG_QUERY_VALUE.value, stub_data=KEY_HANDLE))
+        assert caching_connection.statistics.num_evictions == 1
+
+        await caching_connection.request(Message(opnum=Operation.BASE_REG_QUERY_VALUE.value, stub_data=KEY_HANDLE))
+        assert fake_connection.num_requests == 2
+
+        await sleep(0.06)
+        await caching_connection.request(Message(opnum=Operation.BASE_REG_QUERY_VALUE.value, stub_data=KEY_HANDLE))
+        assert fake_connection.num_requests == 3
+
+    run(main())
+
+
+def test_cancellation_during_coalescing():
+    async def main() -> None:
+        fake_connection = make_fake_connection()
+        caching_connection = CachingConnection(rpc_connection=fake_connection)
+
+        # A cancelled waiting request does not cancel the in-flight request for the others.
+        leader_task = create_task(caching_connection.request(_query_info_key()))
+        follower_tasks = [create_task(caching_connection.request(_query_info_key())) for _ in range(2)]
+        await sleep(0)
+        follower_tasks[0].cancel()
+        await gather(leader_task, follower_tasks[1])
+        assert follower_tasks[0].cancelled()
+        assert fake_connection.num_requests == 1
+
+        # If the request that is in flight is cancelled, the waiting requests retry, sharing one new request.
+        caching_connection.invalidate()
+        leader_task = create_task(caching_connection.request(_query_info_key()))
+        follower_tasks = [create_task(caching_connection.request(_query_info_key())) for _ in range(3)]
+        await sleep(0)
+        leader_task.cancel()
+        response_messages = await gather(*follower_tasks)
+        assert leader_task.cancelled()
+        assert all(response_message.stub_data == b'response' + SUCCESS for response_message in response_messages)
+        assert fake_connection.num_requests == 3
+
+    run(main())
@@ -0,0 +1,79 @@
+from asyncio import run
+from os import urandom
+from pathlib import Path, PureWindowsPath
+
+from msdsalgs.win32_error import Win32ErrorCode
+from pytest import raises
+
+from ms_rrp.operations import Operation
+from ms_rrp.utils import upload_file, restore_reg, open_key_path
+from tests.fakes import FakeSMBSession, FakeRegistryError
+
+UPLOAD_PATH = PureWindowsPath('C:\\Windows\\Temp\\hive')
+REMOTE_PATH = PureWindowsPath('Windows\\Temp\\hive')
+
+
+def test_upload_file(tmp_path: Path):
+    data = urandom(10_000)
+    (tmp_path / 'hive').write_bytes(data)
+    smb_session = FakeSMBSession()
+
+    num_uploaded_bytes = run(
+        upload_file(
+            smb_session=smb_session,
+            tree_id=1,
+            local_path=tmp_path / 'hive',
+            remote_path=REMOTE_PATH,
+            chunk_size=1024,
+            max_concurrency=4
+        )
+    )
+
+    assert num_uploaded_bytes == len(data)
+    assert smb_session.files[REMOTE_PATH] == data
+    assert smb_session.max_num_writes_in_flight == 4
+
+
+def test_restore_reg(fake_registry, tmp_path: Path):
+    fake_registry.add_key(key_path='HKLM\\SOFTWARE\\Vendor')
+    (tmp_path / 'hive').write_bytes(b'regf')
+    smb_session = FakeSMBSession()
+
+    async def main() -> None:
+        async with open_key_path(rpc_connection=fake_registry, key_path='HKLM') as root_key_handle:
+            restore_reg_options = dict(
+                rpc_connection=fake_registry,
+                smb_session=smb_session,
+                root_key_handle=root_key_handle,
+                tree_id=1,
+                local_path=tmp_path / 'hive',
+                upload_path=UPLOAD_PATH
+            )
+
+            # A restored hive file is deleted.
+            await restore_reg(**restore_reg_options, sub_key_name='SOFTWARE\\Vendor')
+            assert fake_registry.operation_count(Operation.BASE_REG_RESTORE_KEY) == 1
+            assert REMOTE_PATH not in smb_session.files
+
+            # A hive file that failed to be restored is deleted.
+            with raises(FakeRegistryError):
+                await restore_reg(**restore_reg_options, sub_key_name='SOFTWARE\\Missing')
+            assert REMOTE_PATH not in smb_session.files
+
+            # A loaded hive file remains in use, and is kept.
+            await restore_reg(**restore_reg_options, sub_key_name='Loaded', load=True)
+            assert smb_session.files[REMOTE_PATH] == b'regf'
+            del smb_session.files[REMOTE_PATH]
+
+            # Nothing is deleted if the upload fails, so that the error of the upload is raised.
+            with raises(FileNotFoundError) as exception_info:
+                await restore_reg(**{**restore_reg_options, 'local_path': tmp_path / 'missing'}, sub_key_name='Loaded')
+            assert exception_info.value.filename == str(tmp_path / 'missing')
+
+            # A hive file that failed to be loaded is deleted.
+            fake_registry.failures[Operation.BASE_REG_LOAD_KEY] = Win32ErrorCode.ERROR_ACCESS_DENIED
+            with raises(FakeRegistryError):
+                await restore_reg(**restore_reg_options, sub_key_name='Loaded', load=True)
+            assert REMOTE_PATH not in smb_session.files
+
+    run(main())
@@ -0,0 +1,62 @@
+from asyncio import run, sleep, gather, create_task
+
+from pytest import raises
+
+from ms_rrp.scheduler import RequestScheduler, PriorityClass
+from tests.fakes import Message, FakeConnection
+
+
+def test_priority_order():
+    async def main() -> list[bytes]:
+        slow_connection = FakeConnection(delay=0.01)
+        scheduler = RequestScheduler(
+            rpc_connection=slow_connection,
+            priority_classes=[
+                PriorityClass(name='interactive', priority=1),
+                PriorityClass(name='crawl', priority=0, share=0.5)
+            ],
+            max_concurrency=2
+        )
+        crawl_connection = scheduler.connection(priority_class_name='crawl')
+        interactive_connection = scheduler.connection(priority_class_name='interactive')
+
+        crawl_tasks = [
+            create_task(crawl_connection.request(Message(opnum=0, stub_data=b'c%d' % i))) for i in range(4)
+        ]
+        await sleep(0)
+        await interactive_connection.request(Message(opnum=0, stub_data=b'i'))
+
+        assert scheduler.metrics()['crawl'].queue_depth == 2
+        await gather(*crawl_tasks)
+
+        metrics = scheduler.metrics()
+        assert (metrics['crawl'].num_dispatched, metrics['interactive'].num_dispatched) == (4, 1)
+        assert metrics['crawl'].queue_depth == metrics['crawl'].in_flight == 0
+
+        return [request_message.stub_data for request_message in slow_connection.request_messages]
+
+    served = run(main())
+    # The crawl may only occupy one of the two slots, so the interactive request is served alongside the first crawl
+    # request rather than after all of them.
+    assert served.index(b'i') <= 1
+
+
+def test_deadline():
+    async def main() -> None:
+        scheduler = RequestScheduler(
+            rpc_connection=FakeConnection(delay=0.01),
+            priority_classes=[PriorityClass(name='crawl', priority=0, deadline=0.005)],
+            max_concurrency=1
+        )
+        connection = scheduler.connection(priority_class_name='crawl')
+
+        first_task = create_task(connection.request(Message(opnum=0, stub_data=b'1')))
+        await sleep(0)
+        with raises(TimeoutError):
+            await connection.request(Message(opnum=0, stub_data=b'2'))
+        await first_task
+
+        metrics = scheduler.metrics()['crawl']
+        assert (metrics.num_dispatched, metrics.num_expired, metrics.queue_depth) == (1, 1, 0)
+
+    run(main())
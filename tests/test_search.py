@@ -0,0 +1,125 @@
+from asyncio import run
+from re import compile as re_compile
+
+from ms_rrp.capabilities import HostCapabilities
+from ms_rrp.operations import Operation
+from ms_rrp.search import SearchHit, find
+from ms_rrp.structures.reg_value_type import RegValueType
+from ms_rrp.utils import open_key_path
+
+RUN_VALUE = (RegValueType.REG_SZ, 'C:\\Users\\Public\\evil.exe\x00'.encode(encoding='utf-16-le'))
+OTHER_VALUE = (RegValueType.REG_SZ, 'C:\\Program Files\\Vendor\\app.exe\x00'.encode(encoding='utf-16-le'))
+
+
+def _add_keys(fake_registry) -> None:
+    fake_registry.add_key(
+        key_path='HKLM\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Run',
+        values={'Updater': RUN_VALUE, 'Vendor': OTHER_VALUE}
+    )
+    fake_registry.add_key(key_path='HKLM\\SOFTWARE\\Vendor\\Run', values={'Updater': RUN_VALUE})
+    fake_registry.add_key(key_path='HKLM\\SOFTWARE\\Locked\\Run', values={'Updater': RUN_VALUE}).access_denied = True
+
+
+def _find(fake_registry, **find_options) -> tuple[list[SearchHit], dict[str, Exception]]:
+    async def main() -> tuple[list[SearchHit], dict[str, Exception]]:
+        errors: dict[str, Exception] = {}
+        async with open_key_path(rpc_connection=fake_registry, key_path='HKLM\\SOFTWARE') as key_handle:
+            search_hits = [
+                search_hit
+                async for search_hit in find(
+                    rpc_connection=fake_registry,
+                    key_handle=key_handle,
+                    key_path='HKLM\\SOFTWARE',
+                    errors=errors,
+                    **find_options
+                )
+            ]
+        return search_hits, errors
+
+    return run(main())
+
+
+def test_find_values(fake_registry):
+    _add_keys(fake_registry=fake_registry)
+
+    search_hits, errors = _find(
+        fake_registry=fake_registry,
+        value_data_pattern='*\\Users\\*',
+        exclude_key_path_pattern='*\\Vendor'
+    )
+
+    assert search_hits == [
+        SearchHit(
+            key_path='HKLM\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Run',
+            value_name='Updater',
+            value_type=RUN_VALUE[0],
+            value=RUN_VALUE[1]
+        )
+    ]
+    assert list(errors) == ['HKLM\\SOFTWARE\\Locked\\Run']
+    assert fake_registry.operation_count(Operation.BASE_REG_QUERY_MULTIPLE_VALUES) == 1
+    assert fake_registry.num_open_handles == 0
+
+
+def test_find_values_with_query_multiple_values2(fake_registry):
+    _add_keys(fake_registry=fake_registry)
+
+    search_hits, _ = _find(
+        fake_registry=fake_registry,
+        value_name_pattern='updater',
+        host_capabilities=HostCapabilities(
+            version=6,
+            build_number='19045',
+            supported_operations={Operation.BASE_REG_QUERY_MULTIPLE_VALUES2}
+        )
+    )
+
+    assert [search_hit.key_path for search_hit in search_hits] == [
+        'HKLM\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Run',
+        'HKLM\\SOFTWARE\\Vendor\\Run'
+    ]
+    assert fake_registry.operation_count(Operation.BASE_REG_QUERY_MULTIPLE_VALUES2) == 2
+    assert fake_registry.operation_count(Operation.BASE_REG_QUERY_MULTIPLE_VALUES) == 0
+
+
+def test_find_keys(fake_registry):
+    _add_keys(fake_registry=fake_registry)
+
+    search_hits, errors = _find(fake_registry=fake_registry, key_name_pattern='run', maximum_depth=2)
+
+    assert search_hits == [
+        SearchHit(key_path='HKLM\\SOFTWARE\\Vendor\\Run'),
+        SearchHit(key_path='HKLM\\SOFTWARE\\Locked\\Run')
+    ]
+    # The `Run` keys at the maximum depth are matched without being opened.
+    assert errors == {}
+
+
+def test_find_values_retries_query_multiple_values(fake_registry, monkeypatch):
+    key = fake_registry.add_key(key_path='HKLM\\SOFTWARE\\Vendor\\Run', values={'Updater': RUN_VALUE})
+    longer_run_value = (RUN_VALUE[0], RUN_VALUE[1][:-2] + 'x\x00'.encode(encoding='utf-16-le') * 100)
+    base_reg_query_multiple_values = fake_registry._base_reg_query_multiple_values
+
+    def grow_value_and_query_multiple_values(request):
+        # The value grows between it being enumerated and queried.
+        key.values['Updater'] = longer_run_value
+        return base_reg_query_multiple_values(request)
+
+    monkeypatch.setattr(fake_registry, '_base_reg_query_multiple_values', grow_value_and_query_multiple_values)
+
+    search_hits, _ = _find(fake_registry=fake_registry, value_name_pattern='updater')
+
+    assert [search_hit.value for search_hit in search_hits] == [longer_run_value[1]]
+    assert fake_registry.operation_count(Operation.BASE_REG_QUERY_MULTIPLE_VALUES) == 2
+
+
+def test_patterns_are_searched(fake_registry):
+    _add_keys(fake_registry=fake_registry)
+
+    # Regular expressions match anywhere in names.
+    search_hits, _ = _find(fake_registry=fake_registry, key_name_pattern=re_compile('endo'), maximum_depth=1)
+    assert [search_hit.key_path for search_hit in search_hits] == ['HKLM\\SOFTWARE\\Vendor']
+
+    # Glob patterns match whole names.
+    search_hits, _ = _find(fake_registry=fake_registry, key_name_pattern='end*', maximum_depth=1)
+    assert search_hits == []
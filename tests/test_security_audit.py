@@ -0,0 +1,89 @@
+from asyncio import run
+
+from msdsalgs.win32_error import Win32ErrorCode
+
+from ms_rrp.operations import Operation
+from ms_rrp.security_audit import KeySecurityAudit, audit_key_security
+from ms_rrp.utils import open_key_path
+
+OTHER_SECURITY_DESCRIPTOR = bytes.fromhex('010004801400000000000000000000000000000001010000000000050c000000')
+
+
+def _audit(fake_registry, **audit_options) -> KeySecurityAudit:
+    async def main() -> KeySecurityAudit:
+        async with open_key_path(rpc_connection=fake_registry, key_path='HKLM\\SOFTWARE') as key_handle:
+            return await audit_key_security(
+                rpc_connection=fake_registry,
+                key_handle=key_handle,
+                key_path='HKLM\\SOFTWARE',
+                **audit_options
+            )
+
+    return run(main())
+
+
+def test_key_security_audit():
+    key_security_audit = KeySecurityAudit()
+
+    assert key_security_audit.add(key_path='A', security_descriptor=b'\x01') == 0
+    assert key_security_audit.add(key_path='B', security_descriptor=b'\x02') == 1
+    assert key_security_audit.add(key_path='C', security_descriptor=b'\x01') == 0
+
+    assert key_security_audit.security_descriptors == [b'\x01', b'\x02']
+    assert key_security_audit.key_paths_by_security_descriptor() == {b'\x01': ['A', 'C'], b'\x02': ['B']}
+
+
+def test_audit_key_security(fake_registry):
+    default_security_descriptor = fake_registry.add_key(key_path='HKLM\\SOFTWARE').security_descriptor
+    fake_registry.add_key(key_path='HKLM\\SOFTWARE\\Vendor\\App')
+    fake_registry.add_key(key_path='HKLM\\SOFTWARE\\Other').security_descriptor = OTHER_SECURITY_DESCRIPTOR
+    fake_registry.add_key(key_path='HKLM\\SOFTWARE\\Locked\\App').access_denied = True
+
+    key_security_audit = _audit(fake_registry=fake_registry, max_concurrency=2)
+
+    assert key_security_audit.security_descriptors == [default_security_descriptor, OTHER_SECURITY_DESCRIPTOR]
+    assert {
+        security_descriptor: sorted(key_paths)
+        for security_descriptor, key_paths in key_security_audit.key_paths_by_security_descriptor().items()
+    } == {
+        default_security_descriptor: [
+            'HKLM\\SOFTWARE',
+            'HKLM\\SOFTWARE\\Locked',
+            'HKLM\\SOFTWARE\\Vendor',
+            'HKLM\\SOFTWARE\\Vendor\\App'
+        ],
+        OTHER_SECURITY_DESCRIPTOR: ['HKLM\\SOFTWARE\\Other']
+    }
+    assert list(key_security_audit.errors) == ['HKLM\\SOFTWARE\\Locked\\App']
+    # Besides the two handles of the start key, at most one key per worker is open at once.
+    assert fake_registry.max_num_open_handles <= 4
+    assert fake_registry.num_open_handles == 0
+
+
+def test_audit_key_security_start_key_failure(fake_registry):
+    fake_registry.add_key(key_path='HKLM\\SOFTWARE\\Vendor')
+    fake_registry.failures[Operation.BASE_REG_QUERY_INFO_KEY] = Win32ErrorCode.ERROR_ACCESS_DENIED
+
+    key_security_audit = _audit(fake_registry=fake_registry)
+
+    assert list(key_security_audit.errors) == ['HKLM\\SOFTWARE']
+    assert key_security_audit.key_paths == []
+
+
+def test_audit_key_security_grown_security_descriptor(fake_registry):
+    key = fake_registry.add_key(key_path='HKLM\\SOFTWARE')
+    query_info_key_handler = fake_registry._base_reg_query_info_key
+
+    def base_reg_query_info_key(request):
+        # The security descriptor grows after its size is reported.
+        response = query_info_key_handler(request)
+        key.security_descriptor = OTHER_SECURITY_DESCRIPTOR
+        return response
+
+    fake_registry._base_reg_query_info_key = base_reg_query_info_key
+
+    key_security_audit = _audit(fake_registry=fake_registry)
+
+    assert key_security_audit.security_descriptors == [OTHER_SECURITY_DESCRIPTOR]
+    assert key_security_audit.errors == {}
+    assert fake_registry.operation_count(Operation.BASE_REG_GET_KEY_SECURITY) == 2
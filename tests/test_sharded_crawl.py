@@ -0,0 +1,68 @@
+from typing import AsyncIterator
+from asyncio import sleep
+
+from ms_rrp.sharded_crawl import ShardedCrawl, pack_key_record, pack_host_record, unpack_records
+from ms_rrp.structures.reg_value_type import RegValueType
+from ms_rrp.utils import WalkedKey
+
+
+async def crawl_host(host: str) -> AsyncIterator[WalkedKey]:
+    if host == 'unreachable':
+        raise ConnectionError('Connection refused.')
+
+    for i in range(3):
+        yield WalkedKey(
+            key_path=f'SOFTWARE\\{host}\\{i}',
+            last_write_time=i,
+            values={'Name': (RegValueType.REG_SZ, host.encode(encoding='utf-16-le'))}
+        )
+
+
+async def crawl_slow_host(host: str) -> AsyncIterator[WalkedKey]:
+    for i in range(2):
+        yield WalkedKey(key_path=f'SOFTWARE\\{host}\\{i}', last_write_time=i, values={})
+        await sleep(0.5)
+
+
+def test_record_round_trip():
+    walked_key = WalkedKey(
+        key_path='SOFTWARE\\Vendor\\Ünïcode',
+        last_write_time=132_000_000_000_000_000,
+        values={'': (RegValueType.REG_DWORD, b'\x01\x00\x00\x00'), 'Empty': (RegValueType.REG_NONE, b'')}
+    )
+
+    frame = pack_key_record(host_index=7, walked_key=walked_key) + pack_host_record(host_index=7) + pack_host_record(
+        host_index=8,
+        error_message='TimeoutError'
+    )
+    assert list(unpack_records(frame=frame)) == [(7, walked_key, None), (7, None, None), (8, None, 'TimeoutError')]
+
+
+def test_sharded_crawl():
+    hosts = ['host1', 'host2', 'unreachable', 'host3']
+    sharded_crawl = ShardedCrawl(host_crawler=crawl_host, hosts=hosts, num_workers=2)
+
+    crawled = sorted((host, walked_key.key_path) for host, walked_key in sharded_crawl)
+    assert crawled == [
+        (host, f'SOFTWARE\\{host}\\{i}') for host in ['host1', 'host2', 'host3'] for i in range(3)
+    ]
+
+    progress = sharded_crawl.progress
+    assert (progress.num_hosts_done, progress.num_keys, progress.num_values) == (4, 9, 9)
+    assert sum(progress.num_keys_per_worker) == 9
+    assert list(progress.failed_hosts) == ['unreachable']
+
+
+def test_time_based_flush():
+    sharded_crawl = ShardedCrawl(
+        host_crawler=crawl_slow_host,
+        hosts=['host1'],
+        num_workers=1,
+        frame_size=1024 * 1024,
+        flush_interval=0.05
+    )
+
+    # The keys that do not fill a frame are sent as the slow host is being crawled, rather than when its crawl ends.
+    num_frames_received: list[int] = [sharded_crawl.progress.num_frames_received for _ in sharded_crawl]
+    assert num_frames_received == [1, 2]
+    assert sharded_crawl.progress.num_hosts_done == 1
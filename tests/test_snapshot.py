@@ -0,0 +1,128 @@
+from asyncio import run
+
+from pytest import raises
+
+from ms_rrp.operations.open_local_machine import open_local_machine, OpenLocalMachineRequest
+from ms_rrp.snapshot import KeySnapshot, SnapshotChange, ChangeKind, take_snapshot, diff_snapshots
+from ms_rrp.structures.reg_value_type import RegValueType
+from ms_rrp.structures.regsam import Regsam
+
+OLD_VALUE = (RegValueType.REG_DWORD, b'\x01\x00\x00\x00')
+NEW_VALUE = (RegValueType.REG_DWORD, b'\x02\x00\x00\x00')
+
+
+def test_diff_values():
+    old_snapshot = KeySnapshot(
+        last_write_time=1,
+        values={'Modified': OLD_VALUE, 'Removed': OLD_VALUE, 'Kept': OLD_VALUE}
+    )
+    new_snapshot = KeySnapshot(
+        last_write_time=2,
+        values={'Modified': NEW_VALUE, 'Added': NEW_VALUE, 'Kept': OLD_VALUE}
+    )
+
+    assert set(diff_snapshots(old_snapshot=old_snapshot, new_snapshot=new_snapshot, key_path='HKLM\\Key')) == {
+        SnapshotChange(
+            kind=ChangeKind.VALUE_MODIFIED,
+            key_path='HKLM\\Key',
+            value_name='Modified',
+            old_value=OLD_VALUE,
+            new_value=NEW_VALUE
+        ),
+        SnapshotChange(kind=ChangeKind.VALUE_REMOVED, key_path='HKLM\\Key', value_name='Removed', old_value=OLD_VALUE),
+        SnapshotChange(kind=ChangeKind.VALUE_ADDED, key_path='HKLM\\Key', value_name='Added', new_value=NEW_VALUE)
+    }
+
+
+def test_diff_value_names_case_insensitively():
+    old_snapshot = KeySnapshot(last_write_time=1, values={'Path': OLD_VALUE, 'Timeout': OLD_VALUE})
+    new_snapshot = KeySnapshot(last_write_time=2, values={'PATH': OLD_VALUE, 'TIMEOUT': NEW_VALUE})
+
+    assert list(diff_snapshots(old_snapshot=old_snapshot, new_snapshot=new_snapshot)) == [
+        SnapshotChange(
+            kind=ChangeKind.VALUE_MODIFIED,
+            key_path='',
+            value_name='TIMEOUT',
+            old_value=OLD_VALUE,
+            new_value=NEW_VALUE
+        )
+    ]
+
+
+def test_diff_keys():
+    old_snapshot = KeySnapshot(
+        last_write_time=1,
+        sub_keys={
+            'Removed': KeySnapshot(last_write_time=1, sub_keys={'Child': KeySnapshot(last_write_time=1)}),
+            'Changed': KeySnapshot(last_write_time=1, values={'Value': OLD_VALUE})
+        }
+    )
+    new_snapshot = KeySnapshot(
+        last_write_time=2,
+        sub_keys={
+            'Added': KeySnapshot(last_write_time=2),
+            'Changed': KeySnapshot(last_write_time=2, values={'Value': NEW_VALUE})
+        }
+    )
+
+    assert list(diff_snapshots(old_snapshot=old_snapshot, new_snapshot=new_snapshot)) == [
+        SnapshotChange(kind=ChangeKind.KEY_REMOVED, key_path='Removed'),
+        SnapshotChange(kind=ChangeKind.KEY_REMOVED, key_path='Removed\\Child'),
+        SnapshotChange(
+            kind=ChangeKind.VALUE_MODIFIED,
+            key_path='Changed',
+            value_name='Value',
+            old_value=OLD_VALUE,
+            new_value=NEW_VALUE
+        ),
+        SnapshotChange(kind=ChangeKind.KEY_ADDED, key_path='Added')
+    ]
+
+
+def test_diff_ignores_inaccessible_keys():
+    old_snapshot = KeySnapshot(last_write_time=1, sub_keys={'SAM': KeySnapshot(last_write_time=1)})
+    new_snapshot = KeySnapshot(last_write_time=1, errors={'SAM': 'access denied'})
+
+    assert list(diff_snapshots(old_snapshot=old_snapshot, new_snapshot=new_snapshot)) == []
+    assert list(diff_snapshots(old_snapshot=new_snapshot, new_snapshot=old_snapshot)) == []
+
+
+def test_take_snapshot_records_inaccessible_keys(fake_registry):
+    fake_registry.add_key(key_path='HKLM\\SOFTWARE\\Vendor', values={'Value': OLD_VALUE})
+    fake_registry.add_key(key_path='HKLM\\SAM\\SAM').access_denied = True
+    fake_registry.add_key(key_path='HKLM\\SYSTEM')
+
+    async def main() -> KeySnapshot:
+        open_local_machine_options = dict(
+            rpc_connection=fake_registry,
+            request=OpenLocalMachineRequest(sam_desired=Regsam(maximum_allowed=True))
+        )
+        async with open_local_machine(**open_local_machine_options) as open_local_machine_response:
+            return await take_snapshot(rpc_connection=fake_registry, key_handle=open_local_machine_response.key_handle)
+
+    snapshot = run(main())
+
+    assert snapshot.sub_keys['SOFTWARE'].sub_keys['Vendor'].values == {'Value': OLD_VALUE}
+    assert 'SYSTEM' in snapshot.sub_keys
+    assert list(snapshot.sub_keys['SAM'].errors) == ['SAM']
+    assert KeySnapshot.from_dict(data=snapshot.to_dict()) == snapshot
+
+
+def test_take_snapshot_propagates_other_errors(fake_registry, monkeypatch):
+    fake_registry.add_key(key_path='HKLM\\SOFTWARE')
+
+    def base_reg_open_key(request):
+        raise RuntimeError('not a registry error')
+
+    monkeypatch.setattr(fake_registry, '_base_reg_open_key', base_reg_open_key)
+
+    async def main() -> KeySnapshot:
+        open_local_machine_options = dict(
+            rpc_connection=fake_registry,
+            request=OpenLocalMachineRequest(sam_desired=Regsam(maximum_allowed=True))
+        )
+        async with open_local_machine(**open_local_machine_options) as open_local_machine_response:
+            return await take_snapshot(rpc_connection=fake_registry, key_handle=open_local_machine_response.key_handle)
+
+    with raises(RuntimeError):
+        run(main())
@@ -0,0 +1,122 @@
+from pathlib import Path
+
+from pytest import raises
+
+from ms_rrp.crawl_store import CrawlStore
+from ms_rrp.snapshot import ChangeKind, SnapshotChange
+from ms_rrp.snapshot_file import SnapshotFile, write_snapshot_file, diff_snapshot_files
+from ms_rrp.structures.reg_value_type import RegValueType
+from ms_rrp.utils import WalkedKey
+
+WALKED_KEYS = [
+    WalkedKey(key_path='HKLM\\SOFTWARE', last_write_time=1, values={}),
+    WalkedKey(
+        key_path='HKLM\\SOFTWARE\\Vendor',
+        last_write_time=2,
+        values={'Name': (RegValueType.REG_SZ, 'vendor\x00'.encode(encoding='utf-16-le'))}
+    ),
+    WalkedKey(
+        key_path='HKLM\\SOFTWARE\\Vendor\\Product',
+        last_write_time=3,
+        values={'Version': (RegValueType.REG_DWORD, b'\x02\x00\x00\x00')}
+    ),
+    WalkedKey(key_path='HKLM\\SOFTWARE\\Other', last_write_time=4, values={}),
+]
+
+
+def write_walked_keys(file_path: Path, walked_keys: list[WalkedKey]) -> None:
+    crawl_store = CrawlStore()
+    for walked_key in walked_keys:
+        crawl_store.add_walked_key(walked_key=walked_key)
+    write_snapshot_file(file_path=file_path, crawl_store=crawl_store)
+
+
+def test_round_trip(tmp_path: Path):
+    write_walked_keys(file_path=tmp_path / 'snapshot', walked_keys=WALKED_KEYS)
+
+    with SnapshotFile(file_path=tmp_path / 'snapshot') as snapshot_file:
+        assert len(snapshot_file) == 4
+        assert list(snapshot_file) == sorted(WALKED_KEYS, key=lambda walked_key: walked_key.key_path.lower())
+
+
+def test_find(tmp_path: Path):
+    write_walked_keys(file_path=tmp_path / 'snapshot', walked_keys=WALKED_KEYS)
+
+    with SnapshotFile(file_path=tmp_path / 'snapshot') as snapshot_file:
+        assert snapshot_file.walked_key(position=snapshot_file.find(key_path='hklm\\software\\vendor')) == WALKED_KEYS[1]
+        assert snapshot_file.find(key_path='HKLM\\SOFTWARE\\Missing') is None
+
+
+def test_value_data(tmp_path: Path):
+    write_walked_keys(file_path=tmp_path / 'snapshot', walked_keys=WALKED_KEYS)
+
+    snapshot_file = SnapshotFile(file_path=tmp_path / 'snapshot')
+    # The values are ordered by the paths of their keys, of which `HKLM\\SOFTWARE\\Vendor` is the first with values.
+    with snapshot_file.value_data(value_index=0) as value_data:
+        assert value_data == WALKED_KEYS[1].values['Name'][1]
+
+    # The mapping cannot be closed while a view of it is held.
+    value_data = snapshot_file.value_data(value_index=0)
+    with raises(BufferError):
+        snapshot_file.close()
+
+    value_data.release()
+    snapshot_file.close()
+
+
+def test_scan_prefix(tmp_path: Path):
+    write_walked_keys(file_path=tmp_path / 'snapshot', walked_keys=WALKED_KEYS)
+
+    with SnapshotFile(file_path=tmp_path / 'snapshot') as snapshot_file:
+        assert list(snapshot_file.scan_prefix(key_path_prefix='HKLM\\SOFTWARE\\Vendor')) == WALKED_KEYS[1:3]
+        assert list(snapshot_file.scan_prefix(key_path_prefix='HKLM\\SOFTWARE\\Vendor\\')) == WALKED_KEYS[2:3]
+
+
+def test_diff_snapshot_files(tmp_path: Path):
+    write_walked_keys(file_path=tmp_path / 'old', walked_keys=WALKED_KEYS)
+    write_walked_keys(
+        file_path=tmp_path / 'new',
+        walked_keys=[
+            *WALKED_KEYS[:2],
+            WalkedKey(
+                key_path='HKLM\\SOFTWARE\\Vendor\\Product',
+                last_write_time=5,
+                values={'Version': (RegValueType.REG_DWORD, b'\x03\x00\x00\x00')}
+            ),
+            WalkedKey(key_path='HKLM\\SOFTWARE\\New', last_write_time=6, values={})
+        ]
+    )
+
+    with SnapshotFile(file_path=tmp_path / 'old') as old_snapshot_file, \
+            SnapshotFile(file_path=tmp_path / 'new') as new_snapshot_file:
+        assert list(diff_snapshot_files(old_snapshot_file=old_snapshot_file, new_snapshot_file=new_snapshot_file)) == [
+            SnapshotChange(kind=ChangeKind.KEY_ADDED, key_path='HKLM\\SOFTWARE\\New'),
+            SnapshotChange(kind=ChangeKind.KEY_REMOVED, key_path='HKLM\\SOFTWARE\\Other'),
+            SnapshotChange(
+                kind=ChangeKind.VALUE_MODIFIED,
+                key_path='HKLM\\SOFTWARE\\Vendor\\Product',
+                value_name='Version',
+                old_value=(RegValueType.REG_DWORD, b'\x02\x00\x00\x00'),
+                new_value=(RegValueType.REG_DWORD, b'\x03\x00\x00\x00')
+            )
+        ]
+
+
+def test_diff_snapshot_files_value_names_case_insensitively(tmp_path: Path):
+    write_walked_keys(file_path=tmp_path / 'old', walked_keys=WALKED_KEYS)
+    write_walked_keys(
+        file_path=tmp_path / 'new',
+        walked_keys=[
+            WALKED_KEYS[0],
+            WalkedKey(
+                key_path='HKLM\\SOFTWARE\\Vendor',
+                last_write_time=5,
+                values={'NAME': WALKED_KEYS[1].values['Name']}
+            ),
+            *WALKED_KEYS[2:]
+        ]
+    )
+
+    with SnapshotFile(file_path=tmp_path / 'old') as old_snapshot_file, \
+            SnapshotFile(file_path=tmp_path / 'new') as new_snapshot_file:
+        assert list(diff_snapshot_files(old_snapshot_file=old_snapshot_file, new_snapshot_file=new_snapshot_file)) == []
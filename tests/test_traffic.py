@@ -0,0 +1,62 @@
+from asyncio import run
+from io import BytesIO
+
+from ms_rrp.traffic import TrafficRecord, TrafficRecorder, RecordingConnection, ReplayConnection, read_traffic
+from tests.fakes import Message, FakeConnection
+
+
+TRAFFIC_RECORDS = [
+    TrafficRecord(opnum=15, request_stub_data=b'\x01\x02', response_stub_data=b'\x02\x01', duration_ns=1000),
+    TrafficRecord(opnum=5, request_stub_data=b'\x03', response_stub_data=b'', duration_ns=2000)
+]
+
+
+def test_round_trip():
+    stream = BytesIO()
+    traffic_recorder = TrafficRecorder(stream=stream)
+    for traffic_record in TRAFFIC_RECORDS:
+        traffic_recorder.record(traffic_record=traffic_record)
+
+    stream.seek(0)
+    assert list(read_traffic(stream=stream)) == TRAFFIC_RECORDS
+
+
+def test_recording_connection():
+    stream = BytesIO()
+    recording_connection = RecordingConnection(
+        rpc_connection=FakeConnection(
+            respond=lambda request_message: Message(
+                opnum=request_message.opnum,
+                stub_data=request_message.stub_data[::-1]
+            )
+        ),
+        traffic_recorder=TrafficRecorder(stream=stream)
+    )
+
+    response_message = run(recording_connection.request(Message(opnum=15, stub_data=b'\x01\x02')))
+    assert response_message.stub_data == b'\x02\x01'
+
+    stream.seek(0)
+    traffic_record, = read_traffic(stream=stream)
+    assert (traffic_record.opnum, traffic_record.request_stub_data, traffic_record.response_stub_data) == (
+        15, b'\x01\x02', b'\x02\x01'
+    )
+
+
+def test_replay_connection():
+    replay_connection = ReplayConnection(
+        traffic_records=[
+            *TRAFFIC_RECORDS,
+            TrafficRecord(opnum=15, request_stub_data=b'\x04', response_stub_data=b'\x05', duration_ns=0)
+        ],
+        latency_scale=None
+    )
+
+    async def replay() -> list[bytes]:
+        return [
+            (await replay_connection.request(Message(opnum=15, stub_data=b'\x04'))).stub_data,
+            (await replay_connection.request(Message(opnum=15, stub_data=b'\xff'))).stub_data,
+            (await replay_connection.request(Message(opnum=5, stub_data=b'\x03'))).stub_data
+        ]
+
+    assert run(replay()) == [b'\x05', b'\x02\x01', b'']
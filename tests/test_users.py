@@ -0,0 +1,38 @@
+from asyncio import run
+
+from msdsalgs.win32_error import Win32ErrorCode
+
+from ms_rrp.structures.reg_value_type import RegValueType
+from ms_rrp.users import query_users
+
+RUN_KEY_PATH = 'Software\\Microsoft\\Windows\\CurrentVersion\\Run'
+VALUE = (RegValueType.REG_SZ, 'C:\\app.exe\x00'.encode(encoding='utf-16-le'))
+
+
+def add_user_keys(fake_registry) -> None:
+    fake_registry.add_key(key_path=f'HKU\\S-1-5-21-1\\{RUN_KEY_PATH}', values={'App': VALUE})
+    fake_registry.add_key(key_path='HKU\\S-1-5-21-1_Classes\\CLSID')
+    fake_registry.add_key(key_path='HKU\\S-1-5-21-2\\Software')
+
+
+def test_query_users(fake_registry):
+    add_user_keys(fake_registry=fake_registry)
+
+    sid_to_results = run(query_users(rpc_connection=fake_registry, relative_key_paths=[RUN_KEY_PATH]))
+
+    assert list(sid_to_results) == ['S-1-5-21-1', 'S-1-5-21-1_Classes', 'S-1-5-21-2']
+    assert sid_to_results['S-1-5-21-1'][RUN_KEY_PATH].succeeded
+    assert sid_to_results['S-1-5-21-1'][RUN_KEY_PATH].values == {'App': VALUE}
+    assert sid_to_results['S-1-5-21-2'][RUN_KEY_PATH].exception.return_code is Win32ErrorCode.ERROR_FILE_NOT_FOUND
+    assert fake_registry.num_open_handles == 0
+
+
+def test_query_users_skip_classes_hives(fake_registry):
+    add_user_keys(fake_registry=fake_registry)
+
+    sid_to_results = run(
+        query_users(rpc_connection=fake_registry, relative_key_paths=['\\Software\\'], skip_classes_hives=True)
+    )
+
+    assert list(sid_to_results) == ['S-1-5-21-1', 'S-1-5-21-2']
+    assert all(results['Software'].succeeded for results in sid_to_results.values())
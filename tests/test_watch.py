@@ -0,0 +1,100 @@
+from asyncio import run, sleep, create_task, wait_for
+
+from msdsalgs.win32_error import Win32ErrorCode
+from pytest import raises
+
+from ms_rrp.operations import Operation
+from ms_rrp.structures.reg_value_type import RegValueType
+from ms_rrp.watch import KeyWatcher, KeyChange, KeyWatchError
+
+KEY_PATH = 'HKLM\\SOFTWARE\\Vendor'
+OLD_VALUE = (RegValueType.REG_SZ, 'old\x00'.encode(encoding='utf-16-le'))
+NEW_VALUE = (RegValueType.REG_SZ, 'new\x00'.encode(encoding='utf-16-le'))
+
+
+def test_key_change(fake_registry):
+    key = fake_registry.add_key(key_path=KEY_PATH, values={'Value': OLD_VALUE})
+
+    async def main() -> None:
+        key_watcher = KeyWatcher(rpc_connection=fake_registry, minimum_interval=0.01, maximum_interval=0.01)
+        key_changes = key_watcher.watch(key_paths=[KEY_PATH], interval=0.01)
+
+        next_key_change = create_task(key_changes.__anext__())
+        await sleep(0.05)
+        key.values['Value'] = NEW_VALUE
+        fake_registry.touch(key=key)
+
+        key_change = await wait_for(next_key_change, timeout=1)
+        assert key_change.key_path == KEY_PATH
+        assert key_change.previous_values == {'Value': OLD_VALUE}
+        assert key_change.values == {'Value': NEW_VALUE}
+
+        await key_changes.aclose()
+        assert fake_registry.num_open_handles == 0
+
+    run(main())
+
+
+def test_resubscription_after_failure(fake_registry):
+    key = fake_registry.add_key(key_path=KEY_PATH, values={'Value': OLD_VALUE})
+
+    async def main() -> None:
+        key_watcher = KeyWatcher(rpc_connection=fake_registry, minimum_interval=0.01, maximum_interval=0.01)
+
+        key_changes = key_watcher.watch(key_paths=[KEY_PATH], interval=0.01)
+        next_key_change = create_task(key_changes.__anext__())
+        await sleep(0.05)
+        fake_registry.failures[Operation.BASE_REG_QUERY_INFO_KEY] = Win32ErrorCode.ERROR_ACCESS_DENIED
+        key_watch_error = await wait_for(next_key_change, timeout=1)
+        assert isinstance(key_watch_error, KeyWatchError)
+        assert key_watch_error.exception.return_code is Win32ErrorCode.ERROR_ACCESS_DENIED
+        # The watch ends as its only key is no longer watched.
+        with raises(StopAsyncIteration):
+            await key_changes.__anext__()
+        # The failed poll closes the handle of the key after reporting the error.
+        await sleep(0.01)
+        assert fake_registry.num_open_handles == 0
+
+        del fake_registry.failures[Operation.BASE_REG_QUERY_INFO_KEY]
+        key_changes = key_watcher.watch(key_paths=[KEY_PATH], interval=0.01)
+        next_key_change = create_task(key_changes.__anext__())
+        await sleep(0.05)
+        key.values['Value'] = NEW_VALUE
+        fake_registry.touch(key=key)
+
+        assert (await wait_for(next_key_change, timeout=1)).values == {'Value': NEW_VALUE}
+        await key_changes.aclose()
+
+    run(main())
+
+
+def test_failing_key_does_not_end_watch(fake_registry):
+    key = fake_registry.add_key(key_path=KEY_PATH, values={'Value': OLD_VALUE})
+    other_key = fake_registry.add_key(key_path='HKLM\\SOFTWARE\\Other')
+
+    async def main() -> None:
+        key_watcher = KeyWatcher(rpc_connection=fake_registry, minimum_interval=0.01, maximum_interval=0.01)
+        key_changes = key_watcher.watch(
+            key_paths=['HKLM\\SOFTWARE\\Missing', KEY_PATH, 'HKLM\\SOFTWARE\\Other'],
+            interval=0.01
+        )
+
+        key_watch_error = await wait_for(key_changes.__anext__(), timeout=1)
+        assert key_watch_error.key_path == 'HKLM\\SOFTWARE\\Missing'
+        assert key_watch_error.exception.return_code is Win32ErrorCode.ERROR_FILE_NOT_FOUND
+        num_open_handles = fake_registry.num_open_handles
+
+        next_key_change = create_task(key_changes.__anext__())
+        await sleep(0.05)
+        other_key.deleted = True
+        key.values['Value'] = NEW_VALUE
+        fake_registry.touch(key=key)
+
+        items = [await wait_for(next_key_change, timeout=1), await wait_for(key_changes.__anext__(), timeout=1)]
+        assert {type(item) for item in items} == {KeyWatchError, KeyChange}
+
+        await key_changes.aclose()
+        await sleep(0.01)
+        assert fake_registry.num_open_handles == num_open_handles
+
+    run(main())